@@ -4,21 +4,30 @@ Database Backup Script for MeshCore Bot
 Creates timestamped backups of all SQLite database files
 """
 
+import argparse
 import sqlite3
 import shutil
 import os
 import sys
-from datetime import datetime
 from pathlib import Path
 
+from modules.db_backup import BackupError, online_backup
 
-def backup_database(db_path, backup_dir="backups"):
+
+def backup_database(db_path, backup_dir="backups", compress=False, keep=0, pages_per_step=256, step_sleep=0.05):
     """
-    Create a timestamped backup of a SQLite database
+    Create a timestamped online backup of a SQLite database
+    
+    The copy is taken a few pages at a time so a running bot can keep writing
+    (see modules/db_backup.py) and is integrity-checked before it is kept.
     
     Args:
         db_path: Path to the database file
         backup_dir: Directory to store backups (default: backups)
+        compress: Gzip the backup (.db.gz)
+        keep: Number of backups of this database to keep (0 keeps all)
+        pages_per_step: Pages copied per backup step
+        step_sleep: Seconds to sleep between steps
     
     Returns:
         Path to the backup file if successful, None otherwise
@@ -29,47 +38,21 @@ def backup_database(db_path, backup_dir="backups"):
         print(f"Warning: Database file {db_path} does not exist, skipping...")
         return None
     
-    # Create backup directory if it doesn't exist
-    backup_path = Path(backup_dir)
-    backup_path.mkdir(exist_ok=True)
-    
-    # Generate timestamp string
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    # Create backup filename with timestamp
-    db_name = db_path.stem
-    backup_filename = f"{db_name}_{timestamp}.db"
-    backup_file = backup_path / backup_filename
-    
     try:
-        # Use SQLite backup API for proper backup (handles WAL files correctly)
-        source_conn = sqlite3.connect(str(db_path))
-        backup_conn = sqlite3.connect(str(backup_file))
+        result = online_backup(str(db_path), str(backup_dir), pages_per_step=pages_per_step,
+                               step_sleep=step_sleep, compress=compress, keep=keep)
+        file_size_mb = result.size_bytes / (1024 * 1024)
+        print(f"✓ Backed up {db_path.name} -> {Path(result.path).name} ({file_size_mb:.2f} MB, "
+              f"{result.duration_seconds}s, integrity {result.integrity})")
+        for removed in result.removed:
+            print(f"  Removed old backup {Path(removed).name}")
+        return result.path
         
-        # Perform the backup
-        source_conn.backup(backup_conn)
-        
-        # Close connections
-        backup_conn.close()
-        source_conn.close()
-        
-        # Get file size for reporting
-        file_size = backup_file.stat().st_size
-        file_size_mb = file_size / (1024 * 1024)
-        
-        print(f"✓ Backed up {db_path.name} -> {backup_file.name} ({file_size_mb:.2f} MB)")
-        return str(backup_file)
-        
-    except sqlite3.Error as e:
+    except BackupError as e:
         print(f"✗ Error backing up {db_path.name}: {e}")
-        # Clean up failed backup file
-        if backup_file.exists():
-            backup_file.unlink()
         return None
     except Exception as e:
         print(f"✗ Unexpected error backing up {db_path.name}: {e}")
-        if backup_file.exists():
-            backup_file.unlink()
         return None
 
 
@@ -144,6 +127,14 @@ def find_database_files(root_dir=".", check_usage=True):
 
 def main():
     """Main backup function"""
+    parser = argparse.ArgumentParser(description="Back up the MeshCore Bot databases (safe while the bot is running)")
+    parser.add_argument('--backup-dir', default=None, help="Backup directory (default: backups/ in the project root)")
+    parser.add_argument('--compress', action='store_true', help="Gzip the backups")
+    parser.add_argument('--keep', type=int, default=0, help="Backups to keep per database (default: 0, keep all)")
+    parser.add_argument('--pages-per-step', type=int, default=256, help="Pages copied per backup step (default: 256)")
+    parser.add_argument('--step-sleep-ms', type=int, default=50, help="Pause between backup steps (default: 50)")
+    args = parser.parse_args()
+    
     # Get script directory (project root)
     script_dir = Path(__file__).parent.absolute()
     os.chdir(script_dir)
@@ -187,12 +178,13 @@ def main():
         print()
     
     # Create backups (only for active databases)
-    backup_dir = script_dir / "backups"
+    backup_dir = Path(args.backup_dir) if args.backup_dir else script_dir / "backups"
     successful_backups = []
     failed_backups = []
     
     for db_file in active_databases:
-        result = backup_database(db_file, backup_dir)
+        result = backup_database(db_file, backup_dir, compress=args.compress, keep=args.keep,
+                                 pages_per_step=args.pages_per_step, step_sleep=args.step_sleep_ms / 1000.0)
         if result:
             successful_backups.append(result)
         else:
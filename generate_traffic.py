@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic MeshCore traffic for scale testing.
+
+Run standalone: python generate_traffic.py --repeaters 500 --companions 2000 --duration 3600 --output traffic.jsonl
+Simulates a mesh of repeaters and companions and writes the packets the bot
+would hear (signed flood adverts, channel chatter and commands) as a capture
+file that replay_capture.py can replay. With --replay the traffic is fed
+straight through the RX pipeline and the timing report is printed.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+
+from modules.replay_benchmark import capture_line_to_events, format_report, run_replay
+from modules.traffic_generator import LAYOUTS, MeshTopology, TrafficGenerator
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic MeshCore traffic for scale testing")
+    parser.add_argument("--repeaters", type=int, default=50, help="Number of repeaters (default: 50)")
+    parser.add_argument("--companions", type=int, default=200, help="Number of companions (default: 200)")
+    parser.add_argument("--layout", choices=LAYOUTS, default="random", help="Repeater placement (default: random)")
+    parser.add_argument("--area-km", type=float, default=60.0, help="Side of the simulated area in km (default: 60)")
+    parser.add_argument("--link-range-km", type=float, default=12.0,
+                        help="Repeater-to-repeater radio range in km (default: 12)")
+    parser.add_argument("--duration", type=float, default=3600.0, help="Simulated seconds of traffic (default: 3600)")
+    parser.add_argument("--advert-interval", type=float, default=3 * 3600.0,
+                        help="Mean seconds between adverts per node (default: 10800)")
+    parser.add_argument("--chatter-per-min", type=float, default=2.0,
+                        help="Channel messages per minute across the mesh (default: 2)")
+    parser.add_argument("--command-ratio", type=float, default=0.1,
+                        help="Fraction of channel messages that are bot commands (default: 0.1)")
+    parser.add_argument("--channels", default="general", help="Comma-separated channel names (default: general)")
+    parser.add_argument("--seed", type=int, help="Random seed for a reproducible mesh and traffic")
+    parser.add_argument("--output", help="Write the traffic as a capture file (JSONL)")
+    parser.add_argument("--replay", action="store_true", help="Replay the traffic through the bot and report timings")
+    parser.add_argument("--config", default="config.ini", help="Bot config used with --replay (default: config.ini)")
+    parser.add_argument("--speed", type=float, help="With --replay, replay N times faster than generated (default: max)")
+    parser.add_argument("--geocode", action="store_true", help="With --replay, reverse geocode advert locations")
+    parser.add_argument("--log-level", default="WARNING", help="Bot log level during --replay (default: WARNING)")
+    parser.add_argument("--json", action="store_true", help="Print the replay report as JSON")
+    args = parser.parse_args()
+
+    if not args.output and not args.replay:
+        parser.error("nothing to do: pass --output FILE and/or --replay")
+
+    started = time.time()
+    topology = MeshTopology(
+        repeaters=args.repeaters,
+        companions=args.companions,
+        area_km=args.area_km,
+        link_range_km=args.link_range_km,
+        layout=args.layout,
+        seed=args.seed,
+    )
+    generator = TrafficGenerator(
+        topology,
+        advert_interval_s=args.advert_interval,
+        chatter_per_minute=args.chatter_per_min,
+        command_ratio=args.command_ratio,
+        channels=[c.strip() for c in args.channels.split(',') if c.strip()],
+        seed=args.seed,
+    )
+    records = list(generator.records(args.duration, start_time=started))
+    stats = topology.get_stats()
+    print(f"Generated {len(records)} records from {stats['repeaters']} repeaters / {stats['companions']} companions "
+          f"({stats['reachable_repeaters']} repeaters reachable, max {stats['max_hops']} hops) "
+          f"in {time.time() - started:.1f}s", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+
+    if not args.replay:
+        return 0
+
+    events = [event for record in records for event in capture_line_to_events(record)]
+    with tempfile.TemporaryDirectory(prefix="meshcore-traffic-") as work_dir:
+        report = asyncio.run(run_replay(args.config, events, work_dir, speed=args.speed,
+                                       log_level=args.log_level, geocode=args.geocode))
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
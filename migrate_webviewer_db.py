@@ -34,25 +34,38 @@ def main() -> int:
         conn = sqlite3.connect(target_path, timeout=30.0)
         conn.execute("ATTACH DATABASE ? AS src", (source_path,))
 
-        # Ensure packet_stream exists in target (same schema as web viewer)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS packet_stream (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp REAL NOT NULL,
-                data TEXT NOT NULL,
-                type TEXT NOT NULL
+        # Ensure packet_stream exists in target (same schema as web viewer); a view
+        # means the target already stores it in partitions, which accept inserts as-is
+        target_type = conn.execute(
+            "SELECT type FROM main.sqlite_master WHERE name='packet_stream'"
+        ).fetchone()
+        if not target_type or target_type[0] != 'view':
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS packet_stream (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp REAL NOT NULL,
+                    data TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    raw BLOB,
+                    snr REAL,
+                    rssi INTEGER
+                )
+            """)
+            # Compact packet columns (raw bytes, SNR, RSSI) on tables created before they existed
+            target_columns = {row[1] for row in conn.execute("PRAGMA main.table_info(packet_stream)")}
+            for column, sql_type in (("raw", "BLOB"), ("snr", "REAL"), ("rssi", "INTEGER")):
+                if column not in target_columns:
+                    conn.execute(f"ALTER TABLE main.packet_stream ADD COLUMN {column} {sql_type}")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_packet_stream_timestamp ON packet_stream(timestamp)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_packet_stream_type ON packet_stream(type)"
             )
-        """)
-        conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_packet_stream_timestamp ON packet_stream(timestamp)"
-        )
-        conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_packet_stream_type ON packet_stream(type)"
-        )
 
         # Check that source has packet_stream
         cur = conn.execute(
-            "SELECT name FROM src.sqlite_master WHERE type='table' AND name='packet_stream'"
+            "SELECT name FROM src.sqlite_master WHERE type IN ('table', 'view') AND name='packet_stream'"
         )
         if cur.fetchone() is None:
             conn.execute("DETACH DATABASE src")
@@ -61,11 +74,15 @@ def main() -> int:
             return 0
 
         # Copy rows from source; skip ids that already exist in target (INSERT OR IGNORE)
+        source_columns = {row[1] for row in conn.execute("PRAGMA src.table_info(packet_stream)")}
+        columns = ", ".join(
+            c for c in ("id", "timestamp", "data", "type", "raw", "snr", "rssi") if c in source_columns
+        )
         before = conn.total_changes
         conn.execute(
-            """
-            INSERT OR IGNORE INTO main.packet_stream (id, timestamp, data, type)
-            SELECT id, timestamp, data, type FROM src.packet_stream
+            f"""
+            INSERT OR IGNORE INTO main.packet_stream ({columns})
+            SELECT {columns} FROM src.packet_stream
             """
         )
         inserted = conn.total_changes - before
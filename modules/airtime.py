@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+LoRa time-on-air and a duty-cycle budget for the bot's transmissions
+A fixed gap between sends treats a 10-byte ping and a 150-byte reply at SF11
+alike. Here each send is charged the airtime its packet occupies, from the
+radio's spreading factor, bandwidth, coding rate and preamble, and the bot's
+total airtime over a sliding window is kept under a configured duty cycle.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+# MeshCore packet framing: header byte and path length byte, then the path
+PACKET_OVERHEAD_BYTES = 2
+# Ciphertext is AES-128 blocks over timestamp (4) + flags (1) + text
+CIPHER_BLOCK_BYTES = 16
+TEXT_PREFIX_BYTES = 5
+# GRP_TXT: channel hash + MAC; TXT_MSG: destination hash + source hash + MAC
+CHANNEL_PAYLOAD_OVERHEAD = 3
+DM_PAYLOAD_OVERHEAD = 4
+
+# Used when neither the config nor the connected radio report a value
+DEFAULT_LORA_SETTINGS = {
+    'spreading_factor': 11,
+    'bandwidth_khz': 250.0,
+    'coding_rate': 5,
+    'preamble_length': 16,
+}
+
+# self_info keys reported by the companion radio
+_SELF_INFO_KEYS = {
+    'spreading_factor': 'radio_sf',
+    'bandwidth_khz': 'radio_bw',
+    'coding_rate': 'radio_cr',
+}
+
+
+def time_on_air(payload_bytes: int, spreading_factor: int, bandwidth_khz: float, coding_rate: int = 5,
+                preamble_length: int = 16, explicit_header: bool = True, crc: bool = True,
+                low_data_rate_optimize: Optional[bool] = None) -> float:
+    """Seconds a LoRa packet of payload_bytes occupies the channel (Semtech AN1200.13).
+
+    Args:
+        payload_bytes: PHY payload length (the whole MeshCore packet).
+        spreading_factor: 7-12.
+        bandwidth_khz: Bandwidth in kHz (e.g. 62.5, 125, 250).
+        coding_rate: 5-8 for 4/5-4/8 (1-4 are accepted too).
+        preamble_length: Programmed preamble symbols.
+        explicit_header: LoRa explicit header mode.
+        crc: Payload CRC enabled.
+        low_data_rate_optimize: Force LDRO; by default on when a symbol lasts 16 ms or more.
+    """
+    sf = int(spreading_factor)
+    cr = int(coding_rate)
+    if cr >= 5:
+        cr -= 4
+    symbol_seconds = (2 ** sf) / (float(bandwidth_khz) * 1000.0)
+    if low_data_rate_optimize is None:
+        low_data_rate_optimize = symbol_seconds >= 0.016
+    de = 1 if low_data_rate_optimize else 0
+    ih = 0 if explicit_header else 1
+    numerator = 8 * payload_bytes - 4 * sf + 28 + (16 if crc else 0) - 20 * ih
+    payload_symbols = 8 + max(math.ceil(numerator / (4 * (sf - 2 * de))) * (cr + 4), 0)
+    return (preamble_length + 4.25) * symbol_seconds + payload_symbols * symbol_seconds
+
+
+def text_packet_bytes(text: str, channel: bool, path_len: int = 0, sender_name: str = '') -> int:
+    """Size of the MeshCore packet carrying a text message.
+
+    Args:
+        text: Message text.
+        channel: True for a channel (GRP_TXT) message, False for a DM (TXT_MSG).
+        path_len: Path bytes the packet leaves with (0 when flooded).
+        sender_name: Channel messages are sent as "<sender_name>: <text>".
+    """
+    body = f"{sender_name}: {text}" if channel and sender_name else text
+    plaintext = TEXT_PREFIX_BYTES + len(body.encode('utf-8'))
+    ciphertext = max(1, math.ceil(plaintext / CIPHER_BLOCK_BYTES)) * CIPHER_BLOCK_BYTES
+    overhead = CHANNEL_PAYLOAD_OVERHEAD if channel else DM_PAYLOAD_OVERHEAD
+    return PACKET_OVERHEAD_BYTES + max(0, path_len) + overhead + ciphertext
+
+
+def lora_settings(config: Any, self_info: Any = None) -> Dict[str, Any]:
+    """LoRa settings for time-on-air: [Airtime] overrides, then the radio's self_info, then defaults."""
+    settings = dict(DEFAULT_LORA_SETTINGS)
+    if isinstance(self_info, dict):
+        for key, info_key in _SELF_INFO_KEYS.items():
+            value = self_info.get(info_key)
+            if value:
+                settings[key] = float(value) if key == 'bandwidth_khz' else int(value)
+    for key in DEFAULT_LORA_SETTINGS:
+        raw = config.get('Airtime', key, fallback='').strip() if config.has_section('Airtime') else ''
+        if raw:
+            settings[key] = float(raw) if key == 'bandwidth_khz' else int(raw)
+    return settings
+
+
+class AirtimeBudget:
+    """Airtime spent over a sliding window, capped at a duty cycle.
+
+    Sends are reserved when they are admitted, so concurrent senders cannot
+    both fit into the same remaining budget.
+    """
+
+    def __init__(self, duty_cycle_percent: float, window_seconds: float = 3600.0,
+                 max_wait_seconds: float = 30.0, clock: Callable[[], float] = time.time):
+        self.window_seconds = max(1.0, float(window_seconds))
+        self.budget_seconds = self.window_seconds * max(0.0, float(duty_cycle_percent)) / 100.0
+        self.max_wait_seconds = max_wait_seconds
+        self.clock = clock
+        self._sent: Deque[Tuple[float, float]] = deque()
+        self._used = 0.0
+        self._total_airtime = 0.0
+        self._total_deferred = 0
+        self._total_dropped = 0
+        self._total_released = 0
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._sent and self._sent[0][0] <= cutoff:
+            self._used -= self._sent.popleft()[1]
+        if not self._sent:
+            self._used = 0.0
+
+    def used(self) -> float:
+        """Airtime spent in the current window, in seconds."""
+        self._expire(self.clock())
+        return self._used
+
+    def time_until(self, airtime: float) -> float:
+        """Seconds until a send of this airtime fits in the budget."""
+        if self.budget_seconds <= 0 and airtime > 0:
+            # A 0% duty cycle never transmits
+            return math.inf
+        now = self.clock()
+        self._expire(now)
+        # A packet longer than the whole budget waits for an empty window
+        needed = min(airtime, self.budget_seconds)
+        excess = self._used + needed - self.budget_seconds
+        if excess <= 1e-9:
+            return 0.0
+        freed = 0.0
+        for sent_at, spent in self._sent:
+            freed += spent
+            if freed >= excess - 1e-9:
+                return max(0.0, sent_at + self.window_seconds - now)
+        return self.window_seconds
+
+    def reserve(self, airtime: float) -> None:
+        """Charge a send to the budget."""
+        if airtime <= 0:
+            return
+        now = self.clock()
+        self._expire(now)
+        self._sent.append((now, airtime))
+        self._used += airtime
+        self._total_airtime += airtime
+
+    def release(self, airtime: float) -> None:
+        """Refund a reservation for a send that never went on air."""
+        if airtime <= 0:
+            return
+        self._expire(self.clock())
+        for i in range(len(self._sent) - 1, -1, -1):
+            if self._sent[i][1] == airtime:
+                del self._sent[i]
+                self._used = max(0.0, self._used - airtime)
+                self._total_airtime = max(0.0, self._total_airtime - airtime)
+                self._total_released += 1
+                return
+
+    def note_deferred(self) -> None:
+        self._total_deferred += 1
+
+    def note_dropped(self) -> None:
+        self._total_dropped += 1
+
+    def adopt(self, other: 'AirtimeBudget') -> None:
+        """Carry the sends of a budget being replaced (config reload) into this one."""
+        self._sent = deque(other._sent)
+        self._used = other._used
+        self._total_airtime = other._total_airtime
+        self._total_deferred = other._total_deferred
+        self._total_dropped = other._total_dropped
+        self._total_released = other._total_released
+
+    def get_stats(self) -> dict:
+        used = self.used()
+        return {
+            'airtime_used_seconds': round(used, 3),
+            'airtime_budget_seconds': round(self.budget_seconds, 3),
+            'airtime_window_seconds': self.window_seconds,
+            'airtime_utilization': used / self.budget_seconds if self.budget_seconds else 0.0,
+            'airtime_total_seconds': round(self._total_airtime, 3),
+            'airtime_deferred': self._total_deferred,
+            'airtime_dropped': self._total_dropped,
+            'airtime_released': self._total_released,
+        }
+
+
+def airtime_budget_from_config(config: Any) -> Optional[AirtimeBudget]:
+    """Budget from [Airtime], or None when airtime pacing is disabled."""
+    if not config.getboolean('Airtime', 'enabled', fallback=False):
+        return None
+    return AirtimeBudget(
+        duty_cycle_percent=config.getfloat('Airtime', 'duty_cycle_percent', fallback=10.0),
+        window_seconds=config.getfloat('Airtime', 'window_seconds', fallback=3600.0),
+        max_wait_seconds=config.getfloat('Airtime', 'max_wait_seconds', fallback=30.0),
+    )
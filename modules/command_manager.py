@@ -13,6 +13,8 @@ from datetime import datetime
 import pytz
 from meshcore import EventType
 
+from .airtime import AirtimeBudget, text_packet_bytes, time_on_air
+from .metrics import get_metrics, record_command_response, timed
 from .models import MeshMessage
 from .plugin_loader import PluginLoader
 from .commands.base_command import BaseCommand
@@ -241,7 +243,7 @@ class CommandManager:
             message: The queued message.
         """
         # Execute directly
-        success = await command.execute(message)
+        success = await self._run_command(command, message)
         
         # Record in stats
         if 'stats' in self.commands:
@@ -249,6 +251,14 @@ class CommandManager:
             if stats_command:
                 stats_command.record_command(message, command.name, success)
     
+    async def _run_command(self, command: BaseCommand, message: MeshMessage) -> bool:
+        """Execute a command, recording its duration in the command_execute histogram."""
+        metrics = get_metrics(self.bot)
+        if metrics is None:
+            return await command.execute(message)
+        with metrics.timer('command_execute', {'command': command.name}):
+            return await command.execute(message)
+    
     async def _apply_tx_delay(self):
         """Apply transmission delay to prevent message collisions"""
         if self.bot.tx_delay_ms > 0:
@@ -259,8 +269,50 @@ class CommandManager:
         """Return the key used for per-user rate limiting (pubkey when available, else sender name)."""
         return message.sender_pubkey or message.sender_id or None
     
+    def _airtime_budget(self) -> Optional[AirtimeBudget]:
+        """The bot's airtime budget, or None when airtime pacing is disabled."""
+        budget = getattr(self.bot.bot_tx_rate_limiter, 'airtime_budget', None)
+        return budget if isinstance(budget, AirtimeBudget) else None
+    
+    def _estimate_airtime(self, content: str, channel: bool, recipient_id: Optional[str] = None) -> float:
+        """Time-on-air of a text message, or 0 when airtime pacing is disabled.
+        
+        Args:
+            content: The message text.
+            channel: True for a channel message, False for a DM.
+            recipient_id: DM recipient; a direct DM carries the contact's stored path.
+        
+        Returns:
+            float: Seconds the packet occupies the channel.
+        """
+        if not self._airtime_budget():
+            return 0.0
+        try:
+            sender_name = ''
+            path_len = 0
+            if recipient_id:
+                contact = self.bot.meshcore.get_contact_by_name(recipient_id)
+                if isinstance(contact, dict):
+                    # out_path_len is -1 when the contact is reached by flooding
+                    path_len = max(0, contact.get('out_path_len') or 0)
+            if channel:
+                self_info = getattr(self.bot.meshcore, 'self_info', None)
+                if isinstance(self_info, dict):
+                    sender_name = self_info.get('name') or ''
+                sender_name = sender_name or self.bot.config.get('Bot', 'bot_name', fallback='')
+            settings = self.bot.get_lora_settings()
+            return time_on_air(
+                text_packet_bytes(content, channel, path_len, sender_name),
+                settings['spreading_factor'], settings['bandwidth_khz'],
+                settings['coding_rate'], settings['preamble_length']
+            )
+        except Exception as e:
+            self.logger.debug(f"Could not estimate airtime: {e}")
+            return 0.0
+    
     async def _check_rate_limits(
-        self, skip_user_rate_limit: bool = False, rate_limit_key: Optional[str] = None
+        self, skip_user_rate_limit: bool = False, rate_limit_key: Optional[str] = None,
+        airtime: float = 0.0
     ) -> Tuple[bool, str]:
         """Check all rate limits before sending.
         
@@ -270,6 +322,7 @@ class CommandManager:
         Args:
             skip_user_rate_limit: If True, skip the user rate limiter check (for automated responses).
             rate_limit_key: Optional key for per-user rate limit (e.g. from get_rate_limit_key(message)).
+            airtime: Time-on-air of the message, charged to the airtime budget if one is configured.
         
         Returns:
             Tuple[bool, str]: A tuple containing:
@@ -292,8 +345,17 @@ class CommandManager:
                         return False, f"Rate limited. Wait {wait_time:.1f} seconds"
                     return False, ""
         
-        # Wait for bot TX rate limiter
-        await self.bot.bot_tx_rate_limiter.wait_for_tx()
+        # Drop the message rather than send it long after it was asked for
+        airtime_budget = self._airtime_budget()
+        if airtime_budget and airtime > 0:
+            wait_time = airtime_budget.time_until(airtime)
+            if wait_time > airtime_budget.max_wait_seconds:
+                airtime_budget.note_dropped()
+                return False, (f"Airtime budget exhausted ({airtime_budget.used():.1f}s of "
+                               f"{airtime_budget.budget_seconds:.1f}s used). Wait {wait_time:.1f} seconds")
+        
+        # Wait for bot TX rate limiter (and airtime budget)
+        await self.bot.bot_tx_rate_limiter.wait_for_tx(airtime)
         
         # Apply transmission delay
         await self._apply_tx_delay()
@@ -479,6 +541,7 @@ class CommandManager:
             mesh_info=None  # Keywords don't use mesh info placeholders
         )
     
+    @timed('command_match')
     def check_keywords(self, message: MeshMessage) -> List[tuple]:
         """Check message content for keywords and return matching responses.
         
@@ -640,7 +703,7 @@ class CommandManager:
             message: The message triggering the advert command.
         """
         command = self.commands['advert']
-        success = await command.execute(message)
+        success = await self._run_command(command, message)
         
         # Small delay to ensure send_response has completed
         await asyncio.sleep(0.1)
@@ -658,6 +721,97 @@ class CommandManager:
             if stats_command:
                 stats_command.record_command(message, 'advert', response_sent)
     
+    async def _send_msg_with_retry(
+        self,
+        contact: Dict[str, Any],
+        content: str,
+        recipient_id: str,
+        transmitted: List[int],
+        max_attempts: int = 3,
+        max_flood_attempts: int = 2,
+        flood_after: int = 2,
+        timeout: float = 0,
+        min_timeout: float = 0,
+    ) -> Any:
+        """Send a DM with meshcore's retry schedule, pacing each retry against the airtime budget.
+        
+        This is a copy of the loop in ``MessagingCommands.send_msg_with_retry`` as of
+        meshcore 2.1.10, which gives no per-attempt hook. Re-check it against the
+        library when the meshcore requirement is raised. It differs in two ways.
+        Each retry is a new transmission, so it waits for and is charged to the
+        airtime budget like any other send; the first attempt was already reserved
+        by _check_rate_limits. An ERROR from the radio ends the loop instead of
+        failing on its payload.
+        
+        Args:
+            contact: The meshcore contact dict.
+            content: The message content to send.
+            recipient_id: The recipient's name, used to estimate retry airtime.
+            transmitted: Attempt numbers are appended here as they go on air, so the
+                caller knows what was sent if this raises.
+            max_attempts: Maximum number of transmissions.
+            max_flood_attempts: Maximum number of flooded transmissions.
+            flood_after: Number of attempts after which the path is reset to flood.
+            timeout: ACK timeout in seconds; 0 uses the radio's suggested timeout.
+            min_timeout: Lower bound for the ACK timeout in seconds.
+        
+        Returns:
+            The MSG_SENT event of the acknowledged attempt, the ERROR event if the
+            radio rejected an attempt, or None if no ACK was received.
+        """
+        commands = self.bot.meshcore.commands
+        flood = contact.get('out_path_len') == -1
+        attempts = 0
+        flood_attempts = 0
+        while attempts < max_attempts and (not flood or flood_attempts < max_flood_attempts):
+            if attempts == flood_after:
+                reset = await commands.reset_path(contact)
+                if reset.type == EventType.ERROR:
+                    self.logger.error(f"Couldn't reset path to {recipient_id}, continuing: {reset.payload}")
+                else:
+                    flood = True
+                    contact['out_path'] = ''
+                    contact['out_path_len'] = -1
+            
+            airtime = 0.0
+            if attempts > 0:
+                airtime = self._estimate_airtime(content, channel=False, recipient_id=recipient_id)
+                budget = self._airtime_budget()
+                if budget and budget.time_until(airtime) > budget.max_wait_seconds:
+                    budget.note_dropped()
+                    self.logger.warning(f"Airtime budget exhausted; not retrying DM to {recipient_id}")
+                    return None
+                await self.bot.bot_tx_rate_limiter.wait_for_tx(airtime)
+                self.logger.info(f"Retry sending DM to {recipient_id}: attempt {attempts + 1}")
+            
+            try:
+                result = await commands.send_msg(contact, content, attempt=attempts)
+            except Exception:
+                self.bot.bot_tx_rate_limiter.release(airtime)
+                raise
+            if result.type == EventType.ERROR:
+                # The caller refunds the first attempt
+                self.bot.bot_tx_rate_limiter.release(airtime)
+                return result
+            transmitted.append(attempts)
+            
+            # As in meshcore, the first attempt's timeout is kept for the retries
+            if timeout == 0:
+                timeout = result.payload['suggested_timeout'] / 1000 * 1.2
+            timeout = max(timeout, min_timeout)
+            ack = await self.bot.meshcore.dispatcher.wait_for_event(
+                EventType.ACK,
+                attribute_filters={'code': result.payload['expected_ack'].hex()},
+                timeout=timeout
+            )
+            attempts += 1
+            if flood:
+                flood_attempts += 1
+            if ack is not None:
+                return result
+        return None
+    
+    @timed('send', {'kind': 'dm'})
     async def send_dm(
         self,
         recipient_id: str,
@@ -684,19 +838,23 @@ class CommandManager:
             return False
         
         # Check all rate limits
+        airtime = self._estimate_airtime(content, channel=False, recipient_id=recipient_id)
         can_send, reason = await self._check_rate_limits(
-            skip_user_rate_limit=skip_user_rate_limit, rate_limit_key=rate_limit_key
+            skip_user_rate_limit=skip_user_rate_limit, rate_limit_key=rate_limit_key,
+            airtime=airtime
         )
         if not can_send:
             if reason:
                 self.logger.warning(reason)
             return False
         
+        transmitted: List[int] = []  # Attempts that went on air
         try:
             # Find the contact by name (since recipient_id is the contact name)
             contact = self.bot.meshcore.get_contact_by_name(recipient_id)
             if not contact:
                 self.logger.error(f"Contact not found for name: {recipient_id}")
+                self.bot.bot_tx_rate_limiter.release(airtime)
                 return False
             
             # Use the contact name for logging
@@ -718,20 +876,30 @@ class CommandManager:
                 self.logger.debug(f"Error recording transmission for repeat tracking: {e}")
                 # Don't fail the send if transmission tracking fails
             
-            # Try to use send_msg_with_retry if available (meshcore-2.1.6+)
-            try:
-                # Use the meshcore commands interface for send_msg_with_retry
-                if hasattr(self.bot.meshcore, 'commands') and hasattr(self.bot.meshcore.commands, 'send_msg_with_retry'):
-                    self.logger.debug("Using send_msg_with_retry for improved reliability")
-                    
-                    # Use send_msg_with_retry with configurable retry parameters
-                    max_attempts = self.bot.config.getint('Bot', 'dm_max_retries', fallback=3)
-                    max_flood_attempts = self.bot.config.getint('Bot', 'dm_max_flood_attempts', fallback=2)
-                    flood_after = self.bot.config.getint('Bot', 'dm_flood_after', fallback=2)
-                    timeout = 0  # Use suggested timeout from meshcore
-                    
-                    self.logger.debug(f"Attempting DM send with {max_attempts} max attempts")
-                    result = await self.bot.meshcore.commands.send_msg_with_retry(
+            # Use send_msg_with_retry if available (meshcore-2.1.6+)
+            commands = self.bot.meshcore.commands
+            used_retry_method = hasattr(commands, 'send_msg_with_retry')
+            if used_retry_method:
+                self.logger.debug("Using send_msg_with_retry for improved reliability")
+                
+                # Use send_msg_with_retry with configurable retry parameters
+                max_attempts = self.bot.config.getint('Bot', 'dm_max_retries', fallback=3)
+                max_flood_attempts = self.bot.config.getint('Bot', 'dm_max_flood_attempts', fallback=2)
+                flood_after = self.bot.config.getint('Bot', 'dm_flood_after', fallback=2)
+                timeout = 0  # Use suggested timeout from meshcore
+                
+                self.logger.debug(f"Attempting DM send with {max_attempts} max attempts")
+                if airtime > 0:
+                    # Every retry goes on air again, so each one is paced and charged
+                    result = await self._send_msg_with_retry(
+                        contact, content, recipient_id, transmitted,
+                        max_attempts=max_attempts,
+                        max_flood_attempts=max_flood_attempts,
+                        flood_after=flood_after,
+                        timeout=timeout
+                    )
+                else:
+                    result = await commands.send_msg_with_retry(
                         contact, 
                         content,
                         max_attempts=max_attempts,
@@ -739,29 +907,32 @@ class CommandManager:
                         flood_after=flood_after,
                         timeout=timeout
                     )
-                else:
-                    # Fallback to regular send_msg for older meshcore versions
-                    self.logger.debug("send_msg_with_retry not available, using send_msg")
-                    result = await self.bot.meshcore.commands.send_msg(contact, content)
-                    
-            except AttributeError:
+            else:
                 # Fallback to regular send_msg for older meshcore versions
                 self.logger.debug("send_msg_with_retry not available, using send_msg")
-                result = await self.bot.meshcore.commands.send_msg(contact, content)
+                result = await commands.send_msg(contact, content)
+                if getattr(result, 'type', None) != EventType.ERROR:
+                    transmitted.append(0)
             
-            # Check if send_msg_with_retry was used
-            used_retry_method = (hasattr(self.bot.meshcore, 'commands') and 
-                               hasattr(self.bot.meshcore.commands, 'send_msg_with_retry'))
+            # Nothing went on air (the radio rejected the first attempt)
+            if not transmitted:
+                self.bot.bot_tx_rate_limiter.release(airtime)
             
             # Handle result using unified handler
-            return self._handle_send_result(
+            sent = self._handle_send_result(
                 result, "DM", contact_name, used_retry_method, rate_limit_key=rate_limit_key
             )
+            if sent:
+                record_command_response(self.bot)
+            return sent
                 
         except Exception as e:
             self.logger.error(f"Failed to send DM: {e}")
+            if not transmitted:
+                self.bot.bot_tx_rate_limiter.release(airtime)
             return False
     
+    @timed('send', {'kind': 'channel'})
     async def send_channel_message(
         self,
         channel: str,
@@ -788,14 +959,17 @@ class CommandManager:
             return False
         
         # Check all rate limits
+        airtime = self._estimate_airtime(content, channel=True)
         can_send, reason = await self._check_rate_limits(
-            skip_user_rate_limit=skip_user_rate_limit, rate_limit_key=rate_limit_key
+            skip_user_rate_limit=skip_user_rate_limit, rate_limit_key=rate_limit_key,
+            airtime=airtime
         )
         if not can_send:
             if reason:
                 self.logger.warning(reason)
             return False
         
+        transmitted = False
         try:
             # Get channel number from channel name
             channel_num = self.bot.channel_manager.get_channel_number(channel)
@@ -803,6 +977,7 @@ class CommandManager:
             # Check if channel was found (None indicates channel name not found)
             if channel_num is None:
                 self.logger.error(f"Channel '{channel}' not found. Cannot send message.")
+                self.bot.bot_tx_rate_limiter.release(airtime)
                 return False
             
             self.logger.info(f"Sending channel message to {channel} (channel {channel_num}): {content}")
@@ -826,14 +1001,24 @@ class CommandManager:
             from meshcore_cli.meshcore_cli import send_chan_msg
             result = await send_chan_msg(self.bot.meshcore, channel_num, content)
             
+            # The radio rejected the message, so nothing went on air
+            transmitted = getattr(result, 'type', None) != EventType.ERROR
+            if not transmitted:
+                self.bot.bot_tx_rate_limiter.release(airtime)
+            
             # Handle result using unified handler
             target = f"{channel} (channel {channel_num})"
-            return self._handle_send_result(
+            sent = self._handle_send_result(
                 result, "Channel message", target, rate_limit_key=rate_limit_key
             )
+            if sent:
+                record_command_response(self.bot)
+            return sent
                 
         except Exception as e:
             self.logger.error(f"Failed to send channel message: {e}")
+            if not transmitted:
+                self.bot.bot_tx_rate_limiter.release(airtime)
             return False
     
     def get_help_for_command(self, command_name: str, message: MeshMessage = None) -> str:
@@ -1152,7 +1337,7 @@ class CommandManager:
                             command._record_execution()
                     
                     # Execute the command
-                    success = await command.execute(message)
+                    success = await self._run_command(command, message)
                     
                     # Small delay to ensure send_response has completed
                     await asyncio.sleep(0.1)
@@ -31,6 +31,11 @@ class BaseCommand(ABC):
     cooldown_seconds: int = 0
     category: str = "general"
     
+    # Whether the plugin loader may defer importing this command until a message
+    # contains one of its keywords. Set False when matches_keyword accepts text
+    # that contains none of the keywords.
+    lazy_loadable: bool = True
+    
     # Documentation fields - to be overridden by subclasses for website generation
     short_description: str = ""  # Brief description for website (without usage syntax)
     usage: str = ""  # Usage syntax, e.g., "wx <zipcode|city> [tomorrow|7d|hourly|alerts]"
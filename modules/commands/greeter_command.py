@@ -7,11 +7,12 @@ Greets users on their first public channel message with mesh information
 import sqlite3
 import time
 import asyncio
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Set, Tuple
 from .base_command import BaseCommand
 from ..models import MeshMessage
 from ..utils import decode_escape_sequences
+from ..greeter_index import CHANGES_TABLE, GreetedNameIndex, bounded_levenshtein, init_changes_table
 
 
 class GreeterCommand(BaseCommand):
@@ -30,8 +31,19 @@ class GreeterCommand(BaseCommand):
             bot: The bot instance.
         """
         super().__init__(bot)
+        # In-memory copy of greeted_users: (sender_id, channel or None for global greetings)
+        self.greeted_keys: Set[Tuple[str, Optional[str]]] = set()
+        # Greeted names for Levenshtein dedupe
+        self.greeted_name_index = GreetedNameIndex()
+        self.greeted_users_loaded = False
+        # (rollout_id, end time in UTC) of the active rollout, if any
+        self.active_rollout: Optional[Tuple[int, datetime]] = None
         self._init_greeter_tables()
         self._load_config()
+        try:
+            self._load_greeted_users()
+        except Exception as e:
+            self.logger.error(f"Failed to load greeted users (will retry on demand): {e}")
         
         # Track pending greetings (for dead air delay)
         self.pending_greetings = {}  # key: (sender_id, channel), value: asyncio.Task
@@ -47,6 +59,7 @@ class GreeterCommand(BaseCommand):
         
         # Check for existing rollout and mark active users if needed
         self._check_rollout_period()
+        self._load_rollout_state()
         
         # Auto-start rollout if enabled, rollout_days > 0, and no active rollout exists
         if self.enabled and self.rollout_days > 0:
@@ -233,6 +246,9 @@ class GreeterCommand(BaseCommand):
                     )
                 ''')
                 
+                # Queue of changes made by the web viewer (ungreets, ended rollouts)
+                init_changes_table(cursor)
+                
                 conn.commit()
                 
                 # Clean up any existing duplicates (in case they existed before UNIQUE constraint)
@@ -331,6 +347,7 @@ class GreeterCommand(BaseCommand):
                 ''', (int(rollout_start.timestamp()),))
                 
                 active_users = cursor.fetchall()
+                marked = []
                 marked_count = 0
                 
                 for sender_id, channel in active_users:
@@ -359,6 +376,7 @@ class GreeterCommand(BaseCommand):
                             (sender_id, channel, rollout_marked, greeted_at)
                             VALUES (?, ?, 1, ?)
                         ''', (sender_id, mark_channel, rollout_start.isoformat()))
+                        marked.append((sender_id, mark_channel))
                         marked_count += 1
                 
                 # Update rollout record
@@ -369,6 +387,7 @@ class GreeterCommand(BaseCommand):
                 ''', (marked_count, rollout_id))
                 
                 conn.commit()
+                self._remember_greeted(marked)
                 
                 if marked_count > 0:
                     self.logger.info(f"Marked {marked_count} active users as greeted during rollout")
@@ -430,6 +449,7 @@ class GreeterCommand(BaseCommand):
                     ''')
                 
                 historical_users = cursor.fetchall()
+                marked = []
                 marked_count = 0
                 skipped_count = 0
                 
@@ -457,11 +477,13 @@ class GreeterCommand(BaseCommand):
                             (sender_id, channel, rollout_marked, greeted_at)
                             VALUES (?, ?, 1, datetime('now'))
                         ''', (sender_id, mark_channel))
+                        marked.append((sender_id, mark_channel))
                         marked_count += 1
                     else:
                         skipped_count += 1
                 
                 conn.commit()
+                self._remember_greeted(marked)
                 
                 result = {
                     'success': True,
@@ -529,6 +551,7 @@ class GreeterCommand(BaseCommand):
                 
                 rollout_id = cursor.lastrowid
                 conn.commit()
+                self._load_rollout_state()
                 
                 # Mark active users immediately
                 self._mark_active_users_as_greeted(rollout_id)
@@ -568,13 +591,55 @@ class GreeterCommand(BaseCommand):
         
         return previous_row[-1]
     
+    def _greeting_scope(self, channel: Optional[str]) -> Optional[str]:
+        """Channel a greeting is recorded under (None for global greetings)."""
+        return channel if self.per_channel_greetings else None
+    
+    def _load_greeted_users(self) -> None:
+        """Load every greeted (sender_id, channel) pair into memory.
+        
+        greeted_keys and the fuzzy name index answer the per-message checks;
+        they are written through by this command and updated from the web
+        viewer's queued changes (see apply_greeter_changes).
+        """
+        with self.bot.db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT DISTINCT sender_id, channel FROM greeted_users')
+            rows = [tuple(row) for row in cursor.fetchall()]
+        self.greeted_keys = set(rows)
+        self.greeted_name_index.load(rows)
+        self.greeted_users_loaded = True
+        self.logger.debug(f"Loaded {len(self.greeted_keys)} greeted user(s) into memory")
+    
+    def _ensure_greeted_users_loaded(self) -> None:
+        """Retry loading greeted users if it failed at startup."""
+        if not self.greeted_users_loaded:
+            self._load_greeted_users()
+    
+    def _remember_greeted(self, greeted: List[Tuple[str, Optional[str]]]) -> None:
+        """Add newly greeted (sender_id, channel) pairs to the in-memory copy.
+        
+        Args:
+            greeted: Pairs as stored in greeted_users.
+        """
+        if not self.greeted_users_loaded:
+            return
+        for sender_id, scope in greeted:
+            self.greeted_keys.add((sender_id, scope))
+            self.greeted_name_index.add(sender_id, scope)
+    
+    def _forget_greeted(self, sender_id: str, scope: Optional[str]) -> None:
+        """Remove an ungreeted (sender_id, channel) pair from the in-memory copy."""
+        self.greeted_keys.discard((sender_id, scope))
+        self.greeted_name_index.discard(sender_id, scope)
+    
     def _find_similar_greeted_user(self, sender_id: str, channel: str) -> Optional[str]:
         """Find if a user with a similar name has been greeted.
         
         Args:
             sender_id: The user's ID to check.
             channel: The channel name (used only if per_channel_greetings is True).
-            
+        
         Returns:
             Optional[str]: The greeted sender_id if a similar one is found, None otherwise.
         """
@@ -582,32 +647,14 @@ class GreeterCommand(BaseCommand):
             return None
         
         try:
-            with self.bot.db_manager.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                if self.per_channel_greetings:
-                    # Per-channel mode: check greeted users on this specific channel
-                    cursor.execute('''
-                        SELECT DISTINCT sender_id FROM greeted_users
-                        WHERE channel = ?
-                    ''', (channel,))
-                else:
-                    # Global mode: check all greeted users (channel = NULL)
-                    cursor.execute('''
-                        SELECT DISTINCT sender_id FROM greeted_users
-                        WHERE channel IS NULL
-                    ''')
-                
-                greeted_users = cursor.fetchall()
-                
-                # Check each greeted user for similarity
-                for (greeted_id,) in greeted_users:
-                    distance = self._levenshtein_distance(sender_id.lower(), greeted_id.lower())
-                    if distance <= self.levenshtein_distance:
-                        self.logger.debug(f"Found similar user: {greeted_id} (distance: {distance} from {sender_id})")
-                        return greeted_id
-                
+            self._ensure_greeted_users_loaded()
+            matches = self.greeted_name_index.matches(sender_id, self._greeting_scope(channel),
+                                                      self.levenshtein_distance)
+            if not matches:
                 return None
+            greeted_id, distance = matches[0]
+            self.logger.debug(f"Found similar user: {greeted_id} (distance: {distance} from {sender_id})")
+            return greeted_id
         except Exception as e:
             self.logger.error(f"Error checking for similar greeted users: {e}")
             return None
@@ -615,44 +662,66 @@ class GreeterCommand(BaseCommand):
     def has_been_greeted(self, sender_id: str, channel: str) -> bool:
         """Check if a user has been greeted.
         
+        Answered from the in-memory copy of greeted_users.
+        
         Args:
             sender_id: The user's ID.
             channel: The channel name (used only if per_channel_greetings is True).
-            
+        
         Returns:
             bool: True if user has been greeted (globally or on this channel), False otherwise.
         """
+        try:
+            self._ensure_greeted_users_loaded()
+            if (sender_id, self._greeting_scope(channel)) in self.greeted_keys:
+                return True
+            
+            # If exact match not found and Levenshtein distance is enabled, check for similar names
+            if self.levenshtein_distance > 0:
+                similar_user = self._find_similar_greeted_user(sender_id, channel)
+                if similar_user:
+                    self.logger.info(f"User {sender_id} matches previously greeted user {similar_user} (Levenshtein distance enabled)")
+                    return True
+            
+            return False
+        except Exception as e:
+            self.logger.error(f"Error checking if user has been greeted: {e}")
+            return False
+    
+    def apply_greeter_changes(self) -> int:
+        """Apply changes queued by the web viewer (ungreeted users, ended rollouts).
+        
+        Returns:
+            int: Number of changes applied.
+        """
         try:
             with self.bot.db_manager.get_connection() as conn:
                 cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT id, change_type, sender_id, channel
+                    FROM {CHANGES_TABLE}
+                    ORDER BY id
+                ''')
+                changes = cursor.fetchall()
+                if not changes:
+                    return 0
                 
-                if self.per_channel_greetings:
-                    # Per-channel mode: check if greeted on this specific channel
-                    cursor.execute('''
-                        SELECT id FROM greeted_users
-                        WHERE sender_id = ? AND channel = ?
-                    ''', (sender_id, channel))
-                else:
-                    # Global mode: check if greeted at all (channel = NULL)
-                    cursor.execute('''
-                        SELECT id FROM greeted_users
-                        WHERE sender_id = ? AND channel IS NULL
-                    ''', (sender_id,))
-                
-                if cursor.fetchone() is not None:
-                    return True
-                
-                # If exact match not found and Levenshtein distance is enabled, check for similar names
-                if self.levenshtein_distance > 0:
-                    similar_user = self._find_similar_greeted_user(sender_id, channel)
-                    if similar_user:
-                        self.logger.info(f"User {sender_id} matches previously greeted user {similar_user} (Levenshtein distance enabled)")
-                        return True
+                for change_id, change_type, sender_id, channel in changes:
+                    if change_type == 'ungreet':
+                        self._forget_greeted(sender_id, channel)
+                        self.logger.info(f"Greeter: {sender_id} was ungreeted (channel: {channel or 'global'})")
+                    elif change_type == 'end_rollout':
+                        self._load_rollout_state()
+                        self.logger.info("Greeter: rollout ended from the web viewer")
+                    else:
+                        self.logger.warning(f"Ignoring unknown greeter change '{change_type}' (id {change_id})")
                 
-                return False
+                cursor.execute(f'DELETE FROM {CHANGES_TABLE} WHERE id <= ?', (changes[-1][0],))
+                conn.commit()
+                return len(changes)
         except Exception as e:
-            self.logger.error(f"Error checking if user has been greeted: {e}")
-            return False
+            self.logger.error(f"Error applying greeter changes: {e}")
+            return 0
     
     def mark_as_greeted(self, sender_id: str, channel: str) -> bool:
         """Mark a user as greeted atomically.
@@ -669,6 +738,12 @@ class GreeterCommand(BaseCommand):
         try:
             self.logger.debug(f"Marking {sender_id} as greeted (channel: {channel})")
             
+            # Already greeted as far as this process knows - nothing to write
+            self._ensure_greeted_users_loaded()
+            if (sender_id, self._greeting_scope(channel)) in self.greeted_keys:
+                self.logger.debug(f"User {sender_id} already greeted (channel: {channel if self.per_channel_greetings else 'global'})")
+                return True
+            
             with self.bot.db_manager.get_connection() as conn:
                 # Use WAL mode for better concurrency (if not already enabled)
                 # This helps with race conditions
@@ -711,6 +786,7 @@ class GreeterCommand(BaseCommand):
                                 ''', all_ids[1:])
                                 conn.commit()
                                 self.logger.debug(f"Cleaned up {len(all_ids) - 1} duplicate greeting entries for {sender_id} on {channel}, kept earliest")
+                        self._remember_greeted([(sender_id, channel)])
                         self.logger.debug(f"User {sender_id} already greeted on channel {channel}")
                         return True
                     
@@ -721,12 +797,14 @@ class GreeterCommand(BaseCommand):
                             VALUES (?, ?)
                         ''', (sender_id, channel))
                         conn.commit()
+                        self._remember_greeted([(sender_id, channel)])
                         self.logger.info(f"✅ Saved: Marked {sender_id} as greeted on channel {channel}")
                         return True
                     except sqlite3.IntegrityError:
                         # Race condition - another process inserted it between our check and insert
                         # This is fine, the user is now greeted
                         conn.rollback()
+                        self._remember_greeted([(sender_id, channel)])
                         self.logger.debug(f"User {sender_id} was marked as greeted by another process (race condition)")
                         return True
                 else:
@@ -763,6 +841,7 @@ class GreeterCommand(BaseCommand):
                                 ''', all_ids[1:])
                                 conn.commit()
                                 self.logger.debug(f"Cleaned up {len(all_ids) - 1} duplicate greeting entries for {sender_id} (global), kept earliest")
+                        self._remember_greeted([(sender_id, None)])
                         self.logger.debug(f"User {sender_id} already greeted globally")
                         return True
                     
@@ -773,12 +852,14 @@ class GreeterCommand(BaseCommand):
                             VALUES (?, NULL)
                         ''', (sender_id,))
                         conn.commit()
+                        self._remember_greeted([(sender_id, None)])
                         self.logger.info(f"✅ Saved: Marked {sender_id} as greeted globally (all channels)")
                         return True
                     except sqlite3.IntegrityError:
                         # Race condition - another process inserted it between our check and insert
                         # This is fine, the user is now greeted
                         conn.rollback()
+                        self._remember_greeted([(sender_id, None)])
                         self.logger.debug(f"User {sender_id} was marked as greeted by another process (race condition)")
                         return True
                         
@@ -1052,59 +1133,57 @@ class GreeterCommand(BaseCommand):
         """
         return False
     
-    def _is_rollout_active(self) -> bool:
-        """Check if there's an active rollout period.
-        
-        Returns:
-            bool: True if a rollout is active, False otherwise.
-        """
+    def _load_rollout_state(self) -> None:
+        """Cache the active rollout's id and end time for the per-message checks."""
         try:
             with self.bot.db_manager.get_connection() as conn:
                 cursor = conn.cursor()
-                # Use SQLite's datetime functions to calculate end date and compare with current time
-                # This handles timezone issues automatically since both are in UTC
                 cursor.execute('''
-                    SELECT id, rollout_started_at, rollout_days,
-                           datetime(rollout_started_at, '+' || rollout_days || ' days') as end_date,
-                           datetime('now') as current_time
+                    SELECT id, datetime(rollout_started_at, '+' || rollout_days || ' days') as end_date
                     FROM greeter_rollout
                     WHERE rollout_completed = 0
                     ORDER BY rollout_started_at DESC
                     LIMIT 1
                 ''')
                 rollout = cursor.fetchone()
-                
-                if rollout:
-                    rollout_id, started_at_str, rollout_days, end_date_str, current_time_str = rollout
-                    
-                    # Parse for logging (both are in UTC from SQLite)
-                    started_at = datetime.fromisoformat(started_at_str)
-                    end_date = datetime.fromisoformat(end_date_str)
-                    current_time = datetime.fromisoformat(current_time_str)
-                    
-                    if current_time < end_date:
-                        remaining = (end_date - current_time).total_seconds() / 86400  # days
-                        self.logger.debug(f"Rollout active: {remaining:.1f} days remaining (started {started_at}, ends {end_date})")
-                        return True
-                    else:
-                        # Rollout period ended - mark as completed
-                        days_over = (current_time - end_date).total_seconds() / 86400
-                        cursor.execute('''
-                            UPDATE greeter_rollout
-                            SET rollout_completed = 1
-                            WHERE id = ?
-                        ''', (rollout_id,))
-                        conn.commit()
-                        self.logger.info(f"Greeter rollout period completed (ended {end_date}, {days_over:.1f} days ago)")
-                        return False
-                
-                self.logger.debug("No active rollout found")
-                return False
+            self.active_rollout = (rollout[0], datetime.fromisoformat(rollout[1])) if rollout else None
         except Exception as e:
-            self.logger.error(f"Error checking rollout status: {e}")
-            import traceback
-            self.logger.error(traceback.format_exc())
+            self.logger.error(f"Error loading rollout state: {e}")
+    
+    def _is_rollout_active(self) -> bool:
+        """Check if there's an active rollout period.
+        
+        Uses the rollout cached by _load_rollout_state; the database is only
+        touched when the rollout has just run out.
+        
+        Returns:
+            bool: True if a rollout is active, False otherwise.
+        """
+        if self.active_rollout is None:
             return False
+        
+        rollout_id, end_date = self.active_rollout
+        # SQLite's datetime('now') is UTC without an offset
+        current_time = datetime.now(timezone.utc).replace(tzinfo=None)
+        if current_time < end_date:
+            return True
+        
+        # Rollout period ended - mark as completed
+        try:
+            with self.bot.db_manager.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE greeter_rollout
+                    SET rollout_completed = 1
+                    WHERE id = ?
+                ''', (rollout_id,))
+                conn.commit()
+            days_over = (current_time - end_date).total_seconds() / 86400
+            self.logger.info(f"Greeter rollout period completed (ended {end_date}, {days_over:.1f} days ago)")
+        except Exception as e:
+            self.logger.error(f"Error completing rollout: {e}")
+        self.active_rollout = None
+        return False
     
     def _check_human_greeting(self, new_user_id: str, channel: str, since_timestamp: int) -> bool:
         """Check if a human has greeted the new user.
@@ -1156,8 +1235,7 @@ class GreeterCommand(BaseCommand):
                             for word in words:
                                 # Remove common punctuation
                                 word = word.strip('.,!?;:()[]{}@')
-                                distance = self._levenshtein_distance(new_user_id_lower, word)
-                                if distance <= self.levenshtein_distance:
+                                if bounded_levenshtein(new_user_id_lower, word, self.levenshtein_distance) is not None:
                                     self.logger.info(f"Human greeting detected: {sender_id} mentioned {new_user_id} in channel {channel}")
                                     return True
                         else:
@@ -1450,8 +1528,7 @@ class GreeterCommand(BaseCommand):
                         words = message.content.lower().split()
                         for word in words:
                             word = word.strip('.,!?;:()[]{}@')
-                            distance = self._levenshtein_distance(sender_id.lower(), word)
-                            if distance <= self.levenshtein_distance:
+                            if bounded_levenshtein(sender_id.lower(), word, self.levenshtein_distance) is not None:
                                 should_cancel = True
                                 break
                     else:
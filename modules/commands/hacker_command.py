@@ -21,6 +21,7 @@ class HackerCommand(BaseCommand):
                 'ifconfig', 'ip addr', 'uname -a']
     description = "Simulates hacking a supervillain's mainframe with hilarious error messages"
     category = "fun"
+    lazy_loadable = False  # Matches commands that are not in keywords
     
     # Documentation
     short_description = "Try Linux commands and get supervillain mainframe errors"
@@ -23,6 +23,7 @@ class PathCommand(BaseCommand):
     requires_dm = False
     cooldown_seconds = 1
     category = "meshcore_info"
+    lazy_loadable = False  # The "p" shortcut is not a keyword
     
     # Documentation
     short_description = "Decode path data to show repeaters involved in message routing"
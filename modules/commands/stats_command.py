@@ -10,6 +10,11 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 from .base_command import BaseCommand
 from ..models import MeshMessage
+from ..stats_rollup import (
+    init_rollup_tables, backfill_rollups, record_rollup, prune_hourly_rollups,
+    METRIC_MESSAGE, METRIC_COMMAND, METRIC_PATH_LENGTH, HOURLY_TABLE, DAILY_TABLE
+)
+from ..leaderboards import Leaderboards, SNAPSHOT_TABLE, init_snapshot_table, window_start
 
 
 class StatsCommand(BaseCommand):
@@ -41,7 +46,9 @@ class StatsCommand(BaseCommand):
         """
         super().__init__(bot)
         self._load_config()
+        self.leaderboards = Leaderboards(self.leaderboard_size)
         self._init_stats_tables()
+        self._seed_leaderboards()
     
     def _load_config(self) -> None:
         """Load configuration settings for stats command."""
@@ -53,6 +60,7 @@ class StatsCommand(BaseCommand):
         self.track_all_messages = self.get_config_value('Stats_Command', 'track_all_messages', fallback=True, value_type='bool')
         self.track_command_details = self.get_config_value('Stats_Command', 'track_command_details', fallback=True, value_type='bool')
         self.anonymize_users = self.get_config_value('Stats_Command', 'anonymize_users', fallback=False, value_type='bool')
+        self.leaderboard_size = self.get_config_value('Stats_Command', 'leaderboard_size', fallback=20, value_type='int')
     
     def _init_stats_tables(self) -> None:
         """Initialize database tables for stats tracking.
@@ -120,7 +128,15 @@ class StatsCommand(BaseCommand):
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_path_length ON path_stats(path_length)')
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_path_sender ON path_stats(sender_id)')
                 
+                # Hourly/daily rollups for the web viewer dashboard
+                init_rollup_tables(cursor)
+                # Leaderboard snapshots published for the web viewer
+                init_snapshot_table(cursor)
+                
                 conn.commit()
+                
+                # One-time backfill of the rollups from existing history
+                backfill_rollups(conn, self.logger)
                 self.logger.info("Stats tables initialized successfully")
                 
         except Exception as e:
@@ -161,7 +177,13 @@ class StatsCommand(BaseCommand):
                     message.rssi,
                     message.path
                 ))
+                record_rollup(cursor, METRIC_MESSAGE, message.timestamp, message.channel, sender_id)
                 conn.commit()
+            
+            timestamp = message.timestamp or time.time()
+            self.leaderboards['message_senders'].record(sender_id, timestamp=timestamp)
+            if message.channel:
+                self.leaderboards['channels'].record(message.channel, sender_id, timestamp=timestamp)
         except Exception as e:
             self.logger.error(f"Error recording message stats: {e}")
     
@@ -198,7 +220,14 @@ class StatsCommand(BaseCommand):
                     message.is_dm,
                     response_sent
                 ))
+                record_rollup(cursor, METRIC_COMMAND, message.timestamp, command_name, sender_id, replied=response_sent)
                 conn.commit()
+            
+            timestamp = message.timestamp or time.time()
+            self.leaderboards['command_users'].record(sender_id, timestamp=timestamp)
+            self.leaderboards['commands'].record(command_name, timestamp=timestamp)
+            if response_sent:
+                self.leaderboards['command_replies'].record(command_name, timestamp=timestamp)
         except Exception as e:
             self.logger.error(f"Error recording command stats: {e}")
     
@@ -244,10 +273,117 @@ class StatsCommand(BaseCommand):
                     path_string,
                     message.hops
                 ))
+                record_rollup(cursor, METRIC_PATH_LENGTH, message.timestamp, message.hops)
                 conn.commit()
+            
+            self.leaderboards['paths'].record(sender_id, message.hops, path_string,
+                                              timestamp=message.timestamp or time.time())
         except Exception as e:
             self.logger.error(f"Error recording path stats: {e}")
     
+    def record_advert(self, public_key: str, name: str, timestamp: Optional[float] = None) -> None:
+        """Count a unique advert packet for the adverts leaderboard.
+        
+        Args:
+            public_key: Public key of the advertising node.
+            name: Node name to display.
+            timestamp: Unix time the advert was heard (defaults to now).
+        """
+        if not self.stats_enabled:
+            return
+        if name:
+            self.leaderboards.names[public_key] = name
+        self.leaderboards['adverts'].record(public_key, timestamp=timestamp)
+    
+    def _seed_leaderboards(self) -> None:
+        """Load the leaderboards from the rollups and raw tables once at startup.
+        
+        The 24h and 7d windows come from the hourly rollups (and raw path/advert rows),
+        all-time counts from the daily rollups. From then on they are kept up to date
+        by the record_* methods.
+        """
+        boards = self.leaderboards
+        boards.clear()
+        now = time.time()
+        recent = window_start('7d', now)
+        windowed = ('24h', '7d')
+        try:
+            with sqlite3.connect(self.bot.db_manager.db_path) as conn:
+                cursor = conn.cursor()
+                # _init_stats_tables has created and backfilled the rollups
+                for table, windows, params in ((HOURLY_TABLE, windowed, (recent,)), (DAILY_TABLE, ('all',), (0,))):
+                    cursor.execute(f'''
+                        SELECT bucket, metric, key, subkey, count, replied FROM {table}
+                        WHERE metric IN (?, ?) AND bucket >= ?
+                    ''', (METRIC_MESSAGE, METRIC_COMMAND, *params))
+                    for bucket, metric, key, subkey, count, replied in cursor.fetchall():
+                        if metric == METRIC_MESSAGE:
+                            boards['message_senders'].record(subkey, amount=count, timestamp=bucket, windows=windows)
+                            if key:
+                                boards['channels'].record(key, subkey, amount=count, timestamp=bucket, windows=windows)
+                        else:
+                            boards['command_users'].record(subkey, amount=count, timestamp=bucket, windows=windows)
+                            boards['commands'].record(key, amount=count, timestamp=bucket, windows=windows)
+                            if replied:
+                                boards['command_replies'].record(key, amount=replied, timestamp=bucket, windows=windows)
+                
+                # Raw path rows are kept for data_retention_days; the longest per sender and hour is enough
+                cursor.execute('''
+                    SELECT sender_id, MAX(path_length), path_string, timestamp
+                    FROM path_stats
+                    GROUP BY sender_id, timestamp - timestamp % 3600
+                ''')
+                for sender_id, path_length, path_string, timestamp in cursor.fetchall():
+                    boards['paths'].record(sender_id, path_length, path_string, timestamp=timestamp)
+                
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('unique_advert_packets', 'daily_stats', 'complete_contact_tracking')")
+                advert_tables = {row[0] for row in cursor.fetchall()}
+                if 'unique_advert_packets' in advert_tables:
+                    # first_seen is stored as local time
+                    since = datetime.fromtimestamp(recent).strftime('%Y-%m-%d %H:%M:%S')
+                    cursor.execute('''
+                        SELECT public_key, strftime('%Y-%m-%d %H:00:00', first_seen) as hour, COUNT(*)
+                        FROM unique_advert_packets
+                        WHERE first_seen >= ?
+                        GROUP BY public_key, hour
+                    ''', (since,))
+                    for public_key, hour, count in cursor.fetchall():
+                        if hour:
+                            timestamp = datetime.strptime(hour, '%Y-%m-%d %H:%M:%S').timestamp()
+                            boards['adverts'].record(public_key, amount=count, timestamp=timestamp, windows=windowed)
+                if 'daily_stats' in advert_tables:
+                    cursor.execute('SELECT public_key, SUM(advert_count) FROM daily_stats GROUP BY public_key')
+                    for public_key, count in cursor.fetchall():
+                        boards['adverts'].record(public_key, amount=count or 0, timestamp=now, windows=('all',))
+                if 'complete_contact_tracking' in advert_tables:
+                    keys = {entry['key'] for window in ('24h', '7d', 'all') for entry in boards['adverts'].top(window)}
+                    if keys:
+                        placeholders = ','.join('?' * len(keys))
+                        cursor.execute(f'SELECT public_key, name FROM complete_contact_tracking WHERE public_key IN ({placeholders})', tuple(keys))
+                        boards.names.update({public_key: name for public_key, name in cursor.fetchall() if name})
+            self.logger.debug("Stats leaderboards loaded")
+        except Exception as e:
+            self.logger.error(f"Error loading stats leaderboards: {e}")
+    
+    def flush_leaderboards(self) -> None:
+        """Slide the leaderboard windows forward and publish them for the web viewer.
+        
+        Called periodically by the scheduler. Rewrites the snapshot table only when a
+        board changed; otherwise just marks the snapshot as current.
+        """
+        if not self.stats_enabled:
+            return
+        try:
+            self.leaderboards.decay()
+            with sqlite3.connect(self.bot.db_manager.db_path) as conn:
+                if self.leaderboards.dirty():
+                    self.leaderboards.write_snapshot(conn)
+                else:
+                    conn.execute(f'UPDATE {SNAPSHOT_TABLE} SET updated_at = ?', (int(time.time()),))
+                conn.commit()
+        except Exception as e:
+            self.logger.error(f"Error publishing stats leaderboards: {e}")
+    
     def _is_valid_path_format(self, path: str) -> bool:
         """Check if path contains actual node IDs rather than descriptive text.
         
@@ -378,64 +514,31 @@ class StatsCommand(BaseCommand):
             str: Formatted string containing basic statistics (commands, top user, etc.).
         """
         try:
-            # Get time window (24 hours ago)
-            now = int(time.time())
-            day_ago = now - (24 * 60 * 60)
+            commands = self.leaderboards['commands']
+            commands_received = commands.total('24h')
+            bot_replies = self.leaderboards['command_replies'].total('24h')
             
-            with sqlite3.connect(self.bot.db_manager.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Bot commands received
-                cursor.execute('''
-                    SELECT COUNT(*) FROM command_stats 
-                    WHERE timestamp >= ?
-                ''', (day_ago,))
-                commands_received = cursor.fetchone()[0]
-                
-                # Bot replies sent
-                cursor.execute('''
-                    SELECT COUNT(*) FROM command_stats 
-                    WHERE timestamp >= ? AND response_sent = 1
-                ''', (day_ago,))
-                bot_replies = cursor.fetchone()[0]
-                
-                # Top command
-                cursor.execute('''
-                    SELECT command_name, COUNT(*) as count 
-                    FROM command_stats 
-                    WHERE timestamp >= ?
-                    GROUP BY command_name 
-                    ORDER BY count DESC 
-                    LIMIT 1
-                ''', (day_ago,))
-                top_command_result = cursor.fetchone()
-                if top_command_result:
-                    top_command = f"{top_command_result[0]} ({top_command_result[1]})"
-                else:
-                    top_command = self.translate('commands.stats.basic.none')
-                
-                # Top user
-                cursor.execute('''
-                    SELECT sender_id, COUNT(*) as count 
-                    FROM command_stats 
-                    WHERE timestamp >= ?
-                    GROUP BY sender_id 
-                    ORDER BY count DESC 
-                    LIMIT 1
-                ''', (day_ago,))
-                top_user_result = cursor.fetchone()
-                if top_user_result:
-                    top_user = f"{top_user_result[0]} ({top_user_result[1]})"
-                else:
-                    top_user = self.translate('commands.stats.basic.none')
-                
-                response = f"""{self.translate('commands.stats.basic.header')}
+            # Top command
+            top_commands = commands.top('24h', 1)
+            if top_commands:
+                top_command = f"{top_commands[0]['key']} ({top_commands[0]['count']})"
+            else:
+                top_command = self.translate('commands.stats.basic.none')
+            
+            # Top user
+            top_users = self.leaderboards['command_users'].top('24h', 1)
+            if top_users:
+                top_user = f"{top_users[0]['key']} ({top_users[0]['count']})"
+            else:
+                top_user = self.translate('commands.stats.basic.none')
+            
+            response = f"""{self.translate('commands.stats.basic.header')}
 {self.translate('commands.stats.basic.commands', count=commands_received, replies=bot_replies)}
 {self.translate('commands.stats.basic.top_command', command=top_command)}
 {self.translate('commands.stats.basic.top_user', user=top_user)}"""
-                
-                return response
-                
+            
+            return response
+        
         except Exception as e:
             self.logger.error(f"Error getting basic stats: {e}")
             return self.translate('commands.stats.error', error=str(e))
@@ -447,36 +550,22 @@ class StatsCommand(BaseCommand):
             str: Formatted leaderboard string.
         """
         try:
-            # Get time window (24 hours ago)
-            now = int(time.time())
-            day_ago = now - (24 * 60 * 60)
+            # Top bot users (people who triggered commands) in the last 24 hours
+            top_users = self.leaderboards['command_users'].top('24h', 5)
             
-            with sqlite3.connect(self.bot.db_manager.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Top bot users (people who triggered commands)
-                cursor.execute('''
-                    SELECT sender_id, COUNT(*) as count 
-                    FROM command_stats 
-                    WHERE timestamp >= ?
-                    GROUP BY sender_id 
-                    ORDER BY count DESC 
-                    LIMIT 5
-                ''', (day_ago,))
-                top_users = cursor.fetchall()
-                
-                # Build response
-                response = self.translate('commands.stats.users.header') + "\n"
-                
-                if top_users:
-                    for i, (user, count) in enumerate(top_users, 1):
-                        display_user = user[:12] + "..." if len(user) > 15 else user
-                        response += f"{i}. {display_user}: {count}\n"
-                else:
-                    response += self.translate('commands.stats.users.none') + "\n"
-                
-                return response
-                
+            # Build response
+            response = self.translate('commands.stats.users.header') + "\n"
+            
+            if top_users:
+                for i, entry in enumerate(top_users, 1):
+                    user = entry['key']
+                    display_user = user[:12] + "..." if len(user) > 15 else user
+                    response += f"{i}. {display_user}: {entry['count']}\n"
+            else:
+                response += self.translate('commands.stats.users.none') + "\n"
+            
+            return response
+        
         except Exception as e:
             self.logger.error(f"Error getting bot user leaderboard: {e}")
             return self.translate('commands.stats.error_bot_users', error=str(e))
@@ -488,41 +577,27 @@ class StatsCommand(BaseCommand):
             str: Formatted leaderboard string.
         """
         try:
-            # Get time window (24 hours ago)
-            now = int(time.time())
-            day_ago = now - (24 * 60 * 60)
+            # Top channels by message count with unique user counts
+            top_channels = self.leaderboards['channels'].top('24h', 5)
             
-            with sqlite3.connect(self.bot.db_manager.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Top channels by message count with unique user counts
-                cursor.execute('''
-                    SELECT channel, COUNT(*) as message_count, COUNT(DISTINCT sender_id) as unique_users
-                    FROM message_stats 
-                    WHERE timestamp >= ? AND channel IS NOT NULL
-                    GROUP BY channel 
-                    ORDER BY message_count DESC 
-                    LIMIT 5
-                ''', (day_ago,))
-                top_channels = cursor.fetchall()
-                
-                # Build compact response
-                response = self.translate('commands.stats.channels.header') + "\n"
-                
-                if top_channels:
-                    for i, (channel, msg_count, unique_users) in enumerate(top_channels, 1):
-                        display_channel = channel[:12] + "..." if len(channel) > 15 else channel
-                        # Handle singular/plural for messages and users
-                        msg_text = self.translate('commands.stats.channels.msg_singular') if msg_count == 1 else self.translate('commands.stats.channels.msg_plural')
-                        user_text = self.translate('commands.stats.channels.user_singular') if unique_users == 1 else self.translate('commands.stats.channels.user_plural')
-                        response += self.translate('commands.stats.channels.format', rank=i, channel=display_channel, msg_count=msg_count, msg_text=msg_text, user_count=unique_users, user_text=user_text) + "\n"
-                    # Remove trailing newline
-                    response = response.rstrip('\n')
-                else:
-                    response += self.translate('commands.stats.channels.none')
-                
-                return response
-                
+            # Build compact response
+            response = self.translate('commands.stats.channels.header') + "\n"
+            
+            if top_channels:
+                for i, entry in enumerate(top_channels, 1):
+                    channel, msg_count, unique_users = entry['key'], entry['count'], entry['distinct']
+                    display_channel = channel[:12] + "..." if len(channel) > 15 else channel
+                    # Handle singular/plural for messages and users
+                    msg_text = self.translate('commands.stats.channels.msg_singular') if msg_count == 1 else self.translate('commands.stats.channels.msg_plural')
+                    user_text = self.translate('commands.stats.channels.user_singular') if unique_users == 1 else self.translate('commands.stats.channels.user_plural')
+                    response += self.translate('commands.stats.channels.format', rank=i, channel=display_channel, msg_count=msg_count, msg_text=msg_text, user_count=unique_users, user_text=user_text) + "\n"
+                # Remove trailing newline
+                response = response.rstrip('\n')
+            else:
+                response += self.translate('commands.stats.channels.none')
+            
+            return response
+        
         except Exception as e:
             self.logger.error(f"Error getting channel leaderboard: {e}")
             return self.translate('commands.stats.error_channels', error=str(e))
@@ -534,55 +609,53 @@ class StatsCommand(BaseCommand):
             str: Formatted leaderboard string.
         """
         try:
-            # Get time window (24 hours ago)
-            now = int(time.time())
-            day_ago = now - (24 * 60 * 60)
+            # Top longest paths (one per user, more results with compact format)
+            longest_paths = self.leaderboards['paths'].top('24h', 8)
             
-            with sqlite3.connect(self.bot.db_manager.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Top longest paths (one per user, more results with compact format)
-                cursor.execute('''
-                    SELECT sender_id, path_length, path_string 
-                    FROM path_stats p1
-                    WHERE timestamp >= ? 
-                    AND path_length = (
-                        SELECT MAX(path_length) 
-                        FROM path_stats p2 
-                        WHERE p2.sender_id = p1.sender_id 
-                        AND p2.timestamp >= ?
-                    )
-                    GROUP BY sender_id
-                    ORDER BY path_length DESC 
-                    LIMIT 8
-                ''', (day_ago, day_ago))
-                longest_paths = cursor.fetchall()
-                
-                # Build compact response with length checking
-                response = ""
-                max_length = self.get_max_message_length(message) if message else 130
-                
-                if longest_paths:
-                    for i, (sender, path_len, path_str) in enumerate(longest_paths, 1):
-                        # Truncate sender name to fit more data
-                        display_sender = sender[:8] + "..." if len(sender) > 11 else sender
-                        # Compact format: "1 Gundam 56,1c,98,1a,aa,cd,5f"
-                        new_line = self.translate('commands.stats.paths.format', rank=i, sender=display_sender, path=path_str) + "\n"
-                        
-                        # Check if adding this line would exceed the limit
-                        if len(response + new_line) > max_length:
-                            break
-                        
-                        response += new_line
-                else:
-                    response = self.translate('commands.stats.paths.none') + "\n"
-                
-                return response
-                
+            # Build compact response with length checking
+            response = ""
+            max_length = self.get_max_message_length(message) if message else 130
+            
+            if longest_paths:
+                for i, entry in enumerate(longest_paths, 1):
+                    sender, path_str = entry['key'], entry['label']
+                    # Truncate sender name to fit more data
+                    display_sender = sender[:8] + "..." if len(sender) > 11 else sender
+                    # Compact format: "1 Gundam 56,1c,98,1a,aa,cd,5f"
+                    new_line = self.translate('commands.stats.paths.format', rank=i, sender=display_sender, path=path_str) + "\n"
+                    
+                    # Check if adding this line would exceed the limit
+                    if len(response + new_line) > max_length:
+                        break
+                    
+                    response += new_line
+            else:
+                response = self.translate('commands.stats.paths.none') + "\n"
+            
+            return response
+        
         except Exception as e:
             self.logger.error(f"Error getting path leaderboard: {e}")
             return self.translate('commands.stats.error_paths', error=str(e))
     
+    def _get_advert_hashes(self, public_key: str) -> Optional[str]:
+        """Get the packet hashes of a node's unique adverts in the last 24 hours.
+        
+        Returns:
+            Optional[str]: Comma-separated packet hashes, or None if there are none.
+        """
+        with sqlite3.connect(self.bot.db_manager.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT packet_hash
+                FROM unique_advert_packets
+                WHERE public_key = ?
+                AND first_seen >= datetime('now', '-24 hours')
+                ORDER BY first_seen
+            ''', (public_key,))
+            hash_rows = cursor.fetchall()
+        return ', '.join([row[0] for row in hash_rows]) if hash_rows else None
+    
     async def _get_adverts_leaderboard(self, message: Optional[MeshMessage] = None, show_hashes: bool = False) -> str:
         """Get leaderboard for nodes with most unique advert packets in last 24 hours.
         
@@ -594,161 +667,55 @@ class StatsCommand(BaseCommand):
             str: Formatted leaderboard string.
         """
         try:
-            with sqlite3.connect(self.bot.db_manager.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Check if daily_stats table exists
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='daily_stats'")
-                has_daily_stats = cursor.fetchone() is not None
-                
-                if has_daily_stats:
-                    if show_hashes:
-                        # Query with packet hashes for validation
-                        # First get the top nodes, then get their hashes
-                        cursor.execute('''
-                            SELECT 
-                                c.public_key,
-                                c.name,
-                                COALESCE(
-                                    (SELECT advert_count FROM daily_stats 
-                                     WHERE date = DATE(c.last_advert_timestamp) 
-                                     AND public_key = c.public_key), 0
-                                ) as unique_adverts
-                            FROM complete_contact_tracking c
-                            WHERE c.last_advert_timestamp >= datetime('now', '-24 hours')
-                            GROUP BY c.public_key, c.name
-                            HAVING unique_adverts > 0
-                            ORDER BY unique_adverts DESC
-                            LIMIT 20
-                        ''')
-                        top_nodes = cursor.fetchall()
-                        
-                        # Now get packet hashes for each node
-                        top_adverts = []
-                        for public_key, name, count in top_nodes:
-                            # Get packet hashes for this node in the last 24 hours
-                            cursor.execute('''
-                                SELECT packet_hash 
-                                FROM unique_advert_packets 
-                                WHERE public_key = ? 
-                                AND first_seen >= datetime('now', '-24 hours')
-                                ORDER BY first_seen
-                            ''', (public_key,))
-                            hash_rows = cursor.fetchall()
-                            packet_hashes = ', '.join([row[0] for row in hash_rows]) if hash_rows else None
-                            top_adverts.append((public_key, name, count, packet_hashes))
-                    else:
-                        # Query nodes that advertised in the last 24 hours
-                        # Get advert_count from daily_stats for the day of last_advert_timestamp
-                        # This gives us the count of unique adverts for that day
-                        cursor.execute('''
-                            SELECT 
-                                c.public_key,
-                                c.name,
-                                COALESCE(
-                                    (SELECT advert_count FROM daily_stats 
-                                     WHERE date = DATE(c.last_advert_timestamp) 
-                                     AND public_key = c.public_key), 0
-                                ) as unique_adverts
-                            FROM complete_contact_tracking c
-                            WHERE c.last_advert_timestamp >= datetime('now', '-24 hours')
-                            GROUP BY c.public_key, c.name
-                            HAVING unique_adverts > 0
-                            ORDER BY unique_adverts DESC
-                            LIMIT 20
-                        ''')
-                        top_adverts = cursor.fetchall()
-                else:
-                    # Fallback: use advert_count from complete_contact_tracking
-                    # This is less accurate but works if daily_stats doesn't exist
-                    if show_hashes:
-                        # Get nodes first
-                        cursor.execute('''
-                            SELECT public_key, name, advert_count as unique_adverts
-                            FROM complete_contact_tracking
-                            WHERE last_advert_timestamp >= datetime('now', '-24 hours')
-                            ORDER BY advert_count DESC
-                            LIMIT 20
-                        ''')
-                        top_nodes = cursor.fetchall()
-                        
-                        # Get packet hashes for each node
-                        top_adverts = []
-                        for public_key, name, count in top_nodes:
-                            cursor.execute('''
-                                SELECT packet_hash 
-                                FROM unique_advert_packets 
-                                WHERE public_key = ? 
-                                AND first_seen >= datetime('now', '-24 hours')
-                                ORDER BY first_seen
-                            ''', (public_key,))
-                            hash_rows = cursor.fetchall()
-                            packet_hashes = ', '.join([row[0] for row in hash_rows]) if hash_rows else None
-                            top_adverts.append((public_key, name, count, packet_hashes))
-                    else:
-                        cursor.execute('''
-                            SELECT public_key, name, advert_count as unique_adverts
-                            FROM complete_contact_tracking
-                            WHERE last_advert_timestamp >= datetime('now', '-24 hours')
-                            ORDER BY advert_count DESC
-                            LIMIT 20
-                        ''')
-                        top_adverts = cursor.fetchall()
-                
-                # Build compact response with length checking
-                response = self.translate('commands.stats.adverts.header') + "\n"
-                max_length = self.get_max_message_length(message) if message else 130
-                
-                if top_adverts:
-                    for i, row in enumerate(top_adverts, 1):
-                        if show_hashes:
-                            public_key, name, count, packet_hashes = row
-                        else:
-                            public_key, name, count = row
-                            packet_hashes = None
-                        
-                        # Truncate name if needed
-                        display_name = name[:15] + "..." if len(name) > 18 else name
-                        # Format: "1. NodeName: 42 adverts"
-                        advert_text = self.translate('commands.stats.adverts.advert_singular') if count == 1 else self.translate('commands.stats.adverts.advert_plural')
-                        
-                        if show_hashes and packet_hashes:
-                            # Format with packet hashes: "1. NodeName: 42 adverts\n   Hashes: abc123, def456, ..."
-                            main_line = self.translate('commands.stats.adverts.format', 
-                                                     rank=i, 
-                                                     name=display_name, 
-                                                     count=count,
-                                                     advert_text=advert_text)
-                            
-                            # Split packet hashes and format them
-                            hash_list = [h.strip() for h in packet_hashes.split(',') if h.strip()]
-                            # Show first few hashes (truncate if too many)
-                            if len(hash_list) > 10:
-                                hash_display = ', '.join(hash_list[:10]) + f" ... ({len(hash_list)} total)"
-                            else:
-                                hash_display = ', '.join(hash_list)
-                            
-                            new_line = f"{main_line}\n   {self.translate('commands.stats.adverts.hashes_label', hashes=hash_display)}"
+            top_adverts = self.leaderboards['adverts'].top('24h', 20)
+            
+            # Build compact response with length checking
+            response = self.translate('commands.stats.adverts.header') + "\n"
+            max_length = self.get_max_message_length(message) if message else 130
+            
+            if top_adverts:
+                for i, entry in enumerate(top_adverts, 1):
+                    public_key, count = entry['key'], entry['count']
+                    name = self.leaderboards.names.get(public_key) or public_key[:8]
+                    
+                    # Truncate name if needed
+                    display_name = name[:15] + "..." if len(name) > 18 else name
+                    # Format: "1. NodeName: 42 adverts"
+                    advert_text = self.translate('commands.stats.adverts.advert_singular') if count == 1 else self.translate('commands.stats.adverts.advert_plural')
+                    main_line = self.translate('commands.stats.adverts.format',
+                                             rank=i,
+                                             name=display_name,
+                                             count=count,
+                                             advert_text=advert_text)
+                    
+                    # Packet hashes are only looked up for the nodes that are shown
+                    packet_hashes = self._get_advert_hashes(public_key) if show_hashes else None
+                    if packet_hashes:
+                        # Format with packet hashes: "1. NodeName: 42 adverts\n   Hashes: abc123, def456, ..."
+                        hash_list = [h.strip() for h in packet_hashes.split(',') if h.strip()]
+                        # Show first few hashes (truncate if too many)
+                        if len(hash_list) > 10:
+                            hash_display = ', '.join(hash_list[:10]) + f" ... ({len(hash_list)} total)"
                         else:
-                            new_line = self.translate('commands.stats.adverts.format', 
-                                                     rank=i, 
-                                                     name=display_name, 
-                                                     count=count,
-                                                     advert_text=advert_text) + "\n"
-                        
-                        # Check if adding this line would exceed the limit
-                        if len(response + new_line.rstrip('\n')) > max_length:
-                            break
+                            hash_display = ', '.join(hash_list)
                         
-                        response += new_line
+                        new_line = f"{main_line}\n   {self.translate('commands.stats.adverts.hashes_label', hashes=hash_display)}"
+                    else:
+                        new_line = main_line + "\n"
                     
-                    # Remove trailing newline
-                    response = response.rstrip('\n')
-                else:
-                    response += self.translate('commands.stats.adverts.none')
-                
-                return response
+                    # Check if adding this line would exceed the limit
+                    if len(response + new_line.rstrip('\n')) > max_length:
+                        break
+                    
+                    response += new_line
                 
+                # Remove trailing newline
+                response = response.rstrip('\n')
+            else:
+                response += self.translate('commands.stats.adverts.none')
+            
+            return response
+        
         except Exception as e:
             self.logger.error(f"Error getting adverts leaderboard: {e}")
             return self.translate('commands.stats.error_adverts', error=str(e))
@@ -777,6 +744,9 @@ class StatsCommand(BaseCommand):
                 cursor.execute('DELETE FROM path_stats WHERE timestamp < ?', (cutoff_time,))
                 paths_deleted = cursor.rowcount
                 
+                # Daily rollups outlive the raw rows; hourly ones only cover recent windows
+                prune_hourly_rollups(cursor)
+                
                 conn.commit()
                 
                 total_deleted = messages_deleted + commands_deleted + paths_deleted
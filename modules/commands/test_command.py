@@ -25,6 +25,7 @@ class TestCommand(BaseCommand):
     keywords = ['test', 't']
     description = "Responds to 'test' or 't' with connection info"
     category = "basic"
+    lazy_loadable = False  # Matches after stripping control characters
     
     # Documentation
     short_description = "Get test response with connection info"
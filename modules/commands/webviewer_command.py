@@ -127,6 +127,8 @@ class WebViewerCommand(BaseCommand):
             status.update({
                 'circuit_breaker_open': bot_integration.circuit_breaker_open,
                 'circuit_breaker_failures': bot_integration.circuit_breaker_failures,
+                'mesh_updates_sent': getattr(bot_integration, 'mesh_updates_sent', 0),
+                'mesh_updates_dropped': getattr(bot_integration, 'mesh_updates_dropped', 0),
                 'shutdown': getattr(bot_integration, 'is_shutting_down', False)
             })
         
@@ -21,6 +21,7 @@ SEVERITY_INFO = "info"
 CANONICAL_NON_COMMAND_SECTIONS = frozenset({
     "Connection",
     "Bot",
+    "Airtime",
     "Channels",
     "Banned_Users",
     "Localization",
@@ -29,6 +30,7 @@ CANONICAL_NON_COMMAND_SECTIONS = frozenset({
     "Companion_Purge",
     "Keywords",
     "Scheduled_Messages",
+    "Backup",
     "Logging",
     "Custom_Syntax",
     "External_Data",
@@ -211,6 +213,21 @@ def validate_config(config_path: str) -> List[Tuple[str, str]]:
             if msg:
                 results.append((SEVERITY_WARNING, msg))
 
+    # Airtime pacing with no duty cycle would never transmit
+    if config.has_section("Airtime"):
+        try:
+            airtime_enabled = config.getboolean("Airtime", "enabled", fallback=False)
+            duty_cycle = config.getfloat("Airtime", "duty_cycle_percent", fallback=10.0)
+        except ValueError as e:
+            results.append((SEVERITY_ERROR, f"Invalid [Airtime] setting: {e}"))
+        else:
+            if airtime_enabled and duty_cycle <= 0:
+                results.append((
+                    SEVERITY_ERROR,
+                    f"[Airtime] duty_cycle_percent = {duty_cycle:g} blocks every transmission; "
+                    "use a positive value or set enabled = false.",
+                ))
+
     prefix_to_section: Optional[Dict[str, str]] = None
 
     for section in config.sections():
@@ -28,6 +28,7 @@ from meshcore_cli.meshcore_cli import send_cmd, send_chan_msg
 
 # Import our modules
 from .rate_limiter import RateLimiter, BotTxRateLimiter, PerUserRateLimiter, NominatimRateLimiter
+from .airtime import airtime_budget_from_config, lora_settings
 from .message_handler import MessageHandler
 from .command_manager import CommandManager
 from .channel_manager import ChannelManager
@@ -41,6 +42,9 @@ from .feed_manager import FeedManager
 from .service_plugin_loader import ServicePluginLoader
 from .transmission_tracker import TransmissionTracker
 from .utils import resolve_path
+from .metrics import MetricsRegistry
+from .loop_monitor import LoopMonitor
+from .startup import StartupOrchestrator
 
 
 class MeshCoreBot:
@@ -66,6 +70,22 @@ class MeshCoreBot:
         # Bot start time for uptime tracking
         self.start_time = time.time()
         
+        # Latency histograms and queue gauges (exposed via system health and /metrics)
+        if self.config.getboolean('Bot', 'metrics_enabled', fallback=True):
+            self.metrics = MetricsRegistry(self.logger)
+        else:
+            self.metrics = None
+        
+        # Event loop lag sampler and blocking-call detector (started with the loop in start())
+        if self.config.getboolean('Bot', 'loop_monitor_enabled', fallback=True):
+            self.loop_monitor = LoopMonitor(
+                self,
+                interval=self.config.getfloat('Bot', 'loop_monitor_interval', fallback=0.5),
+                threshold=self.config.getfloat('Bot', 'slow_callback_threshold_ms', fallback=250) / 1000.0,
+            )
+        else:
+            self.loop_monitor = None
+        
         # Initialize database manager first (needed by plugins)
         db_path = self.config.get('Bot', 'db_path', fallback='meshcore_bot.db')
         
@@ -116,7 +136,8 @@ class MeshCoreBot:
             self.config.getint('Bot', 'rate_limit_seconds', fallback=10)
         )
         self.bot_tx_rate_limiter = BotTxRateLimiter(
-            self.config.getfloat('Bot', 'bot_tx_rate_limit_seconds', fallback=1.0)
+            self.config.getfloat('Bot', 'bot_tx_rate_limit_seconds', fallback=1.0),
+            airtime_budget=airtime_budget_from_config(self.config)
         )
         # Per-user rate limiter: minimum seconds between replies to the same user (key = pubkey or name)
         self.per_user_rate_limit_enabled = self.config.getboolean(
@@ -196,6 +217,7 @@ class MeshCoreBot:
         try:
             from .mesh_graph import MeshGraph
             self.mesh_graph = MeshGraph(self)
+            self.mesh_graph.start_snapshot_publisher()
             self.logger.info("Mesh graph initialized successfully")
             
             # Register cleanup handler for mesh graph (independent of web viewer)
@@ -233,6 +255,8 @@ class MeshCoreBot:
                 if hasattr(cmd_instance, '_load_translated_keywords'):
                     cmd_instance._load_translated_keywords()
         
+        self._register_queue_gauges()
+        
         # Advert tracking
         self.last_advert_time = None
         
@@ -278,6 +302,18 @@ class MeshCoreBot:
             'timeout': self.config.getint('Connection', 'timeout', fallback=30),
         }
     
+    def get_lora_settings(self) -> Dict[str, Any]:
+        """Get the LoRa modem settings used to compute time-on-air.
+        
+        [Airtime] overrides win, then the settings reported by the connected
+        radio, then MeshCore defaults.
+        
+        Returns:
+            Dict[str, Any]: spreading_factor, bandwidth_khz, coding_rate and preamble_length.
+        """
+        self_info = getattr(self.meshcore, 'self_info', None) if self.meshcore else None
+        return lora_settings(self.config, self_info)
+    
     def reload_config(self) -> Tuple[bool, str]:
         """Reload configuration from file without restarting the bot.
         
@@ -330,7 +366,12 @@ class MeshCoreBot:
             self.rate_limiter = RateLimiter(new_rate_limit)
             
             new_bot_tx_rate_limit = self.config.getfloat('Bot', 'bot_tx_rate_limit_seconds', fallback=1.0)
-            self.bot_tx_rate_limiter = BotTxRateLimiter(new_bot_tx_rate_limit)
+            new_airtime_budget = airtime_budget_from_config(self.config)
+            old_airtime_budget = self.bot_tx_rate_limiter.airtime_budget
+            if new_airtime_budget and old_airtime_budget:
+                # Keep the airtime already spent in the window
+                new_airtime_budget.adopt(old_airtime_budget)
+            self.bot_tx_rate_limiter = BotTxRateLimiter(new_bot_tx_rate_limit, airtime_budget=new_airtime_budget)
             
             self.per_user_rate_limit_enabled = self.config.getboolean(
                 'Bot', 'per_user_rate_limit_enabled', fallback=True
@@ -964,13 +1005,12 @@ long_jokes = false
                 
                 # Setup message event handlers
                 await self.setup_message_handlers()
-                
-                # Set radio clock if needed
-                await self.set_radio_clock()
-                
-                # Set device name to match config if needed
-                await self.set_device_name()
-                
+
+                # Send feed messages that were queued while disconnected
+                if self.feed_manager:
+                    self.feed_manager.notify_connected()
+
+                # Radio clock and device name are set by their own startup stages
                 return True
             else:
                 self.logger.error("Failed to connect to MeshCore node")
@@ -1182,6 +1222,71 @@ long_jokes = false
         
         self.logger.info("Message handlers setup complete")
     
+    def _build_startup(self) -> StartupOrchestrator:
+        """Build the startup stage graph.
+        
+        Everything waits for the connection. Message handlers are registered
+        by connect(), so the command queue starts right away and commands are
+        answered while the remaining stages run. Stages that send radio
+        commands (clock, name, startup advert) run one after another; the
+        rest run concurrently.
+        
+        Returns:
+            StartupOrchestrator: Orchestrator with all stages registered.
+        """
+        startup = StartupOrchestrator(
+            self, default_timeout=self.config.getfloat('Bot', 'startup_stage_timeout', fallback=60.0)
+        )
+        connect_timeout = self.config.getfloat('Bot', 'startup_connect_timeout', fallback=120.0)
+        startup.add('connect', self.connect, timeout=max(0.0, connect_timeout), critical=True)
+        
+        def start_command_queue():
+            if hasattr(self.command_manager, '_start_queue_processor'):
+                self.command_manager._start_queue_processor()
+        
+        def update_bot_prefix():
+            # Update transmission tracker bot prefix now that we're connected
+            if hasattr(self, 'transmission_tracker') and self.transmission_tracker:
+                self.transmission_tracker._update_bot_prefix()
+        
+        async def initialize_feeds():
+            if self.feed_manager:
+                await self.feed_manager.initialize()
+        
+        # Clock and name updates are best effort; a refusal must not hold back the advert
+        async def set_radio_clock():
+            await self.set_radio_clock()
+        
+        async def set_device_name():
+            await self.set_device_name()
+        
+        def start_scheduler():
+            self.scheduler.setup_scheduled_messages()
+            self.scheduler.start()
+        
+        def start_web_viewer():
+            if self.web_viewer_integration and self.web_viewer_integration.enabled:
+                self.web_viewer_integration.start_viewer()
+                self.logger.info("Web viewer started")
+        
+        startup.add('command_queue', start_command_queue, ('connect',))
+        startup.add('bot_prefix', update_bot_prefix, ('connect',))
+        startup.add('radio_clock', set_radio_clock, ('connect',))
+        startup.add('device_name', set_device_name, ('radio_clock',))
+        startup.add('startup_advert', self.send_startup_advert, ('device_name',))
+        startup.add('feeds', initialize_feeds, ('connect',))
+        # Scheduled messages, backups and feed polling do not need the feed drain task
+        startup.add('scheduler', start_scheduler, ('connect',))
+        startup.add('web_viewer', start_web_viewer, ('connect',))
+        
+        for service_name, service_instance in self.services.items():
+            async def start_service(name=service_name, service=service_instance):
+                await service.start()
+                self.logger.info(f"Service '{name}' started")
+            startup.add(f'service:{service_name}', start_service, ('connect',))
+        
+        return startup
+    
     async def start(self) -> None:
         """Start the bot.
         
@@ -1193,44 +1298,22 @@ long_jokes = false
         # Store reference to main event loop for scheduler thread access
         self.main_event_loop = asyncio.get_running_loop()
         
-        # Connect to MeshCore node
-        if not await self.connect():
-            self.logger.error("Failed to connect to MeshCore node")
-            return
-
-        # Update transmission tracker bot prefix now that we're connected
-        if hasattr(self, 'transmission_tracker') and self.transmission_tracker:
-            self.transmission_tracker._update_bot_prefix()
-
-        # Setup scheduled messages
-        self.scheduler.setup_scheduled_messages()
-        
-        # Initialize feed manager (if enabled)
-        if self.feed_manager:
-            await self.feed_manager.initialize()
-        
-        # Start scheduler thread
-        self.scheduler.start()
-        
-        # Start web viewer if enabled
-        if self.web_viewer_integration and self.web_viewer_integration.enabled:
-            self.web_viewer_integration.start_viewer()
-            self.logger.info("Web viewer started")
+        if self.loop_monitor:
+            self.loop_monitor.start()
         
-        # Send startup advert if enabled
-        await self.send_startup_advert()
+        # Import plugins deferred by the plugin manifest in the background
+        warmup_delay = self.config.getfloat('Bot', 'plugin_warmup_delay', fallback=10.0)
+        if warmup_delay >= 0:
+            self.command_manager.plugin_loader.start_warmup(warmup_delay)
         
-        # Start all loaded services
-        for service_name, service_instance in self.services.items():
-            try:
-                await service_instance.start()
-                self.logger.info(f"Service '{service_name}' started")
-            except Exception as e:
-                self.logger.error(f"Failed to start service '{service_name}': {e}")
-        
-        # Start command queue processor if needed
-        if hasattr(self.command_manager, '_start_queue_processor'):
-            self.command_manager._start_queue_processor()
+        # Connect to the node, then bring up everything else concurrently
+        self.startup = self._build_startup()
+        connected = await self.startup.run()
+        for line in self.startup.format_timeline():
+            self.logger.info(line)
+        if not connected:
+            self.logger.error("Failed to connect to MeshCore node")
+            return
         
         # Keep running
         self.logger.info("Bot is running. Press Ctrl+C to stop.")
@@ -1318,6 +1401,12 @@ long_jokes = false
             except Exception as e:
                 self.logger.warning(f"Error shutting down mesh graph: {e}")
         
+        if getattr(self, 'loop_monitor', None):
+            await self.loop_monitor.stop()
+        
+        if hasattr(self, 'command_manager'):
+            await self.command_manager.plugin_loader.stop_warmup()
+        
         # Stop feed manager
         if self.feed_manager:
             await self.feed_manager.stop()
@@ -1332,6 +1421,9 @@ long_jokes = false
         
         # Stop web viewer with proper shutdown sequence
         if self.web_viewer_integration:
+            # Deliver queued mesh updates while the viewer is still up
+            if self.web_viewer_integration.bot_integration:
+                self.web_viewer_integration.bot_integration.shutdown()
             # Web viewer has simpler shutdown
             self.web_viewer_integration.stop_viewer()
             try:
@@ -1364,6 +1456,26 @@ long_jokes = false
         finally:
             self._service_restarting.discard(service_name)
 
+    def _register_queue_gauges(self) -> None:
+        """Register queue-depth gauges read when metrics are snapshotted."""
+        if not self.metrics:
+            return
+        queues = {
+            'command_queue': lambda: len(self.command_manager._command_queue),
+            'pending_messages': lambda: len(self.message_handler.pending_messages),
+            'recent_rf_data': lambda: len(self.message_handler.recent_rf_data),
+        }
+        if self.mesh_graph:
+            queues['mesh_graph_pending_writes'] = lambda: len(self.mesh_graph.pending_updates)
+        if self.web_viewer_integration:
+            queues['web_viewer_mesh_updates'] = lambda: len(self.web_viewer_integration.bot_integration._mesh_pending)
+        if self.packet_capture_service and hasattr(self.packet_capture_service, 'get_publish_stats'):
+            queues['mqtt_publish'] = lambda: sum(
+                broker['queued'] for broker in self.packet_capture_service.get_publish_stats()
+            )
+        for name, callback in queues.items():
+            self.metrics.register_gauge('queue_depth', callback, {'queue': name})
+    
     async def get_system_health(self) -> Dict[str, Any]:
         """Aggregate health status from all components.
         
@@ -1446,6 +1558,16 @@ long_jokes = false
             else:
                 health['status'] = 'unhealthy'
         
+        if getattr(self, 'metrics', None):
+            health['metrics'] = self.metrics.snapshot()
+        if getattr(self, 'loop_monitor', None):
+            health['event_loop'] = self.loop_monitor.get_stats()
+        if getattr(self, 'startup', None):
+            health['startup'] = self.startup.get_timeline()
+        airtime_budget = getattr(getattr(self, 'bot_tx_rate_limiter', None), 'airtime_budget', None)
+        if airtime_budget:
+            health['airtime'] = airtime_budget.get_stats()
+        
         # Store health data in database for web viewer access
         try:
             self.db_manager.set_system_health(health)
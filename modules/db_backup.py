@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Online SQLite backups that do not stall the running bot
+The database is copied with the SQLite backup API a few pages at a time,
+sleeping between steps so the bot's writers get the lock in between. The WAL
+is checkpointed (passively) first so the copy does not have to read through a
+long WAL. Each copy is integrity-checked, optionally gzip-compressed, and old
+copies are rotated out.
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+INTEGRITY_MODES = ('quick', 'full', 'none')
+
+
+class BackupError(Exception):
+    """A backup could not be completed or failed verification."""
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+@dataclass
+class BackupResult:
+    """Outcome of one online backup"""
+    path: str
+    size_bytes: int
+    duration_seconds: float
+    pages: int
+    steps: int
+    restarts: int
+    integrity: str
+    checkpoint: Optional[tuple] = None
+    removed: List[str] = field(default_factory=list)
+
+
+def backup_files(backup_dir: str, stem: str) -> List[Path]:
+    """Backups of the database named ``stem`` in backup_dir, oldest first."""
+    directory = Path(backup_dir)
+    if not directory.is_dir():
+        return []
+    files = [p for p in directory.iterdir()
+             if p.name.startswith(f"{stem}_") and (p.name.endswith('.db') or p.name.endswith('.db.gz'))]
+    return sorted(files, key=lambda p: p.name)
+
+
+def rotate_backups(backup_dir: str, stem: str, keep: int) -> List[str]:
+    """Delete all but the newest ``keep`` backups (keep <= 0 keeps everything).
+
+    Returns:
+        List[str]: Paths of the removed backups.
+    """
+    if keep <= 0:
+        return []
+    removed = []
+    for path in backup_files(backup_dir, stem)[:-keep]:
+        try:
+            path.unlink()
+            removed.append(str(path))
+        except OSError:
+            pass
+    return removed
+
+
+def verify_backup(path: str, mode: str = 'quick') -> str:
+    """Run an integrity check on an uncompressed database copy.
+
+    Returns:
+        str: 'ok', or 'skipped' when mode is 'none'.
+
+    Raises:
+        BackupError: If the check reports problems.
+    """
+    if mode == 'none':
+        return 'skipped'
+    pragma = 'integrity_check' if mode == 'full' else 'quick_check'
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = [row[0] for row in conn.execute(f"PRAGMA {pragma}")]
+    finally:
+        conn.close()
+    if rows != ['ok']:
+        raise BackupError(f"{pragma} failed for {path}: {'; '.join(rows[:5])}")
+    return 'ok'
+
+
+def _compress(source: Path, target: Path) -> None:
+    partial = target.with_name(target.name + '.partial')
+    with open(source, 'rb') as src, gzip.open(partial, 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(partial, target)
+
+
+def online_backup(db_path: str, backup_dir: str, pages_per_step: int = 256, step_sleep: float = 0.05,
+                  compress: bool = True, keep: int = 7, integrity: str = 'quick', max_restarts: int = 5,
+                  logger=None) -> BackupResult:
+    """Copy a live database into backup_dir as ``<stem>_<YYYYmmdd_HHMMSS>.db[.gz]``.
+
+    Writes by other connections restart a stepped copy. After ``max_restarts``
+    restarts the remaining copy is done in one step, which in WAL mode reads a
+    single snapshot without blocking writers.
+
+    Args:
+        db_path: Database to back up.
+        backup_dir: Directory for the copies (created if missing).
+        pages_per_step: Pages copied per step (<= 0 copies everything in one step).
+        step_sleep: Seconds to pause between steps (and to wait after a busy step).
+        compress: Gzip the copy.
+        keep: Number of copies to keep (<= 0 keeps all).
+        integrity: 'quick', 'full' or 'none'.
+        max_restarts: Restarts tolerated before falling back to a single step.
+        logger: Optional logger.
+
+    Returns:
+        BackupResult: Where the copy went and how it was taken.
+
+    Raises:
+        BackupError: If the database is missing or the copy fails verification.
+    """
+    if integrity not in INTEGRITY_MODES:
+        raise ValueError(f"Unknown integrity mode '{integrity}' (expected one of {', '.join(INTEGRITY_MODES)})")
+    source_path = Path(db_path)
+    if not source_path.exists():
+        raise BackupError(f"Database {db_path} does not exist")
+
+    directory = Path(backup_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = source_path.stem
+    copy_path = directory / f"{stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+    partial = copy_path.with_name(copy_path.name + '.partial')
+    started = time.perf_counter()
+    progress_state = {'steps': 0, 'restarts': 0, 'remaining': None, 'total': 0}
+
+    def progress(status, remaining, total):
+        progress_state['steps'] += 1
+        progress_state['total'] = total
+        last = progress_state['remaining']
+        if last is not None and remaining > last:
+            progress_state['restarts'] += 1
+            if progress_state['restarts'] > max_restarts:
+                raise _TooManyRestarts()
+        progress_state['remaining'] = remaining
+        if remaining and step_sleep > 0:
+            # backup()'s own sleep only applies to BUSY/LOCKED steps; pause here
+            # so writers get the database between steps
+            time.sleep(step_sleep)
+
+    source = sqlite3.connect(str(source_path), timeout=30.0)
+    checkpoint = None
+    try:
+        if source.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal':
+            # PASSIVE never waits for readers or writers; it copies what it can
+            checkpoint = tuple(source.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone())
+        target = sqlite3.connect(str(partial))
+        try:
+            pages = pages_per_step if pages_per_step > 0 else -1
+            try:
+                source.backup(target, pages=pages, progress=progress, sleep=step_sleep)
+            except _TooManyRestarts:
+                if logger:
+                    logger.info(f"Backup of {source_path.name} restarted {max_restarts} times by writes; "
+                                f"finishing in one step")
+                source.backup(target, pages=-1)
+        finally:
+            target.close()
+    except sqlite3.Error as e:
+        partial.unlink(missing_ok=True)
+        raise BackupError(f"Backup of {db_path} failed: {e}") from e
+    finally:
+        source.close()
+
+    try:
+        result_integrity = verify_backup(str(partial), integrity)
+        if compress:
+            final_path = copy_path.with_name(copy_path.name + '.gz')
+            _compress(partial, final_path)
+            partial.unlink()
+        else:
+            final_path = copy_path
+            os.replace(partial, final_path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+    removed = rotate_backups(str(directory), stem, keep)
+    result = BackupResult(
+        path=str(final_path),
+        size_bytes=final_path.stat().st_size,
+        duration_seconds=round(time.perf_counter() - started, 3),
+        pages=progress_state['total'],
+        steps=progress_state['steps'],
+        restarts=progress_state['restarts'],
+        integrity=result_integrity,
+        checkpoint=checkpoint,
+        removed=removed,
+    )
+    if logger:
+        logger.info(f"Backed up {source_path.name} to {final_path} ({result.size_bytes / (1024 * 1024):.2f} MB, "
+                    f"{result.pages} pages in {result.steps} steps, {result.duration_seconds}s, "
+                    f"integrity {result.integrity})")
+    return result
@@ -11,6 +11,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 from pathlib import Path
 
+from .metrics import timed
+
 
 class DBManager:
     """Generalized database manager for common operations.
@@ -248,6 +250,7 @@ class DBManager:
             self.logger.error(f"Error getting cached geocoding: {e}")
             return None, None
     
+    @timed('db_write')
     def cache_geocoding(self, query: str, latitude: float, longitude: float, cache_hours: int = 720) -> None:
         """Cache geocoding result for future use.
         
@@ -300,6 +303,7 @@ class DBManager:
             self.logger.error(f"Error getting cached value: {e}")
             return None
     
+    @timed('db_write')
     def cache_value(self, cache_key: str, cache_value: str, cache_type: str, cache_hours: int = 24) -> None:
         """Cache a value for future use.
         
@@ -523,6 +527,7 @@ class DBManager:
             self.logger.error(f"Error executing query: {e}")
             return []
     
+    @timed('db_write')
     def execute_update(self, query: str, params: Tuple = ()) -> int:
         """Execute an update/insert/delete query and return number of affected rows"""
         try:
@@ -554,6 +559,7 @@ class DBManager:
         return cursor.rowcount
 
     # Bot metadata methods
+    @timed('db_write')
     def set_metadata(self, key: str, value: str) -> None:
         """Set a metadata value for the bot.
         
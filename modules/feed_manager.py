@@ -39,6 +39,8 @@ class FeedManager:
             self.max_message_length = 130
             self.default_output_format = '{emoji} {body|truncate:100} - {date}\n{link|truncate:50}'
             self.default_send_interval = 2.0
+            self.queue_batch_size = 20
+            self.queue_retry_seconds = 30.0
         else:
             self.enabled = bot.config.getboolean('Feed_Manager', 'feed_manager_enabled', fallback=False)
             self.default_check_interval = bot.config.getint('Feed_Manager', 'default_check_interval_seconds', fallback=300)
@@ -49,6 +51,8 @@ class FeedManager:
             self.max_message_length = bot.config.getint('Feed_Manager', 'max_message_length', fallback=130)
             self.default_output_format = bot.config.get('Feed_Manager', 'default_output_format', fallback='{emoji} {body|truncate:100} - {date}\n{link|truncate:50}')
             self.default_send_interval = bot.config.getfloat('Feed_Manager', 'default_message_send_interval_seconds', fallback=2.0)
+            self.queue_batch_size = bot.config.getint('Feed_Manager', 'queue_batch_size', fallback=20)
+            self.queue_retry_seconds = bot.config.getfloat('Feed_Manager', 'queue_retry_seconds', fallback=30.0)
         
         # Rate limiting per domain
         self._domain_last_request: Dict[str, float] = {}
@@ -59,6 +63,14 @@ class FeedManager:
         # Semaphore to limit concurrent requests
         self._request_semaphore = asyncio.Semaphore(5)
         
+        # Event-driven queue drain: _queue_feed_message() sets the event, a single
+        # drain task sleeps on it, so an empty queue costs nothing
+        self._queue_event: Optional[asyncio.Event] = None
+        self._queue_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._drain_task: Optional[asyncio.Task] = None
+        self._feed_last_send: Dict[int, float] = {}
+        self._failed_queue_ids: set = set()
+        
         self.logger.info("FeedManager initialized")
     
     async def initialize(self):
@@ -71,9 +83,81 @@ class FeedManager:
         # This avoids issues with using sessions across different event loops
         # The session will be created in the same event loop where it's used
         self.logger.info("FeedManager initialized (session will be created on first use)")
+        
+        self._start_drain_task()
+    
+    def _start_drain_task(self):
+        """Start the queue drain task in the running event loop"""
+        if self._drain_task and not self._drain_task.done():
+            return
+        self._queue_loop = asyncio.get_running_loop()
+        self._queue_event = asyncio.Event()
+        # Messages left over from a previous run are drained immediately
+        self._queue_event.set()
+        self._drain_task = self._queue_loop.create_task(self._drain_message_queue())
+    
+    def _signal_message_queue(self):
+        """Wake the drain task (safe to call from any thread or event loop)"""
+        if self._queue_event is None or self._queue_loop is None or self._queue_loop.is_closed():
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._queue_loop:
+            self._queue_event.set()
+        else:
+            self._queue_loop.call_soon_threadsafe(self._queue_event.set)
+    
+    def notify_connected(self):
+        """Wake the drain task once the bot is connected, to send messages held while it was not"""
+        self._signal_message_queue()
+    
+    async def _drain_message_queue(self):
+        """Send queued messages whenever the queue is signalled
+        
+        Sleeps until _queue_feed_message() signals. While the bot is disconnected
+        from the radio, queued messages are held until notify_connected() signals.
+        If sends failed, the remaining rows are retried after queue_retry_seconds
+        even without a new signal.
+        """
+        self.logger.debug("Feed message queue drain task started")
+        while True:
+            try:
+                await self._queue_event.wait()
+                self._queue_event.clear()
+                if not self._bot_connected():
+                    self.logger.debug("Feed message queue waiting for the bot to connect")
+                    continue
+                failed = await self.process_message_queue()
+                if not self._bot_connected():
+                    # Disconnected mid-pass: the rest is sent after notify_connected()
+                    continue
+                if failed:
+                    try:
+                        await asyncio.wait_for(self._queue_event.wait(), timeout=self.queue_retry_seconds)
+                    except asyncio.TimeoutError:
+                        self._queue_event.set()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"Error in feed message queue drain task: {e}")
+                await asyncio.sleep(self.queue_retry_seconds)
+                self._queue_event.set()
+        self.logger.debug("Feed message queue drain task stopped")
+    
+    def _bot_connected(self) -> bool:
+        return bool(getattr(self.bot, 'connected', False))
     
     async def stop(self):
-        """Stop the feed manager (close HTTP session)"""
+        """Stop the feed manager (close HTTP session and queue drain task)"""
+        if self._drain_task and not self._drain_task.done():
+            self._drain_task.cancel()
+            try:
+                await self._drain_task
+            except asyncio.CancelledError:
+                pass
+        self._drain_task = None
         if self.session and not self.session.closed:
             await self.session.close()
             self.session = None
@@ -969,6 +1053,7 @@ class FeedManager:
                 ))
                 conn.commit()
                 self.logger.debug(f"Queued feed message for {feed['channel_name']}: {item.get('title', '')[:50]}")
+            self._signal_message_queue()
         except Exception as e:
             self.logger.error(f"Error queuing feed message: {e}")
             self._record_feed_error(feed['id'], 'queue', str(e))
@@ -1188,77 +1273,78 @@ class FeedManager:
         except Exception as e:
             self.logger.error(f"Error recording feed error: {e}")
     
-    async def process_message_queue(self):
-        """Process queued feed messages and send them at configured intervals"""
+    def _fetch_queued_batch(self, db_path: str) -> List[sqlite3.Row]:
+        """Fetch the next batch of unsent messages, highest priority first
+        
+        Messages that already failed during the current pass are skipped so one
+        unreachable channel does not hold up the rest of the queue.
+        """
+        exclude = sorted(self._failed_queue_ids)
+        exclude_clause = f"AND q.id NOT IN ({','.join('?' * len(exclude))})" if exclude else ''
+        with sqlite3.connect(db_path, timeout=30.0) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT q.id, q.feed_id, q.channel_name, q.message, q.item_id, q.item_title,
+                       f.message_send_interval_seconds
+                FROM feed_message_queue q
+                JOIN feed_subscriptions f ON q.feed_id = f.id
+                WHERE q.sent_at IS NULL {exclude_clause}
+                ORDER BY q.priority DESC, q.queued_at ASC
+                LIMIT ?
+            ''', (*exclude, self.queue_batch_size))
+            return cursor.fetchall()
+    
+    def _mark_batch_sent(self, db_path: str, sent: List[sqlite3.Row]):
+        """Mark a batch of sent messages and record their activity in a single transaction"""
+        if not sent:
+            return
+        with sqlite3.connect(db_path, timeout=30.0) as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                UPDATE feed_message_queue
+                SET sent_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', [(msg['id'],) for msg in sent])
+            cursor.executemany('''
+                INSERT INTO feed_activity (feed_id, item_id, item_title, message_sent)
+                VALUES (?, ?, ?, 1)
+            ''', [(msg['feed_id'], msg['item_id'], (msg['item_title'] or '')[:200]) for msg in sent])
+            conn.commit()
+    
+    async def process_message_queue(self) -> int:
+        """Send all queued feed messages in batches, respecting per-feed send intervals
+        
+        Messages are dequeued in priority order and paced by each feed's send
+        interval (send_channel_message waits for the bot TX rate limiter). The
+        messages sent from each batch are marked in one transaction when the batch
+        ends, including when the pass stops early because the bot disconnected or
+        an error was raised. Only a crash mid-batch can resend, at most
+        queue_batch_size messages.
+        
+        Returns:
+            int: Number of messages that failed to send and remain queued.
+        """
+        failed = 0
         try:
-            # Get all unsent messages, ordered by priority and queue time
             db_path = str(self.db_path)  # Ensure string, not Path object
-            with sqlite3.connect(db_path, timeout=30.0) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT q.id, q.feed_id, q.channel_name, q.message, q.item_id, q.item_title,
-                           f.message_send_interval_seconds
-                    FROM feed_message_queue q
-                    JOIN feed_subscriptions f ON q.feed_id = f.id
-                    WHERE q.sent_at IS NULL
-                    ORDER BY q.priority DESC, q.queued_at ASC
-                    LIMIT 100
-                ''')
-                messages = cursor.fetchall()
-            
-            if not messages:
-                return
-            
-            # Group messages by feed to respect per-feed send intervals
-            feed_last_send: Dict[int, float] = {}
-            
-            for msg in messages:
-                feed_id = msg['feed_id']
-                channel_name = msg['channel_name']
-                message_text = msg['message']
-                queue_id = msg['id']
-                item_id = msg['item_id']
-                item_title = msg['item_title']
-                
-                # Get send interval for this feed (default if not set)
-                send_interval = msg['message_send_interval_seconds'] or self.default_send_interval
+            while True:
+                messages = self._fetch_queued_batch(db_path)
+                if not messages:
+                    break
                 
-                # Check if we need to wait before sending this feed's message
-                if feed_id in feed_last_send:
-                    elapsed = time.time() - feed_last_send[feed_id]
-                    if elapsed < send_interval:
-                        wait_time = send_interval - elapsed
-                        await asyncio.sleep(wait_time)
-                
-                # Send the message
+                sent: List[sqlite3.Row] = []
                 try:
-                    success = await self.bot.command_manager.send_channel_message(channel_name, message_text)
-                    
-                    if success:
-                        # Mark as sent
-                        with sqlite3.connect(db_path, timeout=30.0) as conn:
-                            cursor = conn.cursor()
-                            cursor.execute('''
-                                UPDATE feed_message_queue
-                                SET sent_at = CURRENT_TIMESTAMP
-                                WHERE id = ?
-                            ''', (queue_id,))
-                            conn.commit()
-                        
-                        # Record activity
-                        self._record_feed_activity(feed_id, item_id, item_title)
-                        self.logger.debug(f"Sent queued feed message to {channel_name}: {item_title[:50]}")
-                        feed_last_send[feed_id] = time.time()
-                    else:
-                        self.logger.warning(f"Failed to send queued feed message to channel {channel_name}")
-                        self._record_feed_error(feed_id, 'channel', f"Failed to send to channel {channel_name}")
-                        # Don't mark as sent, will retry later
-                
-                except Exception as e:
-                    self.logger.error(f"Error sending queued feed message: {e}")
-                    self._record_feed_error(feed_id, 'other', str(e))
-                    # Don't mark as sent, will retry later
+                    for msg in messages:
+                        if not self._bot_connected():
+                            return failed
+                        if await self._send_queued_message(msg):
+                            sent.append(msg)
+                        else:
+                            self._failed_queue_ids.add(msg['id'])
+                            failed += 1
+                finally:
+                    self._mark_batch_sent(db_path, sent)
         
         except Exception as e:
             db_path = getattr(self, 'db_path', 'unknown')
@@ -1273,4 +1359,37 @@ class FeedManager:
                     self.logger.error(f"Parent directory: {parent} (exists: {parent.exists()}, writable: {os.access(str(parent), os.W_OK) if parent.exists() else False})")
             else:
                 self.logger.error(f"Database path: {db_path_str}")
-
+        finally:
+            self._failed_queue_ids.clear()
+        
+        return failed
+    
+    async def _send_queued_message(self, msg: sqlite3.Row) -> bool:
+        """Send one queued message, waiting for its feed's send interval"""
+        feed_id = msg['feed_id']
+        channel_name = msg['channel_name']
+        item_title = msg['item_title'] or ''
+        
+        # Get send interval for this feed (default if not set)
+        send_interval = msg['message_send_interval_seconds'] or self.default_send_interval
+        
+        # Check if we need to wait before sending this feed's message
+        if feed_id in self._feed_last_send:
+            elapsed = time.time() - self._feed_last_send[feed_id]
+            if elapsed < send_interval:
+                await asyncio.sleep(send_interval - elapsed)
+        
+        try:
+            success = await self.bot.command_manager.send_channel_message(channel_name, msg['message'])
+            if success:
+                self.logger.debug(f"Sent queued feed message to {channel_name}: {item_title[:50]}")
+                self._feed_last_send[feed_id] = time.time()
+                return True
+            
+            self.logger.warning(f"Failed to send queued feed message to channel {channel_name}")
+            self._record_feed_error(feed_id, 'channel', f"Failed to send to channel {channel_name}")
+        except Exception as e:
+            self.logger.error(f"Error sending queued feed message: {e}")
+            self._record_feed_error(feed_id, 'other', str(e))
+        # Don't mark as sent, will retry later
+        return False
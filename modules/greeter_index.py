@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+In-memory greeted-user lookups for the greeter
+The greeter's Levenshtein dedupe used to compare every unseen sender against
+every greeted name. Names are bucketed by length per greeting scope (a channel,
+or None for global greetings), so only names within the distance threshold in
+length are compared, and each comparison is a banded Levenshtein that stops as
+soon as the threshold cannot be met.
+
+The greeter keeps greeted_users in memory, so the web viewer queues its
+changes (ungreets, ended rollouts) in greeter_changes for the bot to apply.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+CHANGES_TABLE = 'greeter_changes'
+
+
+def init_changes_table(cursor: Any) -> None:
+    """Create the queue of greeter changes made outside the bot."""
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            change_type TEXT NOT NULL,
+            sender_id TEXT,
+            channel TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def queue_change(cursor: Any, change_type: str, sender_id: Optional[str] = None,
+                 channel: Optional[str] = None) -> None:
+    """Queue a change for the running bot's greeter ('ungreet' or 'end_rollout').
+
+    The caller commits, normally in the same transaction as the change itself.
+    """
+    init_changes_table(cursor)
+    cursor.execute(f'''
+        INSERT INTO {CHANGES_TABLE} (change_type, sender_id, channel)
+        VALUES (?, ?, ?)
+    ''', (change_type, sender_id, channel))
+
+
+def bounded_levenshtein(s1: str, s2: str, max_distance: int) -> Optional[int]:
+    """Levenshtein distance between s1 and s2 if it is at most max_distance.
+
+    Only the diagonal band of width 2 * max_distance + 1 is computed, and the
+    scan stops once every cell in a row exceeds max_distance.
+
+    Returns:
+        Optional[int]: The distance, or None if it is greater than max_distance.
+    """
+    if max_distance < 0:
+        return None
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    len1, len2 = len(s1), len(s2)
+    if len1 - len2 > max_distance:
+        return None
+    if len2 == 0:
+        return len1
+    if s1 == s2:
+        return 0
+
+    over = max_distance + 1
+    previous = [j if j <= max_distance else over for j in range(len2 + 1)]
+    for i in range(1, len1 + 1):
+        c1 = s1[i - 1]
+        current = [over] * (len2 + 1)
+        current[0] = i if i <= max_distance else over
+        row_min = current[0]
+        for j in range(max(1, i - max_distance), min(len2, i + max_distance) + 1):
+            value = min(previous[j - 1] + (c1 != s2[j - 1]), current[j - 1] + 1, previous[j] + 1)
+            if value > over:
+                value = over
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return None
+        previous = current
+
+    distance = previous[len2]
+    return distance if distance <= max_distance else None
+
+
+class GreetedNameIndex:
+    """Greeted sender ids per scope, bucketed by the length of the lowercased name.
+
+    Matching is case-insensitive, like the greeter's original comparison; the
+    original sender ids are kept so a match can be reported.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # scope -> name length -> lowercased name -> original sender ids
+        self._scopes: Dict[Optional[str], Dict[int, Dict[str, Set[str]]]] = {}
+        self.loaded = False
+
+    def load(self, rows: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """Replace the contents with (sender_id, scope) rows."""
+        scopes: Dict[Optional[str], Dict[int, Dict[str, Set[str]]]] = {}
+        for sender_id, scope in rows:
+            if sender_id:
+                lowered = sender_id.lower()
+                scopes.setdefault(scope, {}).setdefault(len(lowered), {}).setdefault(lowered, set()).add(sender_id)
+        with self._lock:
+            self._scopes = scopes
+            self.loaded = True
+
+    def invalidate(self) -> None:
+        """Drop the contents so the next lookup reloads them."""
+        with self._lock:
+            self._scopes = {}
+            self.loaded = False
+
+    def add(self, sender_id: str, scope: Optional[str]) -> None:
+        if not sender_id:
+            return
+        lowered = sender_id.lower()
+        with self._lock:
+            self._scopes.setdefault(scope, {}).setdefault(len(lowered), {}).setdefault(lowered, set()).add(sender_id)
+
+    def discard(self, sender_id: str, scope: Optional[str]) -> None:
+        if not sender_id:
+            return
+        lowered = sender_id.lower()
+        with self._lock:
+            lengths = self._scopes.get(scope)
+            names = lengths.get(len(lowered)) if lengths else None
+            if not names or lowered not in names:
+                return
+            names[lowered].discard(sender_id)
+            if not names[lowered]:
+                del names[lowered]
+                if not names:
+                    del lengths[len(lowered)]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(ids) for lengths in self._scopes.values()
+                       for names in lengths.values() for ids in names.values())
+
+    def matches(self, sender_id: str, scope: Optional[str], max_distance: int) -> List[Tuple[str, int]]:
+        """Greeted ids in scope within max_distance of sender_id, closest first."""
+        if not sender_id or max_distance <= 0:
+            return []
+        lowered = sender_id.lower()
+        length = len(lowered)
+        with self._lock:
+            lengths = self._scopes.get(scope)
+            if not lengths:
+                return []
+            candidates = [(name, tuple(ids))
+                          for size in range(max(0, length - max_distance), length + max_distance + 1)
+                          for name, ids in lengths.get(size, {}).items()]
+
+        found = []
+        for name, ids in candidates:
+            distance = bounded_levenshtein(lowered, name, max_distance)
+            if distance is not None:
+                found.extend((greeted_id, distance) for greeted_id in sorted(ids))
+        found.sort(key=lambda match: match[1])
+        return found
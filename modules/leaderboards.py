@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+In-memory top-N leaderboards over sliding time windows
+Counters are updated as stats rows are recorded, so the stats command and the
+web viewer read a short precomputed list instead of aggregating raw tables.
+Events are also kept in hourly buckets for the last 7 days; a decay job
+subtracts buckets as they slide out of the 24h and 7d windows.
+"""
+
+import heapq
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+BUCKET_SECONDS = 3600
+WINDOW_SECONDS = {
+    '24h': 24 * BUCKET_SECONDS,
+    '7d': 7 * 24 * BUCKET_SECONDS,
+}
+WINDOWS = ('24h', '7d', 'all')
+
+SNAPSHOT_TABLE = 'stats_leaderboards'
+
+
+def _bucket(timestamp: float) -> int:
+    ts = int(timestamp)
+    return ts - ts % BUCKET_SECONDS
+
+
+def window_start(window: str, now: float) -> Optional[int]:
+    """First hourly bucket inside a window, or None for all time (same alignment as the rollups)."""
+    seconds = WINDOW_SECONDS.get(window)
+    if seconds is None:
+        return None
+    return _bucket(now - seconds)
+
+
+class _WindowedBoard:
+    """Per-window aggregates plus a cached top-N list for each window.
+
+    Subclasses define how an event is merged into a per-key aggregate and how
+    aggregates are ordered. Windows only ever grow between decays, so the top
+    list is maintained incrementally on record and rebuilt when buckets expire.
+    """
+
+    def __init__(self, name: str, top_n: int = 20, clock: Callable[[], float] = time.time):
+        self.name = name
+        self.top_n = max(1, top_n)
+        self.clock = clock
+        self._lock = threading.Lock()
+        # bucket start -> key -> aggregate, kept for the longest expiring window
+        self._buckets: Dict[int, Dict[str, Any]] = {}
+        self._starts: Dict[str, Optional[int]] = {window: None for window in WINDOWS}
+        self._values: Dict[str, Dict[str, Any]] = {window: {} for window in WINDOWS}
+        self._top: Dict[str, List[str]] = {window: [] for window in WINDOWS}
+        self.version = 0
+
+    # Subclass hooks
+    def _new(self) -> Any:
+        raise NotImplementedError
+
+    def _merge(self, aggregate: Any, event: Tuple) -> Any:
+        raise NotImplementedError
+
+    def _rank(self, aggregate: Any) -> Any:
+        raise NotImplementedError
+
+    def _combine(self, aggregates: Iterable[Any]) -> Any:
+        raise NotImplementedError
+
+    def _subtract(self, window: str, expired: Dict[str, Any], now: float) -> None:
+        raise NotImplementedError
+
+    def _entry(self, key: str, aggregate: Any) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _add(self, event: Tuple, key: str, timestamp: Optional[float], windows: Optional[Iterable[str]]) -> None:
+        now = self.clock()
+        ts = now if timestamp is None else timestamp
+        bucket = _bucket(ts)
+        with self._lock:
+            self._expire(now)
+            targets = WINDOWS if windows is None else windows
+            keep_bucket = False
+            for window in targets:
+                start = self._starts[window]
+                if start is not None:
+                    if bucket < start:
+                        continue
+                    keep_bucket = True
+                values = self._values[window]
+                values[key] = self._merge(values.get(key, self._new()), event)
+                self._promote(window, key)
+            if keep_bucket:
+                per_key = self._buckets.setdefault(bucket, {})
+                per_key[key] = self._merge(per_key.get(key, self._new()), event)
+            self.version += 1
+
+    def _promote(self, window: str, key: str) -> None:
+        """Move key into place in the window's top list after its aggregate grew (O(top_n))."""
+        values = self._values[window]
+        top = self._top[window]
+        rank = self._rank(values[key])
+        if key in top:
+            index = top.index(key)
+        elif len(top) < self.top_n:
+            top.append(key)
+            index = len(top) - 1
+        elif rank > self._rank(values[top[-1]]):
+            top[-1] = key
+            index = len(top) - 1
+        else:
+            return
+        while index > 0 and self._rank(values[top[index - 1]]) < rank:
+            top[index - 1], top[index] = top[index], top[index - 1]
+            index -= 1
+
+    def _rebuild(self, window: str) -> None:
+        values = self._values[window]
+        self._top[window] = heapq.nlargest(self.top_n, values, key=lambda k: self._rank(values[k]))
+
+    def _expire(self, now: float) -> bool:
+        """Drop buckets that slid out of each window (caller holds the lock)."""
+        changed = False
+        for window in WINDOW_SECONDS:
+            start = window_start(window, now)
+            previous = self._starts[window]
+            if previous is not None and start <= previous:
+                continue
+            self._starts[window] = start
+            if previous is None:
+                continue
+            expired_buckets = [b for b in self._buckets if previous <= b < start]
+            if not expired_buckets:
+                continue
+            expired: Dict[str, Any] = {}
+            for b in expired_buckets:
+                for key, aggregate in self._buckets[b].items():
+                    expired.setdefault(key, []).append(aggregate)
+            self._subtract(window, {k: self._combine(v) for k, v in expired.items()}, now)
+            self._rebuild(window)
+            changed = True
+        oldest = self._starts['7d']
+        for b in [b for b in self._buckets if b < oldest]:
+            del self._buckets[b]
+        if changed:
+            self.version += 1
+        return changed
+
+    def decay(self, now: Optional[float] = None) -> bool:
+        """Slide the windows forward. Returns True if any window changed."""
+        with self._lock:
+            return self._expire(self.clock() if now is None else now)
+
+    def top(self, window: str = '24h', limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The leading entries for a window, best first."""
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown leaderboard window '{window}'")
+        with self._lock:
+            self._expire(self.clock())
+            values = self._values[window]
+            keys = self._top[window][:limit] if limit else self._top[window]
+            return [self._entry(key, values[key]) for key in keys]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            for window in WINDOWS:
+                self._values[window].clear()
+                self._top[window] = []
+            self.version += 1
+
+
+class CountBoard(_WindowedBoard):
+    """Counts per key, with the number of distinct subkeys (e.g. users per channel)."""
+
+    def __init__(self, name: str, top_n: int = 20, distinct: bool = False, clock: Callable[[], float] = time.time):
+        super().__init__(name, top_n, clock)
+        self.distinct = distinct
+
+    def record(self, key: Any, subkey: Any = '', amount: int = 1, timestamp: Optional[float] = None,
+               windows: Optional[Iterable[str]] = None) -> None:
+        """Count an event (or `amount` events) for key.
+
+        Args:
+            key: Ranked key (user, channel, command...).
+            subkey: Distinct-counted secondary key (only kept when distinct=True).
+            amount: Number of events.
+            timestamp: Unix time of the event (defaults to now).
+            windows: Restrict to these windows (used when seeding from rollups).
+        """
+        key = '' if key is None else str(key)
+        subkey = str(subkey) if self.distinct and subkey is not None else ''
+        self._add((amount, subkey), key, timestamp, windows)
+
+    def _new(self):
+        return [0, Counter()] if self.distinct else [0, None]
+
+    def _merge(self, aggregate, event):
+        amount, subkey = event
+        aggregate[0] += amount
+        if aggregate[1] is not None:
+            aggregate[1][subkey] += amount
+        return aggregate
+
+    def _rank(self, aggregate):
+        return aggregate[0]
+
+    def _combine(self, aggregates):
+        combined = self._new()
+        for count, subkeys in aggregates:
+            combined[0] += count
+            if combined[1] is not None:
+                combined[1].update(subkeys)
+        return combined
+
+    def _subtract(self, window, expired, now):
+        values = self._values[window]
+        for key, (count, subkeys) in expired.items():
+            aggregate = values.get(key)
+            if aggregate is None:
+                continue
+            aggregate[0] -= count
+            if aggregate[1] is not None:
+                aggregate[1].subtract(subkeys)
+                aggregate[1] = +aggregate[1]
+            if aggregate[0] <= 0:
+                del values[key]
+
+    def _entry(self, key, aggregate):
+        entry = {'key': key, 'count': aggregate[0]}
+        if aggregate[1] is not None:
+            entry['distinct'] = len(aggregate[1])
+        return entry
+
+    def total(self, window: str = '24h') -> int:
+        """Sum of all counts in a window."""
+        with self._lock:
+            self._expire(self.clock())
+            return sum(aggregate[0] for aggregate in self._values[window].values())
+
+
+class MaxBoard(_WindowedBoard):
+    """Largest value per key with its label (e.g. each sender's longest path)."""
+
+    def record(self, key: Any, value: float, label: str = '', timestamp: Optional[float] = None,
+               windows: Optional[Iterable[str]] = None) -> None:
+        key = '' if key is None else str(key)
+        ts = self.clock() if timestamp is None else timestamp
+        self._add((value, label, ts), key, ts, windows)
+
+    def _new(self):
+        return None
+
+    def _merge(self, aggregate, event):
+        if aggregate is None or event[0] > aggregate[0]:
+            return event
+        return aggregate
+
+    def _rank(self, aggregate):
+        return aggregate[0]
+
+    def _combine(self, aggregates):
+        best = None
+        for aggregate in aggregates:
+            best = self._merge(best, aggregate)
+        return best
+
+    def _subtract(self, window, expired, now):
+        # A maximum can't be decremented: recompute affected keys from the buckets still in the window
+        values = self._values[window]
+        start = window_start(window, now)
+        for key in expired:
+            best = None
+            for b, per_key in self._buckets.items():
+                if b >= start and key in per_key:
+                    best = self._merge(best, per_key[key])
+            if best is None:
+                values.pop(key, None)
+            else:
+                values[key] = best
+
+    def _entry(self, key, aggregate):
+        value, label, ts = aggregate
+        return {'key': key, 'value': value, 'label': label, 'timestamp': int(ts)}
+
+
+class Leaderboards:
+    """The stats leaderboards, keyed by board name."""
+
+    def __init__(self, top_n: int = 20, clock: Callable[[], float] = time.time):
+        self.top_n = top_n
+        self.clock = clock
+        self.boards: Dict[str, _WindowedBoard] = {
+            # Command senders ('stats messages', top user in 'stats')
+            'command_users': CountBoard('command_users', top_n, clock=clock),
+            # Commands by name and the replies sent for them
+            'commands': CountBoard('commands', top_n, clock=clock),
+            'command_replies': CountBoard('command_replies', top_n, clock=clock),
+            # Channel messages with distinct senders ('stats channels', web viewer top channels)
+            'channels': CountBoard('channels', top_n, distinct=True, clock=clock),
+            # Message senders (web viewer top users)
+            'message_senders': CountBoard('message_senders', top_n, clock=clock),
+            # Longest path per sender ('stats paths')
+            'paths': MaxBoard('paths', top_n, clock=clock),
+            # Unique advert packets per node, labelled with the node name ('stats adverts')
+            'adverts': CountBoard('adverts', top_n, clock=clock),
+        }
+        # Display names for advert public keys
+        self.names: Dict[str, str] = {}
+        self._flushed_versions: Dict[str, int] = {}
+
+    def __getitem__(self, name: str) -> _WindowedBoard:
+        return self.boards[name]
+
+    def decay(self, now: Optional[float] = None) -> bool:
+        changed = False
+        for board in self.boards.values():
+            changed = board.decay(now) or changed
+        return changed
+
+    def clear(self) -> None:
+        for board in self.boards.values():
+            board.clear()
+
+    def snapshot_rows(self, now: Optional[float] = None) -> List[Tuple]:
+        """Rows for the snapshot table: (board, window, rank, key, value, distinct, label, updated_at)."""
+        updated_at = int(self.clock() if now is None else now)
+        rows = []
+        for name, board in self.boards.items():
+            for window in WINDOWS:
+                for rank, entry in enumerate(board.top(window), 1):
+                    value = entry.get('count', entry.get('value'))
+                    label = self.names.get(entry['key'], '') if name == 'adverts' else entry.get('label', '')
+                    rows.append((name, window, rank, entry['key'], value, entry.get('distinct'), label, updated_at))
+        return rows
+
+    def dirty(self) -> bool:
+        return any(board.version != self._flushed_versions.get(name) for name, board in self.boards.items())
+
+    def write_snapshot(self, conn, now: Optional[float] = None) -> int:
+        """Replace the snapshot table contents with the current top lists (caller commits).
+
+        Returns:
+            int: Number of rows written.
+        """
+        init_snapshot_table(conn.cursor())
+        versions = {name: board.version for name, board in self.boards.items()}
+        rows = self.snapshot_rows(now)
+        conn.execute(f'DELETE FROM {SNAPSHOT_TABLE}')
+        conn.executemany(f'''
+            INSERT INTO {SNAPSHOT_TABLE} (board, window, rank, key, value, distinct_count, label, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        self._flushed_versions = versions
+        return len(rows)
+
+
+def init_snapshot_table(cursor) -> None:
+    """Create the table the bot publishes leaderboard snapshots to (read by the web viewer)."""
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {SNAPSHOT_TABLE} (
+            board TEXT NOT NULL,
+            window TEXT NOT NULL,
+            rank INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            value REAL,
+            distinct_count INTEGER,
+            label TEXT,
+            updated_at INTEGER NOT NULL,
+            PRIMARY KEY (board, window, rank)
+        ) WITHOUT ROWID
+    ''')
+
+
+def read_snapshot(cursor, board: str, window: str, limit: int, max_age: float,
+                  now: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+    """A board's published top list, or None if there is no snapshot newer than max_age seconds."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (SNAPSHOT_TABLE,))
+    if cursor.fetchone() is None:
+        return None
+    cursor.execute(f'SELECT MAX(updated_at) FROM {SNAPSHOT_TABLE}')
+    updated_at = cursor.fetchone()[0]
+    if updated_at is None or updated_at < (time.time() if now is None else now) - max_age:
+        return None
+    cursor.execute(f'''
+        SELECT key, value, distinct_count, label FROM {SNAPSHOT_TABLE}
+        WHERE board = ? AND window = ?
+        ORDER BY rank
+        LIMIT ?
+    ''', (board, window, limit))
+    return [{'key': row[0], 'value': row[1], 'distinct': row[2], 'label': row[3]} for row in cursor.fetchall()]
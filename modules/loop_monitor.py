@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Event loop lag monitor and blocking-call detector
+A sampler coroutine measures how late the event loop wakes it up. A watchdog
+thread notices when the loop has not ticked for longer than the threshold and
+captures the loop thread's stack while it is still blocked. Stalls are
+aggregated by the bot call site that was running, so the worst synchronous
+SQLite, HTTP and geocoding calls inside coroutines can be found and fixed.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+from .metrics import Histogram, get_metrics
+
+# Repository root, used to tell bot frames from library frames
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STACK_LIMIT = 20
+
+
+def _relative(filename: str, root: str) -> str:
+    try:
+        return os.path.relpath(filename, root) if filename.startswith(root + os.sep) else filename
+    except ValueError:
+        return filename
+
+
+def describe_stack(frame, root: str = PROJECT_ROOT) -> Dict[str, Any]:
+    """Summarize a blocked stack: the innermost bot frame, the innermost frame and the formatted stack.
+
+    Returns:
+        Dict[str, Any]: 'site' (innermost frame in the bot's own code, excluding
+        this module), 'blocked_in' (innermost frame overall, often a library
+        call such as a socket read) and 'stack' (formatted, innermost last).
+    """
+    frames = traceback.extract_stack(frame, limit=None)
+    this_file = os.path.abspath(__file__)
+    site = None
+    for entry in reversed(frames):
+        filename = os.path.abspath(entry.filename)
+        if filename.startswith(root + os.sep) and filename != this_file and '/site-packages/' not in filename:
+            site = f"{_relative(filename, root)}:{entry.lineno} in {entry.name}"
+            break
+    innermost = frames[-1] if frames else None
+    blocked_in = (f"{_relative(os.path.abspath(innermost.filename), root)}:{innermost.lineno} in {innermost.name}"
+                  if innermost else 'unknown')
+    return {
+        'site': site or blocked_in,
+        'blocked_in': blocked_in,
+        'stack': ''.join(traceback.format_list(frames[-STACK_LIMIT:])),
+    }
+
+
+class LoopMonitor:
+    """Samples event loop lag and records the call sites of long stalls.
+
+    Args:
+        bot: Bot instance (for logger and optional metrics registry).
+        interval: Seconds between lag samples.
+        threshold: Stall length in seconds that is recorded as an offender.
+        max_sites: Maximum number of distinct call sites kept.
+    """
+
+    def __init__(self, bot, interval: float = 0.5, threshold: float = 0.25, max_sites: int = 50):
+        self.bot = bot
+        self.logger = bot.logger
+        self.interval = max(0.01, interval)
+        self.threshold = max(0.001, threshold)
+        self.max_sites = max(1, max_sites)
+
+        self.lag = Histogram()
+        self.last_lag = 0.0
+        self.stalls = 0
+        self.offenders: Dict[str, Dict[str, Any]] = {}
+
+        self._lock = threading.Lock()
+        self._last_tick = time.monotonic()
+        self._captured: Optional[Dict[str, Any]] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def start(self) -> None:
+        """Start sampling; must be called from the event loop being monitored."""
+        if self._task and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop_event.clear()
+        self._task = asyncio.create_task(self._sample_loop())
+        self._watchdog = threading.Thread(target=self._watch, name='loop-monitor', daemon=True)
+        self._watchdog.start()
+        self.logger.info(f"Event loop monitor started (interval {self.interval}s, "
+                         f"threshold {self.threshold * 1000:.0f}ms)")
+
+    async def stop(self) -> None:
+        self._stop_event.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    async def _sample_loop(self) -> None:
+        while not self._stop_event.is_set():
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.record_lag(max(0.0, now - expected), now)
+
+    def record_lag(self, lag: float, now: Optional[float] = None) -> None:
+        """Record one lag sample and attribute it to the captured call site if it was a stall."""
+        with self._lock:
+            self._last_tick = now if now is not None else time.monotonic()
+            captured, self._captured = self._captured, None
+            self.last_lag = lag
+            self.lag.observe(lag)
+            if lag >= self.threshold:
+                self.stalls += 1
+                if captured is None:
+                    # Stall ended before the watchdog looked; the culprit's stack is gone
+                    captured = {'site': 'unknown (stall ended before capture)', 'blocked_in': 'unknown', 'stack': ''}
+                self._add_offender(captured, lag)
+        metrics = get_metrics(self.bot)
+        if metrics:
+            metrics.observe('event_loop_lag', lag)
+
+    def _add_offender(self, captured: Dict[str, Any], lag: float) -> None:
+        entry = self.offenders.get(captured['site'])
+        if entry is None:
+            if len(self.offenders) >= self.max_sites:
+                smallest = min(self.offenders, key=lambda site: self.offenders[site]['total_ms'])
+                del self.offenders[smallest]
+            entry = self.offenders[captured['site']] = {
+                'site': captured['site'],
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+            }
+        lag_ms = lag * 1000
+        entry['count'] += 1
+        entry['total_ms'] = round(entry['total_ms'] + lag_ms, 1)
+        entry['max_ms'] = round(max(entry['max_ms'], lag_ms), 1)
+        entry['blocked_in'] = captured['blocked_in']
+        entry['stack'] = captured['stack']
+        entry['last_seen'] = time.time()
+
+    def _watch(self) -> None:
+        check_interval = max(0.005, self.threshold / 4)
+        while not self._stop_event.wait(check_interval):
+            with self._lock:
+                stalled_for = time.monotonic() - self._last_tick - self.interval
+                if stalled_for < self.threshold or self._captured is not None:
+                    continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            captured = describe_stack(frame)
+            del frame
+            with self._lock:
+                if self._captured is None:
+                    self._captured = captured
+            self.logger.debug(f"Event loop blocked for {stalled_for * 1000:.0f}ms+ at {captured['site']}")
+
+    def get_stats(self, top: int = 20) -> Dict[str, Any]:
+        """Lag percentiles and the worst call sites by total blocked time."""
+        with self._lock:
+            offenders = sorted(self.offenders.values(), key=lambda e: e['total_ms'], reverse=True)[:top]
+            return {
+                'interval_s': self.interval,
+                'threshold_ms': round(self.threshold * 1000, 1),
+                'samples': self.lag.count,
+                'stalls': self.stalls,
+                'lag_ms': {
+                    'current': round(self.last_lag * 1000, 2),
+                    'p50': round(self.lag.percentile(50) * 1000, 2),
+                    'p99': round(self.lag.percentile(99) * 1000, 2),
+                    'max': round(self.lag.max * 1000, 2),
+                },
+                'offenders': [dict(entry) for entry in offenders],
+            }
+
@@ -7,7 +7,9 @@ Persists graph state across bot restarts for development scenarios.
 
 import sqlite3
 import threading
+import time
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Set
 from collections import defaultdict
 
@@ -37,20 +39,136 @@ class MeshGraph:
         self.batch_interval = bot.config.getint('Path_Command', 'graph_batch_interval_seconds', fallback=30)
         self.batch_max_pending = bot.config.getint('Path_Command', 'graph_batch_max_pending', fallback=100)
         self.startup_load_days = bot.config.getint('Path_Command', 'graph_startup_load_days', fallback=0)
+        self.snapshot_warm_start = bot.config.getboolean('Path_Command', 'graph_snapshot_warm_start', fallback=True)
         
         # Background task for batched writes
         self._batch_task = None
         self._shutdown_event = threading.Event()
         
-        # Load graph from database on startup
-        self._load_from_database()
+        # Version of the in-memory graph: seq counts edge changes within this generation
+        self.graph_generation = int(time.time() * 1000)
+        self.graph_seq = 0
+        self.snapshot_publisher = None
+        self.snapshot_path = self._resolve_snapshot_path()
+        
+        # Load graph from the snapshot (plus newer DB rows) or from the database on startup
+        if not (self.snapshot_warm_start and self._load_from_snapshot()):
+            self._load_from_database()
         
         # Start background batch writer if needed
         if self.write_strategy in ('batched', 'hybrid'):
             self._start_batch_writer()
     
-    def _load_from_database(self):
-        """Load graph edges from database on startup."""
+    def _resolve_snapshot_path(self) -> Optional[str]:
+        """Snapshot file shared with the web viewer (see mesh_graph_snapshot)."""
+        try:
+            from .mesh_graph_snapshot import snapshot_path_from_config
+            db_path = getattr(self.db_manager, 'db_path', None)
+            return snapshot_path_from_config(
+                self.bot.config, getattr(self.bot, 'bot_root', '.'),
+                db_path=str(db_path) if isinstance(db_path, (str, Path)) else None,
+            )
+        except Exception as e:
+            self.logger.debug(f"Cannot resolve mesh graph snapshot path: {e}")
+            return None
+    
+    def _startup_cutoff(self) -> Optional[datetime]:
+        if self.startup_load_days > 0:
+            return datetime.now() - timedelta(days=self.startup_load_days)
+        return None
+    
+    def database_identity(self) -> Optional[Tuple[int, int]]:
+        """Identify the database and how far mesh_connections has grown, for snapshots.
+        
+        Returns:
+            Optional[Tuple[int, int]]: (database id, highest mesh_connections rowid),
+                or None if the database cannot be read.
+        """
+        db_path = getattr(self.db_manager, 'db_path', None)
+        if not isinstance(db_path, (str, Path)):
+            return None
+        from .mesh_graph_snapshot import database_id
+        rows = self.db_manager.execute_query('SELECT MAX(rowid) AS max_rowid FROM mesh_connections')
+        if not rows:
+            return None
+        return database_id(db_path), rows[0]['max_rowid'] or 0
+    
+    def _snapshot_mismatch(self, snapshot) -> Optional[str]:
+        """Why the snapshot cannot stand in for the database rows older than its watermark.
+        
+        Returns:
+            Optional[str]: A reason, or None if the snapshot matches this database and
+                load window.
+        """
+        identity = self.database_identity()
+        if identity is None or not snapshot.db_id:
+            return "its database is unknown"
+        db_id, max_rowid = identity
+        if snapshot.db_id != db_id:
+            return "a different database"
+        if max_rowid < snapshot.db_max_rowid:
+            return "a database with more mesh_connections rows (restored from a backup?)"
+        if snapshot.load_days and not (0 < self.startup_load_days <= snapshot.load_days):
+            return f"a {snapshot.load_days}-day load window"
+        return None
+    
+    def _load_from_snapshot(self) -> bool:
+        """Load edges from the binary snapshot, then replay DB rows seen since it was written.
+        
+        The snapshot is only used if it was taken from this database (same path, and
+        mesh_connections has not shrunk since) with a load window covering the current one.
+        
+        Returns:
+            bool: False if there is no usable snapshot (the caller loads from the database).
+        """
+        if not self.snapshot_path:
+            return False
+        from .mesh_graph_snapshot import SnapshotError, read_snapshot
+        try:
+            snapshot = read_snapshot(self.snapshot_path)
+        except FileNotFoundError:
+            return False
+        except (OSError, SnapshotError) as e:
+            self.logger.warning(f"Ignoring mesh graph snapshot {self.snapshot_path}: {e}")
+            return False
+        
+        mismatch = self._snapshot_mismatch(snapshot)
+        if mismatch:
+            self.logger.info(f"Mesh graph snapshot {self.snapshot_path} is for {mismatch}; loading from database")
+            return False
+        
+        cutoff = self._startup_cutoff()
+        if cutoff is None:
+            self.edges = snapshot.edges
+        else:
+            self.edges = {
+                key: edge for key, edge in snapshot.edges.items()
+                if edge['last_seen'] is not None and edge['last_seen'] >= cutoff
+            }
+        
+        # Every DB write sets last_seen, so rows at or after the watermark may be newer
+        # than the snapshot; rows before it are already in the snapshot
+        replayed = 0
+        if snapshot.watermark is not None:
+            replayed = self._load_from_database(since=snapshot.watermark)
+            if replayed is None:
+                self.edges = {}
+                return False
+        self.logger.info(
+            f"Loaded {len(self.edges)} graph edges from snapshot {self.snapshot_path} "
+            f"({replayed} updated from database)"
+        )
+        return True
+    
+    def _load_from_database(self, since: Optional[datetime] = None) -> Optional[int]:
+        """Load graph edges from database on startup.
+        
+        Args:
+            since: Only load rows with last_seen at or after this time (replay on top of a snapshot).
+        
+        Returns:
+            Optional[int]: Number of rows loaded, or None if the query failed.
+        """
         try:
             query = '''
                 SELECT from_prefix, to_prefix, from_public_key, to_public_key,
@@ -60,13 +178,21 @@ class MeshGraph:
             '''
             
             # Apply date filter if configured
-            if self.startup_load_days > 0:
-                cutoff_date = datetime.now() - timedelta(days=self.startup_load_days)
-                query += f" WHERE last_seen >= '{cutoff_date.isoformat()}'"
+            conditions = []
+            params = []
+            cutoff = self._startup_cutoff()
+            if cutoff is not None:
+                conditions.append('last_seen >= ?')
+                params.append(cutoff.isoformat())
+            if since is not None:
+                conditions.append('last_seen >= ?')
+                params.append(since.isoformat())
+            if conditions:
+                query += ' WHERE ' + ' AND '.join(conditions)
             
             query += " ORDER BY last_seen DESC"
             
-            results = self.db_manager.execute_query(query)
+            results = self.db_manager.execute_query(query, tuple(params))
             
             edge_count = 0
             for row in results:
@@ -87,16 +213,21 @@ class MeshGraph:
                 }
                 edge_count += 1
             
+            if since is not None:
+                return edge_count
+            
             self.logger.info(f"Loaded {edge_count} graph edges from database")
             
             # Log statistics
             if edge_count > 0:
                 total_observations = sum(e['observation_count'] for e in self.edges.values())
                 self.logger.info(f"Graph statistics: {edge_count} edges, {total_observations} total observations")
+            return edge_count
         
         except Exception as e:
             self.logger.warning(f"Error loading graph from database: {e}")
             # Continue with empty graph
+            return None
     
     def add_edge(self, from_prefix: str, to_prefix: str, 
                  from_public_key: Optional[str] = None,
@@ -122,6 +253,7 @@ class MeshGraph:
         
         edge_key = (from_prefix, to_prefix)
         now = datetime.now()
+        self.graph_seq += 1
         
         # Update or create edge
         if edge_key in self.edges:
@@ -216,7 +348,9 @@ class MeshGraph:
                 'last_seen': edge['last_seen'].isoformat() if isinstance(edge['last_seen'], datetime) else str(edge['last_seen']),
                 'avg_hop_position': edge.get('avg_hop_position'),
                 'geographic_distance': edge.get('geographic_distance'),
-                'is_new': is_new
+                'is_new': is_new,
+                'generation': self.graph_generation,
+                'seq': self.graph_seq
             }
             
             # Send update asynchronously
@@ -581,6 +715,30 @@ class MeshGraph:
             self.logger.debug(f"Error building update params for {edge_key}: {e}")
             return None
     
+    def start_snapshot_publisher(self):
+        """Maintain the graph snapshot file read by the web viewer and by warm starts.
+        
+        With [Web_Viewer] mesh_snapshot_enabled it is published every
+        mesh_snapshot_interval_seconds; with only [Path_Command] graph_snapshot_warm_start
+        it is written after batch flushes and at shutdown. Only the bot calls this;
+        the web viewer reads the snapshots instead.
+        """
+        publish_for_viewer = self.bot.config.getboolean('Web_Viewer', 'mesh_snapshot_enabled', fallback=True)
+        if not (publish_for_viewer or self.snapshot_warm_start) or not self.snapshot_path:
+            return
+        try:
+            from .mesh_graph_snapshot import MeshGraphSnapshotPublisher
+            interval = self.bot.config.getfloat('Web_Viewer', 'mesh_snapshot_interval_seconds', fallback=10.0)
+            self.snapshot_publisher = MeshGraphSnapshotPublisher(self, self.snapshot_path, interval)
+            if publish_for_viewer:
+                self.snapshot_publisher.start()
+                self.logger.info(f"Publishing mesh graph snapshots to {self.snapshot_path} every {interval:g}s")
+            else:
+                self.snapshot_publisher.publish(fsync=True)
+        except Exception as e:
+            self.logger.warning(f"Failed to start mesh graph snapshot publisher: {e}")
+            self.snapshot_publisher = None
+    
     def _start_batch_writer(self):
         """Start background task for batched writes."""
         def batch_writer_loop():
@@ -649,6 +807,9 @@ class MeshGraph:
         
         if updates:
             self.logger.debug(f"Flushed {len(updates)} pending graph edge updates")
+            # Keep the warm-start snapshot in step with the database
+            if self.snapshot_publisher:
+                self.snapshot_publisher.publish()
     
     async def _flush_pending_updates(self):
         """Flush all pending edge updates to database (async wrapper)."""
@@ -1012,6 +1173,11 @@ class MeshGraph:
         except Exception as e:
             self.logger.warning(f"Error flushing graph updates on shutdown: {e}")
         
+        # Final snapshot so the web viewer and the next warm start see the complete graph
+        if self.snapshot_publisher:
+            self.snapshot_publisher.stop()
+            self.snapshot_publisher = None
+        
         # Log final statistics
         if self.edges:
             total_observations = sum(e['observation_count'] for e in self.edges.values())
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Mesh graph snapshots shared between the bot and the web viewer
+The bot periodically writes its in-memory MeshGraph to a compact binary file
+(atomically, via rename) stamped with a generation and sequence number, and
+sends every edge change as a sequence-numbered delta. The web viewer loads the
+snapshot once, applies deltas on top, and serves /api/mesh/* without SQLite.
+The same file gives MeshGraph a warm start: edges are read from it with one
+mmap and only rows modified after its high-water mark are read from SQLite.
+The header records which database the snapshot was taken from and the load
+window, so a warm start falls back to a full load when they no longer match.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .utils import resolve_path
+
+SNAPSHOT_MAGIC = b'MGSN'
+SNAPSHOT_FORMAT_VERSION = 4
+
+# magic, format version, record size, generation, seq, created (unix us),
+# high-water mark (newest last_seen, epoch us), database id, highest mesh_connections
+# rowid, startup load days (0 = all), edge count, CRC32 of header and records
+_HEADER = struct.Struct('<4sHHqqqqQqiII')
+# from prefix, to prefix, observations, first seen, last seen (epoch us), avg hop, distance,
+# from public key, to public key (raw 32 bytes), key flags
+_EDGE = struct.Struct('<2s2sIqqdd32s32sB')
+_KEY_BYTES = 32
+_NO_KEY = bytes(_KEY_BYTES)
+# Key flags: which public keys are present
+_HAS_FROM_KEY = 0x01
+_HAS_TO_KEY = 0x02
+
+# Sentinel for a missing timestamp (None)
+_NO_TIME = -(2 ** 63)
+_EPOCH = datetime(1970, 1, 1)
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is truncated, corrupt or an unknown format."""
+
+
+@dataclass
+class GraphSnapshot:
+    """Decoded snapshot: edge dicts keyed by (from_prefix, to_prefix)"""
+    generation: int
+    seq: int
+    created_at: float
+    edges: Dict[Tuple[str, str], Dict[str, Any]]
+    # Newest last_seen in the snapshot; DB rows seen at or after it may be newer
+    watermark: Optional[datetime] = None
+    # database_id() of the database the graph was loaded from (0 = unknown)
+    db_id: int = 0
+    # Highest mesh_connections rowid when the snapshot was taken
+    db_max_rowid: int = -1
+    # [Path_Command] graph_startup_load_days of the graph (0 = every row)
+    load_days: int = 0
+
+
+def snapshot_path_from_config(config, bot_root: Any = '.', db_path: Optional[str] = None) -> str:
+    """Resolve the snapshot file path ([Web_Viewer] mesh_snapshot_path or next to the database).
+
+    Args:
+        db_path: Database path if already resolved (defaults to [Bot] db_path).
+    """
+    path = config.get('Web_Viewer', 'mesh_snapshot_path', fallback='').strip()
+    if not path:
+        path = (db_path or config.get('Bot', 'db_path', fallback='meshcore_bot.db')) + '.meshgraph'
+    return resolve_path(path, bot_root)
+
+
+def database_id(db_path: Any) -> int:
+    """Stable non-zero id for a database file, from its resolved path."""
+    digest = hashlib.sha1(os.path.realpath(str(db_path)).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'little') or 1
+
+
+def _to_micros(value: Any) -> int:
+    """Naive datetime or ISO string -> microseconds since the (naive) epoch."""
+    if value is None:
+        return _NO_TIME
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return _NO_TIME
+    if not isinstance(value, datetime):
+        return _NO_TIME
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> Optional[datetime]:
+    if value == _NO_TIME:
+        return None
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _to_float(value: Any) -> float:
+    return float('nan') if value is None else float(value)
+
+
+def _from_float(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+def _encode_key(value: Optional[str]) -> Optional[bytes]:
+    """Hex public key -> 32 raw bytes, or None if it is missing or not a full key."""
+    if not value:
+        return None
+    try:
+        raw = bytes.fromhex(value)
+    except ValueError:
+        return None
+    return raw if len(raw) == _KEY_BYTES else None
+
+
+def _decode_key(raw: bytes, present: bool) -> Optional[str]:
+    return raw.hex() if present else None
+
+
+def _header(generation: int, seq: int, created_us: int, watermark_us: int, db_id: int,
+            db_max_rowid: int, load_days: int, count: int, crc: int) -> bytes:
+    return _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, _EDGE.size,
+                        generation, seq, created_us, watermark_us, db_id, db_max_rowid,
+                        load_days, count, crc)
+
+
+def encode_snapshot(edges: Iterable[Dict[str, Any]], generation: int, seq: int,
+                    created_at: Optional[float] = None,
+                    db_identity: Optional[Tuple[int, int]] = None, load_days: int = 0) -> bytes:
+    """Serialize edges into the binary snapshot format.
+
+    Args:
+        edges: MeshGraph edge dicts (timestamps may be datetimes or ISO strings).
+        generation: Identifies the publishing MeshGraph instance; seq restarts per generation.
+        seq: Sequence number of the last edge change included in the snapshot.
+        created_at: Unix time the snapshot was taken (defaults to now).
+        db_identity: (database_id(), highest mesh_connections rowid) of the database the
+            graph mirrors, or None if unknown (a warm start then loads from the database).
+        load_days: Startup load window of the graph (0 = every row).
+
+    Returns:
+        bytes: Fixed-size header followed by fixed-width edge records.
+    """
+    records = []
+    watermark_us = _NO_TIME
+    for edge in edges:
+        last_us = _to_micros(edge.get('last_seen'))
+        watermark_us = max(watermark_us, last_us)
+        from_key = _encode_key(edge.get('from_public_key'))
+        to_key = _encode_key(edge.get('to_public_key'))
+        flags = (_HAS_FROM_KEY if from_key else 0) | (_HAS_TO_KEY if to_key else 0)
+        records.append(_EDGE.pack(
+            edge['from_prefix'].encode('ascii', 'ignore')[:2],
+            edge['to_prefix'].encode('ascii', 'ignore')[:2],
+            min(int(edge.get('observation_count') or 0), 0xFFFFFFFF),
+            _to_micros(edge.get('first_seen')),
+            last_us,
+            _to_float(edge.get('avg_hop_position')),
+            _to_float(edge.get('geographic_distance')),
+            from_key or _NO_KEY,
+            to_key or _NO_KEY,
+            flags,
+        ))
+    body = b''.join(records)
+    created_us = int((created_at if created_at is not None else time.time()) * 1_000_000)
+    db_id, db_max_rowid = db_identity if db_identity else (0, -1)
+    fields = (generation, seq, created_us, watermark_us, db_id, db_max_rowid, max(0, int(load_days)), len(records))
+    crc = zlib.crc32(body, zlib.crc32(_header(*fields, 0)))
+    return _header(*fields, crc) + body
+
+
+def decode_snapshot(data) -> GraphSnapshot:
+    """Parse a snapshot produced by encode_snapshot().
+
+    Args:
+        data: bytes or any buffer (e.g. an mmap of the snapshot file).
+
+    Raises:
+        SnapshotError: If the data is truncated, fails its checksum or has an unknown format.
+    """
+    with memoryview(data) as view:
+        if len(view) < _HEADER.size:
+            raise SnapshotError("snapshot truncated")
+        (magic, fmt, record_size, generation, seq, created_us, watermark_us, db_id,
+         db_max_rowid, load_days, count, crc) = _HEADER.unpack_from(view, 0)
+        if magic != SNAPSHOT_MAGIC or fmt != SNAPSHOT_FORMAT_VERSION or record_size != _EDGE.size:
+            raise SnapshotError(f"unsupported snapshot format {magic!r} v{fmt}")
+        end = _HEADER.size + count * _EDGE.size
+        if len(view) != end:
+            raise SnapshotError(f"snapshot truncated: {len(view)} bytes, expected {end}")
+
+        edges: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        with view[_HEADER.size:end] as records:
+            header_crc = zlib.crc32(_header(generation, seq, created_us, watermark_us, db_id,
+                                            db_max_rowid, load_days, count, 0))
+            if zlib.crc32(records, header_crc) != crc:
+                raise SnapshotError("snapshot checksum mismatch")
+            for (from_p, to_p, observations, first_us, last_us, hop, distance,
+                 from_key, to_key, flags) in _EDGE.iter_unpack(records):
+                from_prefix = from_p.rstrip(b'\0').decode('ascii')
+                to_prefix = to_p.rstrip(b'\0').decode('ascii')
+                edges[(from_prefix, to_prefix)] = {
+                    'from_prefix': from_prefix,
+                    'to_prefix': to_prefix,
+                    'from_public_key': _decode_key(from_key, flags & _HAS_FROM_KEY),
+                    'to_public_key': _decode_key(to_key, flags & _HAS_TO_KEY),
+                    'observation_count': observations,
+                    'first_seen': _from_micros(first_us),
+                    'last_seen': _from_micros(last_us),
+                    'avg_hop_position': _from_float(hop),
+                    'geographic_distance': _from_float(distance),
+                }
+    return GraphSnapshot(generation=generation, seq=seq, created_at=created_us / 1_000_000,
+                         edges=edges, watermark=_from_micros(watermark_us), db_id=db_id,
+                         db_max_rowid=db_max_rowid, load_days=load_days)
+
+
+def read_snapshot(path: str) -> GraphSnapshot:
+    """Decode the snapshot file at path through a read-only mmap.
+
+    Raises:
+        OSError: If the file cannot be opened.
+        SnapshotError: If the file is empty, truncated, corrupt or an unknown format.
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:  # Empty file
+            raise SnapshotError(f"snapshot truncated: {e}") from e
+        try:
+            return decode_snapshot(mapped)
+        finally:
+            mapped.close()
+
+
+def write_snapshot_atomic(path: str, data: bytes, fsync: bool = True) -> None:
+    """Write data to a temp file in the same directory and rename it over path.
+
+    Readers therefore always see either the previous or the new snapshot in full.
+
+    Args:
+        fsync: Flush the file to disk before the rename. Without it a power loss
+            can lose the newest snapshot, but never leaves a partial one visible.
+    """
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+class MeshGraphSnapshotPublisher:
+    """Bot side: writes the MeshGraph snapshot whenever it changed, at most once per interval.
+
+    MeshGraph.graph_seq is bumped on every edge change, so it doubles as the dirty
+    counter: the file is only rewritten when it moved since the last write. Writes
+    after batch flushes skip the fsync; the periodic and final writes sync, so on
+    SD cards an idle graph costs no writes and a busy one one fsync per interval.
+    """
+
+    def __init__(self, mesh_graph, path: str, interval_seconds: float = 10.0):
+        self.mesh_graph = mesh_graph
+        self.logger = mesh_graph.logger
+        self.path = path
+        self.interval_seconds = max(1.0, interval_seconds)
+        self.published_seq: Optional[int] = None
+        self.synced_seq: Optional[int] = None
+        self._publish_lock = threading.Lock()
+        self._shutdown_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Publish the current graph immediately, then keep it fresh from a daemon thread."""
+        self.publish()
+
+        def publisher_loop():
+            while not self._shutdown_event.wait(self.interval_seconds):
+                self.publish(fsync=True)
+
+        self._thread = threading.Thread(target=publisher_loop, name='mesh-graph-snapshot', daemon=True)
+        self._thread.start()
+
+    def publish(self, force: bool = False, fsync: bool = False) -> bool:
+        """Write a snapshot if the graph changed since the last one.
+
+        Args:
+            force: Write even if the graph is unchanged.
+            fsync: Make the snapshot durable. If the graph is unchanged but the last
+                write was not synced, the existing file is synced instead of rewritten.
+
+        Returns:
+            bool: True if a snapshot was written.
+        """
+        graph = self.mesh_graph
+        # The publisher thread and the graph's batch writer both publish
+        with self._publish_lock:
+            # Read seq before copying edges: deltas are full edge states, so a copy that
+            # already contains a slightly newer change is harmless when the delta is replayed
+            seq = graph.graph_seq
+            if not force and seq == self.published_seq:
+                if fsync and self.synced_seq != seq:
+                    self._sync_file(seq)
+                return False
+            try:
+                # Read before copying edges, so every row up to the rowid is in the copy
+                db_identity = graph.database_identity()
+                edges = [dict(edge) for edge in list(graph.edges.values())]
+                data = encode_snapshot(edges, graph.graph_generation, seq, db_identity=db_identity,
+                                       load_days=graph.startup_load_days)
+                write_snapshot_atomic(self.path, data, fsync=fsync)
+                self.published_seq = seq
+                if fsync:
+                    self.synced_seq = seq
+                self.logger.debug(f"Published mesh graph snapshot: {len(edges)} edges, seq {seq}")
+                return True
+            except Exception as e:
+                self.logger.warning(f"Error publishing mesh graph snapshot to {self.path}: {e}")
+                return False
+
+    def _sync_file(self, seq: int) -> None:
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self.synced_seq = seq
+        except OSError as e:
+            self.logger.debug(f"Error syncing mesh graph snapshot {self.path}: {e}")
+
+    def stop(self) -> None:
+        """Stop the publisher thread and write a final snapshot."""
+        self._shutdown_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.publish(fsync=True)
+
+
+class MeshGraphSnapshotReader:
+    """Web viewer side: the published snapshot plus the deltas received since.
+
+    Recent deltas are kept in a bounded log so that when a newer snapshot is
+    loaded, any deltas it does not yet include are replayed on top of it. A gap
+    in delta sequence numbers (a lost HTTP push) marks the view as stale until a
+    snapshot covering the gap is published.
+    """
+
+    def __init__(self, path: str, logger: Any = None, max_delta_log: int = 2048):
+        self.path = path
+        self.logger = logger
+        self.edges: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.generation: Optional[int] = None
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.resync_seq: Optional[int] = None
+        self.snapshots_loaded = 0
+        self.deltas_applied = 0
+        self._file_sig: Optional[Tuple[int, int, int]] = None
+        self._delta_log: Deque[Tuple[int, int, Dict[str, Any]]] = deque(maxlen=max_delta_log)
+        self._lock = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        """True once a snapshot has been loaded."""
+        return self.generation is not None and self.snapshots_loaded > 0
+
+    @property
+    def stale(self) -> bool:
+        """True while deltas are known to be missing."""
+        return self.resync_seq is not None
+
+    def refresh(self) -> bool:
+        """Load the snapshot file if it changed on disk.
+
+        Returns:
+            bool: True if the in-memory graph was replaced from a snapshot.
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        sig = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if sig == self._file_sig:
+                return False
+            try:
+                snapshot = read_snapshot(self.path)
+            except (OSError, SnapshotError) as e:
+                if self.logger:
+                    self.logger.debug(f"Could not read mesh graph snapshot {self.path}: {e}")
+                return False
+            self._file_sig = sig
+            if (self.loaded and snapshot.generation == self.generation
+                    and snapshot.seq <= self.snapshot_seq):
+                return False
+            self._load(snapshot)
+            return True
+
+    def _load(self, snapshot: GraphSnapshot) -> None:
+        self.edges = snapshot.edges
+        self.generation = snapshot.generation
+        self.seq = self.snapshot_seq = snapshot.seq
+        if self.resync_seq is not None and snapshot.seq >= self.resync_seq:
+            self.resync_seq = None
+        self.snapshots_loaded += 1
+        for generation, seq, edge_data in list(self._delta_log):
+            if generation == snapshot.generation and seq > snapshot.seq:
+                self._apply(seq, edge_data)
+
+    def apply_delta(self, edge_data: Dict[str, Any]) -> bool:
+        """Apply one edge delta pushed by the bot.
+
+        Args:
+            edge_data: Full edge state with 'generation' and 'seq' (as sent by MeshGraph).
+
+        Returns:
+            bool: True if the delta changed the in-memory graph.
+        """
+        generation = edge_data.get('generation')
+        seq = edge_data.get('seq')
+        if generation is None or seq is None:
+            return False
+        with self._lock:
+            if generation != self.generation:
+                # Bot restarted: its startup snapshot normally already exists
+                self.refresh()
+                if generation != self.generation:
+                    self.generation = generation
+                    self.seq = self.snapshot_seq = 0
+                    self.resync_seq = max(self.resync_seq or 0, seq - 1)
+            self._delta_log.append((generation, seq, edge_data))
+            if seq <= self.seq:
+                return False
+            self._apply(seq, edge_data)
+            return True
+
+    def _apply(self, seq: int, edge_data: Dict[str, Any]) -> None:
+        # prev_seq (set when the bot coalesced updates) is the seq the sender expects us to
+        # have; without it every seq must arrive
+        expected = edge_data.get('prev_seq')
+        if expected is None:
+            expected = seq - 1
+        if expected > self.seq:
+            self.resync_seq = max(self.resync_seq or 0, expected)
+        from_prefix = str(edge_data.get('from_prefix', '')).lower()
+        to_prefix = str(edge_data.get('to_prefix', '')).lower()
+        self.edges[(from_prefix, to_prefix)] = {
+            'from_prefix': from_prefix,
+            'to_prefix': to_prefix,
+            'from_public_key': edge_data.get('from_public_key'),
+            'to_public_key': edge_data.get('to_public_key'),
+            'observation_count': edge_data.get('observation_count') or 0,
+            'first_seen': _from_micros(_to_micros(edge_data.get('first_seen'))),
+            'last_seen': _from_micros(_to_micros(edge_data.get('last_seen'))),
+            'avg_hop_position': edge_data.get('avg_hop_position'),
+            'geographic_distance': edge_data.get('geographic_distance'),
+        }
+        self.seq = max(self.seq, seq)
+        self.deltas_applied += 1
+
+    def version(self) -> Dict[str, Any]:
+        """Snapshot generation and sequence, for clients applying deltas themselves."""
+        with self._lock:
+            return {'generation': self.generation, 'seq': self.seq, 'stale': self.stale}
+
+    def get_edges(self) -> List[Dict[str, Any]]:
+        """Current edges (refreshing from disk first), as copies."""
+        self.refresh()
+        with self._lock:
+            return [dict(edge) for edge in self.edges.values()]
@@ -12,6 +12,7 @@ import copy
 from typing import List, Optional, Dict, Any, Tuple
 from meshcore import EventType
 
+from .metrics import get_metrics, reset_response_clock, start_response_clock
 from .models import MeshMessage
 from .enums import PayloadType, PayloadVersion, RouteType, AdvertFlags, DeviceRole
 from .utils import calculate_packet_hash, format_elapsed_display
@@ -611,6 +612,9 @@ class MessageHandler:
             event: The MeshCore event object containing RF data.
             metadata: Optional metadata dictionary.
         """
+        rx_started = time.perf_counter()
+        decoded_at = None
+        metrics = get_metrics(self.bot)
         try:
             # Copy payload immediately to avoid segfault if event is freed
             import copy
@@ -668,6 +672,9 @@ class MessageHandler:
                     if raw_hex:
                         # Use extracted payload if available, otherwise use raw_hex
                         decoded_packet = self.decode_meshcore_packet(raw_hex, extracted_payload)
+                        decoded_at = time.perf_counter()
+                        if metrics:
+                            metrics.observe('rx_decode', decoded_at - rx_started)
                         if decoded_packet:
                             # Calculate packet hash for this packet (useful for tracking same message via different paths)
                             # Use extracted_payload if available (actual MeshCore packet), otherwise use raw_hex
@@ -766,6 +773,8 @@ class MessageHandler:
                                 # (header + path_len + path + payload, without RF wrapper)
                                 decoded_packet['raw_packet_hex'] = extracted_payload if extracted_payload else raw_hex
                                 decoded_packet['packet_hash'] = packet_hash
+                                decoded_packet['snr'] = snr_value
+                                decoded_packet['rssi'] = payload.get('rssi')
                                 self.bot.web_viewer_integration.bot_integration.capture_full_packet_data(decoded_packet)
                             
                             # Process ADVERT packets for contact tracking (regardless of path length)
@@ -806,6 +815,8 @@ class MessageHandler:
                     
                     # Try to correlate with any pending messages
                     self.try_correlate_pending_messages(rf_data)
+                    if metrics and decoded_at is not None:
+                        metrics.observe('decode_correlate', time.perf_counter() - decoded_at)
                     
                     self.logger.debug(f"Stored recent RF data with routing info: {rf_data}")
                     
@@ -2794,6 +2805,14 @@ class MessageHandler:
             return f"Raw: {truncated}{'...' if len(hex_path) > 16 else ''}"
     
     async def process_message(self, message: MeshMessage):
+        """Process a received message, timing it until the first reply is sent (command_response)"""
+        token = start_response_clock()
+        try:
+            await self._process_message(message)
+        finally:
+            reset_response_clock(token)
+    
+    async def _process_message(self, message: MeshMessage):
         """Process a received message"""
         # Check if multitest is listening and notify it
         if self.multitest_listener:
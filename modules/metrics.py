@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Latency histograms and gauges for the bot's processing stages
+Stages (RX decode, correlation, command matching and execution, sends, DB
+writes) record durations into fixed-bucket histograms. Queue depths are read
+from registered callables when a snapshot is taken. Snapshots are stored with
+the system health so the web viewer can serve them as JSON or in the
+Prometheus text format.
+"""
+
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Bucket upper bounds in seconds (Prometheus convention); +Inf is implicit
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_PREFIX = 'meshcore_bot'
+
+# Descriptions used for Prometheus HELP lines
+STAGE_DESCRIPTIONS = {
+    'rx_decode': 'RX log event received to packet decoded',
+    'decode_correlate': 'Packet decoded to RF data stored and correlated with pending messages',
+    'command_match': 'Keyword and command matching for a message',
+    'command_execute': 'Command plugin execution',
+    'send': 'Sending a channel message or DM to the radio',
+    'db_write': 'Database insert/update/delete',
+    'command_response': 'Message processing start to first reply sent',
+    'event_loop_lag': 'Delay between when the loop monitor should wake and when it did',
+    'startup_stage': 'Duration of each startup stage',
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Start time of the message currently being processed in this task (see response_clock)
+_response_clock: contextvars.ContextVar = contextvars.ContextVar('command_response_clock', default=None)
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items())) if labels else ()
+
+
+class Histogram:
+    """Cumulative fixed-bucket latency histogram."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, pct: float) -> float:
+        """Estimate a percentile in seconds by interpolating within its bucket."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100.0 * self.count))
+        seen = 0
+        lower = 0.0
+        for i, bucket_count in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.max
+            if bucket_count and seen + bucket_count >= rank:
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(estimate, self.max)
+            seen += bucket_count
+            lower = upper
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative = []
+        running = 0
+        for i, bound in enumerate(self.buckets):
+            running += self.counts[i]
+            cumulative.append([bound, running])
+        return {
+            'count': self.count,
+            'sum': round(self.total, 6),
+            'buckets': cumulative,
+            'p50_ms': round(self.percentile(50) * 1000, 3),
+            'p90_ms': round(self.percentile(90) * 1000, 3),
+            'p99_ms': round(self.percentile(99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe collection of labelled histograms and gauges.
+
+    Args:
+        logger: Logger for gauge callback errors.
+        buckets: Histogram bucket upper bounds in seconds.
+    """
+
+    def __init__(self, logger=None, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.logger = logger
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, Callable[[], Optional[float]]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, labels: Optional[Dict[str, str]] = None) -> None:
+        """Record one duration for a stage."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def timer(self, name: str, labels: Optional[Dict[str, str]] = None) -> '_Timer':
+        """Context manager recording the duration of its block."""
+        return _Timer(self, name, labels)
+
+    def register_gauge(self, name: str, callback: Callable[[], Optional[float]],
+                       labels: Optional[Dict[str, str]] = None) -> None:
+        """Register a callable read at snapshot time (returning None skips the sample)."""
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = callback
+
+    def get_histogram(self, name: str, labels: Optional[Dict[str, str]] = None) -> Optional[Histogram]:
+        with self._lock:
+            return self._histograms.get(name, {}).get(_label_key(labels))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Histograms and current gauge values as JSON-serializable data."""
+        with self._lock:
+            histograms = {
+                name: [dict(labels=dict(key), **histogram.to_dict()) for key, histogram in series.items()]
+                for name, series in self._histograms.items()
+            }
+            gauges = {name: list(series.items()) for name, series in self._gauges.items()}
+
+        gauge_values = {}
+        for name, series in gauges.items():
+            samples = []
+            for key, callback in series:
+                try:
+                    value = callback()
+                except Exception as e:
+                    if self.logger:
+                        self.logger.debug(f"Error reading gauge {name}{dict(key)}: {e}")
+                    continue
+                if value is not None:
+                    samples.append({'labels': dict(key), 'value': value})
+            gauge_values[name] = samples
+
+        return {'timestamp': time.time(), 'histograms': histograms, 'gauges': gauge_values}
+
+
+class _Timer:
+    def __init__(self, registry: MetricsRegistry, name: str, labels: Optional[Dict[str, str]]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.start, self.labels)
+        return False
+
+
+def get_metrics(bot) -> Optional[MetricsRegistry]:
+    """The bot's registry, or None when metrics are disabled or the bot has none."""
+    metrics = getattr(bot, 'metrics', None)
+    return metrics if isinstance(metrics, MetricsRegistry) else None
+
+
+def timed(stage: str, labels: Optional[Dict[str, str]] = None):
+    """Decorator recording a method's duration under stage in self.bot.metrics.
+
+    Works for sync and async methods of components holding a ``bot`` attribute.
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                metrics = get_metrics(getattr(self, 'bot', None))
+                if metrics is None:
+                    return await func(self, *args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(self, *args, **kwargs)
+                finally:
+                    metrics.observe(stage, time.perf_counter() - start, labels)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            metrics = get_metrics(getattr(self, 'bot', None))
+            if metrics is None:
+                return func(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                metrics.observe(stage, time.perf_counter() - start, labels)
+        return wrapper
+    return decorator
+
+
+def start_response_clock() -> contextvars.Token:
+    """Mark the start of processing a message in the current task."""
+    return _response_clock.set({'start': time.perf_counter(), 'recorded': False})
+
+
+def reset_response_clock(token: contextvars.Token) -> None:
+    _response_clock.reset(token)
+
+
+def record_command_response(bot) -> None:
+    """Record command_response for the message being processed, once per message."""
+    clock = _response_clock.get()
+    metrics = get_metrics(bot)
+    if clock is None or clock['recorded'] or metrics is None:
+        return
+    clock['recorded'] = True
+    metrics.observe('command_response', time.perf_counter() - clock['start'])
+
+
+def _format_labels(labels: Dict[str, Any], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels.items())
+    if extra:
+        items.append(extra)
+    if not items:
+        return ''
+    escaped = []
+    for key, value in items:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{key}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound)) if bound != int(bound) else f"{bound:.1f}"
+
+
+def format_prometheus(snapshot: Dict[str, Any]) -> str:
+    """Render a snapshot in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for name, series in sorted(snapshot.get('histograms', {}).items()):
+        metric = f"{METRIC_PREFIX}_{name}_seconds"
+        lines.append(f"# HELP {metric} {STAGE_DESCRIPTIONS.get(name, name)}")
+        lines.append(f"# TYPE {metric} histogram")
+        for sample in series:
+            labels = sample.get('labels', {})
+            for bound, count in sample['buckets']:
+                lines.append(f"{metric}_bucket{_format_labels(labels, ('le', _format_bound(bound)))} {count}")
+            lines.append(f"{metric}_bucket{_format_labels(labels, ('le', '+Inf'))} {sample['count']}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {sample['sum']}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {sample['count']}")
+    for name, samples in sorted(snapshot.get('gauges', {}).items()):
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# TYPE {metric} gauge")
+        for sample in samples:
+            lines.append(f"{metric}{_format_labels(sample.get('labels', {}))} {sample['value']}")
+    if 'timestamp' in snapshot:
+        lines.append(f"# TYPE {METRIC_PREFIX}_metrics_timestamp_seconds gauge")
+        lines.append(f"{METRIC_PREFIX}_metrics_timestamp_seconds {snapshot['timestamp']}")
+    return '\n'.join(lines) + '\n'
@@ -6,14 +6,134 @@ Handles scanning, loading, and registering command plugins
 
 import os
 import sys
+import json
+import asyncio
 import inspect
 import importlib
 import importlib.util
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Type
+from typing import Dict, List, Any, Optional, Type, Union
 import logging
 
 from .commands.base_command import BaseCommand
+from .utils import resolve_path
+
+MANIFEST_VERSION = 1
+
+# Routing methods a plugin may override; overriding any of them means the manifest's
+# keywords cannot decide whether a message is for the plugin, so it is loaded eagerly
+ROUTING_METHODS = ('should_execute', 'matches_custom_syntax', 'is_channel_allowed')
+
+
+def manifest_path_from_config(config, bot_root: Any = '.') -> str:
+    """Resolve the plugin manifest path ([Bot] plugin_manifest_path or next to [Bot] db_path)."""
+    path = config.get('Bot', 'plugin_manifest_path', fallback='').strip()
+    if not path:
+        path = config.get('Bot', 'db_path', fallback='meshcore_bot.db') + '.plugins.json'
+    return resolve_path(path, bot_root)
+
+
+def _file_signature(path: Union[str, Path]) -> Optional[List[int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class LazyCommand:
+    """Stand-in for a command plugin that has not been imported yet.
+
+    Answers routing questions (keywords, channel access, metadata) from the
+    plugin manifest and imports and instantiates the real command on the first
+    message that could match it, or on any other attribute access. Once loaded,
+    the real command replaces this object in the loader's plugin dict.
+    """
+
+    def __init__(self, loader: 'PluginLoader', plugin_file: str, from_alternatives: bool, entry: Dict[str, Any]):
+        set_ = object.__setattr__
+        set_(self, '_loader', loader)
+        set_(self, '_instance', None)
+        set_(self, '_failed', False)
+        set_(self, '_overrides', {})
+        set_(self, 'plugin_file', plugin_file)
+        set_(self, 'from_alternatives', from_alternatives)
+        set_(self, 'bot', loader.bot)
+        set_(self, 'logger', loader.logger)
+        metadata = dict(entry['metadata'])
+        set_(self, '_metadata', metadata)
+        set_(self, 'name', entry['name'])
+        set_(self, 'keywords', list(entry['keywords']))
+        set_(self, 'allowed_channels', entry.get('allowed_channels'))
+        set_(self, 'config_section', entry.get('config_section'))
+        for attr in ('description', 'requires_dm', 'requires_internet', 'cooldown_seconds', 'category'):
+            set_(self, attr, metadata.get(attr))
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self._instance is not None else 'failed' if self._failed else 'deferred'
+        return f"<LazyCommand {self.name} ({self.plugin_file}, {state})>"
+
+    def __getattr__(self, attr: str):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        instance = self._resolve(f"attribute '{attr}'")
+        if instance is None:
+            raise AttributeError(f"Plugin '{self.plugin_file}' failed to load")
+        return getattr(instance, attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        if self._instance is not None:
+            setattr(self._instance, attr, value)
+            return
+        # Applied to the real command when it is loaded (e.g. the wx_international rename)
+        self._overrides[attr] = value
+        object.__setattr__(self, attr, value)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._instance is not None
+
+    def _resolve(self, reason: str) -> Optional[BaseCommand]:
+        if self._instance is None and not self._failed:
+            self._loader.materialize(self, reason)
+        return self._instance
+
+    def should_execute(self, message) -> bool:
+        if self._instance is not None:
+            return self._instance.should_execute(message)
+        if self._failed:
+            return False
+        # Every keyword match contains the keyword, so a message containing none of
+        # them cannot match and the plugin stays unloaded
+        content = (message.content or '').lower()
+        if not any(keyword.lower() in content for keyword in self.keywords):
+            return False
+        instance = self._resolve('first matching message')
+        return instance.should_execute(message) if instance is not None else False
+
+    def is_channel_allowed(self, message) -> bool:
+        if self._instance is not None:
+            return self._instance.is_channel_allowed(message)
+        return BaseCommand.is_channel_allowed(self, message)
+
+    def _load_translated_keywords(self) -> None:
+        if self._instance is not None:
+            self._instance._load_translated_keywords()
+            return
+        if not hasattr(self.bot, 'translator'):
+            return
+        try:
+            translated = self.bot.translator.get_value(f"keywords.{self.name}")
+            if translated and isinstance(translated, list):
+                merged = list(self.keywords) + [k for k in translated if k not in self.keywords]
+                object.__setattr__(self, 'keywords', merged)
+        except Exception as e:
+            self.logger.debug(f"Could not load translated keywords for {self.name}: {e}")
+
+    def get_metadata(self) -> Dict[str, Any]:
+        if self._instance is not None:
+            return self._instance.get_metadata()
+        return {**self._metadata, 'name': self.name, 'keywords': self.keywords}
 
 
 class PluginLoader:
@@ -31,6 +151,17 @@ class PluginLoader:
         self._failed_plugins: Dict[str, str] = {}  # plugin_name -> error_message
         self._load_plugin_overrides()
         
+        # Lazy loading: plugins with a current manifest entry are deferred until needed
+        self.lazy_loading = bot.config.getboolean('Bot', 'lazy_plugin_loading', fallback=True)
+        self.manifest_path: Optional[str] = None
+        self._manifest_entries: Dict[str, Dict[str, Any]] = {}
+        self._manifest_dirty = False
+        self._manifest_seen: set = set()
+        self._warmup_task: Optional[asyncio.Task] = None
+        self.lazy_stats = {'deferred': 0, 'loaded_on_demand': 0, 'loaded_by_warmup': 0, 'failed': 0}
+        if self.lazy_loading:
+            self._load_manifest()
+        
     def _load_plugin_overrides(self):
         """Load plugin override configuration from config file"""
         self.plugin_overrides = {}
@@ -86,6 +217,192 @@ class PluginLoader:
             self.logger.info(f"Discovered {len(plugin_files)} alternative plugin files: {plugin_files}")
         return plugin_files
     
+    def _manifest_key(self, plugin_file: str, from_alternatives: bool) -> str:
+        return f"alternatives/{plugin_file}" if from_alternatives else plugin_file
+    
+    def _module_path(self, plugin_file: str, from_alternatives: bool) -> str:
+        if from_alternatives:
+            return f"modules.commands.alternatives.{plugin_file}"
+        return f"modules.commands.{plugin_file}"
+    
+    def _manifest_fingerprint(self) -> List[Any]:
+        """Signatures of everything besides the plugin files that shapes plugin keywords and metadata"""
+        fingerprint: List[Any] = [
+            _file_signature(os.path.join(self.commands_dir, 'base_command.py')),
+            sorted(self.plugin_overrides.items()),
+        ]
+        config_file = getattr(self.bot, 'config_file', None)
+        fingerprint.append(_file_signature(config_file) if isinstance(config_file, (str, Path)) else None)
+        translator = getattr(self.bot, 'translator', None)
+        translation_path = getattr(translator, 'translation_path', None)
+        if isinstance(translation_path, (str, Path)):
+            fingerprint.append(getattr(translator, 'language', None))
+            fingerprint.extend(
+                [path.name, _file_signature(path)] for path in sorted(Path(translation_path).glob('*.json'))
+            )
+        return fingerprint
+    
+    def _load_manifest(self):
+        """Load the plugin manifest, discarding it if the config, translations or base command changed"""
+        try:
+            self.manifest_path = manifest_path_from_config(self.bot.config, getattr(self.bot, 'bot_root', '.'))
+        except (TypeError, ValueError, AttributeError) as e:
+            self.logger.debug(f"Lazy plugin loading disabled, cannot resolve manifest path: {e}")
+            self.lazy_loading = False
+            return
+        
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            self.logger.info("No plugin manifest yet, loading all plugins to build one")
+            return
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable plugin manifest {self.manifest_path}: {e}")
+            return
+        
+        if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+            self.logger.info("Plugin manifest format changed, rebuilding")
+            return
+        # Round-trip through JSON so tuples compare equal to the stored lists
+        if manifest.get('fingerprint') != json.loads(json.dumps(self._manifest_fingerprint())):
+            self.logger.info("Config, translations or base command changed since the plugin manifest was built, rebuilding")
+            return
+        plugins = manifest.get('plugins')
+        if isinstance(plugins, dict):
+            self._manifest_entries = plugins
+    
+    def save_manifest(self):
+        """Write the plugin manifest if any entry changed"""
+        if not self.lazy_loading or not self.manifest_path or not self._manifest_dirty:
+            return
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'fingerprint': self._manifest_fingerprint(),
+            'plugins': self._manifest_entries,
+        }
+        tmp_path = f"{self.manifest_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.manifest_path)
+            self._manifest_dirty = False
+            self.logger.debug(f"Wrote plugin manifest with {len(self._manifest_entries)} entries to {self.manifest_path}")
+        except OSError as e:
+            self.logger.warning(f"Could not write plugin manifest {self.manifest_path}: {e}")
+    
+    def _is_lazy_loadable(self, command_class: Type[BaseCommand]) -> bool:
+        if not getattr(command_class, 'lazy_loadable', True):
+            return False
+        return all(getattr(command_class, method) is getattr(BaseCommand, method) for method in ROUTING_METHODS)
+    
+    def _record_manifest_entry(self, key: str, signature: Optional[List[int]], plugin_instance: Optional[BaseCommand]):
+        """Record a freshly loaded plugin in the manifest (failed loads are never recorded)"""
+        if plugin_instance is None or signature is None:
+            if self._manifest_entries.pop(key, None) is not None:
+                self._manifest_dirty = True
+            return
+        
+        try:
+            metadata = plugin_instance.get_metadata()
+            entry = {
+                'file': signature,
+                'lazy': self._is_lazy_loadable(type(plugin_instance)),
+                'name': plugin_instance.name,
+                'keywords': list(plugin_instance.keywords),
+                'aliases': list(metadata.get('aliases', [])),
+                'config_section': plugin_instance._derive_config_section_name(),
+                'allowed_channels': plugin_instance.allowed_channels,
+                'metadata': metadata,
+            }
+            entry = json.loads(json.dumps(entry))
+        except (TypeError, ValueError, AttributeError) as e:
+            self.logger.debug(f"Plugin {key} cannot be deferred: {e}")
+            entry = {'file': signature, 'lazy': False}
+        
+        if self._manifest_entries.get(key) != entry:
+            self._manifest_entries[key] = entry
+            self._manifest_dirty = True
+    
+    def _load_or_defer(self, plugin_file: str, from_alternatives: bool = False) -> Optional[Union[BaseCommand, LazyCommand]]:
+        """Load a plugin, or return a LazyCommand if the manifest has a current entry for it"""
+        if not self.lazy_loading:
+            return self.load_plugin(plugin_file, from_alternatives=from_alternatives)
+        
+        key = self._manifest_key(plugin_file, from_alternatives)
+        plugins_dir = self.alternatives_dir if from_alternatives else self.commands_dir
+        signature = _file_signature(os.path.join(plugins_dir, f"{plugin_file}.py"))
+        self._manifest_seen.add(key)
+        entry = self._manifest_entries.get(key)
+        if entry and entry.get('lazy') and entry.get('file') == signature:
+            self.lazy_stats['deferred'] += 1
+            return LazyCommand(self, plugin_file, from_alternatives, entry)
+        
+        plugin_instance = self.load_plugin(plugin_file, from_alternatives=from_alternatives)
+        self._record_manifest_entry(key, signature, plugin_instance)
+        return plugin_instance
+    
+    def materialize(self, proxy: LazyCommand, reason: str = 'on demand') -> Optional[BaseCommand]:
+        """Import and instantiate a deferred plugin and swap it in for its LazyCommand"""
+        if proxy.is_loaded:
+            return proxy._instance
+        plugin_instance = self.load_plugin(proxy.plugin_file, from_alternatives=proxy.from_alternatives)
+        if plugin_instance is None:
+            object.__setattr__(proxy, '_failed', True)
+            self.lazy_stats['failed'] += 1
+            return None
+        
+        for attr, value in proxy._overrides.items():
+            setattr(plugin_instance, attr, value)
+        object.__setattr__(proxy, '_instance', plugin_instance)
+        # Reassigning existing keys keeps any iteration over the dict valid
+        for plugin_name, plugin in self.loaded_plugins.items():
+            if plugin is proxy:
+                self.loaded_plugins[plugin_name] = plugin_instance
+        self.lazy_stats['loaded_by_warmup' if reason == 'warm-up' else 'loaded_on_demand'] += 1
+        self.logger.debug(f"Loaded deferred plugin {plugin_instance.name} ({reason})")
+        return plugin_instance
+    
+    def get_deferred_plugins(self) -> List[LazyCommand]:
+        """Plugins still waiting to be imported"""
+        return [
+            plugin for plugin in self.loaded_plugins.values()
+            if isinstance(plugin, LazyCommand) and not plugin.is_loaded and not plugin._failed
+        ]
+    
+    def start_warmup(self, delay: float = 10.0):
+        """Load deferred plugins in the background after ``delay`` seconds (call from the event loop)"""
+        if self._warmup_task is None and self.get_deferred_plugins():
+            self._warmup_task = asyncio.create_task(self._warm_up(delay))
+    
+    async def _warm_up(self, delay: float):
+        await asyncio.sleep(delay)
+        loop = asyncio.get_running_loop()
+        loaded = 0
+        for proxy in self.get_deferred_plugins():
+            if proxy.is_loaded or proxy._failed:
+                continue
+            # Import off the event loop; instantiation stays on the loop with the other plugins
+            try:
+                await loop.run_in_executor(None, importlib.import_module,
+                                           self._module_path(proxy.plugin_file, proxy.from_alternatives))
+            except Exception:
+                pass  # load_plugin reports the error
+            if not proxy.is_loaded and self.materialize(proxy, 'warm-up') is not None:
+                loaded += 1
+            await asyncio.sleep(0)
+        self.logger.info(f"Plugin warm-up loaded {loaded} deferred plugin(s)")
+    
+    async def stop_warmup(self):
+        """Cancel a running warm-up"""
+        task, self._warmup_task = self._warmup_task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    
     def _validate_plugin(self, plugin_class: Type[BaseCommand]) -> List[str]:
         """
         Validate a plugin class has required attributes before instantiation.
@@ -156,10 +473,7 @@ class PluginLoader:
         """
         try:
             # Construct the full module path
-            if from_alternatives:
-                module_path = f"modules.commands.alternatives.{plugin_name}"
-            else:
-                module_path = f"modules.commands.{plugin_name}"
+            module_path = self._module_path(plugin_name, from_alternatives)
             
             # Check if module is already loaded
             if module_path in sys.modules:
@@ -230,10 +544,11 @@ class PluginLoader:
         # Build a map of plugin names to their file names for default plugins
         default_plugin_map = {}  # plugin_name -> file_name
         loaded_plugins = {}
+        self._manifest_seen = set()
         
         # First pass: Load all default plugins and build the map
         for plugin_file in default_plugin_files:
-            plugin_instance = self.load_plugin(plugin_file, from_alternatives=False)
+            plugin_instance = self._load_or_defer(plugin_file, from_alternatives=False)
             if plugin_instance:
                 metadata = plugin_instance.get_metadata()
                 plugin_name = metadata['name']
@@ -246,7 +561,7 @@ class PluginLoader:
         for plugin_name, alternative_file in self.plugin_overrides.items():
             if alternative_file in alternative_plugin_files:
                 # Load the alternative plugin
-                alt_instance = self.load_plugin(alternative_file, from_alternatives=True)
+                alt_instance = self._load_or_defer(alternative_file, from_alternatives=True)
                 if alt_instance:
                     alt_metadata = alt_instance.get_metadata()
                     alt_plugin_name = alt_metadata['name']
@@ -282,7 +597,7 @@ class PluginLoader:
             if alt_file in self.plugin_overrides.values():
                 continue
             
-            alt_instance = self.load_plugin(alt_file, from_alternatives=True)
+            alt_instance = self._load_or_defer(alt_file, from_alternatives=True)
             if alt_instance:
                 alt_metadata = alt_instance.get_metadata()
                 alt_plugin_name = alt_metadata['name']
@@ -325,8 +640,18 @@ class PluginLoader:
         
         self.loaded_plugins = loaded_plugins
         
+        if self.lazy_loading:
+            # Forget plugins whose files are gone
+            for key in set(self._manifest_entries) - self._manifest_seen:
+                del self._manifest_entries[key]
+                self._manifest_dirty = True
+            self.save_manifest()
+        
         # Report loading summary
         self.logger.info(f"Loaded {len(loaded_plugins)} plugins: {list(loaded_plugins.keys())}")
+        deferred = self.get_deferred_plugins()
+        if deferred:
+            self.logger.info(f"Deferred import of {len(deferred)} plugin(s) until first use: {[p.name for p in deferred]}")
         if self._failed_plugins:
             self.logger.warning(f"Failed to load {len(self._failed_plugins)} plugin(s): {list(self._failed_plugins.keys())}")
             for plugin_name, error_msg in self._failed_plugins.items():
@@ -8,6 +8,8 @@ import time
 import asyncio
 from typing import Optional, Dict, List
 
+from .airtime import AirtimeBudget
+
 
 class PerUserRateLimiter:
     """Per-user rate limiting: minimum seconds between bot replies to the same user.
@@ -95,47 +97,72 @@ class RateLimiter:
 
 
 class BotTxRateLimiter:
-    """Rate limiting for bot transmission to prevent network overload"""
+    """Rate limiting for bot transmission to prevent network overload
+
+    Enforces a minimum gap between transmissions and, when an AirtimeBudget is
+    given, keeps the airtime of the bot's packets under its duty cycle.
+    """
     
-    def __init__(self, seconds: float = 1.0):
+    def __init__(self, seconds: float = 1.0, airtime_budget: Optional[AirtimeBudget] = None):
         self.seconds = seconds
+        self.airtime_budget = airtime_budget
         self.last_tx = 0
         self._total_tx = 0
         self._total_throttled = 0
     
-    def can_tx(self) -> bool:
-        """Check if bot can transmit a message"""
+    def can_tx(self, airtime: float = 0.0) -> bool:
+        """Check if bot can transmit a message (of the given time-on-air)"""
         can = time.time() - self.last_tx >= self.seconds
+        if can and self.airtime_budget and airtime > 0:
+            can = self.airtime_budget.time_until(airtime) <= 0
         if not can:
             self._total_throttled += 1
         return can
     
-    def time_until_next_tx(self) -> float:
+    def time_until_next_tx(self, airtime: float = 0.0) -> float:
         """Get time until next allowed transmission"""
         elapsed = time.time() - self.last_tx
-        return max(0, self.seconds - elapsed)
+        wait = max(0, self.seconds - elapsed)
+        if self.airtime_budget and airtime > 0:
+            wait = max(wait, self.airtime_budget.time_until(airtime))
+        return wait
     
     def record_tx(self):
         """Record that bot transmitted a message"""
         self.last_tx = time.time()
         self._total_tx += 1
     
-    async def wait_for_tx(self):
-        """Wait until bot can transmit (async)"""
-        while not self.can_tx():
-            wait_time = self.time_until_next_tx()
+    async def wait_for_tx(self, airtime: float = 0.0):
+        """Wait until bot can transmit (async), then reserve the packet's airtime"""
+        deferred = False
+        while not self.can_tx(airtime):
+            wait_time = self.time_until_next_tx(airtime)
+            if (not deferred and self.airtime_budget and airtime > 0
+                    and self.airtime_budget.time_until(airtime) > 0):
+                self.airtime_budget.note_deferred()
+                deferred = True
             if wait_time > 0:
                 await asyncio.sleep(wait_time + 0.05)  # Small buffer
-    
+        if self.airtime_budget and airtime > 0:
+            self.airtime_budget.reserve(airtime)
+
+    def release(self, airtime: float = 0.0):
+        """Refund the airtime reserved by wait_for_tx for a packet that was never sent"""
+        if self.airtime_budget and airtime > 0:
+            self.airtime_budget.release(airtime)
+
     def get_stats(self) -> dict:
         """Get rate limiter statistics"""
         total_attempts = self._total_tx + self._total_throttled
         throttle_rate = self._total_throttled / max(1, total_attempts)
-        return {
+        stats = {
             'total_tx': self._total_tx,
             'total_throttled': self._total_throttled,
             'throttle_rate': throttle_rate
         }
+        if self.airtime_budget:
+            stats.update(self.airtime_budget.get_stats())
+        return stats
 
 
 class NominatimRateLimiter:
@@ -510,6 +510,15 @@ class RepeaterManager:
                     
                     self.logger.debug(f"Added daily stats for {name}: first unique advert today")
                 
+                # Keep the stats command's adverts leaderboard current
+                try:
+                    if 'stats' in self.bot.command_manager.commands:
+                        stats_command = self.bot.command_manager.commands['stats']
+                        if stats_command:
+                            stats_command.record_advert(public_key, name, timestamp.timestamp() if isinstance(timestamp, datetime) else None)
+                except Exception as e:
+                    self.logger.debug(f"Error updating adverts leaderboard: {e}")
+                
         except Exception as e:
             self.logger.error(f"Error tracking daily advertisement: {e}")
     
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Capture replay benchmark for the bot's RX pipeline
+Replays a PacketCaptureService JSONL capture (or recorded handler events)
+through MessageHandler against a fake meshcore connection and a temporary
+database, timing each handler and the expensive steps inside it.
+"""
+
+import asyncio
+import configparser
+import json
+import math
+import sqlite3
+import statistics
+import time
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from meshcore import EventType
+from meshcore.events import Event
+
+# Handler stages a replay event can be dispatched to
+HANDLER_STAGES = {
+    'rf_log_data': 'handle_rf_log_data',
+    'raw_data': 'handle_raw_data',
+    'channel_message': 'handle_channel_message',
+    'contact_message': 'handle_contact_message',
+}
+
+# Inner steps timed in addition to the handlers: (bot attribute, method, stage name)
+INNER_STAGES = [
+    ('message_handler', 'decode_meshcore_packet', 'decode_meshcore_packet'),
+    ('message_handler', '_process_advertisement_packet', 'process_advertisement'),
+    ('repeater_manager', 'track_contact_advertisement', 'track_contact_advertisement'),
+    ('mesh_graph', 'add_edge', 'mesh_graph.add_edge'),
+]
+
+# Services are loaded but never started during a replay; keep them from doing work
+SERVICE_SECTIONS = ('PacketCapture', 'MapUploader', 'Weather_Service', 'DiscordBridge')
+
+
+class FakeCommands:
+    """Records outgoing commands and acknowledges them immediately."""
+
+    def __init__(self):
+        self.sent: List[Tuple[str, Any, str]] = []
+
+    async def send_chan_msg(self, channel_idx, text):
+        self.sent.append(('channel', channel_idx, text))
+        return Event(EventType.MSG_SENT, {'expected_ack': b'\x00\x00\x00\x00', 'suggested_timeout': 0})
+
+    async def send_msg(self, contact, text):
+        self.sent.append(('dm', contact.get('public_key', '') if isinstance(contact, dict) else contact, text))
+        return Event(EventType.MSG_SENT, {'expected_ack': b'\x00\x00\x00\x00', 'suggested_timeout': 0})
+
+    async def send_msg_with_retry(self, contact, text, **kwargs):
+        return await self.send_msg(contact, text)
+
+    async def send_advert(self, flood=False):
+        self.sent.append(('advert', None, 'flood' if flood else 'zero-hop'))
+        return Event(EventType.OK, {})
+
+    def __getattr__(self, name):
+        # Anything else the bot asks the radio for succeeds with an empty payload
+        async def _ok(*args, **kwargs):
+            return Event(EventType.OK, {})
+        return _ok
+
+
+class FakeMeshCore:
+    """Stand-in for a connected meshcore.MeshCore instance."""
+
+    def __init__(self, name: str = 'ReplayBot', public_key: str = 'ab' * 32):
+        self.is_connected = True
+        self.self_info = {'name': name, 'public_key': public_key, 'adv_lat': 0.0, 'adv_lon': 0.0}
+        self.contacts: Dict[str, Dict[str, Any]] = {}
+        self.channels: Dict[int, Dict[str, Any]] = {}
+        self.commands = FakeCommands()
+
+    def get_contact_by_name(self, name):
+        for contact in self.contacts.values():
+            if contact.get('adv_name') == name or contact.get('name') == name:
+                return contact
+        return None
+
+    def get_contact_by_key_prefix(self, prefix):
+        for key, contact in self.contacts.items():
+            if key.startswith(prefix):
+                return contact
+        return None
+
+    def subscribe(self, *args, **kwargs):
+        return None
+
+    async def disconnect(self):
+        self.is_connected = False
+
+
+class StageTimer:
+    """Collects per-stage call durations."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, obj: Any, method_name: str, stage: str) -> bool:
+        """Replace obj.method_name on the instance with a timed wrapper."""
+        method = getattr(obj, method_name, None)
+        if method is None:
+            return False
+        timer = self
+
+        if asyncio.iscoroutinefunction(method):
+            @wraps(method)
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    timer.record(stage, time.perf_counter() - start)
+        else:
+            @wraps(method)
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    timer.record(stage, time.perf_counter() - start)
+
+        setattr(obj, method_name, timed)
+        return True
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Count, total and p50/p99/max latency in milliseconds per stage."""
+        result = {}
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            result[stage] = {
+                'count': len(ordered),
+                'total_ms': round(sum(ordered) * 1000, 3),
+                'p50_ms': round(_percentile(ordered, 50) * 1000, 3),
+                'p99_ms': round(_percentile(ordered, 99) * 1000, 3),
+                'max_ms': round(ordered[-1] * 1000, 3),
+                'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+            }
+        return result
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    # Nearest-rank percentile
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _parse_timestamp(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+def capture_line_to_events(record: Dict[str, Any], include_raw_data: bool = False) -> List[Dict[str, Any]]:
+    """Convert one capture record into replay events.
+
+    Two record shapes are accepted:
+
+    - PacketCaptureService lines (type 'PACKET'): replayed as RX_LOG_DATA, and
+      also as RAW_DATA when include_raw_data is set.
+    - Event lines: {"event": "<stage>", "payload": {...}, "metadata": {...},
+      "timestamp": ...} dispatched as-is to the named handler stage.
+
+    Returns:
+        List[Dict[str, Any]]: Events with 'stage', 'payload', 'metadata' and 'timestamp'.
+    """
+    timestamp = _parse_timestamp(record.get('timestamp'))
+    if 'event' in record:
+        if record['event'] not in HANDLER_STAGES:
+            return []
+        return [{
+            'stage': record['event'],
+            'payload': record.get('payload') or {},
+            'metadata': record.get('metadata'),
+            'timestamp': timestamp,
+        }]
+
+    raw = record.get('raw')
+    if record.get('type') != 'PACKET' or not raw:
+        return []
+    try:
+        snr = float(record.get('SNR', 0))
+    except (TypeError, ValueError):
+        snr = 0.0
+    try:
+        rssi = int(float(record.get('RSSI', 0)))
+    except (TypeError, ValueError):
+        rssi = 0
+    # Rebuild the RX_LOG_DATA framing: SNR*4 and RSSI as signed bytes ahead of the packet
+    header = bytes([int(snr * 4) & 0xFF, rssi & 0xFF]).hex()
+    events = [{
+        'stage': 'rf_log_data',
+        'payload': {
+            'raw_hex': header + raw,
+            'snr': snr,
+            'rssi': rssi,
+            'payload': raw,
+            'payload_length': len(raw) // 2,
+        },
+        'metadata': None,
+        'timestamp': timestamp,
+    }]
+    if include_raw_data:
+        events.append({'stage': 'raw_data', 'payload': {'data': raw}, 'metadata': None, 'timestamp': timestamp})
+    return events
+
+
+def load_capture(path: str, include_raw_data: bool = False) -> Iterator[Dict[str, Any]]:
+    """Yield replay events from a JSONL capture file (plain, .gz or .zst)."""
+    from .service_plugins.capture_writer_utils import iter_segment_lines
+    for line in iter_segment_lines(path):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        yield from capture_line_to_events(record, include_raw_data)
+
+
+def prepare_replay_config(config_file: str, work_dir: str, log_level: str = 'WARNING',
+                          seed_db: Optional[str] = None) -> str:
+    """Write a replay copy of a bot config into work_dir.
+
+    The copy uses a database in work_dir (optionally seeded from seed_db),
+    logs to work_dir, and turns off the web viewer, services, rate limits and
+    TX delays so only processing time is measured.
+
+    Returns:
+        str: Path of the replay config file.
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file, encoding='utf-8')
+    source_root = Path(config_file).parent.resolve()
+    work = Path(work_dir)
+    work.mkdir(parents=True, exist_ok=True)
+
+    for section in ('Bot', 'Logging', 'Localization', 'Web_Viewer'):
+        if not config.has_section(section):
+            config.add_section(section)
+    db_path = work / 'replay.db'
+    if seed_db:
+        source = sqlite3.connect(seed_db)
+        target = sqlite3.connect(str(db_path))
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+    config.set('Bot', 'db_path', str(db_path))
+    config.set('Bot', 'tx_delay_ms', '0')
+    config.set('Bot', 'rate_limit_seconds', '0')
+    config.set('Bot', 'bot_tx_rate_limit_seconds', '0')
+    config.set('Bot', 'per_user_rate_limit_enabled', 'false')
+    config.set('Bot', 'startup_advert', 'false')
+    config.set('Logging', 'log_file', str(work / 'replay.log'))
+    config.set('Logging', 'log_level', log_level)
+    config.set('Logging', 'colored_output', 'false')
+    config.set('Web_Viewer', 'enabled', 'false')
+    translation_path = Path(config.get('Localization', 'translation_path', fallback='translations/'))
+    if not translation_path.is_absolute():
+        config.set('Localization', 'translation_path', str(source_root / translation_path))
+    for section in SERVICE_SECTIONS:
+        if config.has_section(section):
+            config.set(section, 'enabled', 'false')
+
+    replay_config = work / 'replay_config.ini'
+    with open(replay_config, 'w', encoding='utf-8') as f:
+        config.write(f)
+    return str(replay_config)
+
+
+class ReplayHarness:
+    """Replays events through a bot's MessageHandler and times each stage.
+
+    Args:
+        bot: MeshCoreBot (or compatible) instance; its meshcore connection is
+            replaced with a FakeMeshCore if it has none.
+        speed: None to replay as fast as possible, 1.0 for real time, or a
+            speed-up factor (10.0 = ten times faster than captured).
+        channels: Channel names for indexes 0..N (default: the bot's monitored channels).
+    """
+
+    def __init__(self, bot, speed: Optional[float] = None, channels: Optional[List[str]] = None):
+        self.bot = bot
+        self.speed = speed if speed and speed > 0 else None
+        self.timer = StageTimer()
+        if getattr(bot, 'meshcore', None) is None:
+            bot.meshcore = FakeMeshCore()
+        bot.connected = True
+        self.errors = 0
+        self._seed_channels(channels)
+        self._instrument()
+
+    def _seed_channels(self, channels: Optional[List[str]]) -> None:
+        # There is no radio to fetch channels from, so fill the channel cache directly
+        channel_manager = getattr(self.bot, 'channel_manager', None)
+        if channel_manager is None:
+            return
+        if channels is None:
+            channels = list(getattr(self.bot.command_manager, 'monitor_channels', []) or [])
+        for idx, name in enumerate(channels):
+            channel_manager._channels_cache[idx] = {'channel_idx': idx, 'channel_name': name}
+        channel_manager._cache_valid = True
+        self.bot.meshcore.channels = channel_manager._channels_cache
+
+    def _instrument(self) -> None:
+        handler = self.bot.message_handler
+        for stage, method_name in HANDLER_STAGES.items():
+            self.timer.wrap(handler, method_name, stage)
+        for attr, method_name, stage in INNER_STAGES:
+            target = getattr(self.bot, attr, None)
+            if target is not None:
+                self.timer.wrap(target, method_name, stage)
+
+    async def dispatch(self, event: Dict[str, Any]) -> None:
+        handler = getattr(self.bot.message_handler, HANDLER_STAGES[event['stage']])
+        event_type = {
+            'rf_log_data': EventType.RX_LOG_DATA,
+            'raw_data': EventType.RAW_DATA,
+            'channel_message': EventType.CHANNEL_MSG_RECV,
+            'contact_message': EventType.CONTACT_MSG_RECV,
+        }[event['stage']]
+        metadata = event.get('metadata')
+        try:
+            await handler(Event(event_type, event['payload'], metadata or {}), metadata)
+        except Exception as e:
+            self.errors += 1
+            self.bot.logger.error(f"Replay handler error in {event['stage']}: {e}")
+
+    async def run(self, events: Iterable[Dict[str, Any]], limit: Optional[int] = None) -> Dict[str, Any]:
+        """Replay events and return the benchmark report."""
+        count = 0
+        first_capture_time = None
+        start = time.perf_counter()
+        for event in events:
+            if limit is not None and count >= limit:
+                break
+            if self.speed and event.get('timestamp') is not None:
+                if first_capture_time is None:
+                    first_capture_time = event['timestamp']
+                due = (event['timestamp'] - first_capture_time) / self.speed
+                delay = due - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await self.dispatch(event)
+            count += 1
+            # Let tasks scheduled by the handlers (command processing, web viewer pushes) run
+            await asyncio.sleep(0)
+        elapsed = time.perf_counter() - start
+
+        return {
+            'events': count,
+            'errors': self.errors,
+            'elapsed_s': round(elapsed, 3),
+            'events_per_s': round(count / elapsed, 1) if elapsed > 0 else 0.0,
+            'mode': 'max-speed' if not self.speed else ('real-time' if self.speed == 1.0 else f'{self.speed:g}x'),
+            'messages_sent': len(getattr(self.bot.meshcore.commands, 'sent', [])),
+            'stages': self.timer.report(),
+        }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a replay report as a text table."""
+    lines = [
+        f"Replayed {report['events']} events in {report['elapsed_s']}s "
+        f"({report['events_per_s']} events/s, mode: {report['mode']}, "
+        f"errors: {report['errors']}, messages sent: {report['messages_sent']})",
+        f"{'stage':<30} {'count':>8} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10} {'total ms':>12}",
+    ]
+    for stage, stats in sorted(report['stages'].items(), key=lambda item: -item[1]['total_ms']):
+        lines.append(
+            f"{stage:<30} {stats['count']:>8} {stats['p50_ms']:>10.3f} {stats['p99_ms']:>10.3f} "
+            f"{stats['max_ms']:>10.3f} {stats['total_ms']:>12.1f}"
+        )
+    return '\n'.join(lines)
+
+
+async def run_replay(config_file: str, events: Iterable[Dict[str, Any]], work_dir: str,
+                     speed: Optional[float] = None, seed_db: Optional[str] = None,
+                     log_level: str = 'WARNING', limit: Optional[int] = None,
+                     geocode: bool = False) -> Dict[str, Any]:
+    """Build a bot from a replay copy of config_file and replay events through it.
+
+    Reverse geocoding of advert locations goes to Nominatim over the network;
+    unless geocode is True it is skipped so the report reflects local processing.
+
+    Returns:
+        Dict[str, Any]: The ReplayHarness report.
+    """
+    from . import repeater_manager
+    from .core import MeshCoreBot
+
+    bot = MeshCoreBot(prepare_replay_config(config_file, work_dir, log_level=log_level, seed_db=seed_db))
+    # The viewer is disabled for replays; without this its integration still posts updates to it
+    bot.web_viewer_integration = None
+    harness = ReplayHarness(bot, speed=speed)
+    reverse_geocode = repeater_manager.rate_limited_nominatim_reverse_sync
+    if not geocode:
+        repeater_manager.rate_limited_nominatim_reverse_sync = lambda *args, **kwargs: None
+    try:
+        return await harness.run(events, limit=limit)
+    finally:
+        repeater_manager.rate_limited_nominatim_reverse_sync = reverse_geocode
+        if bot.mesh_graph:
+            bot.mesh_graph.shutdown()
@@ -14,7 +14,8 @@ import json
 import os
 from typing import Dict, Tuple, Any
 from pathlib import Path
-from .utils import decode_escape_sequences, format_keyword_response_with_placeholders
+from .db_backup import BackupError, online_backup
+from .utils import decode_escape_sequences, format_keyword_response_with_placeholders, resolve_path
 
 
 class MessageScheduler:
@@ -26,7 +27,9 @@ class MessageScheduler:
         self.scheduled_messages = {}
         self.scheduler_thread = None
         self.last_channel_ops_check_time = 0
-        self.last_message_queue_check_time = 0
+        self.last_greeter_changes_check_time = 0
+        self.backup_thread = None
+        self.last_backup = None
     
     def get_current_time(self):
         """Get current time in configured timezone"""
@@ -78,6 +81,8 @@ class MessageScheduler:
         
         # Setup interval-based advertising
         self.setup_interval_advertising()
+        self.setup_database_backup()
+        self.setup_leaderboard_decay()
     
     def setup_interval_advertising(self):
         """Setup interval-based advertising from config"""
@@ -93,6 +98,96 @@ class MessageScheduler:
         except Exception as e:
             self.logger.warning(f"Error setting up interval advertising: {e}")
     
+    def setup_database_backup(self):
+        """Setup the nightly online database backup from config"""
+        try:
+            if not self.bot.config.getboolean('Backup', 'enabled', fallback=False):
+                return
+            time_str = self.bot.config.get('Backup', 'schedule', fallback='0300').strip()
+            if not self._is_valid_time_format(time_str):
+                self.logger.warning(f"Invalid time format '{time_str}' for [Backup] schedule, database backup disabled")
+                return
+            schedule_time = f"{time_str[:2]}:{time_str[2:]}"
+            schedule.every().day.at(schedule_time).do(self.run_database_backup)
+            self.logger.info(f"Scheduled online database backup at {schedule_time}")
+        except Exception as e:
+            self.logger.warning(f"Error setting up database backup: {e}")
+
+    def setup_leaderboard_decay(self):
+        """Setup the periodic job that slides the stats leaderboards and publishes them"""
+        try:
+            interval = self.bot.config.getint('Stats_Command', 'leaderboard_flush_seconds', fallback=60)
+            if interval > 0:
+                schedule.every(interval).seconds.do(self.run_leaderboard_decay)
+        except Exception as e:
+            self.logger.warning(f"Error setting up leaderboard decay: {e}")
+
+    def run_leaderboard_decay(self):
+        """Decay the stats leaderboards and write their snapshot for the web viewer"""
+        try:
+            if 'stats' in self.bot.command_manager.commands:
+                stats_command = self.bot.command_manager.commands['stats']
+                if stats_command:
+                    stats_command.flush_leaderboards()
+        except Exception as e:
+            self.logger.error(f"Error running leaderboard decay: {e}")
+
+    def apply_greeter_changes(self):
+        """Let the greeter pick up users ungreeted and rollouts ended in the web viewer"""
+        try:
+            if 'greeter' in self.bot.command_manager.commands:
+                greeter_command = self.bot.command_manager.commands['greeter']
+                if greeter_command and greeter_command.enabled:
+                    greeter_command.apply_greeter_changes()
+        except Exception as e:
+            self.logger.error(f"Error applying greeter changes: {e}")
+
+    def _backup_databases(self) -> list:
+        """Bot database plus a separate web viewer database, if configured"""
+        paths = [str(Path(self.bot.db_manager.db_path).resolve())]
+        if self.bot.config.has_option('Web_Viewer', 'db_path'):
+            raw = self.bot.config.get('Web_Viewer', 'db_path').strip()
+            if raw:
+                viewer_path = str(Path(resolve_path(raw, self.bot.bot_root)).resolve())
+                if viewer_path not in paths and os.path.exists(viewer_path):
+                    paths.append(viewer_path)
+        return paths
+
+    def run_database_backup(self) -> bool:
+        """Start an online backup in its own thread so the scheduler loop keeps running.
+
+        Returns:
+            bool: False if a previous backup is still running.
+        """
+        if self.backup_thread and self.backup_thread.is_alive():
+            self.logger.warning("Previous database backup still running, skipping this run")
+            return False
+        self.backup_thread = threading.Thread(target=self._run_database_backup, name='db-backup', daemon=True)
+        self.backup_thread.start()
+        return True
+
+    def _run_database_backup(self):
+        config = self.bot.config
+        backup_dir = resolve_path(config.get('Backup', 'backup_dir', fallback='backups'), self.bot.bot_root)
+        results = []
+        for db_path in self._backup_databases():
+            try:
+                result = online_backup(
+                    db_path, backup_dir,
+                    pages_per_step=config.getint('Backup', 'pages_per_step', fallback=256),
+                    step_sleep=config.getint('Backup', 'step_sleep_ms', fallback=50) / 1000.0,
+                    compress=config.getboolean('Backup', 'compress', fallback=True),
+                    keep=config.getint('Backup', 'keep', fallback=7),
+                    integrity=config.get('Backup', 'integrity_check', fallback='quick').strip().lower(),
+                    logger=self.logger,
+                )
+                results.append({'database': db_path, 'path': result.path, 'size_bytes': result.size_bytes,
+                                'duration_seconds': result.duration_seconds, 'integrity': result.integrity})
+            except (BackupError, ValueError, OSError) as e:
+                self.logger.error(f"Database backup of {db_path} failed: {e}")
+                results.append({'database': db_path, 'error': str(e)})
+        self.last_backup = {'finished_at': time.time(), 'results': results}
+
     def _is_valid_time_format(self, time_str: str) -> bool:
         """Validate time format (HHMM)"""
         try:
@@ -409,32 +504,12 @@ class MessageScheduler:
                         loop.run_until_complete(self._process_channel_operations())
                     self.last_channel_ops_check_time = time.time()
             
-            # Process feed message queue (every 2 seconds)
-            if time.time() - self.last_message_queue_check_time >= 2:  # Every 2 seconds
-                if (hasattr(self.bot, 'feed_manager') and self.bot.feed_manager and 
-                    hasattr(self.bot, 'connected') and self.bot.connected):
-                    import asyncio
-                    if hasattr(self.bot, 'main_event_loop') and self.bot.main_event_loop and self.bot.main_event_loop.is_running():
-                        # Schedule coroutine in the running main event loop
-                        future = asyncio.run_coroutine_threadsafe(
-                            self.bot.feed_manager.process_message_queue(),
-                            self.bot.main_event_loop
-                        )
-                        try:
-                            future.result(timeout=30)  # 30 second timeout
-                        except Exception as e:
-                            self.logger.error(f"Error processing message queue: {e}")
-                    else:
-                        # Fallback: create new event loop if main loop not available
-                        try:
-                            loop = asyncio.get_event_loop()
-                        except RuntimeError:
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                        
-                        loop.run_until_complete(self.bot.feed_manager.process_message_queue())
-                    self.last_message_queue_check_time = time.time()
+            # Apply greeter changes queued by the web viewer (every 5 seconds)
+            if time.time() - self.last_greeter_changes_check_time >= 5:
+                self.apply_greeter_changes()
+                self.last_greeter_changes_check_time = time.time()
             
+            # Feed message queue is drained by FeedManager's own event-driven task
             schedule.run_pending()
             time.sleep(1)
         
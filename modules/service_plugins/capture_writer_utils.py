@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Buffered, rotating packet capture file writer
+Packet lines are buffered in memory and written out when the buffer reaches a
+size threshold or a flush interval elapses. The output can be rotated hourly
+or by size into (optionally gzip/zstd-compressed) segments. Each finished
+segment is appended to a JSON-lines index with its time range.
+"""
+
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ROTATE_NONE = 'none'
+ROTATE_HOURLY = 'hourly'
+ROTATE_SIZE = 'size'
+
+COMPRESSION_EXTENSIONS = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def index_path_for(output_file: str) -> str:
+    """Path of the segment index kept next to the capture output file."""
+    return f"{output_file}.index"
+
+
+def read_segment_index(output_file: str, start: Optional[float] = None,
+                       end: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Read finished segments, optionally only those overlapping [start, end].
+
+    Args:
+        output_file: Configured capture output file.
+        start: Unix timestamp; segments ending before it are skipped.
+        end: Unix timestamp; segments starting after it are skipped.
+
+    Returns:
+        List[Dict[str, Any]]: Index entries ordered by start time.
+    """
+    segments = []
+    try:
+        with open(index_path_for(output_file), 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if start is not None and entry['end'] < start:
+                    continue
+                if end is not None and entry['start'] > end:
+                    continue
+                segments.append(entry)
+    except FileNotFoundError:
+        pass
+    return sorted(segments, key=lambda e: e['start'])
+
+
+def open_segment(path: str):
+    """Open a capture segment for reading text, decompressing by extension."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read .zst capture segments")
+        import io
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')), encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def iter_segment_lines(path: str) -> Iterator[str]:
+    """Yield the packet lines of a capture segment."""
+    with open_segment(path) as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line:
+                yield line
+
+
+class CaptureWriter:
+    """Buffered capture output with optional rotation and compression.
+
+    Args:
+        output_file: Configured output path. With rotation, segments are named
+            after it (packets.json -> packets-20250101-120000.json.gz).
+        logger: Logger for I/O errors.
+        flush_interval: Seconds between flushes of buffered lines.
+        flush_bytes: Buffered bytes that trigger an immediate flush.
+        rotation: 'none', 'hourly' or 'size'.
+        max_segment_bytes: Segment size (uncompressed) that triggers rotation.
+            Used by 'size' rotation and as an upper bound for 'hourly'.
+        compression: 'none', 'gzip' or 'zstd' (zstd falls back to gzip if
+            the zstandard package is not installed).
+    """
+
+    def __init__(self, output_file: str, logger, flush_interval: float = 5.0,
+                 flush_bytes: int = 65536, rotation: str = ROTATE_NONE,
+                 max_segment_bytes: int = 100 * 1024 * 1024, compression: str = 'none'):
+        self.output_file = output_file
+        self.logger = logger
+        self.flush_interval = max(0.0, flush_interval)
+        self.flush_bytes = max(0, flush_bytes)
+        if rotation not in (ROTATE_NONE, ROTATE_HOURLY, ROTATE_SIZE):
+            logger.warning(f"Unknown capture rotation '{rotation}', rotation disabled")
+            rotation = ROTATE_NONE
+        self.rotation = rotation
+        self.max_segment_bytes = max_segment_bytes
+        if compression not in COMPRESSION_EXTENSIONS:
+            logger.warning(f"Unknown capture compression '{compression}', writing uncompressed")
+            compression = 'none'
+        if compression == 'zstd' and zstandard is None:
+            logger.warning("zstandard not installed, compressing capture segments with gzip")
+            compression = 'gzip'
+        self.compression = compression
+
+        self._buffer: List[str] = []
+        self._buffered_bytes = 0
+        self._last_flush = time.time()
+        self._handle = None
+        self._raw_handle = None
+        self._segment: Optional[Dict[str, Any]] = None
+
+        self.lines_written = 0
+        self.flushes = 0
+        self.segments_closed = 0
+
+    @property
+    def current_segment(self) -> Optional[str]:
+        return self._segment['path'] if self._segment else None
+
+    def _segment_path(self, now: float) -> str:
+        if self.rotation == ROTATE_NONE:
+            return self.output_file + COMPRESSION_EXTENSIONS[self.compression]
+        path = Path(self.output_file)
+        stamp = datetime.fromtimestamp(now).strftime('%Y%m%d-%H%M%S')
+        ext = COMPRESSION_EXTENSIONS[self.compression]
+        candidate = path.with_name(f"{path.stem}-{stamp}{path.suffix}{ext}")
+        counter = 1
+        while candidate.exists():
+            candidate = path.with_name(f"{path.stem}-{stamp}-{counter}{path.suffix}{ext}")
+            counter += 1
+        return str(candidate)
+
+    def _open_segment(self, now: float) -> None:
+        path = self._segment_path(now)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.compression == 'gzip':
+            self._raw_handle = None
+            self._handle = gzip.open(path, 'ab')
+        elif self.compression == 'zstd':
+            self._raw_handle = open(path, 'ab')
+            self._handle = zstandard.ZstdCompressor().stream_writer(self._raw_handle)
+        else:
+            self._raw_handle = None
+            self._handle = open(path, 'ab')
+        self._segment = {
+            'path': path,
+            'start': None,
+            'end': None,
+            'packets': 0,
+            'bytes': 0,
+            'hour': int(now // 3600),
+        }
+
+    def _close_segment(self) -> None:
+        if not self._handle:
+            return
+        try:
+            self._handle.close()
+            if self._raw_handle:
+                self._raw_handle.close()
+        except Exception as e:
+            self.logger.error(f"Error closing capture segment {self._segment['path']}: {e}")
+        segment = self._segment
+        self._handle = None
+        self._raw_handle = None
+        self._segment = None
+        self.segments_closed += 1
+
+        if self.rotation == ROTATE_NONE or not segment['packets']:
+            return
+        entry = {
+            'path': segment['path'],
+            'start': segment['start'],
+            'end': segment['end'],
+            'packets': segment['packets'],
+            'bytes': segment['bytes'],
+            'compression': self.compression,
+        }
+        try:
+            with open(index_path_for(self.output_file), 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+        except Exception as e:
+            self.logger.error(f"Error updating capture segment index: {e}")
+
+    def _needs_rotation(self, now: float) -> bool:
+        if self.rotation == ROTATE_NONE or not self._segment:
+            return False
+        if self._segment['bytes'] >= self.max_segment_bytes:
+            return True
+        return self.rotation == ROTATE_HOURLY and int(now // 3600) != self._segment['hour']
+
+    def write(self, line: str, timestamp: Optional[float] = None) -> None:
+        """Buffer one packet line (without trailing newline).
+
+        Args:
+            line: Serialized packet.
+            timestamp: Packet time used for the segment's time range (default: now).
+        """
+        now = time.time()
+        if self._segment is None or self._needs_rotation(now):
+            self._rotate(now)
+            if self._segment is None:
+                return
+        self._buffer.append(line)
+        self._buffer.append('\n')
+        size = len(line) + 1
+        self._buffered_bytes += size
+
+        segment = self._segment
+        packet_time = timestamp if timestamp is not None else now
+        if segment['start'] is None:
+            segment['start'] = packet_time
+        segment['end'] = packet_time
+        segment['packets'] += 1
+        segment['bytes'] += size
+
+        if self._buffered_bytes >= self.flush_bytes or now - self._last_flush >= self.flush_interval:
+            self.flush(now)
+
+    def _write_buffer(self) -> None:
+        if not self._buffer or not self._handle:
+            return
+        data = ''.join(self._buffer).encode('utf-8')
+        lines = len(self._buffer) // 2
+        self._buffer = []
+        self._buffered_bytes = 0
+        try:
+            self._handle.write(data)
+            if self.compression == 'zstd':
+                self._handle.flush(zstandard.FLUSH_BLOCK)
+            else:
+                self._handle.flush()
+            self.lines_written += lines
+            self.flushes += 1
+        except Exception as e:
+            self.logger.error(f"Error writing capture segment {self._segment['path']}: {e}")
+
+    def _rotate(self, now: float) -> None:
+        # Buffered lines belong to the segment being closed
+        self._write_buffer()
+        self._close_segment()
+        try:
+            self._open_segment(now)
+        except Exception as e:
+            self.logger.error(f"Error opening capture segment: {e}")
+
+    def open(self) -> str:
+        """Open the first segment now, so a bad path or permissions fail at startup.
+
+        Returns:
+            str: Path of the open segment.
+
+        Raises:
+            OSError: If the segment could not be opened.
+        """
+        if self._segment is None:
+            self._rotate(time.time())
+            if self._segment is None:
+                raise OSError(f"Could not open capture segment for {self.output_file}")
+        return self.current_segment
+
+    def flush(self, now: Optional[float] = None) -> None:
+        """Write buffered lines to the current segment, rotating afterwards if due."""
+        now = now if now is not None else time.time()
+        self._last_flush = now
+        if self._needs_rotation(now):
+            self._rotate(now)
+        else:
+            self._write_buffer()
+
+    def flush_if_due(self) -> None:
+        """Flush if the flush interval has elapsed (for periodic callers)."""
+        now = time.time()
+        if (self._buffer and now - self._last_flush >= self.flush_interval) or self._needs_rotation(now):
+            self.flush(now)
+
+    def close(self) -> None:
+        """Flush remaining lines and close (and index) the current segment."""
+        self._write_buffer()
+        self._close_segment()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'current_segment': self.current_segment,
+            'buffered_bytes': self._buffered_bytes,
+            'lines_written': self.lines_written,
+            'flushes': self.flushes,
+            'segments_closed': self.segments_closed,
+            'rotation': self.rotation,
+            'compression': self.compression,
+        }
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Webhook pacing and message coalescing for the Discord bridge service
+Each webhook is paced by a token bucket that is corrected from Discord's rate
+limit headers. Messages that pile up while a webhook is throttled are merged
+into as few posts as Discord's content limit allows.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Discord's maximum message content length
+DISCORD_CONTENT_LIMIT = 2000
+
+ELLIPSIS = '…'
+
+
+class TokenBucket:
+    """Token bucket allowing ``capacity`` posts per ``window`` seconds.
+
+    Args:
+        capacity: Maximum burst (and posts per window).
+        window: Seconds to refill a full bucket.
+    """
+
+    def __init__(self, capacity: int = 25, window: float = 60.0):
+        self.capacity = max(1, capacity)
+        self.rate = self.capacity / max(0.001, window)
+        self.tokens = float(self.capacity)
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        """Take a token if one is available and the webhook is not blocked."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if now < self.blocked_until or self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+    def time_until_available(self, now: Optional[float] = None) -> float:
+        """Seconds until try_acquire can succeed."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1.0:
+            wait = max(wait, (1.0 - self.tokens) / self.rate)
+        return wait
+
+    def block_for(self, seconds: float, now: Optional[float] = None) -> None:
+        """Refuse tokens for ``seconds`` (e.g. Discord's Retry-After)."""
+        now = time.monotonic() if now is None else now
+        self.blocked_until = max(self.blocked_until, now + max(0.0, seconds))
+
+    def update_from_headers(self, remaining: int, reset_after: Optional[float], now: Optional[float] = None) -> None:
+        """Trust Discord's view of the remaining quota over our own estimate.
+
+        Args:
+            remaining: X-RateLimit-Remaining.
+            reset_after: Seconds until the quota resets (X-RateLimit-Reset-After), if known.
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens = min(self.tokens, float(max(0, remaining)))
+        if remaining <= 0 and reset_after is not None:
+            self.block_for(reset_after, now)
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:max(0, limit - len(ELLIPSIS))] + ELLIPSIS
+
+
+def _fit(lines: List[str], max_chars: int) -> int:
+    """How many leading lines fit in max_chars when joined with newlines (at least one)."""
+    length = -1
+    for count, line in enumerate(lines):
+        length += 1 + len(line)
+        if count and length > max_chars:
+            return count
+    return len(lines)
+
+
+def build_batch(payloads: List[Dict[str, Any]], channel_name: str,
+                max_chars: int = DISCORD_CONTENT_LIMIT) -> Tuple[Dict[str, Any], int]:
+    """Merge queued webhook payloads, oldest first, into one post.
+
+    A run of messages from one sender keeps that sender's username and avatar.
+    When messages from several senders can be merged, they are posted under the
+    channel's bridge name with each line prefixed by its sender, whichever
+    layout covers more messages. Messages are taken while the merged content
+    fits in ``max_chars``; a single oversized message is truncated.
+
+    Args:
+        payloads: Webhook payloads ({'content', 'username', optional 'avatar_url'}).
+        channel_name: MeshCore channel name, used as the username for mixed senders.
+        max_chars: Maximum content length of the merged post.
+
+    Returns:
+        Tuple[Dict[str, Any], int]: The merged payload and how many payloads it covers.
+    """
+    first_user = payloads[0].get('username')
+    run = 1
+    while run < len(payloads) and payloads[run].get('username') == first_user:
+        run += 1
+    single = [p['content'] for p in payloads[:run]]
+    single_count = _fit(single, max_chars)
+
+    if single_count == run and run < len(payloads):
+        mixed = [f"**{p.get('username')}:** {p['content']}" for p in payloads]
+        mixed_count = _fit(mixed, max_chars)
+        if mixed_count > single_count:
+            merged = {'username': f"MeshCore [{channel_name}]",
+                      'content': _truncate('\n'.join(mixed[:mixed_count]), max_chars)}
+            return merged, mixed_count
+
+    merged = dict(payloads[0])
+    merged['content'] = _truncate('\n'.join(single[:single_count]), max_chars)
+    return merged, single_count
@@ -8,15 +8,14 @@ import asyncio
 import logging
 import time
 import copy
-from collections import deque
 from dataclasses import dataclass
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 from datetime import datetime
 
 # Import meshcore
 from meshcore import EventType
 
-# Try to import aiohttp for async HTTP (preferred)
+# Import aiohttp for async HTTP
 try:
     import aiohttp
     AIOHTTP_AVAILABLE = True
@@ -24,16 +23,10 @@ except ImportError:
     aiohttp = None
     AIOHTTP_AVAILABLE = False
 
-# Fallback to requests for sync HTTP
-try:
-    import requests
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    requests = None
-    REQUESTS_AVAILABLE = False
-
 # Import base service
 from .base_service import BaseServicePlugin
+from .discord_batch_utils import TokenBucket, build_batch
+from ..metrics import get_metrics
 
 
 @dataclass
@@ -76,8 +69,8 @@ class DiscordBridgeService(BaseServicePlugin):
         # self.logger is already set by super().__init__(bot)
 
         # Check if HTTP library is available
-        if not AIOHTTP_AVAILABLE and not REQUESTS_AVAILABLE:
-            self.logger.error("Neither aiohttp nor requests library is available. Discord bridge requires one of these.")
+        if not AIOHTTP_AVAILABLE:
+            self.logger.error("aiohttp is required for the Discord bridge. Install with: pip install aiohttp")
             self.enabled = False
             return
 
@@ -111,13 +104,19 @@ class DiscordBridgeService(BaseServicePlugin):
         self.retry_delay_base = 1.0  # Base delay in seconds for exponential backoff
         self.max_queue_age = 300  # Max age in seconds before dropping message (5 minutes)
         
-        # Proactive rate limiting: track send times per webhook
+        # Proactive rate limiting: a token bucket per webhook, corrected from Discord's rate limit headers
         # Discord allows 30 messages per 60 seconds, so we'll throttle to ~25/min for safety
-        self.send_times: Dict[str, deque] = {}  # Track timestamps of sent messages (deque for efficient popleft)
+        self.rate_limiters: Dict[str, TokenBucket] = {}
         self.rate_limit_window = 60.0  # 60 second window
         self.rate_limit_max = 25  # Conservative limit (25/min instead of 30/min for safety)
 
-        # HTTP session for async requests
+        # Merge messages queued while a webhook is throttled into one post
+        self.batch_messages = self.bot.config.getboolean('DiscordBridge', 'batch_messages', fallback=True)
+
+        # Per-webhook delivery counters
+        self.delivery_stats: Dict[str, Dict[str, int]] = {}
+
+        # Shared HTTP session for all webhooks
         self.http_session: Optional[aiohttp.ClientSession] = None
 
         # Background task handles
@@ -257,12 +256,15 @@ class DiscordBridgeService(BaseServicePlugin):
 
         self.logger.info("Starting Discord bridge service...")
 
-        # Create aiohttp session if available
-        if AIOHTTP_AVAILABLE:
-            self.http_session = aiohttp.ClientSession()
-            self.logger.debug("Using aiohttp for async HTTP requests")
-        else:
-            self.logger.debug("Using requests library for HTTP requests (fallback)")
+        if not AIOHTTP_AVAILABLE:
+            self.logger.error("aiohttp is required for the Discord bridge. Install with: pip install aiohttp")
+            return
+
+        # One session (and connection pool) shared by all webhooks
+        self.http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=10),
+            timeout=aiohttp.ClientTimeout(total=10)
+        )
 
         # Subscribe to channel message events
         # NOTE: We do NOT subscribe to CONTACT_MSG_RECV (DMs are never bridged)
@@ -275,8 +277,19 @@ class DiscordBridgeService(BaseServicePlugin):
 
         # Initialize message queues for each webhook
         for webhook_url in self.channel_webhooks.values():
-            self.message_queues[webhook_url] = deque()
-            self.send_times[webhook_url] = deque()
+            self.message_queues.setdefault(webhook_url, [])
+            self._get_rate_limiter(webhook_url)
+
+        # Export queue depth and age per channel when metrics are enabled
+        metrics = get_metrics(self.bot)
+        if metrics:
+            for channel_name, webhook_url in self.channel_webhooks.items():
+                labels = {'channel': channel_name}
+                metrics.register_gauge('discord_queue_age_seconds',
+                                       lambda url=webhook_url: self._oldest_queue_age(url), labels)
+                metrics.register_gauge('queue_depth',
+                                       lambda url=webhook_url: len(self.message_queues.get(url, [])),
+                                       {'queue': f'discord_{channel_name}'})
 
         # Start background queue processor task
         self._queue_processor_task = asyncio.create_task(self._process_message_queues())
@@ -411,15 +424,24 @@ class DiscordBridgeService(BaseServicePlugin):
             )
             
             # Add to queue
-            if webhook_url not in self.message_queues:
-                self.message_queues[webhook_url] = []
-            self.message_queues[webhook_url].append(queued_msg)
+            self.message_queues.setdefault(webhook_url, []).append(queued_msg)
             
             self.logger.debug(f"Queued message for Discord [{channel_name}]: {message[:50]}...")
             
         except Exception as e:
             self.logger.error(f"Failed to queue message for Discord webhook [{channel_name}]: {e}", exc_info=True)
     
+    def _get_rate_limiter(self, webhook_url: str) -> TokenBucket:
+        """Get (or create) the token bucket pacing a webhook."""
+        bucket = self.rate_limiters.get(webhook_url)
+        if bucket is None:
+            bucket = self.rate_limiters[webhook_url] = TokenBucket(self.rate_limit_max, self.rate_limit_window)
+        return bucket
+
+    def _record_delivery(self, webhook_url: str, key: str, count: int = 1) -> None:
+        stats = self.delivery_stats.setdefault(webhook_url, {'posts': 0, 'messages': 0, 'dropped': 0})
+        stats[key] += count
+
     async def _process_message_queues(self) -> None:
         """Background task to process message queues with rate limiting and retries.
         
@@ -427,91 +449,10 @@ class DiscordBridgeService(BaseServicePlugin):
         """
         while self._running:
             try:
-                current_time = time.time()
-                
                 # Process each webhook's queue
                 for webhook_url, queue in list(self.message_queues.items()):
-                    if not queue:
-                        continue
-                    
-                    # Clean up old send times (outside rate limit window)
-                    if webhook_url in self.send_times:
-                        send_times = self.send_times[webhook_url]
-                        while send_times and (current_time - send_times[0]) > self.rate_limit_window:
-                            send_times.popleft()
-                    
-                    # Check if we can send (proactive rate limiting)
-                    can_send = True
-                    if webhook_url in self.send_times:
-                        recent_sends = len(self.send_times[webhook_url])
-                        if recent_sends >= self.rate_limit_max:
-                            can_send = False
-                            # Calculate wait time until oldest message expires
-                            oldest_send = self.send_times[webhook_url][0]
-                            wait_time = (oldest_send + self.rate_limit_window) - current_time
-                            if wait_time > 0:
-                                self.logger.debug(f"Rate limit throttling [{queue[0].channel_name}]: waiting {wait_time:.1f}s")
-                    
-                    if not can_send:
-                        continue
-                    
-                    # Find next message ready to be sent (not waiting for retry delay)
-                    queued_msg = None
-                    for msg in queue:
-                        if current_time >= msg.next_retry_at:
-                            queued_msg = msg
-                            break
-                    
-                    # If no message is ready, skip this webhook
-                    if queued_msg is None:
-                        continue
-                    
-                    # Check if message is too old
-                    age = current_time - queued_msg.first_queued
-                    if age > self.max_queue_age:
-                        # Remove old message from queue
-                        queue.remove(queued_msg)
-                        self.logger.warning(
-                            f"Dropping old message from queue [{queued_msg.channel_name}]: "
-                            f"age {age:.1f}s exceeds max {self.max_queue_age}s"
-                        )
-                        continue
-                    
-                    # Try to send the message
-                    success = await self._post_to_webhook(
-                        queued_msg.webhook_url,
-                        queued_msg.payload,
-                        queued_msg.channel_name,
-                        queued_msg
-                    )
-                    
-                    if success:
-                        # Success - remove from queue
-                        queue.remove(queued_msg)
-                        # Track send time for rate limiting
-                        if webhook_url not in self.send_times:
-                            self.send_times[webhook_url] = deque()
-                        self.send_times[webhook_url].append(current_time)
-                    else:
-                        # Failed - increment retry count and schedule retry
-                        queued_msg.retry_count += 1
-                        if queued_msg.retry_count > self.max_retries:
-                            # Max retries exceeded - drop message
-                            queue.remove(queued_msg)
-                            self.logger.error(
-                                f"Dropping message after {self.max_retries} retries "
-                                f"[{queued_msg.channel_name}]: {queued_msg.payload['content'][:50]}..."
-                            )
-                        else:
-                            # Calculate exponential backoff delay
-                            delay = self.retry_delay_base * (2 ** (queued_msg.retry_count - 1))
-                            queued_msg.next_retry_at = current_time + delay
-                            self.logger.debug(
-                                f"Message failed, will retry in {delay:.1f}s "
-                                f"(attempt {queued_msg.retry_count}/{self.max_retries}) "
-                                f"[{queued_msg.channel_name}]"
-                            )
-                            # Message stays in queue, will be retried later
+                    if queue:
+                        await self._process_webhook_queue(webhook_url, queue)
                 
                 # Small delay to prevent tight loop
                 await asyncio.sleep(0.1)
@@ -522,74 +463,119 @@ class DiscordBridgeService(BaseServicePlugin):
                 self.logger.error(f"Error in message queue processor: {e}", exc_info=True)
                 await asyncio.sleep(1.0)  # Wait a bit before retrying on error
     
-    async def _post_to_webhook(self, webhook_url: str, payload: Dict[str, str], channel_name: str, queued_msg: Optional[QueuedMessage] = None) -> bool:
-        """Post message to Discord webhook.
-
+    async def _process_webhook_queue(self, webhook_url: str, queue: List[QueuedMessage]) -> None:
+        """Send one post for a webhook if its rate limit allows.
+        
+        All messages ready to send are merged into as few posts as Discord's
+        content limit allows, so a backlog built up while throttled drains in
+        a handful of posts instead of one post per message.
+        
         Args:
             webhook_url: Discord webhook URL.
-            payload: JSON payload to post.
-            channel_name: MeshCore channel name (for logging).
-            queued_msg: Optional queued message object (for retry tracking).
-
-        Returns:
-            bool: True if message was successfully posted, False otherwise.
+            queue: Messages queued for the webhook (oldest first).
         """
-        try:
-            # Send via aiohttp (async) or requests (sync fallback)
-            if AIOHTTP_AVAILABLE and self.http_session:
-                return await self._post_async(webhook_url, payload, channel_name, queued_msg)
-            elif REQUESTS_AVAILABLE:
-                return await self._post_sync(webhook_url, payload, channel_name, queued_msg)
+        current_time = time.time()
+        
+        # Drop messages that are too old
+        for queued_msg in [msg for msg in queue if current_time - msg.first_queued > self.max_queue_age]:
+            queue.remove(queued_msg)
+            self._record_delivery(webhook_url, 'dropped')
+            self.logger.warning(
+                f"Dropping old message from queue [{queued_msg.channel_name}]: "
+                f"age {current_time - queued_msg.first_queued:.1f}s exceeds max {self.max_queue_age}s"
+            )
+        
+        # Messages ready to be sent (not waiting for retry delay)
+        ready = [msg for msg in queue if current_time >= msg.next_retry_at]
+        if not ready:
+            return
+        
+        # Check if we can send (proactive rate limiting)
+        bucket = self._get_rate_limiter(webhook_url)
+        if not bucket.try_acquire():
+            self.logger.debug(
+                f"Rate limit throttling [{ready[0].channel_name}]: waiting {bucket.time_until_available():.1f}s "
+                f"({len(queue)} queued)"
+            )
+            return
+        
+        payload, count = build_batch([msg.payload for msg in (ready if self.batch_messages else ready[:1])],
+                                     ready[0].channel_name)
+        batch = ready[:count]
+        
+        # Try to send the messages
+        success = await self._post_to_webhook(webhook_url, payload, batch[0].channel_name, batch)
+        
+        if success:
+            # Success - remove from queue
+            for queued_msg in batch:
+                queue.remove(queued_msg)
+            self._record_delivery(webhook_url, 'posts')
+            self._record_delivery(webhook_url, 'messages', len(batch))
+            if len(batch) > 1:
+                self.logger.debug(f"Merged {len(batch)} messages into one post [{batch[0].channel_name}]")
+            return
+        
+        # Failed - increment retry count and schedule retry
+        for queued_msg in batch:
+            queued_msg.retry_count += 1
+            if queued_msg.retry_count > self.max_retries:
+                # Max retries exceeded - drop message
+                queue.remove(queued_msg)
+                self._record_delivery(webhook_url, 'dropped')
+                self.logger.error(
+                    f"Dropping message after {self.max_retries} retries "
+                    f"[{queued_msg.channel_name}]: {queued_msg.payload['content'][:50]}..."
+                )
             else:
-                self.logger.error("No HTTP library available for posting to Discord")
-                return False
-
-        except Exception as e:
-            self.logger.error(f"Failed to post to Discord webhook [{channel_name}]: {e}", exc_info=True)
-            return False
-
-    async def _post_async(self, webhook_url: str, payload: Dict[str, str], channel_name: str, queued_msg: Optional[QueuedMessage] = None) -> bool:
-        """Post to webhook using aiohttp (async).
+                # Calculate exponential backoff delay
+                delay = self.retry_delay_base * (2 ** max(0, queued_msg.retry_count - 1))
+                queued_msg.next_retry_at = current_time + delay
+                # Message stays in queue, will be retried later
+        self.logger.debug(f"Post of {len(batch)} message(s) failed, will retry [{batch[0].channel_name}]")
+    
+    async def _post_to_webhook(self, webhook_url: str, payload: Dict[str, str], channel_name: str,
+                               batch: Optional[List[QueuedMessage]] = None) -> bool:
+        """Post message to Discord webhook.
 
         Args:
             webhook_url: Discord webhook URL.
             payload: JSON payload to post.
             channel_name: MeshCore channel name (for logging).
-            queued_msg: Optional queued message object (for retry tracking).
+            batch: Optional queued messages covered by the payload (for retry tracking).
 
         Returns:
             bool: True if message was successfully posted, False otherwise.
         """
+        if not self.http_session:
+            self.logger.error("HTTP session not available for posting to Discord")
+            return False
+
         try:
-            async with self.http_session.post(webhook_url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            async with self.http_session.post(webhook_url, json=payload) as response:
+                # Monitor rate limit headers (also on errors)
+                self._check_rate_limit_headers(response.headers, webhook_url, channel_name)
+
                 # Check response status
                 if response.status == 204:
                     # Success (Discord webhooks return 204 No Content on success)
                     self.logger.debug(f"Posted to Discord [{channel_name}]: {payload['content'][:50]}...")
-                    # Monitor rate limit headers
-                    self._check_rate_limit_headers(response.headers, webhook_url, channel_name)
                     return True
                 elif response.status == 429:
-                    # Rate limited - will be retried by queue processor
+                    # Rate limited - will be retried by queue processor once Retry-After has passed
                     retry_after = response.headers.get('Retry-After', 'unknown')
                     self.logger.warning(f"Discord rate limit hit for [{channel_name}]. Retry after: {retry_after}s")
-                    # If Retry-After is provided, wait that long before next attempt
-                    if retry_after != 'unknown':
-                        try:
-                            retry_after_float = float(retry_after)
-                            # Add delay to queued message if it exists
-                            if queued_msg:
-                                # Store retry delay in queued message metadata
-                                queued_msg.retry_count = max(0, queued_msg.retry_count - 1)  # Don't count this as a retry attempt
-                        except (ValueError, TypeError):
-                            pass
+                    try:
+                        self._get_rate_limiter(webhook_url).block_for(float(retry_after))
+                    except (ValueError, TypeError):
+                        pass
+                    for queued_msg in batch or []:
+                        queued_msg.retry_count = max(0, queued_msg.retry_count - 1)  # Don't count this as a retry attempt
                     return False
                 else:
                     # Other error
                     response_text = await response.text()
                     self.logger.warning(f"Discord webhook returned {response.status} for [{channel_name}]: {response_text[:200]}")
-                    # Monitor rate limit headers even on error
-                    self._check_rate_limit_headers(response.headers, webhook_url, channel_name)
                     return False
 
         except asyncio.TimeoutError:
@@ -599,58 +585,29 @@ class DiscordBridgeService(BaseServicePlugin):
             self.logger.error(f"Error posting to Discord webhook [{channel_name}]: {e}")
             return False
 
-    async def _post_sync(self, webhook_url: str, payload: Dict[str, str], channel_name: str, queued_msg: Optional[QueuedMessage] = None) -> bool:
-        """Post to webhook using requests library (sync fallback).
+    def _oldest_queue_age(self, webhook_url: str) -> float:
+        """Seconds the oldest queued message for a webhook has been waiting."""
+        queue = self.message_queues.get(webhook_url)
+        if not queue:
+            return 0.0
+        return max(0.0, time.time() - min(msg.first_queued for msg in queue))
 
-        Args:
-            webhook_url: Discord webhook URL.
-            payload: JSON payload to post.
-            channel_name: MeshCore channel name (for logging).
-            queued_msg: Optional queued message object (for retry tracking).
+    def get_queue_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth, oldest message age and delivery counters per bridged channel.
 
         Returns:
-            bool: True if message was successfully posted, False otherwise.
+            Dict[str, Dict[str, Any]]: Stats keyed by configured channel name.
         """
-        try:
-            # Run in thread pool to avoid blocking event loop
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: requests.post(webhook_url, json=payload, timeout=10)
-            )
-
-            # Check response status
-            if response.status_code == 204:
-                # Success
-                self.logger.debug(f"Posted to Discord [{channel_name}]: {payload['content'][:50]}...")
-                # Monitor rate limit headers
-                self._check_rate_limit_headers(response.headers, webhook_url, channel_name)
-                return True
-            elif response.status_code == 429:
-                # Rate limited - will be retried by queue processor
-                retry_after = response.headers.get('Retry-After', 'unknown')
-                self.logger.warning(f"Discord rate limit hit for [{channel_name}]. Retry after: {retry_after}s")
-                # If Retry-After is provided, wait that long before next attempt
-                if retry_after != 'unknown':
-                    try:
-                        retry_after_float = float(retry_after)
-                        # Add delay to queued message if it exists
-                        if queued_msg:
-                            # Store retry delay in queued message metadata
-                            queued_msg.retry_count = max(0, queued_msg.retry_count - 1)  # Don't count this as a retry attempt
-                    except (ValueError, TypeError):
-                        pass
-                return False
-            else:
-                # Other error
-                self.logger.warning(f"Discord webhook returned {response.status_code} for [{channel_name}]: {response.text[:200]}")
-                # Monitor rate limit headers even on error
-                self._check_rate_limit_headers(response.headers, webhook_url, channel_name)
-                return False
-
-        except Exception as e:
-            self.logger.error(f"Error posting to Discord webhook [{channel_name}]: {e}")
-            return False
+        stats = {}
+        for channel_name, webhook_url in self.channel_webhooks.items():
+            bucket = self.rate_limiters.get(webhook_url)
+            stats[channel_name] = {
+                'queued': len(self.message_queues.get(webhook_url, [])),
+                'oldest_age_s': round(self._oldest_queue_age(webhook_url), 1),
+                'rate_limit_wait_s': round(bucket.time_until_available(), 1) if bucket else 0.0,
+                **self.delivery_stats.get(webhook_url, {'posts': 0, 'messages': 0, 'dropped': 0})
+            }
+        return stats
 
     def _check_rate_limit_headers(self, headers: Dict[str, str], webhook_url: str, channel_name: str) -> None:
         """Check Discord rate limit headers and log warnings if approaching limit.
@@ -673,11 +630,19 @@ class DiscordBridgeService(BaseServicePlugin):
             limit = headers_dict.get('X-RateLimit-Limit') or headers_dict.get('x-ratelimit-limit')
             remaining = headers_dict.get('X-RateLimit-Remaining') or headers_dict.get('x-ratelimit-remaining')
             reset = headers_dict.get('X-RateLimit-Reset') or headers_dict.get('x-ratelimit-reset')
+            reset_after = headers_dict.get('X-RateLimit-Reset-After') or headers_dict.get('x-ratelimit-reset-after')
 
             if limit and remaining:
                 limit = int(limit)
                 remaining = int(remaining)
 
+                # Feed Discord's remaining quota into the webhook's token bucket
+                if reset_after is not None:
+                    reset_after = float(reset_after)
+                elif reset:
+                    reset_after = max(0.0, float(reset) - time.time())
+                self._get_rate_limiter(webhook_url).update_from_headers(remaining, reset_after)
+
                 # Calculate percentage remaining
                 if limit > 0:
                     percent_remaining = remaining / limit
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Seen-advert tracking and queued uploads for the map uploader service
+Seen adverts are kept in time buckets so expiry drops whole buckets instead of
+walking every entry. Uploads are queued by the RX handler and sent by a small
+pool of worker tasks, with exponential backoff on failure, so a slow map API
+never delays packet handling.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+
+class SeenAdvertBuckets:
+    """Last uploaded advert timestamp per public key, bucketed by when it was recorded.
+
+    Supports the dict operations the uploader uses (``in``, ``[]``, ``len``,
+    ``get``, ``clear``).
+
+    Args:
+        bucket_seconds: Width of each time bucket.
+        retention_seconds: Entries not refreshed for this long are expired.
+        max_entries: Oldest buckets are dropped while more entries than this are held.
+    """
+
+    def __init__(self, bucket_seconds: int = 600, retention_seconds: int = 7200, max_entries: int = 10000):
+        self.bucket_seconds = max(1, int(bucket_seconds))
+        self.retention_seconds = max(self.bucket_seconds, int(retention_seconds))
+        self.max_entries = max(1, max_entries)
+        self._buckets: Dict[int, Dict[str, int]] = {}
+        self._bucket_of: Dict[str, int] = {}
+
+    def __contains__(self, pubkey: str) -> bool:
+        return pubkey in self._bucket_of
+
+    def __getitem__(self, pubkey: str) -> int:
+        return self._buckets[self._bucket_of[pubkey]][pubkey]
+
+    def __setitem__(self, pubkey: str, timestamp: int) -> None:
+        self.record(pubkey, timestamp)
+
+    def __len__(self) -> int:
+        return len(self._bucket_of)
+
+    def get(self, pubkey: str, default: Optional[int] = None) -> Optional[int]:
+        bucket = self._bucket_of.get(pubkey)
+        return self._buckets[bucket][pubkey] if bucket is not None else default
+
+    def record(self, pubkey: str, timestamp: int, now: Optional[float] = None) -> None:
+        """Record the latest advert timestamp for a node, moving it to the current bucket."""
+        bucket = int((time.time() if now is None else now) // self.bucket_seconds)
+        previous = self._bucket_of.get(pubkey)
+        if previous is not None and previous != bucket:
+            entries = self._buckets[previous]
+            del entries[pubkey]
+            if not entries:
+                del self._buckets[previous]
+        self._buckets.setdefault(bucket, {})[pubkey] = timestamp
+        self._bucket_of[pubkey] = bucket
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop buckets older than the retention period, then the oldest buckets over max_entries.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        cutoff = int(((time.time() if now is None else now) - self.retention_seconds) // self.bucket_seconds)
+        removed = 0
+        for bucket in sorted(self._buckets):
+            if bucket >= cutoff and len(self._bucket_of) <= self.max_entries:
+                break
+            removed += self._drop_bucket(bucket)
+        return removed
+
+    def _drop_bucket(self, bucket: int) -> int:
+        entries = self._buckets.pop(bucket)
+        for pubkey in entries:
+            del self._bucket_of[pubkey]
+        return len(entries)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._bucket_of.clear()
+
+
+@dataclass
+class PendingUpload:
+    """One advert waiting to be uploaded"""
+    raw_hex: str
+    public_key: str
+    name: Optional[str]
+    advert_time: int
+    type: str
+    queued_at: float
+    attempts: int = 0
+    next_attempt: float = 0.0
+
+
+class UploadQueue:
+    """Bounded upload queue drained by a fixed number of worker tasks.
+
+    Args:
+        logger: Logger for upload errors.
+        upload: Coroutine taking a list of PendingUpload and returning False if
+            the upload should be retried.
+        concurrency: Number of uploads in flight at once.
+        batch_size: Adverts sent per upload request.
+        max_queue: Adverts held before the oldest is dropped.
+        max_attempts: Attempts before an advert is dropped.
+        retry_base: Delay in seconds before the first retry; doubles per attempt.
+        retry_max: Maximum retry delay in seconds.
+    """
+
+    def __init__(self, logger, upload: Callable[[List[PendingUpload]], Awaitable[bool]],
+                 concurrency: int = 2, batch_size: int = 1, max_queue: int = 500,
+                 max_attempts: int = 5, retry_base: float = 5.0, retry_max: float = 300.0):
+        self.logger = logger
+        self.upload = upload
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.max_queue = max(1, max_queue)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base = max(0.0, retry_base)
+        self.retry_max = max(self.retry_base, retry_max)
+        self.items: Deque[PendingUpload] = deque()
+        self.in_flight = 0
+        self.stats = {'enqueued': 0, 'uploaded': 0, 'retried': 0, 'dropped': 0}
+        # Created in start() so it belongs to the running loop (Python 3.8/3.9)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running = False
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def enqueue(self, item: PendingUpload) -> None:
+        """Queue an advert (never blocks; drops the oldest advert when full)."""
+        if len(self.items) >= self.max_queue:
+            self.items.popleft()
+            self.stats['dropped'] += 1
+        self.items.append(item)
+        self.stats['enqueued'] += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def retry_delay(self, attempts: int) -> float:
+        """Backoff before the next attempt after ``attempts`` failures."""
+        return min(self.retry_max, self.retry_base * (2 ** max(0, attempts - 1)))
+
+    def _take_batch(self, now: float) -> List[PendingUpload]:
+        batch = []
+        for item in list(self.items):
+            if item.next_attempt <= now:
+                self.items.remove(item)
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+        return batch
+
+    def _next_wait(self, now: float) -> Optional[float]:
+        if not self.items:
+            return None
+        return max(0.0, min(item.next_attempt for item in self.items) - now)
+
+    async def process_once(self) -> bool:
+        """Upload one batch of ready adverts.
+
+        Returns:
+            bool: False if no advert was ready.
+        """
+        now = time.time()
+        batch = self._take_batch(now)
+        if not batch:
+            return False
+        self.in_flight += len(batch)
+        try:
+            delivered = await self.upload(batch)
+        except asyncio.CancelledError:
+            # Keep the batch so it is persisted with the rest of the queue
+            self.items.extendleft(reversed(batch))
+            raise
+        except Exception as e:
+            self.logger.error(f"Error uploading to map: {e}")
+            delivered = False
+        finally:
+            self.in_flight -= len(batch)
+
+        if delivered:
+            self.stats['uploaded'] += len(batch)
+            return True
+        for item in batch:
+            item.attempts += 1
+            if item.attempts >= self.max_attempts:
+                self.stats['dropped'] += 1
+                self.logger.warning(f"Giving up on map upload for {item.public_key[:16]}... "
+                                    f"after {item.attempts} attempts")
+                continue
+            item.next_attempt = time.time() + self.retry_delay(item.attempts)
+            self.items.append(item)
+            self.stats['retried'] += 1
+        return True
+
+    async def _worker(self) -> None:
+        while self._running:
+            if await self.process_once():
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._next_wait(time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Start the worker tasks (must be called from the event loop)."""
+        if self._running:
+            return
+        self._running = True
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """Cancel the workers; unsent adverts stay in the queue."""
+        self._running = False
+        if self._wakeup is not None:
+            self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Queued adverts as JSON-serializable dicts."""
+        return [asdict(item) for item in self.items]
+
+    def load(self, entries: List[Dict[str, Any]]) -> int:
+        """Queue adverts saved by to_list, ready to send now.
+
+        Returns:
+            int: Number of adverts loaded.
+        """
+        loaded = 0
+        for entry in entries:
+            try:
+                item = PendingUpload(**entry)
+            except TypeError:
+                continue
+            item.next_attempt = 0.0
+            self.enqueue(item)
+            loaded += 1
+        return loaded
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'queued': len(self.items), 'in_flight': self.in_flight}
@@ -11,7 +11,8 @@ import logging
 import hashlib
 import time
 import copy
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
 
 # Import meshcore
 import meshcore
@@ -40,8 +41,10 @@ except ImportError:
 from .packet_capture_utils import (
     read_private_key_file,
     hex_to_bytes,
-    bytes_to_hex
+    bytes_to_hex,
+    bytes_to_int_le
 )
+from .map_upload_utils import PendingUpload, SeenAdvertBuckets, UploadQueue
 
 # Import base service
 from .base_service import BaseServicePlugin
@@ -49,6 +52,65 @@ from .base_service import BaseServicePlugin
 # Import utilities
 from ..utils import resolve_path
 
+# bot_metadata key holding adverts not yet uploaded when the service stopped
+PENDING_UPLOADS_METADATA_KEY = 'map_uploader_pending_uploads'
+
+# (public key hex, advert timestamp, SHA-256 of signature || app data)
+AdvertKey = Tuple[str, int, bytes]
+
+
+def advert_cache_key(payload: bytes) -> AdvertKey:
+    """Verification cache key for an advert payload.
+    
+    Copies of the same advert heard over different flood paths share a key.
+    The hash covers the app data as well as the signature so a copy with
+    altered app data cannot reuse another copy's verification result.
+    
+    Args:
+        payload: Advert payload (pub_key || timestamp || signature || app_data).
+        
+    Returns:
+        AdvertKey: Tuple of public key hex, timestamp and digest.
+    """
+    return (
+        payload[0:32].hex(),
+        int.from_bytes(payload[32:36], 'little'),
+        hashlib.sha256(payload[36:]).digest()
+    )
+
+
+def verify_advert_payload(payload: bytes) -> bool:
+    """Verify the Ed25519 signature of an advert payload.
+    
+    The signature covers pub_key (32) || timestamp (4) || app_data.
+    
+    Args:
+        payload: Advert payload (pub_key || timestamp || signature || app_data).
+        
+    Returns:
+        bool: True if the signature is valid, False otherwise.
+    """
+    if not CRYPTOGRAPHY_AVAILABLE or len(payload) < 101:
+        return False
+    try:
+        public_key = ed25519.Ed25519PublicKey.from_public_bytes(payload[0:32])
+        public_key.verify(payload[36:100], payload[0:36] + payload[100:])
+        return True
+    except Exception:
+        return False
+
+
+def verify_advert_batch(items: List[Tuple[AdvertKey, bytes]]) -> Dict[AdvertKey, bool]:
+    """Verify a batch of advert payloads (run in an executor thread).
+    
+    Args:
+        items: (cache key, payload) pairs.
+        
+    Returns:
+        Dict[AdvertKey, bool]: Verification result per key.
+    """
+    return {key: verify_advert_payload(payload) for key, payload in items}
+
 
 class MapUploaderService(BaseServicePlugin):
     """Map uploader service.
@@ -138,9 +200,38 @@ class MapUploaderService(BaseServicePlugin):
         self.connected = False
         
         # Track seen adverts: {pubkey: last_timestamp}
-        # This prevents duplicate uploads and replay attacks
-        # We'll periodically clean old entries to prevent unbounded growth
-        self.seen_adverts: Dict[str, int] = {}
+        # This prevents duplicate uploads and replay attacks. Entries are kept in
+        # time buckets; entries not refreshed for 2 × min_reupload_interval expire
+        retention = self.min_reupload_interval * 2
+        self.seen_adverts = SeenAdvertBuckets(
+            bucket_seconds=max(60, retention // 12),
+            retention_seconds=retention,
+            max_entries=10000
+        )
+        
+        # Uploads are queued by the RX handler and sent by worker tasks
+        self.upload_queue = UploadQueue(
+            self.logger,
+            self._upload_to_map,
+            concurrency=self.upload_concurrency,
+            batch_size=self.upload_batch_size,
+            max_queue=self.upload_queue_size,
+            max_attempts=self.upload_max_attempts,
+            retry_base=self.upload_retry_base,
+            retry_max=self.upload_retry_max
+        )
+        
+        # Signature verification results by advert key (LRU), so repeated
+        # copies of an advert are only verified once
+        self._verify_cache: "OrderedDict[AdvertKey, bool]" = OrderedDict()
+        # Adverts waiting for (or in) a verification batch, and their result futures
+        self._verify_queue: Optional[asyncio.Queue] = None
+        self._verify_pending: Dict[AdvertKey, asyncio.Future] = {}
+        self._verify_task: Optional[asyncio.Task] = None
+        self.verify_stats = {'verified': 0, 'cache_hits': 0, 'batches': 0}
+        
+        # Decoded signing key, cached per (private key hex, public key hex)
+        self._signing_key: Optional[Tuple[Tuple[str, str], Any]] = None
         
         # Device keys and info
         self.private_key_hex: Optional[str] = None
@@ -157,9 +248,13 @@ class MapUploaderService(BaseServicePlugin):
         # Exit flag
         self.should_exit = False
         
-        # Cleanup tracking
+        # Cleanup tracking (expiry drops whole buckets, so it can run once per bucket)
         self._last_cleanup_time = 0
-        self._cleanup_interval = 3600  # Clean up every hour
+        self._cleanup_interval = self.seen_adverts.bucket_seconds
+        
+        # Pending uploads are also saved periodically in case the bot doesn't stop cleanly
+        self._last_persist_time = 0.0
+        self._persist_interval = 60
         
         self.logger.info("Map uploader service initialized")
     
@@ -189,6 +284,18 @@ class MapUploaderService(BaseServicePlugin):
         
         # Verbose logging
         self.verbose = config.getboolean('MapUploader', 'verbose', fallback=False)
+        
+        # Signature verification cache and batching
+        self.verify_cache_size = max(1, config.getint('MapUploader', 'verify_cache_size', fallback=4096))
+        self.verify_batch_size = max(1, config.getint('MapUploader', 'verify_batch_size', fallback=32))
+        
+        # Upload queue
+        self.upload_concurrency = max(1, config.getint('MapUploader', 'upload_concurrency', fallback=2))
+        self.upload_batch_size = max(1, config.getint('MapUploader', 'upload_batch_size', fallback=1))
+        self.upload_queue_size = max(1, config.getint('MapUploader', 'upload_queue_size', fallback=500))
+        self.upload_max_attempts = max(1, config.getint('MapUploader', 'upload_max_attempts', fallback=5))
+        self.upload_retry_base = config.getfloat('MapUploader', 'upload_retry_base', fallback=5.0)
+        self.upload_retry_max = config.getfloat('MapUploader', 'upload_retry_max', fallback=300.0)
     
     @property
     def meshcore(self) -> Any:
@@ -246,6 +353,14 @@ class MapUploaderService(BaseServicePlugin):
         # Create HTTP session
         self.http_session = aiohttp.ClientSession()  # type: ignore
         
+        # Verify advert signatures in batches off the event loop
+        self._verify_queue = asyncio.Queue()
+        self._verify_task = asyncio.create_task(self._verification_worker())
+        
+        # Resume uploads left over from the last run, then start the upload workers
+        await self._load_pending_uploads()
+        self.upload_queue.start()
+        
         # Setup event handlers
         await self._setup_event_handlers()
         
@@ -268,13 +383,32 @@ class MapUploaderService(BaseServicePlugin):
         # Clean up event subscriptions
         self._cleanup_event_subscriptions()
         
+        # Stop the verification worker and release anything waiting on it
+        if self._verify_task:
+            self._verify_task.cancel()
+            try:
+                await self._verify_task
+            except asyncio.CancelledError:
+                pass
+            self._verify_task = None
+        for future in self._verify_pending.values():
+            if not future.done():
+                future.set_result(False)
+        self._verify_pending.clear()
+        self._verify_queue = None
+        
+        # Stop uploading and keep anything unsent for the next start
+        await self.upload_queue.stop()
+        await self._save_pending_uploads()
+        
         # Close HTTP session
         if self.http_session:
             await self.http_session.close()
             self.http_session = None
         
-        # Clear seen_adverts to free memory
+        # Clear seen_adverts and verification cache to free memory
         self.seen_adverts.clear()
+        self._verify_cache.clear()
         
         # Close file handlers
         for handler in self.logger.handlers[:]:
@@ -416,11 +550,11 @@ class MapUploaderService(BaseServicePlugin):
         # Note: meshcore library handles subscription cleanup automatically
         self.event_subscriptions = []
     
-    async def _cleanup_old_seen_adverts(self, current_timestamp: int) -> None:
-        """Clean up old entries from seen_adverts to prevent unbounded memory growth.
+    async def _cleanup_old_seen_adverts(self) -> None:
+        """Expire old seen_adverts buckets to prevent unbounded memory growth.
         
-        Args:
-            current_timestamp: The current timestamp from the latest packet.
+        Entries not refreshed for 2 × min_reupload_interval are dropped a whole
+        bucket at a time; if more than 10,000 remain, the oldest buckets go too.
         """
         current_time = time.time()
         
@@ -430,42 +564,45 @@ class MapUploaderService(BaseServicePlugin):
         
         self._last_cleanup_time = current_time
         
-        # Remove entries older than min_reupload_interval * 2
-        # This keeps recent entries but removes very old ones
-        cutoff_timestamp = current_timestamp - (self.min_reupload_interval * 2)
-        
-        # Count entries before cleanup
         initial_count = len(self.seen_adverts)
-        
-        # Remove old entries
-        keys_to_remove = [
-            pubkey for pubkey, last_ts in self.seen_adverts.items()
-            if last_ts < cutoff_timestamp
-        ]
-        
-        for pubkey in keys_to_remove:
-            del self.seen_adverts[pubkey]
-        
-        removed_count = len(keys_to_remove)
+        removed_count = self.seen_adverts.expire(current_time)
         
         if removed_count > 0:
             self.logger.debug(
                 f"Cleaned up {removed_count} old seen_adverts entries "
                 f"({initial_count} -> {len(self.seen_adverts)})"
             )
-        
-        # Safety limit: if dictionary still grows too large, use more aggressive cleanup
-        if len(self.seen_adverts) > 10000:
-            # Keep only the most recent 5000 entries
-            sorted_entries = sorted(
-                self.seen_adverts.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )
-            self.seen_adverts = dict(sorted_entries[:5000])
-            self.logger.warning(
-                f"seen_adverts grew too large, trimmed to 5000 most recent entries"
+    
+    async def _load_pending_uploads(self) -> None:
+        """Queue adverts that were still waiting to be uploaded when the service last stopped."""
+        db_manager = getattr(self.bot, 'db_manager', None)
+        if not db_manager:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+            saved = await loop.run_in_executor(None, db_manager.get_metadata, PENDING_UPLOADS_METADATA_KEY)
+            if not saved:
+                return
+            loaded = self.upload_queue.load(json.loads(saved))
+            if loaded:
+                self.logger.info(f"Resuming {loaded} pending map upload(s) from last run")
+            await loop.run_in_executor(None, db_manager.set_metadata, PENDING_UPLOADS_METADATA_KEY, '[]')
+        except Exception as e:
+            self.logger.warning(f"Could not load pending map uploads: {e}")
+    
+    async def _save_pending_uploads(self) -> None:
+        """Persist adverts still waiting to be uploaded."""
+        db_manager = getattr(self.bot, 'db_manager', None)
+        if not db_manager:
+            return
+        self._last_persist_time = time.time()
+        try:
+            pending = json.dumps(self.upload_queue.to_list())
+            await asyncio.get_running_loop().run_in_executor(
+                None, db_manager.set_metadata, PENDING_UPLOADS_METADATA_KEY, pending
             )
+        except Exception as e:
+            self.logger.warning(f"Could not save pending map uploads: {e}")
     
     async def _handle_rx_log_data(self, event: Any, metadata: Any = None) -> None:
         """Handle RX log data events.
@@ -552,12 +689,8 @@ class MapUploaderService(BaseServicePlugin):
             if advert.get('type') == 'CHAT':
                 return
             
-            # Verify signature
-            if not await self._verify_advert_signature(advert, payload_bytes):
-                self.logger.warning(f"Ignoring: signature verification failed for {advert.get('public_key', 'unknown')[:16]}...")
-                return
-            
-            # Check for replay attacks
+            # Check for replay attacks (before verifying, so stale copies cost nothing;
+            # seen_adverts only ever holds verified timestamps)
             pub_key = advert.get('public_key', '')
             timestamp = advert.get('advert_time', 0)
             
@@ -584,14 +717,28 @@ class MapUploaderService(BaseServicePlugin):
                     self.logger.debug(f"Ignoring: advert missing or invalid coordinates (lat={lat}, lon={lon}) for {pub_key[:16]}...")
                 return
             
-            # Upload to map
-            await self._upload_to_map(advert, raw_hex)
+            # Verify signature
+            if not await self._verify_advert_signature(advert, payload_bytes):
+                self.logger.warning(f"Ignoring: signature verification failed for {advert.get('public_key', 'unknown')[:16]}...")
+                return
             
-            # Update seen adverts
+            # Queue the upload (sent by the upload workers) and mark the advert as
+            # seen now, so further copies are dropped while the upload is pending
+            self.upload_queue.enqueue(PendingUpload(
+                raw_hex=raw_hex,
+                public_key=pub_key,
+                name=advert.get('name'),
+                advert_time=timestamp,
+                type=advert.get('type', 'unknown'),
+                queued_at=time.time()
+            ))
             self.seen_adverts[pub_key] = timestamp
             
             # Periodically clean up old entries to prevent unbounded memory growth
-            await self._cleanup_old_seen_adverts(timestamp)
+            await self._cleanup_old_seen_adverts()
+            
+            if time.time() - self._last_persist_time >= self._persist_interval:
+                await self._save_pending_uploads()
             
         except Exception as e:
             self.logger.error(f"Error processing packet: {e}", exc_info=True)
@@ -675,6 +822,10 @@ class MapUploaderService(BaseServicePlugin):
     async def _verify_advert_signature(self, advert: Dict[str, Any], payload: bytes) -> bool:
         """Verify advert signature using ed25519.
         
+        Results are cached by (public key, timestamp, signature hash), so each
+        advert is verified once however many copies are heard. Concurrent copies
+        share one pending verification, which runs in a batch off the event loop.
+        
         Args:
             advert: The parsed advert dictionary containing the signature and public key.
             payload: The full binary payload used to verify the signature.
@@ -686,55 +837,114 @@ class MapUploaderService(BaseServicePlugin):
             self.logger.error("Cryptography library not available, cannot verify signatures")
             return False  # Fail verification if library not available (security)
         
-        try:
-            # Extract signature and public key
-            signature_hex = advert.get('signature', '')
-            public_key_hex = advert.get('public_key', '')
-            
-            if not signature_hex or not public_key_hex:
-                return False
-            
-            # Convert to bytes
-            signature_bytes = hex_to_bytes(signature_hex)
-            public_key_bytes = hex_to_bytes(public_key_hex)
-            
-            if len(signature_bytes) != 64:
-                return False
-            
-            if len(public_key_bytes) != 32:
-                return False
-            
-            # The signed data is: pub_key (32) + timestamp (4) + app_data
-            # Signature covers: pub_key || timestamp || app_data
-            signed_data = payload[0:32] + payload[32:36] + payload[100:]
-            
-            # Verify signature
-            public_key = ed25519.Ed25519PublicKey.from_public_bytes(public_key_bytes)
-            public_key.verify(signature_bytes, signed_data)
-            
-            return True
-            
-        except Exception as e:
-            if self.verbose:
-                self.logger.debug(f"Signature verification failed: {e}")
+        if not advert.get('signature') or not advert.get('public_key') or len(payload) < 101:
             return False
+        
+        key = advert_cache_key(payload)
+        cached = self._verify_cache.get(key)
+        if cached is not None:
+            self._verify_cache.move_to_end(key)
+            self.verify_stats['cache_hits'] += 1
+            return cached
+        
+        future = self._verify_pending.get(key)
+        if future is None:
+            if self._verify_queue is None or self._verify_task is None or self._verify_task.done():
+                # Worker not running (service not started): verify inline
+                valid = verify_advert_payload(payload)
+                self._record_verification(key, valid)
+                return valid
+            future = asyncio.get_running_loop().create_future()
+            self._verify_pending[key] = future
+            self._verify_queue.put_nowait((key, payload))
+        else:
+            self.verify_stats['cache_hits'] += 1
+        
+        # Shield so one cancelled waiter doesn't cancel the result for the other copies
+        valid = await asyncio.shield(future)
+        if not valid and self.verbose:
+            self.logger.debug(f"Signature verification failed for {key[0][:16]}... (ts {key[1]})")
+        return valid
     
-    async def _upload_to_map(self, advert: Dict[str, Any], raw_packet_hex: str) -> None:
-        """Upload advert to map.meshcore.dev.
+    def _record_verification(self, key: AdvertKey, valid: bool) -> None:
+        """Cache a verification result, evicting the least recently used entries.
         
-        Signs the upload request and sends it via HTTP POST.
+        Args:
+            key: Advert cache key.
+            valid: Whether the signature verified.
+        """
+        self.verify_stats['verified'] += 1
+        self._verify_cache[key] = valid
+        self._verify_cache.move_to_end(key)
+        while len(self._verify_cache) > self.verify_cache_size:
+            self._verify_cache.popitem(last=False)
+    
+    async def _verification_worker(self) -> None:
+        """Verify queued adverts in batches in an executor thread.
+        
+        Takes everything queued (up to verify_batch_size) while the previous batch
+        was running, so verification keeps up with bursts without blocking RX handling.
+        """
+        loop = asyncio.get_running_loop()
+        while not self.should_exit:
+            key, payload = await self._verify_queue.get()
+            batch = {key: payload}
+            while len(batch) < self.verify_batch_size:
+                try:
+                    key, payload = self._verify_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                batch[key] = payload
+            
+            try:
+                results = await loop.run_in_executor(None, verify_advert_batch, list(batch.items()))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error verifying advert batch: {e}")
+                results = {key: False for key in batch}
+            
+            self.verify_stats['batches'] += 1
+            for key, valid in results.items():
+                self._record_verification(key, valid)
+                future = self._verify_pending.pop(key, None)
+                if future and not future.done():
+                    future.set_result(valid)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Verification cache and upload queue statistics.
+        
+        Returns:
+            Dict[str, Any]: Counts of verifications, cache hits and batches, cache
+            size, seen adverts and upload queue counters.
+        """
+        return {
+            **self.verify_stats,
+            'cache_size': len(self._verify_cache),
+            'pending': len(self._verify_pending),
+            'seen_adverts': len(self.seen_adverts),
+            'uploads': self.upload_queue.get_stats()
+        }
+    
+    async def _upload_to_map(self, uploads: List[PendingUpload]) -> bool:
+        """Upload adverts to map.meshcore.dev.
+        
+        Signs the upload request and sends it via HTTP POST. Called by the
+        upload queue workers with up to upload_batch_size adverts.
         
         Args:
-            advert: Parsed advert data.
-            raw_packet_hex: Raw hex of the packet to report.
+            uploads: Queued adverts whose raw packets are reported.
+            
+        Returns:
+            bool: False if the upload failed and should be retried.
         """
         if not self.http_session:
             self.logger.error("HTTP session not available")
-            return
+            return False
         
         if not self.private_key_hex or not self.public_key_hex:
             self.logger.error("Private or public key not available")
-            return
+            return False
         
         try:
             # Prepare upload data
@@ -746,7 +956,7 @@ class MapUploaderService(BaseServicePlugin):
                     'sf': self.radio_params['sf'],
                     'bw': self.radio_params['bw']
                 },
-                'links': [f'meshcore://{raw_packet_hex}']
+                'links': [f'meshcore://{upload.raw_hex}' for upload in uploads]
             }
             
             # Log upload data as JSON for debugging
@@ -767,13 +977,14 @@ class MapUploaderService(BaseServicePlugin):
             self.logger.debug(f"Signed data (for upload): {json.dumps(signed_data_for_log, indent=2)}")
             
             # Log upload
-            node_info = {
-                'pubKey': advert.get('public_key', '')[:16] + '...',
-                'name': advert.get('name', 'unknown'),
-                'ts': advert.get('advert_time', 0),
-                'type': advert.get('type', 'unknown')
-            }
-            self.logger.info(f"Uploading {node_info}")
+            for upload in uploads:
+                node_info = {
+                    'pubKey': upload.public_key[:16] + '...',
+                    'name': upload.name or 'unknown',
+                    'ts': upload.advert_time,
+                    'type': upload.type
+                }
+                self.logger.info(f"Uploading {node_info}")
             
             # POST to API
             async with self.http_session.post(
@@ -781,13 +992,15 @@ class MapUploaderService(BaseServicePlugin):
                 json=signed_data,
                 timeout=aiohttp.ClientTimeout(total=10)
             ) as response:
+                # Server errors and rate limiting are worth retrying; other rejections are not
+                retry = response.status >= 500 or response.status == 429
                 try:
                     result = await response.json()
                 except Exception as e:
                     # If response is not JSON, get text
                     error_text = await response.text()
                     self.logger.warning(f"Upload failed (status {response.status}): {error_text} (JSON parse error: {e})")
-                    return
+                    return response.status == 200 or not retry
                 
                 # Check for errors in response (API may return 200 with error in JSON)
                 if response.status == 200:
@@ -795,6 +1008,7 @@ class MapUploaderService(BaseServicePlugin):
                         self.logger.warning(f"Upload failed: {result.get('error', 'Unknown error')} (code: {result.get('code', 'unknown')})")
                     else:
                         self.logger.info(f"Upload successful: {result}")
+                    return True
                 else:
                     # Handle non-200 status codes
                     if isinstance(result, dict):
@@ -802,11 +1016,14 @@ class MapUploaderService(BaseServicePlugin):
                     else:
                         error_text = str(result) if result else 'Unknown error'
                     self.logger.warning(f"Upload failed (status {response.status}): {error_text}")
+                    return not retry
         
         except asyncio.TimeoutError:
             self.logger.warning("Upload timeout")
+            return False
         except Exception as e:
             self.logger.error(f"Error uploading to map: {e}", exc_info=True)
+            return False
     
     def _sign_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Sign data using private key.
@@ -831,6 +1048,37 @@ class MapUploaderService(BaseServicePlugin):
             'signature': signature_hex
         }
     
+    def _get_signing_key(self) -> Tuple[str, Any]:
+        """Decoded signing key, cached until the configured keys change.
+        
+        Returns:
+            Tuple[str, Any]: ('orlp', (scalar, scalar_int, prefix, public_key_bytes))
+            for 64-byte keys, or ('seed', Ed25519PrivateKey) for 32-byte seeds.
+            
+        Raises:
+            ValueError: If private key length is invalid.
+        """
+        key_id = (self.private_key_hex, self.public_key_hex)
+        if self._signing_key and self._signing_key[0] == key_id:
+            return self._signing_key[1]
+        
+        private_key_bytes = hex_to_bytes(self.private_key_hex)
+        public_key_bytes = hex_to_bytes(self.public_key_hex)
+        
+        # Handle orlp format (64 bytes) vs seed format (32 bytes)
+        if len(private_key_bytes) == 64:
+            # Orlp format: scalar (first 32) || prefix (last 32)
+            scalar = private_key_bytes[:32]
+            signing_key = ('orlp', (scalar, bytes_to_int_le(scalar), private_key_bytes[32:64], public_key_bytes))
+        elif len(private_key_bytes) == 32:
+            # Seed format: use cryptography library
+            signing_key = ('seed', ed25519.Ed25519PrivateKey.from_private_bytes(private_key_bytes))
+        else:
+            raise ValueError(f"Invalid private key length: {len(private_key_bytes)}")
+        
+        self._signing_key = (key_id, signing_key)
+        return signing_key
+    
     def _sign_hash(self, data_hash: bytes) -> str:
         """Sign a hash using ed25519 private key (orlp format).
         
@@ -845,16 +1093,11 @@ class MapUploaderService(BaseServicePlugin):
             ValueError: If private key length is invalid.
         """
         try:
-            # Convert private key to bytes
-            private_key_bytes = hex_to_bytes(self.private_key_hex)
-            public_key_bytes = hex_to_bytes(self.public_key_hex)
-            
-            # Handle orlp format (64 bytes) vs seed format (32 bytes)
-            if len(private_key_bytes) == 64:
-                # Orlp format: scalar (first 32) || prefix (last 32)
-                # This format requires PyNaCl for proper signing
-                scalar = private_key_bytes[:32]
-                prefix = private_key_bytes[32:64]
+            key_format, key = self._get_signing_key()
+            
+            if key_format == 'orlp':
+                # Orlp format requires PyNaCl for proper signing
+                scalar, scalar_int, prefix, public_key_bytes = key
                 
                 # Use orlp signing function (same as packet_capture_utils)
                 # This matches the Node.js supercop implementation
@@ -864,19 +1107,16 @@ class MapUploaderService(BaseServicePlugin):
                         data_hash,
                         scalar,
                         prefix,
-                        public_key_bytes
+                        public_key_bytes,
+                        scalar_int=scalar_int
                     )
                 except ImportError as e:
                     raise ImportError(
                         "PyNaCl is required for orlp format signing. "
                         "Install with: pip install pynacl"
                     ) from e
-            elif len(private_key_bytes) == 32:
-                # Seed format: use cryptography library
-                private_key = ed25519.Ed25519PrivateKey.from_private_bytes(private_key_bytes)
-                signature = private_key.sign(data_hash)
             else:
-                raise ValueError(f"Invalid private key length: {len(private_key_bytes)}")
+                signature = key.sign(data_hash)
             
             # Return as hex
             return bytes_to_hex(signature)
@@ -884,4 +1124,3 @@ class MapUploaderService(BaseServicePlugin):
         except Exception as e:
             self.logger.error(f"Error signing data: {e}", exc_info=True)
             raise
-
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Queued MQTT publishing for the packet capture service
+The caller serializes each packet once and enqueues the same payload for every
+broker. Each broker has a bounded queue drained by its own worker task, so a
+slow or stalled broker only backs up (and drops from) its own queue.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+DROP_OLDEST = 'oldest'
+DROP_NEWEST = 'newest'
+
+# paho-mqtt's MQTT_ERR_SUCCESS
+MQTT_ERR_SUCCESS = 0
+
+
+@dataclass
+class BrokerQueue:
+    """Pending publishes and counters for one broker"""
+    broker_info: Dict[str, Any]
+    items: Deque[Tuple[str, str, float]]
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+    enqueued: int = 0
+    published: int = 0
+    failed: int = 0
+    dropped: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    @property
+    def name(self) -> str:
+        return self.broker_info.get('config', {}).get('host', 'unknown')
+
+
+class MqttPublishPipeline:
+    """Per-broker bounded publish queues drained by worker tasks.
+
+    Args:
+        logger: Logger for publish errors.
+        max_queue: Messages buffered per broker before the drop policy applies.
+        drop_policy: 'oldest' drops the oldest queued message, 'newest' drops the incoming one.
+        qos: MQTT QoS used for every publish.
+        batch_size: Messages a worker publishes before yielding to the event loop.
+    """
+
+    def __init__(self, logger, max_queue: int = 1000, drop_policy: str = DROP_OLDEST,
+                 qos: int = 0, batch_size: int = 50):
+        self.logger = logger
+        self.max_queue = max(1, max_queue)
+        if drop_policy not in (DROP_OLDEST, DROP_NEWEST):
+            logger.warning(f"Unknown MQTT queue drop policy '{drop_policy}', using '{DROP_OLDEST}'")
+            drop_policy = DROP_OLDEST
+        self.drop_policy = drop_policy
+        self.qos = qos
+        self.batch_size = max(1, batch_size)
+        self._queues: Dict[int, BrokerQueue] = {}
+        self._running = False
+        self._started_at: Optional[float] = None
+
+    def _get_queue(self, broker_info: Dict[str, Any]) -> BrokerQueue:
+        key = id(broker_info)
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = BrokerQueue(broker_info=broker_info, items=deque())
+            self._queues[key] = queue
+            if self._running:
+                self._start_worker(queue)
+        return queue
+
+    def enqueue(self, broker_info: Dict[str, Any], topic: str, payload: str) -> bool:
+        """Queue a serialized message for one broker.
+
+        Returns:
+            bool: False if the message was dropped by the 'newest' drop policy.
+        """
+        queue = self._get_queue(broker_info)
+        if len(queue.items) >= self.max_queue:
+            queue.dropped += 1
+            if self.drop_policy == DROP_NEWEST:
+                return False
+            queue.items.popleft()
+        queue.items.append((topic, payload, time.monotonic()))
+        queue.enqueued += 1
+        queue.wakeup.set()
+        return True
+
+    def _publish_one(self, queue: BrokerQueue, topic: str, payload: str, enqueued_at: float) -> None:
+        if not queue.broker_info.get('connected', False):
+            # Broker went away while the message was queued
+            queue.dropped += 1
+            return
+        try:
+            result = queue.broker_info['client'].publish(topic, payload, qos=self.qos)
+            if result.rc == MQTT_ERR_SUCCESS:
+                queue.published += 1
+                latency = time.monotonic() - enqueued_at
+                queue.latency_total += latency
+                queue.latency_max = max(queue.latency_max, latency)
+            else:
+                queue.failed += 1
+                self.logger.warning(f"Failed to publish to MQTT topic '{topic}' on {queue.name}: rc={result.rc}")
+        except Exception as e:
+            queue.failed += 1
+            self.logger.error(f"Error publishing to MQTT on {queue.name}: {e}")
+
+    async def _worker(self, queue: BrokerQueue) -> None:
+        while self._running:
+            if not queue.items:
+                queue.wakeup.clear()
+                await queue.wakeup.wait()
+                continue
+            for _ in range(min(self.batch_size, len(queue.items))):
+                self._publish_one(queue, *queue.items.popleft())
+            await asyncio.sleep(0)
+
+    def _start_worker(self, queue: BrokerQueue) -> None:
+        queue.task = asyncio.create_task(self._worker(queue))
+
+    def start(self) -> None:
+        """Start one worker task per known broker (must be called from the event loop)."""
+        if self._running:
+            return
+        self._running = True
+        self._started_at = time.monotonic()
+        for queue in self._queues.values():
+            self._start_worker(queue)
+
+    async def stop(self) -> None:
+        """Stop the workers, publishing anything still queued to connected brokers."""
+        self._running = False
+        for queue in self._queues.values():
+            queue.wakeup.set()
+            if queue.task and not queue.task.done():
+                queue.task.cancel()
+                try:
+                    await queue.task
+                except asyncio.CancelledError:
+                    pass
+            queue.task = None
+            while queue.items:
+                self._publish_one(queue, *queue.items.popleft())
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Per-broker queue depth, throughput and enqueue-to-publish latency."""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        stats = []
+        for queue in self._queues.values():
+            stats.append({
+                'broker': queue.name,
+                'queued': len(queue.items),
+                'enqueued': queue.enqueued,
+                'published': queue.published,
+                'failed': queue.failed,
+                'dropped': queue.dropped,
+                'publish_rate': round(queue.published / elapsed, 2) if elapsed > 0 else 0.0,
+                'avg_latency_ms': round(queue.latency_total / queue.published * 1000, 2) if queue.published else 0.0,
+                'max_latency_ms': round(queue.latency_max * 1000, 2),
+            })
+        return stats
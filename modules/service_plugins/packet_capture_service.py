@@ -40,6 +40,12 @@ from .packet_capture_utils import (
     read_private_key_file
 )
 
+# Import MQTT publish pipeline
+from .mqtt_publish_utils import MqttPublishPipeline
+
+# Import capture file writer
+from .capture_writer_utils import CaptureWriter
+
 # Import base service
 from .base_service import BaseServicePlugin
 
@@ -125,11 +131,16 @@ class PacketCaptureService(BaseServicePlugin):
         
         # Packet tracking
         self.packet_count = 0
-        self.output_handle = None
+        self.capture_writer: Optional[CaptureWriter] = None
         
         # MQTT
         self.mqtt_clients: List[Dict[str, Any]] = []
         self.mqtt_connected = False
+        self.mqtt_pipeline = MqttPublishPipeline(
+            self.logger,
+            max_queue=self.get_config_int('mqtt_queue_size', 1000),
+            drop_policy=self.get_config_str('mqtt_queue_drop_policy', 'oldest').lower()
+        )
         
         # Stats/status publishing
         self.stats_status_enabled = self.get_config_bool('stats_in_status_enabled', True)
@@ -173,6 +184,11 @@ class PacketCaptureService(BaseServicePlugin):
         
         # Output file
         self.output_file = config.get('PacketCapture', 'output_file', fallback=None)
+        self.output_flush_interval = config.getfloat('PacketCapture', 'output_flush_interval', fallback=5.0)
+        self.output_flush_bytes = config.getint('PacketCapture', 'output_flush_bytes', fallback=65536)
+        self.output_rotation = config.get('PacketCapture', 'output_rotation', fallback='none').lower()
+        self.output_max_segment_mb = config.getfloat('PacketCapture', 'output_max_segment_mb', fallback=100.0)
+        self.output_compression = config.get('PacketCapture', 'output_compression', fallback='none').lower()
         
         # Verbose/debug
         self.verbose = config.getboolean('PacketCapture', 'verbose', fallback=False)
@@ -346,10 +362,21 @@ class PacketCaptureService(BaseServicePlugin):
         # Open output file if specified
         if self.output_file:
             try:
-                self.output_handle = open(self.output_file, 'a')
-                self.logger.info(f"Writing packets to: {self.output_file}")
+                self.capture_writer = CaptureWriter(
+                    self.output_file,
+                    self.logger,
+                    flush_interval=self.output_flush_interval,
+                    flush_bytes=self.output_flush_bytes,
+                    rotation=self.output_rotation,
+                    max_segment_bytes=int(self.output_max_segment_mb * 1024 * 1024),
+                    compression=self.output_compression
+                )
+                # Open the first segment now so errors show at startup
+                segment = self.capture_writer.open()
+                self.logger.info(f"Writing packets to: {segment} (rotation: {self.capture_writer.rotation}, compression: {self.capture_writer.compression})")
             except Exception as e:
                 self.logger.error(f"Failed to open output file: {e}")
+                self.capture_writer = None
         
         # Setup event handlers
         await self.setup_event_handlers()
@@ -395,6 +422,9 @@ class PacketCaptureService(BaseServicePlugin):
         # Clean up event subscriptions
         self.cleanup_event_subscriptions()
         
+        # Publish anything still queued before disconnecting
+        await self.mqtt_pipeline.stop()
+        
         # Disconnect MQTT
         for mqtt_client_info in self.mqtt_clients:
             try:
@@ -407,10 +437,10 @@ class PacketCaptureService(BaseServicePlugin):
                 # Log unexpected errors but don't fail cleanup
                 self.logger.warning(f"Unexpected error disconnecting MQTT client: {e}")
         
-        # Close output file
-        if self.output_handle:
-            self.output_handle.close()
-            self.output_handle = None
+        # Flush and close output file
+        if self.capture_writer:
+            self.capture_writer.close()
+            self.capture_writer = None
         
         self.logger.info(f"Packet capture service stopped. Total packets captured: {self.packet_count}")
     
@@ -792,10 +822,12 @@ class PacketCaptureService(BaseServicePlugin):
             # Format packet data to match original script's format
             formatted_packet = self._format_packet_data(raw_hex, packet_info, payload, metadata)
             
-            # Write to file
-            if self.output_handle:
-                self.output_handle.write(json.dumps(formatted_packet, default=str) + '\n')
-                self.output_handle.flush()
+            # Serialize once for the output file and every MQTT broker
+            packet_json = json.dumps(formatted_packet, default=str)
+            
+            # Write to file (buffered; flushed by size/interval)
+            if self.capture_writer:
+                self.capture_writer.write(packet_json)
             
             # Publish to MQTT if enabled
             # The publish function will check per-broker connection status
@@ -803,7 +835,7 @@ class PacketCaptureService(BaseServicePlugin):
             if self.mqtt_enabled:
                 if self.debug:
                     self.logger.debug(f"Calling publish_packet_mqtt for packet {self.packet_count}")
-                publish_metrics = await self.publish_packet_mqtt(formatted_packet)
+                publish_metrics = await self.publish_packet_mqtt(formatted_packet, payload=packet_json)
             
             # Log DEBUG level for each packet (verbose; use INFO only for service lifecycle)
             self.logger.debug(f"📦 Captured packet #{self.packet_count}: {formatted_packet['route']} type {formatted_packet['packet_type']}, {formatted_packet['len']} bytes, SNR: {formatted_packet['SNR']}, RSSI: {formatted_packet['RSSI']}, hash: {formatted_packet['hash']} (MQTT: {publish_metrics['succeeded']}/{publish_metrics['attempted']})")
@@ -1233,20 +1265,13 @@ class PacketCaptureService(BaseServicePlugin):
         else:
             self.logger.warning("MQTT enabled but no brokers connected")
     
-    def _resolve_topic_template(self, template: str, packet_type: str = 'packet') -> Optional[str]:
-        """Resolve topic template with placeholders.
+    def _get_device_public_key(self) -> Optional[str]:
+        """Get the connected device's public key as uppercase hex.
         
-        Args:
-            template: Topic template string.
-            packet_type: Type of packet ('packet' or 'status').
-            
         Returns:
-            Optional[str]: Resolved topic string, or None if template is empty.
+            Optional[str]: Device public key, or None if not available.
         """
-        if not template:
-            return None
-        
-        # Get device's public key (NOT owner's key - owner key is only for JWT 'owner' field)
+        # Device's public key (NOT owner's key - owner key is only for JWT 'owner' field)
         # This matches the original script which uses self.device_public_key from self_info
         device_public_key = None
         if self.meshcore and hasattr(self.meshcore, 'self_info'):
@@ -1268,93 +1293,144 @@ class PacketCaptureService(BaseServicePlugin):
         # Normalize to uppercase (remove 0x prefix if present)
         if device_public_key:
             device_public_key = device_public_key.replace('0x', '').replace(' ', '').upper()
+        if not device_public_key or device_public_key == 'UNKNOWN':
+            return None
+        return device_public_key
+    
+    def _resolve_topic_template(self, template: str, packet_type: str = 'packet') -> Optional[str]:
+        """Resolve topic template with placeholders.
+        
+        Args:
+            template: Topic template string.
+            packet_type: Type of packet ('packet' or 'status').
+            
+        Returns:
+            Optional[str]: Resolved topic string, or None if template is empty.
+        """
+        if not template:
+            return None
+        
+        device_public_key = self._get_device_public_key() or 'DEVICE'
         
         # Replace placeholders (matches original script's resolve_topic_template)
         topic = template.replace('{IATA}', self.global_iata.upper())
         topic = topic.replace('{iata}', self.global_iata.lower())
-        topic = topic.replace('{PUBLIC_KEY}', device_public_key if device_public_key and device_public_key != 'Unknown' else 'DEVICE')
-        topic = topic.replace('{public_key}', (device_public_key if device_public_key and device_public_key != 'Unknown' else 'DEVICE').lower())
+        topic = topic.replace('{PUBLIC_KEY}', device_public_key)
+        topic = topic.replace('{public_key}', device_public_key.lower())
         
         return topic
     
-    async def publish_packet_mqtt(self, packet_info: Dict[str, Any]) -> Dict[str, int]:
-        """Publish packet to MQTT - returns metrics dict with 'attempted' and 'succeeded' counts.
+    def _get_broker_topic(self, mqtt_client_info: Dict[str, Any], packet_type: str) -> Optional[str]:
+        """Get a broker's topic for 'packet' or 'status' messages, cached per broker.
+        
+        Topics are only cached once the device public key is known, so a
+        template using {PUBLIC_KEY} is not stuck on the 'DEVICE' placeholder.
         
         Args:
-            packet_info: Formatted packet dictionary.
+            mqtt_client_info: Entry from self.mqtt_clients.
+            packet_type: 'packet' or 'status'.
             
         Returns:
-            Dict[str, int]: Dictionary with 'attempted' and 'succeeded' counts.
+            Optional[str]: Resolved topic, or None if the template is empty.
         """
-        # Always log when function is called (helps diagnose if it's not being invoked)
-        self.logger.debug(f"publish_packet_mqtt called (packet {self.packet_count}, {len(self.mqtt_clients)} clients)")
+        topic_cache = mqtt_client_info.setdefault('topic_cache', {})
+        topic = topic_cache.get(packet_type)
+        if topic:
+            return topic
+        
+        config = mqtt_client_info['config']
+        template = config.get('topic_packets' if packet_type == 'packet' else 'topic_status')
+        if template:
+            topic = self._resolve_topic_template(template, packet_type)
+            if topic and ('{PUBLIC_KEY}' not in template.upper() or self._get_device_public_key()):
+                topic_cache[packet_type] = topic
+        elif config.get('topic_prefix'):
+            topic = f"{config['topic_prefix']}/{packet_type}"
+            topic_cache[packet_type] = topic
+        else:
+            topic = 'meshcore/packets/packet' if packet_type == 'packet' else 'meshcore/status'
+            topic_cache[packet_type] = topic
+        return topic
+    
+    async def publish_packet_mqtt(self, packet_info: Dict[str, Any], payload: Optional[str] = None) -> Dict[str, int]:
+        """Queue a packet for every connected MQTT broker.
         
+        The packet is serialized once and the same payload is queued to each
+        broker; per-broker worker tasks do the actual publish.
+        
+        Args:
+            packet_info: Formatted packet dictionary.
+            payload: Packet already serialized to JSON (serialized here if None).
+            
+        Returns:
+            Dict[str, int]: Dictionary with 'attempted' and 'succeeded' (queued) counts.
+        """
         # Initialize metrics
         metrics = {"attempted": 0, "succeeded": 0}
         
         # Check per-broker connection status (more accurate than global flag)
-        # Don't use early return - let the loop check each broker individually
         if not self.mqtt_clients:
             self.logger.debug("No MQTT clients configured, skipping publish")
             return metrics
         
-        connected_count = sum(1 for m in self.mqtt_clients if m.get('connected', False))
-        self.logger.debug(f"Publishing packet to MQTT ({connected_count}/{len(self.mqtt_clients)} brokers connected)")
+        if payload is None:
+            payload = json.dumps(packet_info, default=str)
         
         for mqtt_client_info in self.mqtt_clients:
             # Only publish to connected brokers
             if not mqtt_client_info.get('connected', False):
-                self.logger.debug(f"Skipping MQTT broker {mqtt_client_info['config'].get('host', 'unknown')} (not connected)")
                 continue
             try:
-                client = mqtt_client_info['client']
-                config = mqtt_client_info['config']
-                
-                # Determine topic
-                topic = None
-                if config.get('topic_packets'):
-                    topic = self._resolve_topic_template(config['topic_packets'], 'packet')
-                elif config.get('topic_prefix'):
-                    topic = f"{config['topic_prefix']}/packet"
-                else:
-                    topic = 'meshcore/packets/packet'
-                
+                topic = self._get_broker_topic(mqtt_client_info, 'packet')
                 if not topic:
                     continue
                 
-                payload = json.dumps(packet_info, default=str)
-                
-                # Log topic and payload size for debugging
-                self.logger.debug(f"Publishing to topic '{topic}' on {config['host']} (payload: {len(payload)} bytes)")
-                
-                # Count as attempted
                 metrics["attempted"] += 1
-                
-                # Use QoS 0 (matches original script - prevents retry storms)
-                result = client.publish(topic, payload, qos=0)
-                if result.rc == mqtt.MQTT_ERR_SUCCESS:
+                if self.mqtt_pipeline.enqueue(mqtt_client_info, topic, payload):
                     metrics["succeeded"] += 1
-                    self.logger.debug(f"Published packet to MQTT topic '{topic}' on {config['host']} (qos=0)")
-                else:
-                    self.logger.warning(f"Failed to publish packet to MQTT topic '{topic}' on {config['host']}: {result.rc} ({mqtt.error_string(result.rc)})")
-                    
             except Exception as e:
-                self.logger.error(f"Error publishing packet to MQTT on {config.get('host', 'unknown')}: {e}")
+                self.logger.error(f"Error queueing packet for MQTT on {mqtt_client_info['config'].get('host', 'unknown')}: {e}")
         
-        # Log summary
-        if metrics["succeeded"] > 0:
-            self.logger.debug(f"Published packet to {metrics['succeeded']} MQTT broker(s)")
-        elif connected_count == 0:
-            self.logger.debug(f"No MQTT brokers connected, packet not published")
+        if metrics["attempted"] == 0:
+            self.logger.debug("No MQTT brokers connected, packet not published")
         
         return metrics
     
+    def get_publish_stats(self) -> List[Dict[str, Any]]:
+        """Get per-broker MQTT publish queue statistics.
+        
+        Returns:
+            List[Dict[str, Any]]: Queue depth, throughput, drops and latency per broker.
+        """
+        return self.mqtt_pipeline.get_stats()
+    
+    def get_metadata(self) -> Dict[str, Any]:
+        """Get service metadata, including MQTT publish and capture file statistics.
+        
+        Returns:
+            Dict[str, Any]: Service metadata.
+        """
+        metadata = super().get_metadata()
+        metadata['mqtt_publish'] = self.get_publish_stats()
+        if self.capture_writer:
+            metadata['capture_output'] = self.capture_writer.get_stats()
+        return metadata
+    
     async def start_background_tasks(self) -> None:
         """Start background tasks.
         
         Initializes scheduler for stats refresh, JWT renewal, health checks,
         and MQTT reconnection monitor.
         """
+        # MQTT publish workers (one per broker)
+        if self.mqtt_enabled:
+            self.mqtt_pipeline.start()
+        
+        # Flush buffered capture output even when no packets arrive
+        if self.capture_writer:
+            task = asyncio.create_task(self.capture_flush_loop())
+            self.background_tasks.append(task)
+        
         # Stats refresh scheduler (matches original script)
         if self.stats_status_enabled and self.stats_refresh_interval > 0:
             self.stats_update_task = asyncio.create_task(self.stats_refresh_scheduler())
@@ -1375,6 +1451,21 @@ class PacketCaptureService(BaseServicePlugin):
             task = asyncio.create_task(self.mqtt_reconnection_monitor())
             self.background_tasks.append(task)
     
+    async def capture_flush_loop(self) -> None:
+        """Periodically flush buffered capture output and apply time-based rotation."""
+        interval = max(1.0, min(self.output_flush_interval, 60.0))
+        while not self.should_exit:
+            try:
+                if self.capture_writer:
+                    self.capture_writer.flush_if_due()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.debug(f"Capture flush error: {e}")
+            
+            if await self._wait_with_shutdown(interval):
+                break
+    
     async def stats_refresh_scheduler(self) -> None:
         """Periodically refresh stats and publish them via MQTT (matches original script).
         
@@ -1696,6 +1787,8 @@ class PacketCaptureService(BaseServicePlugin):
             elif self.debug:
                 self.logger.debug("No stats payload available - status message will not include stats")
         
+        payload = json.dumps(status_msg, default=str)
+        
         # Publish status to all connected brokers
         for mqtt_client_info in self.mqtt_clients:
             # Only publish to connected brokers
@@ -1703,22 +1796,10 @@ class PacketCaptureService(BaseServicePlugin):
                 continue
             try:
                 client = mqtt_client_info['client']
-                config = mqtt_client_info['config']
-                
-                # Determine topic
-                topic = None
-                if config.get('topic_status'):
-                    topic = self._resolve_topic_template(config['topic_status'], 'status')
-                elif config.get('topic_prefix'):
-                    topic = f"{config['topic_prefix']}/status"
-                else:
-                    topic = 'meshcore/status'
-                
+                topic = self._get_broker_topic(mqtt_client_info, 'status')
                 if not topic:
                     continue
                 
-                payload = json.dumps(status_msg, default=str)
-                
                 # Use QoS 0 with retain=True for status (matches original script)
                 result = client.publish(topic, payload, qos=0, retain=True)
                 if result.rc == mqtt.MQTT_ERR_SUCCESS:
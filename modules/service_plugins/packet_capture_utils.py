@@ -119,7 +119,8 @@ def bytes_to_int_le(data: bytes) -> int:
 L = 2**252 + 27742317777372353535851937790883648493
 
 
-def ed25519_sign_with_expanded_key(message: bytes, scalar: bytes, prefix: bytes, public_key: bytes) -> bytes:
+def ed25519_sign_with_expanded_key(message: bytes, scalar: bytes, prefix: bytes, public_key: bytes,
+                                   scalar_int: Optional[int] = None) -> bytes:
     """Sign a message using Ed25519 with pre-expanded key (orlp format).
     
     This implements RFC 8032 Ed25519 signing with an already-expanded key.
@@ -130,6 +131,7 @@ def ed25519_sign_with_expanded_key(message: bytes, scalar: bytes, prefix: bytes,
         scalar: First 32 bytes of orlp private key (clamped scalar).
         prefix: Last 32 bytes of orlp private key (prefix for nonce).
         public_key: 32-byte public key.
+        scalar_int: Optional pre-decoded scalar, for callers signing repeatedly with the same key.
         
     Returns:
         bytes: 64-byte signature (R || s).
@@ -153,7 +155,8 @@ def ed25519_sign_with_expanded_key(message: bytes, scalar: bytes, prefix: bytes,
     k = bytes_to_int_le(h_k) % L
     
     # Step 4: Compute s = (r + k * scalar) mod L
-    scalar_int = bytes_to_int_le(scalar)
+    if scalar_int is None:
+        scalar_int = bytes_to_int_le(scalar)
     s = (r + k * scalar_int) % L
     s_bytes = int_to_bytes_le(s, 32)
     
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Dependency-aware startup orchestration with a boot timeline
+Startup is split into named stages that declare which stages they depend on.
+Each stage starts as soon as its dependencies have succeeded, so independent
+stages (feeds, web viewer, services, startup advert) run concurrently instead
+of one after another. Every stage has its own timeout, and the start offset,
+duration and outcome of each stage is recorded for the boot timeline.
+"""
+
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .metrics import get_metrics
+
+# Stage outcomes
+STAGE_OK = 'ok'
+STAGE_FAILED = 'failed'
+STAGE_TIMEOUT = 'timeout'
+STAGE_SKIPPED = 'skipped'
+STAGE_CANCELLED = 'cancelled'
+
+
+class CriticalStageError(Exception):
+    """Raised internally when a critical stage does not succeed."""
+
+
+@dataclass
+class StartupStage:
+    """One unit of startup work.
+
+    ``func`` may be a plain function or return an awaitable; a result of
+    ``False`` counts as a failure. Synchronous stages run on the event loop, so
+    they should be quick. ``timeout`` only applies to awaitable stages; None
+    uses the orchestrator's default and 0 disables it.
+    """
+    name: str
+    func: Callable[[], Any]
+    depends_on: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    critical: bool = False
+
+
+class StartupOrchestrator:
+    """Runs startup stages concurrently in dependency order.
+
+    A stage whose dependency did not succeed is skipped. If a critical stage
+    fails, every stage still pending is cancelled and run() returns False.
+
+    Args:
+        bot: Bot instance (for the logger and metrics).
+        default_timeout: Timeout in seconds for stages that do not set one
+            (None or <= 0 for no timeout).
+    """
+
+    def __init__(self, bot, default_timeout: Optional[float] = 60.0):
+        self.bot = bot
+        self.logger = bot.logger
+        self.default_timeout = default_timeout if default_timeout and default_timeout > 0 else None
+        self.stages: Dict[str, StartupStage] = {}
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.total_ms: Optional[float] = None
+        self._t0 = 0.0
+        self._done: Dict[str, asyncio.Event] = {}
+
+    def add(self, name: str, func: Callable[[], Any], depends_on: Tuple[str, ...] = (),
+            timeout: Optional[float] = None, critical: bool = False) -> StartupStage:
+        """Register a stage (names must be unique)."""
+        if name in self.stages:
+            raise ValueError(f"Duplicate startup stage: {name}")
+        stage = StartupStage(name, func, tuple(depends_on), timeout, critical)
+        self.stages[name] = stage
+        return stage
+
+    def _validate(self) -> None:
+        for stage in self.stages.values():
+            for dep in stage.depends_on:
+                if dep not in self.stages:
+                    raise ValueError(f"Startup stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        # Depth-first search for dependency cycles
+        state: Dict[str, int] = {}
+
+        def visit(name: str) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Startup stage dependency cycle at '{name}'")
+            state[name] = 1
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            state[name] = 2
+
+        for name in self.stages:
+            visit(name)
+
+    def _record(self, name: str, status: str, start: Optional[float], error: Optional[str] = None) -> None:
+        now = time.perf_counter()
+        self.results[name] = {
+            'stage': name,
+            'status': status,
+            'start_ms': round((start - self._t0) * 1000, 1) if start is not None else None,
+            'duration_ms': round((now - start) * 1000, 1) if start is not None else 0.0,
+            'depends_on': list(self.stages[name].depends_on),
+        }
+        if error:
+            self.results[name]['error'] = error
+        metrics = get_metrics(self.bot)
+        if metrics is not None and start is not None:
+            metrics.observe('startup_stage', now - start, {'stage': name})
+
+    async def _run_stage(self, stage: StartupStage) -> None:
+        try:
+            for dep in stage.depends_on:
+                await self._done[dep].wait()
+            blocked = [dep for dep in stage.depends_on if self.results[dep]['status'] != STAGE_OK]
+            if blocked:
+                self._record(stage.name, STAGE_SKIPPED, None, f"dependency not ready: {', '.join(blocked)}")
+                self.logger.warning(f"Startup stage '{stage.name}' skipped ({', '.join(blocked)} not ready)")
+            else:
+                await self._execute(stage)
+        finally:
+            self._done[stage.name].set()
+
+        if stage.critical and self.results[stage.name]['status'] != STAGE_OK:
+            raise CriticalStageError(stage.name)
+
+    async def _execute(self, stage: StartupStage) -> None:
+        timeout = stage.timeout if stage.timeout is not None else self.default_timeout
+        if timeout is not None and timeout <= 0:
+            timeout = None
+        start = time.perf_counter()
+        try:
+            result = stage.func()
+            if inspect.isawaitable(result):
+                result = await asyncio.wait_for(result, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._record(stage.name, STAGE_TIMEOUT, start, f"timed out after {timeout}s")
+            self.logger.error(f"Startup stage '{stage.name}' timed out after {timeout}s")
+            return
+        except asyncio.CancelledError:
+            self._record(stage.name, STAGE_CANCELLED, start)
+            raise
+        except Exception as e:
+            self._record(stage.name, STAGE_FAILED, start, str(e))
+            self.logger.error(f"Startup stage '{stage.name}' failed: {e}")
+            return
+
+        if result is False:
+            self._record(stage.name, STAGE_FAILED, start)
+            self.logger.error(f"Startup stage '{stage.name}' failed")
+        else:
+            self._record(stage.name, STAGE_OK, start)
+            self.logger.debug(f"Startup stage '{stage.name}' done in {self.results[stage.name]['duration_ms']}ms")
+
+    async def run(self) -> bool:
+        """Run all registered stages.
+
+        Returns:
+            bool: False if a critical stage failed, True otherwise.
+        """
+        self._validate()
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.results = {}
+        self._done = {name: asyncio.Event() for name in self.stages}
+        tasks = [asyncio.create_task(self._run_stage(stage), name=f"startup:{stage.name}")
+                 for stage in self.stages.values()]
+
+        success = True
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+                if any(not task.cancelled() and isinstance(task.exception(), CriticalStageError) for task in done):
+                    success = False
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for name in self.stages:
+                if name not in self.results:
+                    self._record(name, STAGE_CANCELLED, None)
+            self.total_ms = round((time.perf_counter() - self._t0) * 1000, 1)
+        return success
+
+    def get_timeline(self) -> Dict[str, Any]:
+        """Boot timeline as JSON-serializable data, stages in start order."""
+        stages = sorted(self.results.values(),
+                        key=lambda r: (r['start_ms'] is None, r['start_ms'] or 0.0, r['stage']))
+        return {'started_at': self.started_at, 'total_ms': self.total_ms, 'stages': stages}
+
+    def format_timeline(self) -> List[str]:
+        """Boot timeline as log lines."""
+        lines = [f"Startup finished in {self.total_ms}ms"]
+        for entry in self.get_timeline()['stages']:
+            offset = f"+{entry['start_ms']:.1f}ms" if entry['start_ms'] is not None else '-'
+            line = f"  {offset:>11} {entry['stage']:<28} {entry['duration_ms']:>8.1f}ms {entry['status']}"
+            if entry.get('error'):
+                line += f" ({entry['error']})"
+            lines.append(line)
+        return lines
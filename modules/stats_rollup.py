@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Hourly and daily rollups of the stats tables
+Keeps per-command, per-user, per-channel and per-path-length counts up to date at
+insert time so dashboard queries read a few hundred rollup rows instead of
+scanning message_stats, command_stats and path_stats
+"""
+
+import sqlite3
+import time
+from typing import Any, Optional, Tuple
+
+# Bump to force a rebuild of the rollup tables from the raw stats tables
+ROLLUP_SCHEMA_VERSION = '1'
+ROLLUP_VERSION_KEY = 'stats_rollup_version'
+
+HOURLY_TABLE = 'stats_rollup_hourly'
+DAILY_TABLE = 'stats_rollup_daily'
+HOUR_SECONDS = 3600
+DAY_SECONDS = 86400
+
+# Hourly buckets are kept long enough to answer the 30 day window
+HOURLY_RETENTION_DAYS = 31
+
+# Metrics: key/subkey meaning
+METRIC_MESSAGE = 'message'          # key=channel ('' for DMs), subkey=sender_id
+METRIC_COMMAND = 'command'          # key=command_name, subkey=sender_id, replied=responses sent
+METRIC_PATH_LENGTH = 'path_length'  # key=path length, subkey=''
+
+WINDOW_SECONDS = {
+    '24h': 24 * HOUR_SECONDS,
+    '7d': 7 * DAY_SECONDS,
+    '30d': 30 * DAY_SECONDS,
+}
+
+
+def init_rollup_tables(cursor: sqlite3.Cursor) -> None:
+    """Create the hourly and daily rollup tables if they don't exist."""
+    for table in (HOURLY_TABLE, DAILY_TABLE):
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket INTEGER NOT NULL,
+                metric TEXT NOT NULL,
+                key TEXT NOT NULL,
+                subkey TEXT NOT NULL DEFAULT '',
+                count INTEGER NOT NULL DEFAULT 0,
+                replied INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (metric, bucket, key, subkey)
+            ) WITHOUT ROWID
+        ''')
+
+
+def record_rollup(cursor: sqlite3.Cursor, metric: str, timestamp: Optional[int], key: Any,
+                  subkey: Any = '', replied: bool = False) -> None:
+    """Add one event to the hourly and daily rollups (caller commits).
+
+    Args:
+        cursor: Cursor on the connection that inserted the raw stats row.
+        metric: One of the METRIC_* constants.
+        timestamp: Unix timestamp of the event (defaults to now).
+        key: Primary grouping key (channel, command name or path length).
+        subkey: Secondary grouping key (sender id), '' if unused.
+        replied: Whether the bot replied (command metric only).
+    """
+    ts = int(timestamp or time.time())
+    key = '' if key is None else str(key)
+    subkey = '' if subkey is None else str(subkey)
+    replied = 1 if replied else 0
+    for table, size in ((HOURLY_TABLE, HOUR_SECONDS), (DAILY_TABLE, DAY_SECONDS)):
+        cursor.execute(f'''
+            INSERT INTO {table} (bucket, metric, key, subkey, count, replied)
+            VALUES (?, ?, ?, ?, 1, ?)
+            ON CONFLICT (metric, bucket, key, subkey)
+            DO UPDATE SET count = count + 1, replied = replied + excluded.replied
+        ''', (ts - ts % size, metric, key, subkey, replied))
+
+
+def backfill_rollups(conn: sqlite3.Connection, logger: Any = None) -> bool:
+    """Rebuild the rollup tables from the raw stats tables once per schema version.
+
+    Runs in a single transaction. Does nothing if bot_metadata already records
+    the current ROLLUP_SCHEMA_VERSION.
+
+    Returns:
+        bool: True if a backfill was performed.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='bot_metadata'")
+    has_metadata = cursor.fetchone() is not None
+    if has_metadata:
+        cursor.execute('SELECT value FROM bot_metadata WHERE key = ?', (ROLLUP_VERSION_KEY,))
+        row = cursor.fetchone()
+        if row and row[0] == ROLLUP_SCHEMA_VERSION:
+            return False
+
+    init_rollup_tables(cursor)
+    for table, size in ((HOURLY_TABLE, HOUR_SECONDS), (DAILY_TABLE, DAY_SECONDS)):
+        cursor.execute(f'DELETE FROM {table}')
+        cursor.execute(f'''
+            INSERT INTO {table} (bucket, metric, key, subkey, count, replied)
+            SELECT timestamp - timestamp % {size}, '{METRIC_MESSAGE}', COALESCE(channel, ''), sender_id, COUNT(*), 0
+            FROM message_stats
+            GROUP BY 1, 3, 4
+        ''')
+        cursor.execute(f'''
+            INSERT INTO {table} (bucket, metric, key, subkey, count, replied)
+            SELECT timestamp - timestamp % {size}, '{METRIC_COMMAND}', command_name, sender_id,
+                   COUNT(*), SUM(CASE WHEN response_sent THEN 1 ELSE 0 END)
+            FROM command_stats
+            GROUP BY 1, 3, 4
+        ''')
+        cursor.execute(f'''
+            INSERT INTO {table} (bucket, metric, key, subkey, count, replied)
+            SELECT timestamp - timestamp % {size}, '{METRIC_PATH_LENGTH}', CAST(path_length AS TEXT), '', COUNT(*), 0
+            FROM path_stats
+            GROUP BY 1, 3
+        ''')
+    if has_metadata:
+        cursor.execute('''
+            INSERT OR REPLACE INTO bot_metadata (key, value, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+        ''', (ROLLUP_VERSION_KEY, ROLLUP_SCHEMA_VERSION))
+    conn.commit()
+    if logger:
+        logger.info(f"Backfilled stats rollup tables (schema version {ROLLUP_SCHEMA_VERSION})")
+    return True
+
+
+def prune_hourly_rollups(cursor: sqlite3.Cursor, now: Optional[float] = None) -> int:
+    """Delete hourly buckets older than HOURLY_RETENTION_DAYS (daily buckets are kept).
+
+    Returns:
+        int: Number of rows deleted.
+    """
+    cutoff = int(now or time.time()) - HOURLY_RETENTION_DAYS * DAY_SECONDS
+    cursor.execute(f'DELETE FROM {HOURLY_TABLE} WHERE bucket < ?', (cutoff,))
+    return cursor.rowcount
+
+
+def rollup_source(window: str, now: Optional[float] = None) -> Tuple[str, Optional[int]]:
+    """Pick the rollup table and first bucket for a dashboard time window.
+
+    Windows up to 30 days read hourly buckets (accurate to the hour); 'all' reads
+    daily buckets.
+
+    Args:
+        window: '24h', '7d', '30d' or 'all'.
+        now: Current unix time (defaults to now).
+
+    Returns:
+        Tuple[str, Optional[int]]: (table name, minimum bucket or None for all time).
+    """
+    seconds = WINDOW_SECONDS.get(window)
+    if seconds is None:
+        return DAILY_TABLE, None
+    start = int(now or time.time()) - seconds
+    return HOURLY_TABLE, start - start % HOUR_SECONDS
+
+
+def rollup_filter(window: str, now: Optional[float] = None) -> Tuple[str, str, Tuple]:
+    """Build the FROM table, extra WHERE clause and params for a window.
+
+    Returns:
+        Tuple[str, str, Tuple]: (table, "AND bucket >= ?" or "", params).
+    """
+    table, min_bucket = rollup_source(window, now)
+    if min_bucket is None:
+        return table, '', ()
+    return table, 'AND bucket >= ?', (min_bucket,)
+
+
+def rollups_available(cursor: sqlite3.Cursor) -> bool:
+    """Check whether the rollup tables exist and have been backfilled."""
+    cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name IN ('{HOURLY_TABLE}', '{DAILY_TABLE}')")
+    if len(cursor.fetchall()) < 2:
+        return False
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='bot_metadata'")
+    if cursor.fetchone() is None:
+        return False
+    cursor.execute('SELECT value FROM bot_metadata WHERE key = ?', (ROLLUP_VERSION_KEY,))
+    row = cursor.fetchone()
+    return bool(row) and row[0] == ROLLUP_SCHEMA_VERSION
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Time-partitioned storage for high-volume append tables
+Rows are written to one table per day or week (``<name>_pYYYYMMDD``) behind a
+view with the original table name. INSTEAD OF triggers route inserts to the
+current or the (pre-created) next partition by the row's timestamp, and
+updates/deletes to whichever partition holds the row, so existing SQL keeps
+working. Retention drops whole partitions instead of
+deleting rows one by one, which is near-instant, holds the write lock only
+briefly and leaves no free pages for VACUUM to reclaim.
+"""
+
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+PERIODS = ('daily', 'weekly')
+
+
+class PartitionedTable:
+    """A logical table stored as time partitions behind a view.
+
+    Every partition has ``id INTEGER PRIMARY KEY AUTOINCREMENT`` followed by
+    ``columns``; ids keep increasing across partitions. ensure() creates the
+    current and the next period's partitions, and the insert trigger sends rows
+    timestamped at or after the period boundary to the next one, so inserts
+    roll over exactly at the boundary without waiting for maintenance. Columns
+    added to ``columns`` later are added to existing partitions.
+
+    Args:
+        name: Logical table (and view) name.
+        columns: (name, SQL type) pairs, excluding ``id``.
+        indexes: Columns to index in each partition.
+        period: 'daily' or 'weekly' (UTC, weeks start on Monday).
+        time_column: REAL column holding the row's Unix timestamp.
+        logger: Optional logger.
+    """
+
+    def __init__(self, name: str, columns: Sequence[Tuple[str, str]], indexes: Sequence[str] = (),
+                 period: str = 'daily', time_column: str = 'timestamp', logger=None):
+        if period not in PERIODS:
+            raise ValueError(f"Unknown partition period '{period}' (expected one of {', '.join(PERIODS)})")
+        self.name = name
+        self.columns = list(columns)
+        self.indexes = list(indexes)
+        self.period = period
+        self.time_column = time_column
+        self.logger = logger
+
+    # Naming
+
+    def _period_start(self, timestamp: float) -> datetime:
+        start = datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.period == 'weekly':
+            start -= timedelta(days=start.weekday())
+        return start
+
+    def partition_for(self, timestamp: float) -> str:
+        """Name of the partition covering a Unix timestamp."""
+        return f"{self.name}_p{self._period_start(timestamp).strftime('%Y%m%d')}"
+
+    def next_boundary(self, timestamp: float) -> float:
+        """Unix timestamp at which the period after ``timestamp`` starts."""
+        step = timedelta(days=7 if self.period == 'weekly' else 1)
+        return (self._period_start(timestamp) + step).timestamp()
+
+    def _glob(self) -> str:
+        return f"{self.name}_p" + '[0-9]' * 8
+
+    # Schema inspection
+
+    @staticmethod
+    def _object_type(conn: sqlite3.Connection, name: str) -> Optional[str]:
+        row = conn.execute("SELECT type FROM sqlite_master WHERE name = ? AND type IN ('table', 'view')",
+                           (name,)).fetchone()
+        return row[0] if row else None
+
+    def partitions(self, conn: sqlite3.Connection) -> List[str]:
+        """Partition tables, oldest first."""
+        rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ? ORDER BY name",
+                            (self._glob(),)).fetchall()
+        return [row[0] for row in rows]
+
+    def is_partitioned(self, conn: sqlite3.Connection) -> bool:
+        return self._object_type(conn, self.name) == 'view'
+
+    # DDL
+
+    def _column_names(self) -> str:
+        return ', '.join(column for column, _ in self.columns)
+
+    def _create_table(self, conn: sqlite3.Connection, table: str, index_prefix: str) -> None:
+        column_defs = ', '.join(f"{column} {sql_type}" for column, sql_type in self.columns)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, {column_defs})")
+        self._add_missing_columns(conn, table)
+        for column in self.indexes:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{index_prefix}_{column} ON {table}({column})")
+
+    def _add_missing_columns(self, conn: sqlite3.Connection, table: str) -> None:
+        """Add columns introduced after the table was created (always nullable)."""
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for column, sql_type in self.columns:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}")
+
+    def _max_id(self, conn: sqlite3.Connection, tables: Sequence[str]) -> int:
+        highest = 0
+        for table in tables:
+            row = conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()
+            highest = max(highest, row[0] or 0)
+        if tables:
+            placeholders = ', '.join('?' * len(tables))
+            row = conn.execute(f"SELECT MAX(seq) FROM sqlite_sequence WHERE name IN ({placeholders})",
+                               list(tables)).fetchone()
+            highest = max(highest, row[0] or 0)
+        return highest
+
+    def _create_partition(self, conn: sqlite3.Connection, partition: str, existing: Sequence[str]) -> None:
+        next_seq = self._max_id(conn, existing)
+        self._create_table(conn, partition, partition)
+        # Continue ids where the previous partitions left off
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (partition,))
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (partition, next_seq))
+
+    def _view_sql(self, partitions: Sequence[str]) -> str:
+        select = ' UNION ALL '.join(f"SELECT id, {self._column_names()} FROM {p}" for p in partitions)
+        return f"CREATE VIEW {self.name} AS {select}"
+
+    def _insert_trigger_sql(self, current: str, upcoming: Optional[str], boundary: Optional[float]) -> str:
+        insert_values = ', '.join(f"NEW.{column}" for column, _ in self.columns)
+        if upcoming is None:
+            body = f"INSERT INTO {current} (id, {self._column_names()}) SELECT NEW.id, {insert_values};"
+        else:
+            # Rows from the next period go straight to its partition. The next partition was
+            # created early, so ids come from whichever of the two has the higher sequence
+            next_id = (f"COALESCE(NEW.id, (SELECT MAX(seq) FROM sqlite_sequence "
+                       f"WHERE name IN ('{current}', '{upcoming}')) + 1)")
+            into = f"(id, {self._column_names()}) SELECT {next_id}, {insert_values}"
+            body = (f"INSERT INTO {upcoming} {into} WHERE NEW.{self.time_column} >= {boundary!r}; "
+                    f"INSERT INTO {current} {into} WHERE IFNULL(NEW.{self.time_column}, 0) < {boundary!r};")
+        return f"CREATE TRIGGER {self.name}_insert INSTEAD OF INSERT ON {self.name} BEGIN {body} END"
+
+    def _rebuild_view(self, conn: sqlite3.Connection, partitions: Sequence[str], current: str,
+                      upcoming: Optional[str] = None, boundary: Optional[float] = None) -> None:
+        """Recreate the view and its triggers over ``partitions``.
+
+        Inserts go to ``current``, or to ``upcoming`` from ``boundary`` on.
+        """
+        assignments = ', '.join(f"{column} = NEW.{column}" for column, _ in self.columns)
+        update_body = ' '.join(f"UPDATE {p} SET {assignments} WHERE id = OLD.id;" for p in partitions)
+        delete_body = ' '.join(f"DELETE FROM {p} WHERE id = OLD.id;" for p in partitions)
+
+        conn.execute(f"DROP VIEW IF EXISTS {self.name}")
+        conn.execute(self._view_sql(partitions))
+        conn.execute(self._insert_trigger_sql(current, upcoming, boundary))
+        conn.execute(f"CREATE TRIGGER {self.name}_update INSTEAD OF UPDATE ON {self.name} BEGIN {update_body} END")
+        conn.execute(f"CREATE TRIGGER {self.name}_delete INSTEAD OF DELETE ON {self.name} BEGIN {delete_body} END")
+
+    def _view_is_current(self, conn: sqlite3.Connection, partitions: Sequence[str], current: str,
+                         upcoming: Optional[str], boundary: Optional[float]) -> bool:
+        rows = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE name IN (?, ?)",
+                                 (self.name, f"{self.name}_insert")).fetchall())
+        return (rows.get(self.name) == self._view_sql(partitions)
+                and rows.get(f"{self.name}_insert") == self._insert_trigger_sql(current, upcoming, boundary))
+
+    # Maintenance
+
+    @staticmethod
+    def _connect(db_path: str) -> sqlite3.Connection:
+        # Autocommit mode so the explicit BEGIN IMMEDIATE below covers all the DDL
+        return sqlite3.connect(str(db_path), timeout=30.0, isolation_level=None)
+
+    def ensure(self, db_path: str, now: Optional[float] = None) -> str:
+        """Create or migrate the table, with partitions for the current and next period.
+
+        An existing plain table becomes the first partition (a rename, so no
+        rows are copied). Safe to call from several processes.
+
+        Returns:
+            str: The partition now receiving inserts.
+        """
+        now = time.time() if now is None else now
+        conn = self._connect(db_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = self._ensure(conn, now)[0]
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return current
+        finally:
+            conn.close()
+
+    def _ensure(self, conn: sqlite3.Connection, now: float) -> Tuple[str, Optional[str], Optional[float]]:
+        """Returns (insert target, next partition, boundary); the last two are None if unused."""
+        current = self.partition_for(now)
+        boundary = self.next_boundary(now)
+        upcoming = self.partition_for(boundary)
+        if self._object_type(conn, self.name) == 'table':
+            first = conn.execute(f"SELECT MIN({self.time_column}) FROM {self.name}").fetchone()[0]
+            legacy = self.partition_for(first if first is not None else now)
+            conn.execute(f"ALTER TABLE {self.name} RENAME TO {legacy}")
+            if self.logger:
+                self.logger.info(f"Converted {self.name} to partitioned storage (existing rows in {legacy})")
+
+        partitions = self.partitions(conn)
+        for partition in partitions:
+            self._add_missing_columns(conn, partition)
+        target = current
+        if partitions and partitions[-1] > upcoming:
+            # Clock went backwards; keep writing to the newest partition
+            target, upcoming, boundary = partitions[-1], None, None
+        else:
+            for partition in (current, upcoming):
+                if partition not in partitions:
+                    self._create_partition(conn, partition, partitions)
+                    partitions = sorted(partitions + [partition])
+
+        if not self._view_is_current(conn, partitions, target, upcoming, boundary):
+            self._rebuild_view(conn, partitions, target, upcoming, boundary)
+        return target, upcoming, boundary
+
+    def drop_expired(self, db_path: str, cutoff: float, now: Optional[float] = None) -> List[str]:
+        """Drop partitions whose newest row is older than ``cutoff``.
+
+        The insert target and the pre-created next partition are kept.
+
+        Returns:
+            List[str]: Names of the dropped partitions.
+        """
+        now = time.time() if now is None else now
+        conn = self._connect(db_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                target, upcoming, boundary = self._ensure(conn, now)
+                dropped = []
+                for partition in self.partitions(conn):
+                    if partition >= target:
+                        continue
+                    newest = conn.execute(f"SELECT MAX({self.time_column}) FROM {partition}").fetchone()[0]
+                    if newest is None or newest < cutoff:
+                        dropped.append(partition)
+                if dropped:
+                    remaining = [p for p in self.partitions(conn) if p not in dropped]
+                    self._rebuild_view(conn, remaining, target, upcoming, boundary)
+                    for partition in dropped:
+                        conn.execute(f"DROP TABLE {partition}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        if dropped and self.logger:
+            self.logger.info(f"Dropped {len(dropped)} expired {self.name} partition(s): {', '.join(dropped)}")
+        return dropped
+
+    def merge(self, db_path: str) -> bool:
+        """Turn a partitioned table back into a single plain table.
+
+        Returns:
+            bool: True if partitions were merged.
+        """
+        conn = self._connect(db_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if not self.is_partitioned(conn):
+                    conn.execute("COMMIT")
+                    return False
+                partitions = self.partitions(conn)
+                merged = f"{self.name}_merged"
+                conn.execute(f"DROP TABLE IF EXISTS {merged}")
+                self._create_table(conn, merged, merged)
+                conn.execute(f"INSERT INTO {merged} (id, {self._column_names()}) "
+                             f"SELECT id, {self._column_names()} FROM {self.name} ORDER BY id")
+                conn.execute(f"DROP VIEW {self.name}")
+                for partition in partitions:
+                    conn.execute(f"DROP TABLE {partition}")
+                for column in self.indexes:
+                    conn.execute(f"DROP INDEX IF EXISTS idx_{merged}_{column}")
+                conn.execute(f"ALTER TABLE {merged} RENAME TO {self.name}")
+                self._create_table(conn, self.name, self.name)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        if self.logger:
+            self.logger.info(f"Merged {len(partitions)} {self.name} partition(s) back into one table")
+        return True
+
+
+# packet_stream: the web viewer's real-time feed of packets, commands and routing data.
+# Received packets leave data empty and store raw bytes, SNR and RSSI (see web_viewer.packet_records).
+PACKET_STREAM_COLUMNS = (('timestamp', 'REAL NOT NULL'), ('data', 'TEXT NOT NULL'), ('type', 'TEXT NOT NULL'),
+                         ('raw', 'BLOB'), ('snr', 'REAL'), ('rssi', 'INTEGER'))
+PACKET_STREAM_INDEXES = ('timestamp', 'type')
+
+
+def packet_stream_table(config, logger=None) -> Optional[PartitionedTable]:
+    """The packet_stream partition layout from [Web_Viewer] packet_stream_partitioning, or None when off."""
+    period = config.get('Web_Viewer', 'packet_stream_partitioning', fallback='none').strip().lower()
+    if period in ('', 'none', 'off', 'false'):
+        return None
+    if period not in PERIODS:
+        if logger:
+            logger.warning(f"Unknown packet_stream_partitioning '{period}', using daily")
+        period = 'daily'
+    return PartitionedTable('packet_stream', PACKET_STREAM_COLUMNS, PACKET_STREAM_INDEXES,
+                            period=period, logger=logger)
+
+
+def init_packet_stream(db_path: str, config, logger=None) -> None:
+    """Create packet_stream as configured, converting between plain and partitioned storage."""
+    table = packet_stream_table(config, logger)
+    if table is not None:
+        table.ensure(db_path)
+        return
+    plain = PartitionedTable('packet_stream', PACKET_STREAM_COLUMNS, PACKET_STREAM_INDEXES, logger=logger)
+    if not plain.merge(db_path):
+        with sqlite3.connect(str(db_path), timeout=30.0) as conn:
+            plain._create_table(conn, 'packet_stream', 'packet_stream')
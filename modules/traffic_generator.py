@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Synthetic MeshCore traffic for scale testing
+Simulates repeaters and companions on a random geographic topology and emits
+the packets the bot would hear: signed adverts flooded over the repeater
+graph, channel chatter (GRP_TXT packets followed by the decoded channel
+message event) and commands. Output records use the capture format read by
+modules.replay_benchmark, so they can be written to JSONL or replayed directly.
+"""
+
+import hashlib
+import heapq
+import math
+import random
+import struct
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from .enums import AdvertFlags, PayloadType, RouteType
+
+ROLE_REPEATER = 'repeater'
+ROLE_COMPANION = 'companion'
+
+LAYOUT_RANDOM = 'random'
+LAYOUT_GRID = 'grid'
+LAYOUT_LINE = 'line'
+LAYOUTS = (LAYOUT_RANDOM, LAYOUT_GRID, LAYOUT_LINE)
+
+# Approximate kilometres per degree of latitude
+KM_PER_DEGREE = 111.0
+
+DEFAULT_CHATTER = ['hello', 'anyone around?', 'good morning', 'testing', 'nice weather', 'copy that']
+DEFAULT_COMMANDS = ['test', 'ping', 'path', 'help']
+
+
+@dataclass
+class SyntheticNode:
+    """One simulated device"""
+    name: str
+    role: str
+    private_key: Ed25519PrivateKey
+    public_key: bytes
+    lat: float
+    lon: float
+    home: Optional[int] = None  # Index of the repeater a companion reaches the mesh through
+    neighbors: List[int] = field(default_factory=list)
+
+    @property
+    def prefix(self) -> int:
+        return self.public_key[0]
+
+
+def random_bytes(rng: random.Random, n: int) -> bytes:
+    """``rng.randbytes(n)`` for Python 3.8, which lacks it (same bytes for the same seed)."""
+    return rng.getrandbits(8 * n).to_bytes(n, 'little') if n > 0 else b''
+
+
+def build_header(route_type: RouteType, payload_type: PayloadType) -> int:
+    """Packet header byte: route type (bits 0-1), payload type (bits 2-5), version 1 (bits 6-7 = 0)."""
+    return (route_type.value & 0x03) | ((payload_type.value & 0x0F) << 2)
+
+
+def build_packet(payload_type: PayloadType, payload: bytes, path: bytes = b'',
+                 route_type: RouteType = RouteType.FLOOD) -> bytes:
+    """Assemble header, path length, path and payload as decode_meshcore_packet expects."""
+    return bytes([build_header(route_type, payload_type), len(path)]) + path + payload
+
+
+def build_advert_payload(node: SyntheticNode, timestamp: int) -> bytes:
+    """Signed advert: public key, timestamp, Ed25519 signature, then app data (flags, lat/lon, name)."""
+    adv_type = AdvertFlags.ADV_TYPE_REPEATER if node.role == ROLE_REPEATER else AdvertFlags.ADV_TYPE_CHAT
+    flags = adv_type.value | AdvertFlags.ADV_LATLON_MASK.value | AdvertFlags.ADV_NAME_MASK.value
+    app_data = (bytes([flags])
+                + struct.pack('<ii', int(node.lat * 1_000_000), int(node.lon * 1_000_000))
+                + node.name.encode('utf-8'))
+    ts = struct.pack('<I', timestamp & 0xFFFFFFFF)
+    signature = node.private_key.sign(node.public_key + ts + app_data)
+    return node.public_key + ts + signature + app_data
+
+
+def build_group_text_payload(channel_secret: bytes, plaintext_len: int, rng: random.Random) -> bytes:
+    """GRP_TXT payload: channel hash, 2-byte MAC and AES-block-sized ciphertext.
+
+    The bot never decrypts GRP_TXT itself (the radio delivers the decoded
+    channel message separately), so the ciphertext is random bytes of the
+    length the real encryption would produce.
+    """
+    channel_hash = hashlib.sha256(channel_secret).digest()[0]
+    blocks = max(1, math.ceil((plaintext_len + 5) / 16))
+    return bytes([channel_hash]) + random_bytes(rng, 2) + random_bytes(rng, blocks * 16)
+
+
+class MeshTopology:
+    """Repeaters scattered over an area, linked when within radio range.
+
+    Args:
+        repeaters: Number of repeaters.
+        companions: Number of companions, each attached to a nearby repeater.
+        area_km: Side of the square area the nodes are placed in.
+        link_range_km: Maximum repeater-to-repeater link distance.
+        center: (lat, lon) of the area centre.
+        layout: Repeater placement: 'random' (uniform), 'grid' (evenly spaced
+            rows) or 'line' (a west-east chain, for long multi-hop paths).
+        seed: Random seed for reproducible topologies.
+    """
+
+    def __init__(self, repeaters: int = 50, companions: int = 200, area_km: float = 60.0,
+                 link_range_km: float = 12.0, center=(47.6, -122.3), layout: str = LAYOUT_RANDOM,
+                 seed: Optional[int] = None):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown topology layout '{layout}' (expected one of {', '.join(LAYOUTS)})")
+        if repeaters < 1:
+            raise ValueError("At least one repeater is required")
+        self.rng = random.Random(seed)
+        self.layout = layout
+        self.area_km = area_km
+        self.link_range_km = link_range_km
+        self.center = center
+        self.nodes: List[SyntheticNode] = []
+
+        for i in range(repeaters):
+            self.nodes.append(self._make_node(f"Rptr-{i:04d}", ROLE_REPEATER, area_km))
+        self.repeater_ids = list(range(repeaters))
+        self._place_repeaters()
+        self._link_repeaters()
+        for i in range(companions):
+            node = self._make_node(f"User-{i:05d}", ROLE_COMPANION, area_km)
+            node.home = self._nearest_repeater(node)
+            self.nodes.append(node)
+
+        # The bot listens next to the repeater closest to the centre
+        self.bot_repeater = self._nearest_repeater_to(center[0], center[1])
+        self._routes = self._shortest_paths_to(self.bot_repeater)
+
+    def _make_node(self, name: str, role: str, area_km: float) -> SyntheticNode:
+        private_key = Ed25519PrivateKey.from_private_bytes(random_bytes(self.rng, 32))
+        public_key = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw)
+        half = area_km / 2
+        lat, lon = self._offset(self.rng.uniform(-half, half), self.rng.uniform(-half, half))
+        return SyntheticNode(name, role, private_key, public_key, lat, lon)
+
+    def _offset(self, north_km: float, east_km: float):
+        lat = self.center[0] + north_km / KM_PER_DEGREE
+        lon = self.center[1] + east_km / (KM_PER_DEGREE * max(0.1, math.cos(math.radians(self.center[0]))))
+        return round(lat, 6), round(lon, 6)
+
+    def _place_repeaters(self) -> None:
+        """Move repeaters onto the configured layout (random placement is kept as-is)."""
+        count = len(self.repeater_ids)
+        if self.layout == LAYOUT_LINE:
+            step = self.area_km / max(1, count - 1)
+            for n, i in enumerate(self.repeater_ids):
+                self.nodes[i].lat, self.nodes[i].lon = self._offset(0.0, n * step - self.area_km / 2)
+        elif self.layout == LAYOUT_GRID:
+            side = math.ceil(math.sqrt(count))
+            step = self.area_km / max(1, side - 1)
+            for n, i in enumerate(self.repeater_ids):
+                row, col = divmod(n, side)
+                self.nodes[i].lat, self.nodes[i].lon = self._offset(row * step - self.area_km / 2,
+                                                                    col * step - self.area_km / 2)
+
+    def _distance_km(self, a: SyntheticNode, lat: float, lon: float) -> float:
+        dlat = (a.lat - lat) * KM_PER_DEGREE
+        dlon = (a.lon - lon) * KM_PER_DEGREE * math.cos(math.radians(lat))
+        return math.hypot(dlat, dlon)
+
+    def _link_repeaters(self) -> None:
+        for i in self.repeater_ids:
+            for j in self.repeater_ids:
+                if i < j and self._distance_km(self.nodes[i], self.nodes[j].lat, self.nodes[j].lon) <= self.link_range_km:
+                    self.nodes[i].neighbors.append(j)
+                    self.nodes[j].neighbors.append(i)
+
+    def _nearest_repeater_to(self, lat: float, lon: float) -> int:
+        return min(self.repeater_ids, key=lambda i: self._distance_km(self.nodes[i], lat, lon))
+
+    def _nearest_repeater(self, node: SyntheticNode) -> int:
+        return self._nearest_repeater_to(node.lat, node.lon)
+
+    def _shortest_paths_to(self, target: int) -> Dict[int, List[int]]:
+        """Repeater index -> repeaters a flood passes through from it to target (inclusive)."""
+        previous = {target: None}
+        queue = deque([target])
+        while queue:
+            current = queue.popleft()
+            for neighbor in self.nodes[current].neighbors:
+                if neighbor not in previous:
+                    previous[neighbor] = current
+                    queue.append(neighbor)
+        routes = {}
+        for start in previous:
+            route, hop = [], start
+            while hop is not None:
+                route.append(hop)
+                hop = previous[hop]
+            routes[start] = route
+        return routes
+
+    def flood_path(self, node_index: int) -> Optional[bytes]:
+        """Path bytes of a flood from node_index as heard by the bot, or None if unreachable.
+
+        Each repeater that retransmits appends its 1-byte prefix, so a repeater's
+        own advert starts with the next hop while a companion's starts with its
+        home repeater.
+        """
+        node = self.nodes[node_index]
+        if node.role == ROLE_REPEATER:
+            route = self._routes.get(node_index)
+            hops = route[1:] if route else None
+        else:
+            hops = self._routes.get(node.home)
+        if hops is None:
+            return None
+        return bytes(self.nodes[i].prefix for i in hops)
+
+    def companions(self) -> List[int]:
+        return [i for i, n in enumerate(self.nodes) if n.role == ROLE_COMPANION]
+
+    def get_stats(self) -> Dict[str, Any]:
+        links = sum(len(self.nodes[i].neighbors) for i in self.repeater_ids) // 2
+        return {
+            'repeaters': len(self.repeater_ids),
+            'companions': len(self.nodes) - len(self.repeater_ids),
+            'links': links,
+            'reachable_repeaters': len(self._routes),
+            'max_hops': max((len(route) for route in self._routes.values()), default=0),
+        }
+
+
+class TrafficGenerator:
+    """Produces timed capture records for a topology.
+
+    Args:
+        topology: MeshTopology to simulate.
+        advert_interval_s: Mean seconds between flood adverts per node.
+        chatter_per_minute: Mean channel messages per minute across the mesh.
+        command_ratio: Fraction of channel messages that are bot commands.
+        channels: Channel names; messages go to a random one (index = position).
+        seed: Random seed for the traffic pattern.
+    """
+
+    def __init__(self, topology: MeshTopology, advert_interval_s: float = 3 * 3600,
+                 chatter_per_minute: float = 2.0, command_ratio: float = 0.1,
+                 channels: Optional[List[str]] = None, seed: Optional[int] = None):
+        self.topology = topology
+        self.advert_interval_s = max(1.0, advert_interval_s)
+        self.chatter_per_minute = max(0.0, chatter_per_minute)
+        self.command_ratio = command_ratio
+        self.channels = channels or ['general']
+        self.channel_secrets = [hashlib.sha256(name.encode()).digest()[:16] for name in self.channels]
+        self.rng = random.Random(seed)
+
+    def _snr_rssi(self, hops: int) -> Dict[str, Any]:
+        snr = round(self.rng.uniform(-10.0, 12.0), 2)
+        rssi = int(self.rng.uniform(-120, -50))
+        return {'SNR': snr, 'RSSI': rssi, 'hops': hops}
+
+    def _packet_record(self, packet: bytes, timestamp: float) -> Dict[str, Any]:
+        signal = self._snr_rssi(packet[1])
+        return {'type': 'PACKET', 'raw': packet.hex().upper(), 'SNR': signal['SNR'],
+                'RSSI': signal['RSSI'], 'timestamp': timestamp}
+
+    def advert_records(self, node_index: int, timestamp: float) -> List[Dict[str, Any]]:
+        path = self.topology.flood_path(node_index)
+        if path is None:
+            return []
+        payload = build_advert_payload(self.topology.nodes[node_index], int(timestamp))
+        return [self._packet_record(build_packet(PayloadType.ADVERT, payload, path), timestamp)]
+
+    def chatter_records(self, node_index: int, timestamp: float) -> List[Dict[str, Any]]:
+        path = self.topology.flood_path(node_index)
+        if path is None:
+            return []
+        node = self.topology.nodes[node_index]
+        channel_idx = self.rng.randrange(len(self.channels))
+        if self.rng.random() < self.command_ratio:
+            text = self.rng.choice(DEFAULT_COMMANDS)
+        else:
+            text = self.rng.choice(DEFAULT_CHATTER)
+        full_text = f"{node.name}: {text}"
+        payload = build_group_text_payload(self.channel_secrets[channel_idx], len(full_text.encode()), self.rng)
+        packet_record = self._packet_record(build_packet(PayloadType.GRP_TXT, payload, path), timestamp)
+        message = {
+            'event': 'channel_message',
+            'timestamp': timestamp,
+            'payload': {
+                'type': 'CHAN',
+                'channel_idx': channel_idx,
+                'path_len': len(path),
+                'txt_type': 0,
+                'sender_timestamp': int(timestamp),
+                'text': full_text,
+                'SNR': packet_record['SNR'],
+            },
+        }
+        return [packet_record, message]
+
+    def records(self, duration_s: float, start_time: float) -> Iterator[Dict[str, Any]]:
+        """Yield capture records in time order for duration_s seconds from start_time.
+
+        Every node adverts once at a random offset in its first interval and
+        then roughly every advert_interval_s; chatter arrives as a Poisson
+        process from random companions.
+        """
+        schedule = []
+        for index in range(len(self.topology.nodes)):
+            heapq.heappush(schedule, (start_time + self.rng.uniform(0, self.advert_interval_s), index, 'advert'))
+        companions = self.topology.companions()
+        chatter_rate = self.chatter_per_minute / 60.0
+        if companions and chatter_rate > 0:
+            heapq.heappush(schedule, (start_time + self.rng.expovariate(chatter_rate), -1, 'chatter'))
+
+        end_time = start_time + duration_s
+        while schedule:
+            timestamp, index, kind = heapq.heappop(schedule)
+            if timestamp > end_time:
+                break
+            if kind == 'advert':
+                yield from self.advert_records(index, timestamp)
+                jitter = self.rng.uniform(0.9, 1.1)
+                heapq.heappush(schedule, (timestamp + self.advert_interval_s * jitter, index, 'advert'))
+            else:
+                yield from self.chatter_records(self.rng.choice(companions), timestamp)
+                heapq.heappush(schedule, (timestamp + self.rng.expovariate(chatter_rate), -1, 'chatter'))
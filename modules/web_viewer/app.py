@@ -14,6 +14,7 @@ from datetime import datetime, timedelta, date
 from flask import Flask, render_template, jsonify, request, send_from_directory, make_response
 from flask_socketio import SocketIO, emit, join_room, leave_room, disconnect
 from pathlib import Path
+from types import SimpleNamespace
 import os
 import sys
 from typing import Dict, Any, Optional, List
@@ -25,6 +26,21 @@ sys.path.insert(0, project_root)
 from modules.db_manager import DBManager
 from modules.repeater_manager import RepeaterManager
 from modules.utils import resolve_path, calculate_distance
+from modules.web_viewer.packet_records import PacketRecordDecoder
+from modules.web_viewer.response_cache import ResponseCache
+from modules.mesh_graph_snapshot import MeshGraphSnapshotReader, snapshot_path_from_config
+from modules.message_handler import MessageHandler
+from modules.metrics import format_prometheus
+from modules.table_partitions import init_packet_stream, packet_stream_table
+from modules.web_viewer.stream_broadcaster import (
+    StreamBroadcaster, STREAM_COMMANDS, STREAM_PACKETS, STREAM_MESH
+)
+from modules.stats_rollup import (
+    rollups_available, rollup_filter, HOURLY_TABLE, DAILY_TABLE,
+    METRIC_MESSAGE, METRIC_COMMAND, METRIC_PATH_LENGTH
+)
+from modules.leaderboards import WINDOWS as LEADERBOARD_WINDOWS, read_snapshot
+from modules.greeter_index import queue_change as queue_greeter_change
 
 class BotDataViewer:
     """Complete web interface using Flask-SocketIO 5.x best practices"""
@@ -85,6 +101,41 @@ class BotDataViewer:
             use_db = bot_db
         self.db_path = str(resolve_path(use_db, self.bot_root))
         
+        # Cache for heavy JSON APIs (invalidated by database writes)
+        self.response_cache = ResponseCache(
+            self.db_path,
+            logger=self.logger,
+            min_age_seconds=self.config.getfloat('Web_Viewer', 'response_cache_min_age_seconds', fallback=5.0),
+            compress_min_bytes=self.config.getint('Web_Viewer', 'response_compress_min_bytes', fallback=1024),
+            enabled=self.config.getboolean('Web_Viewer', 'response_cache_enabled', fallback=True)
+        )
+        
+        # Mesh graph published by the bot (snapshot file plus pushed deltas).
+        # /api/mesh/edges and /api/mesh/stats fall back to SQLite until a snapshot exists.
+        self.mesh_snapshot = None
+        if self.config.getboolean('Web_Viewer', 'mesh_snapshot_enabled', fallback=True):
+            self.mesh_snapshot = MeshGraphSnapshotReader(
+                snapshot_path_from_config(self.config, self.bot_root), logger=self.logger
+            )
+        
+        # Live streams are coalesced into per-client frames at a bounded rate
+        self.stream_broadcaster = StreamBroadcaster(
+            self.socketio,
+            self.logger,
+            rate_hz=self.config.getfloat('Web_Viewer', 'stream_batch_rate_hz', fallback=10.0),
+            max_queue=self.config.getint('Web_Viewer', 'stream_client_queue_size', fallback=500)
+        )
+        self.stream_broadcaster.start()
+        
+        # Packet rows hold raw bytes; documents are decoded on read and kept in an LRU by row id
+        self.packet_records = PacketRecordDecoder(
+            MessageHandler(SimpleNamespace(logger=self.logger, config=self.config)).decode_meshcore_packet,
+            max_entries=self.config.getint('Web_Viewer', 'packet_decode_cache_size', fallback=2048)
+        )
+        
+        # Top lists published by the bot's stats leaderboards are used while fresher than this
+        self.leaderboard_max_age = self.config.getint('Web_Viewer', 'leaderboard_snapshot_max_age', fallback=300)
+        
         # Setup template context processor for global template variables
         self._setup_template_context()
         
@@ -222,36 +273,10 @@ class BotDataViewer:
     
     def _init_packet_stream_table(self):
         """Initialize the packet_stream table in the web viewer database (same as [Bot] db_path by default)."""
-        conn = None
         try:
-            with sqlite3.connect(self.db_path, timeout=30) as conn:
-                cursor = conn.cursor()
-                
-                # Create packet_stream table with schema matching the INSERT statements
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS packet_stream (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp REAL NOT NULL,
-                        data TEXT NOT NULL,
-                        type TEXT NOT NULL
-                    )
-                ''')
-                
-                # Create index on timestamp for faster queries
-                cursor.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_packet_stream_timestamp 
-                    ON packet_stream(timestamp)
-                ''')
-                
-                # Create index on type for filtering by type
-                cursor.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_packet_stream_type 
-                    ON packet_stream(type)
-                ''')
-                
-                conn.commit()
-                
-                self.logger.info(f"Initialized packet_stream table in {self.db_path}")
+            # Create the table (or its daily/weekly partitions, see [Web_Viewer] packet_stream_partitioning)
+            init_packet_stream(self.db_path, self.config, self.logger)
+            self.logger.info(f"Initialized packet_stream table in {self.db_path}")
             
         except Exception as e:
             self.logger.error(f"Failed to initialize packet_stream table: {e}")
@@ -1025,6 +1050,15 @@ class BotDataViewer:
             self.logger.exception("Unhandled exception (500): %s", e)
             return make_response(("Internal Server Error", 500))
 
+        # Any successful write through the viewer invalidates cached API responses
+        # (stream_data only relays bot events and doesn't touch the database)
+        @self.app.after_request
+        def invalidate_response_cache(response):
+            if (request.method in ('POST', 'PUT', 'DELETE') and response.status_code < 400
+                    and request.path != '/api/stream_data'):
+                self.response_cache.bump()
+            return response
+
         @self.app.route('/')
         def index():
             """Main dashboard"""
@@ -1130,6 +1164,7 @@ class BotDataViewer:
                 'max_clients': self.max_clients,
                 'timestamp': time.time(),
                 'bot_uptime': bot_uptime,
+                'stream': self.stream_broadcaster.get_stats(),
                 'version': 'modern_2.0'
             })
         
@@ -1167,8 +1202,22 @@ class BotDataViewer:
                     'error': str(e),
                     'status': 'error'
                 }), 500
-        
+
+        @self.app.route('/metrics')
+        def prometheus_metrics():
+            """Bot latency histograms and queue gauges in the Prometheus text format"""
+            try:
+                health_data = self.db_manager.get_system_health() or {}
+                body = format_prometheus(health_data.get('metrics') or {})
+                response = make_response(body)
+                response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+                return response
+            except Exception as e:
+                self.logger.error(f"Error rendering metrics: {e}")
+                return make_response(f"# error: {e}\n", 500)
+
         @self.app.route('/api/stats')
+        @self.response_cache.cached
         def api_stats():
             """Get comprehensive database statistics for dashboard"""
             try:
@@ -1191,6 +1240,7 @@ class BotDataViewer:
         
         
         @self.app.route('/api/contacts')
+        @self.response_cache.cached
         def api_contacts():
             """Get contact data. Optional query param: since=24h|7d|30d|90d|all (default 30d)."""
             try:
@@ -1204,6 +1254,7 @@ class BotDataViewer:
                 return jsonify({'error': str(e)}), 500
         
         @self.app.route('/api/cache')
+        @self.response_cache.cached
         def api_cache():
             """Get cache data"""
             try:
@@ -1234,6 +1285,7 @@ class BotDataViewer:
                 return jsonify({'success': False, 'error': str(e)}), 500
         
         @self.app.route('/api/mesh/nodes')
+        @self.response_cache.cached
         def api_mesh_nodes():
             """Get all repeater nodes with locations and metadata"""
             conn = None
@@ -1287,6 +1339,7 @@ class BotDataViewer:
                     conn.close()
         
         @self.app.route('/api/mesh/edges')
+        @self.response_cache.cached(version=self._get_mesh_snapshot_version)
         def api_mesh_edges():
             """Get all graph edges with metadata"""
             conn = None
@@ -1297,6 +1350,13 @@ class BotDataViewer:
                 min_distance = request.args.get('min_distance', type=float)
                 max_distance = request.args.get('max_distance', type=float)
                 
+                snapshot_edges = self._get_mesh_snapshot_edges()
+                if snapshot_edges is not None:
+                    edges = self._filter_mesh_edges(
+                        snapshot_edges, min_observations, days, min_distance, max_distance
+                    )
+                    return jsonify({'edges': edges, 'version': self.mesh_snapshot.version()})
+                
                 conn = self._get_db_connection()
                 cursor = conn.cursor()
                 
@@ -1379,6 +1439,12 @@ class BotDataViewer:
                 ''')
                 node_count = cursor.fetchone()['count']
                 
+                snapshot_edges = self._get_mesh_snapshot_edges()
+                if snapshot_edges is not None:
+                    stats = {'node_count': node_count}
+                    stats.update(self._compute_mesh_edge_stats(snapshot_edges))
+                    return jsonify(stats)
+                
                 # Get edge statistics
                 cursor.execute('''
                     SELECT 
@@ -1444,6 +1510,9 @@ class BotDataViewer:
             except Exception as e:
                 self.logger.error(f"Error getting mesh stats: {e}")
                 return jsonify({'error': str(e)}), 500
+            finally:
+                if conn:
+                    conn.close()
         
         @self.app.route('/api/mesh/resolve-path', methods=['POST'])
         def api_resolve_path():
@@ -1487,6 +1556,13 @@ class BotDataViewer:
                     self._handle_mesh_edge_data(data.get('data', {}))
                 elif data_type == 'mesh_node':
                     self._handle_mesh_node_data(data.get('data', {}))
+                elif data_type == 'batch':
+                    # Coalesced mesh updates from the bot's background notifier
+                    for event in data.get('data', {}).get('events', []):
+                        if event.get('type') == 'mesh_edge':
+                            self._handle_mesh_edge_data(event.get('data', {}))
+                        elif event.get('type') == 'mesh_node':
+                            self._handle_mesh_node_data(event.get('data', {}))
                 else:
                     return jsonify({'error': 'Invalid data type'}), 400
                 
@@ -1989,6 +2065,8 @@ class BotDataViewer:
                     SET rollout_completed = 1
                     WHERE id = ?
                 ''', (rollout_id,))
+                # The bot caches the active rollout; tell it to reload
+                queue_greeter_change(cursor, 'end_rollout')
                 
                 conn.commit()
                 
@@ -2047,6 +2125,9 @@ class BotDataViewer:
                         DELETE FROM greeted_users
                         WHERE sender_id = ? AND channel IS NULL
                     ''', (sender_id,))
+                # The bot keeps greeted users in memory; queue the removal for it
+                queue_greeter_change(cursor, 'ungreet', sender_id,
+                                     channel if channel and channel != '(global)' else None)
                 
                 conn.commit()
                 
@@ -2452,6 +2533,7 @@ class BotDataViewer:
                         'subscribed_packets': False,
                         'subscribed_mesh': False
                     }
+                    self.stream_broadcaster.add_client(client_id)
                     
                     # Connection status is shown via the green indicator in the navbar, no toast needed
                     self.logger.info(f"Client {client_id} connected. Total clients: {len(self.connected_clients)}")
@@ -2466,6 +2548,8 @@ class BotDataViewer:
                 # Safely get client_id - it may be None if disconnect happens during error state
                 client_id = getattr(request, 'sid', None)
                 with self._clients_lock:
+                    if client_id:
+                        self.stream_broadcaster.remove_client(client_id)
                     if client_id and client_id in self.connected_clients:
                         del self.connected_clients[client_id]
                         self.logger.info(f"Client {client_id} disconnected. Total clients: {len(self.connected_clients)}")
@@ -2487,6 +2571,7 @@ class BotDataViewer:
                 with self._clients_lock:
                     if client_id and client_id in self.connected_clients:
                         self.connected_clients[client_id]['subscribed_commands'] = True
+                        self.stream_broadcaster.subscribe(client_id, STREAM_COMMANDS)
                 emit('status', {'message': 'Subscribed to command stream'})
                 self.logger.debug(f"Client {client_id} subscribed to commands")
             except Exception as e:
@@ -2500,6 +2585,7 @@ class BotDataViewer:
                 with self._clients_lock:
                     if client_id and client_id in self.connected_clients:
                         self.connected_clients[client_id]['subscribed_packets'] = True
+                        self.stream_broadcaster.subscribe(client_id, STREAM_PACKETS)
                 emit('status', {'message': 'Subscribed to packet stream'})
                 self.logger.debug(f"Client {client_id} subscribed to packets")
             except Exception as e:
@@ -2513,6 +2599,7 @@ class BotDataViewer:
                 with self._clients_lock:
                     if client_id and client_id in self.connected_clients:
                         self.connected_clients[client_id]['subscribed_mesh'] = True
+                        self.stream_broadcaster.subscribe(client_id, STREAM_MESH)
                 emit('status', {'message': 'Subscribed to mesh graph stream'})
                 self.logger.debug(f"Client {client_id} subscribed to mesh graph")
             except Exception as e:
@@ -2545,63 +2632,115 @@ class BotDataViewer:
     def _handle_command_data(self, command_data):
         """Handle incoming command data from bot"""
         try:
-            # Broadcast to subscribed clients
-            with self._clients_lock:
-                subscribed_clients = [
-                    client_id for client_id, client_info in self.connected_clients.items()
-                    if client_info.get('subscribed_commands', False)
-                ]
-            
-            if subscribed_clients:
-                self.socketio.emit('command_data', command_data, room=None)
-                self.logger.debug(f"Broadcasted command data to {len(subscribed_clients)} clients")
+            # Queue for subscribed clients; sent in the next batch frame
+            self.stream_broadcaster.publish(STREAM_COMMANDS, 'command_data', command_data)
         except Exception as e:
             self.logger.error(f"Error handling command data: {e}")
     
     def _handle_packet_data(self, packet_data):
         """Handle incoming packet data from bot"""
         try:
-            # Broadcast to subscribed clients
-            with self._clients_lock:
-                subscribed_clients = [
-                    client_id for client_id, client_info in self.connected_clients.items()
-                    if client_info.get('subscribed_packets', False)
-                ]
-            
-            if subscribed_clients:
-                self.socketio.emit('packet_data', packet_data, room=None)
-                self.logger.debug(f"Broadcasted packet data to {len(subscribed_clients)} clients")
+            # Queue for subscribed clients; sent in the next batch frame
+            self.stream_broadcaster.publish(STREAM_PACKETS, 'packet_data', packet_data)
         except Exception as e:
             self.logger.error(f"Error handling packet data: {e}")
     
     def _handle_mesh_edge_data(self, edge_data):
         """Handle incoming mesh edge data from bot"""
         try:
-            # Broadcast to subscribed clients
-            with self._clients_lock:
-                subscribed_clients = [
-                    client_id for client_id, client_info in self.connected_clients.items()
-                    if client_info.get('subscribed_mesh', False)
-                ]
+            # Keep the in-memory graph current; clients use generation/seq to apply the delta
+            if self.mesh_snapshot:
+                self.mesh_snapshot.apply_delta(edge_data)
             
-            if subscribed_clients:
-                event_type = 'mesh_edge_added' if edge_data.get('is_new', False) else 'mesh_edge_updated'
-                self.socketio.emit(event_type, edge_data, room=None)
+            event_type = 'mesh_edge_added' if edge_data.get('is_new', False) else 'mesh_edge_updated'
+            self.stream_broadcaster.publish(STREAM_MESH, event_type, edge_data)
         except Exception as e:
             self.logger.error(f"Error handling mesh edge data: {e}", exc_info=True)
     
+    def _get_mesh_snapshot_version(self):
+        """(generation, seq) of the bot-published mesh graph, or None if unavailable"""
+        if not self.mesh_snapshot:
+            return None
+        self.mesh_snapshot.refresh()
+        if not self.mesh_snapshot.loaded:
+            return None
+        return (self.mesh_snapshot.generation, self.mesh_snapshot.seq)
+    
+    def _get_mesh_snapshot_edges(self) -> Optional[List[Dict[str, Any]]]:
+        """Edges from the bot-published mesh graph, or None to fall back to SQLite"""
+        if not self.mesh_snapshot:
+            return None
+        try:
+            edges = self.mesh_snapshot.get_edges()
+            return edges if self.mesh_snapshot.loaded else None
+        except Exception as e:
+            self.logger.warning(f"Error reading mesh graph snapshot: {e}")
+            return None
+    
+    @staticmethod
+    def _format_mesh_edge(edge: Dict[str, Any]) -> Dict[str, Any]:
+        """Snapshot edge as returned by /api/mesh/edges"""
+        formatted = dict(edge)
+        for field in ('first_seen', 'last_seen'):
+            if isinstance(formatted.get(field), datetime):
+                formatted[field] = formatted[field].isoformat()
+        return formatted
+    
+    def _filter_mesh_edges(self, edges: List[Dict[str, Any]], min_observations: Optional[int] = None,
+                           days: Optional[int] = None, min_distance: Optional[float] = None,
+                           max_distance: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Apply the /api/mesh/edges filters to snapshot edges, newest first"""
+        cutoff = datetime.now() - timedelta(days=days) if days is not None else None
+        result = []
+        for edge in edges:
+            if min_observations is not None and edge['observation_count'] < min_observations:
+                continue
+            if cutoff is not None and (edge['last_seen'] is None or edge['last_seen'] < cutoff):
+                continue
+            distance = edge.get('geographic_distance')
+            if min_distance is not None and (distance is None or distance < min_distance):
+                continue
+            if max_distance is not None and (distance is None or distance > max_distance):
+                continue
+            result.append(edge)
+        result.sort(key=lambda e: e['last_seen'] or datetime.min, reverse=True)
+        return [self._format_mesh_edge(edge) for edge in result]
+    
+    @staticmethod
+    def _compute_mesh_edge_stats(edges: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Edge statistics for /api/mesh/stats computed from snapshot edges"""
+        total_edges = len(edges)
+        total_observations = sum(e['observation_count'] for e in edges)
+        distances = [e['geographic_distance'] for e in edges if e.get('geographic_distance') is not None]
+        avg_distance = sum(distances) / len(distances) if distances else None
+        min_distance = min(distances) if distances else None
+        max_distance = max(distances) if distances else None
+        
+        connection_counts: Dict[str, int] = {}
+        for edge in edges:
+            for prefix in (edge['from_prefix'], edge['to_prefix']):
+                connection_counts[prefix] = connection_counts.get(prefix, 0) + 1
+        top_connected = sorted(connection_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+        
+        recent_cutoff = datetime.now() - timedelta(days=1)
+        return {
+            'total_edges': total_edges,
+            'total_observations': total_observations,
+            'avg_observations': round(total_observations / total_edges, 2) if total_edges else 0,
+            'avg_distance': round(avg_distance, 2) if avg_distance else None,
+            'min_distance': round(min_distance, 2) if min_distance else None,
+            'max_distance': round(max_distance, 2) if max_distance else None,
+            'edges_with_from_key': sum(1 for e in edges if e.get('from_public_key')),
+            'edges_with_to_key': sum(1 for e in edges if e.get('to_public_key')),
+            'edges_with_both_keys': sum(1 for e in edges if e.get('from_public_key') and e.get('to_public_key')),
+            'top_connected': [{'prefix': prefix, 'count': count} for prefix, count in top_connected],
+            'recent_edges_24h': sum(1 for e in edges if e['last_seen'] and e['last_seen'] >= recent_cutoff)
+        }
+    
     def _handle_mesh_node_data(self, node_data):
         """Handle incoming mesh node data from bot"""
         try:
-            # Broadcast to subscribed clients
-            with self._clients_lock:
-                subscribed_clients = [
-                    client_id for client_id, client_info in self.connected_clients.items()
-                    if client_info.get('subscribed_mesh', False)
-                ]
-            
-            if subscribed_clients:
-                self.socketio.emit('mesh_node_added', node_data, room=None)
+            self.stream_broadcaster.publish(STREAM_MESH, 'mesh_node_added', node_data)
         except Exception as e:
             self.logger.error(f"Error handling mesh node data: {e}", exc_info=True)
     
@@ -2657,7 +2796,7 @@ class BotDataViewer:
                         
                         # Get new data since last poll
                         cursor.execute('''
-                            SELECT timestamp, data, type FROM packet_stream 
+                            SELECT timestamp, data, type, id, raw, snr, rssi FROM packet_stream 
                             WHERE timestamp > ? 
                             ORDER BY timestamp ASC
                         ''', (last_timestamp,))
@@ -2670,7 +2809,15 @@ class BotDataViewer:
                                 timestamp = row[0]
                                 data_json = row[1]
                                 data_type = row[2]
-                                data = json.loads(data_json)
+                                if row[4] is not None:
+                                    # Compact packet row: only decode it if someone is watching packets
+                                    if not self.stream_broadcaster.has_subscribers(STREAM_PACKETS):
+                                        continue
+                                    data = self.packet_records.packet_data(row[3], timestamp, row[4], row[5], row[6])
+                                    if data is None:
+                                        continue
+                                else:
+                                    data = json.loads(data_json)
                                 
                                 # Broadcast based on type
                                 if data_type == 'command':
@@ -2781,6 +2928,7 @@ class BotDataViewer:
                 
                 for client_id in stale_clients:
                     del self.connected_clients[client_id]
+                    self.stream_broadcaster.remove_client(client_id)
             
             if stale_clients:
                 self.logger.info(f"Cleaned up {len(stale_clients)} stale client(s)")
@@ -2797,6 +2945,13 @@ class BotDataViewer:
             
             cutoff_time = time.time() - (days_to_keep * 24 * 60 * 60)
             
+            partitioned = packet_stream_table(self.config, self.logger)
+            if partitioned is not None:
+                # Dropping whole partitions replaces the batched deletes; this also
+                # moves inserts to a new partition after midnight (UTC)
+                partitioned.drop_expired(self.db_path, cutoff_time)
+                return
+            
             # Use shorter timeout and isolation_level for better concurrency
             conn = sqlite3.connect(self.db_path, timeout=10, isolation_level='DEFERRED')
             cursor = conn.cursor()
@@ -3001,7 +3156,19 @@ class BotDataViewer:
                 stats[f'{table}_active'] = active_count
             
             # Message and command statistics (if stats tables exist)
-            if 'message_stats' in tables:
+            # Read from the hourly/daily rollups when available so cost doesn't grow with history
+            use_rollups = 'message_stats' in tables and 'command_stats' in tables and rollups_available(cursor)
+            # Top lists the bot keeps precomputed in memory (24h, 7d and all time)
+            leaderboard_tops = self._get_leaderboard_tops(
+                cursor, top_users_window, top_commands_window, top_channels_window
+            )
+            if use_rollups:
+                stats.update(self._get_rollup_activity_stats(
+                    cursor, top_users_window, top_commands_window, top_channels_window,
+                    precomputed=leaderboard_tops
+                ))
+            
+            if 'message_stats' in tables and not use_rollups:
                 cursor.execute("SELECT COUNT(*) FROM message_stats")
                 stats['total_messages'] = cursor.fetchone()[0]
                 
@@ -3045,7 +3212,7 @@ class BotDataViewer:
                 cursor.execute(query)
                 stats['top_users'] = [{'user': row[0], 'count': row[1]} for row in cursor.fetchall()]
             
-            if 'command_stats' in tables:
+            if 'command_stats' in tables and not use_rollups:
                 cursor.execute("SELECT COUNT(*) FROM command_stats")
                 stats['total_commands'] = cursor.fetchone()[0]
                 
@@ -3149,6 +3316,8 @@ class BotDataViewer:
                     for row in cursor.fetchall()
                 ]
             
+            stats.update(leaderboard_tops)
+            
             # Path statistics (if path_stats table exists)
             if 'path_stats' in tables:
                 cursor.execute("""
@@ -3176,14 +3345,27 @@ class BotDataViewer:
                 else:  # 'all'
                     time_filter = ""
                 
+                # The path length rollup tells us the shortest length that can still make
+                # the top 5, so the path_length index only has to visit a handful of rows
+                length_floor = None
+                if time_filter and use_rollups:
+                    length_floor = self._get_rollup_path_length_floor(cursor, top_paths_window, 5)
+                
                 query = f"""
                     SELECT sender_id, path_length, path_string, timestamp
                     FROM path_stats 
                     {time_filter}
+                    {'AND path_length >= ?' if length_floor is not None else ''}
                     ORDER BY path_length DESC 
                     LIMIT 5
                 """
-                cursor.execute(query)
+                cursor.execute(query, (length_floor,) if length_floor is not None else ())
+                top_paths = cursor.fetchall()
+                if length_floor is not None and len(top_paths) < 5:
+                    # Rollup buckets are hour-aligned and outlive raw rows, so the floor
+                    # can overshoot; fall back to the unbounded query
+                    cursor.execute(query.replace('AND path_length >= ?', ''))
+                    top_paths = cursor.fetchall()
                 stats['top_paths'] = [
                     {
                         'user': row[0], 
@@ -3191,7 +3373,7 @@ class BotDataViewer:
                         'path_string': row[2], 
                         'timestamp': row[3]
                     } 
-                    for row in cursor.fetchall()
+                    for row in top_paths
                 ]
             
             # Network health metrics
@@ -3252,6 +3434,150 @@ class BotDataViewer:
             if conn:
                 conn.close()
     
+    def _get_leaderboard_tops(self, cursor, top_users_window='all', top_commands_window='all',
+                              top_channels_window='all') -> Dict[str, Any]:
+        """Dashboard top lists from the bot's published leaderboard snapshot.
+        
+        Only lists whose window the bot tracks (24h, 7d, all) are returned, and only
+        while the snapshot is fresh; the caller computes the rest.
+        """
+        tops: Dict[str, Any] = {}
+        try:
+            if top_users_window in LEADERBOARD_WINDOWS:
+                rows = read_snapshot(cursor, 'message_senders', top_users_window, 15, self.leaderboard_max_age)
+                if rows is None:
+                    return tops
+                tops['top_users'] = [{'user': row['key'], 'count': int(row['value'])} for row in rows]
+            if top_commands_window in LEADERBOARD_WINDOWS:
+                rows = read_snapshot(cursor, 'commands', top_commands_window, 15, self.leaderboard_max_age)
+                if rows is None:
+                    return tops
+                tops['top_commands'] = [{'command': row['key'], 'count': int(row['value'])} for row in rows]
+            if top_channels_window in LEADERBOARD_WINDOWS:
+                rows = read_snapshot(cursor, 'channels', top_channels_window, 10, self.leaderboard_max_age)
+                if rows is None:
+                    return tops
+                tops['top_channels'] = [
+                    {'channel': row['key'], 'messages': int(row['value']), 'users': row['distinct'] or 0}
+                    for row in rows
+                ]
+        except sqlite3.Error as e:
+            self.logger.debug(f"Leaderboard snapshot unavailable: {e}")
+        return tops
+    
+    def _get_rollup_activity_stats(self, cursor, top_users_window='all', top_commands_window='all',
+                                   top_channels_window='all', precomputed=None) -> Dict[str, Any]:
+        """Message, command and channel dashboard stats read from the stats rollup tables"""
+        stats: Dict[str, Any] = {}
+        precomputed = precomputed or {}
+        hourly_24h = rollup_filter('24h')
+        
+        def scalar(query, params=()):
+            cursor.execute(query, params)
+            return cursor.fetchone()[0] or 0
+        
+        # Messages
+        stats['total_messages'] = scalar(
+            f"SELECT SUM(count) FROM {DAILY_TABLE} WHERE metric = ?", (METRIC_MESSAGE,)
+        )
+        table, flt, params = hourly_24h
+        stats['messages_24h'] = scalar(
+            f"SELECT SUM(count) FROM {table} WHERE metric = ? {flt}", (METRIC_MESSAGE, *params)
+        )
+        stats['unique_senders_24h'] = scalar(
+            f"SELECT COUNT(DISTINCT subkey) FROM {table} WHERE metric = ? {flt}", (METRIC_MESSAGE, *params)
+        )
+        stats['unique_users_total'] = scalar(
+            f"SELECT COUNT(DISTINCT subkey) FROM {DAILY_TABLE} WHERE metric = ?", (METRIC_MESSAGE,)
+        )
+        stats['unique_channels_total'] = scalar(
+            f"SELECT COUNT(DISTINCT key) FROM {DAILY_TABLE} WHERE metric = ? AND key != ''", (METRIC_MESSAGE,)
+        )
+        
+        if 'top_users' in precomputed:
+            stats['top_users'] = precomputed['top_users']
+        else:
+            table, flt, params = rollup_filter(top_users_window)
+            cursor.execute(f"""
+                SELECT subkey, SUM(count) as total
+                FROM {table}
+                WHERE metric = ? {flt}
+                GROUP BY subkey
+                ORDER BY total DESC
+                LIMIT 15
+            """, (METRIC_MESSAGE, *params))
+            stats['top_users'] = [{'user': row[0], 'count': row[1]} for row in cursor.fetchall()]
+        
+        # Commands
+        stats['total_commands'] = scalar(
+            f"SELECT SUM(count) FROM {DAILY_TABLE} WHERE metric = ?", (METRIC_COMMAND,)
+        )
+        table, flt, params = hourly_24h
+        stats['commands_24h'] = scalar(
+            f"SELECT SUM(count) FROM {table} WHERE metric = ? {flt}", (METRIC_COMMAND, *params)
+        )
+        
+        if 'top_commands' in precomputed:
+            stats['top_commands'] = precomputed['top_commands']
+        else:
+            table, flt, params = rollup_filter(top_commands_window)
+            cursor.execute(f"""
+                SELECT key, SUM(count) as total
+                FROM {table}
+                WHERE metric = ? {flt}
+                GROUP BY key
+                ORDER BY total DESC
+                LIMIT 15
+            """, (METRIC_COMMAND, *params))
+            stats['top_commands'] = [{'command': row[0], 'count': row[1]} for row in cursor.fetchall()]
+        
+        # Bot reply rates (commands that got responses)
+        for window in ('24h', '7d', '30d'):
+            table, flt, params = rollup_filter(window)
+            cursor.execute(
+                f"SELECT SUM(count), SUM(replied) FROM {table} WHERE metric = ? {flt}",
+                (METRIC_COMMAND, *params)
+            )
+            total, replied = cursor.fetchone()
+            stats[f'bot_reply_rate_{window}'] = round((replied / total) * 100, 1) if total else 0
+        
+        # Top channels by message count
+        if 'top_channels' in precomputed:
+            stats['top_channels'] = precomputed['top_channels']
+        else:
+            table, flt, params = rollup_filter(top_channels_window)
+            cursor.execute(f"""
+                SELECT key, SUM(count) as message_count, COUNT(DISTINCT subkey) as unique_users
+                FROM {table}
+                WHERE metric = ? AND key != '' {flt}
+                GROUP BY key
+                ORDER BY message_count DESC
+                LIMIT 10
+            """, (METRIC_MESSAGE, *params))
+            stats['top_channels'] = [
+                {'channel': row[0], 'messages': row[1], 'users': row[2]}
+                for row in cursor.fetchall()
+            ]
+        
+        return stats
+    
+    def _get_rollup_path_length_floor(self, cursor, window: str, limit: int) -> Optional[int]:
+        """Shortest path length that can still appear in the top `limit` paths for a window"""
+        table, flt, params = rollup_filter(window)
+        cursor.execute(f"""
+            SELECT CAST(key AS INTEGER) as length, SUM(count)
+            FROM {table}
+            WHERE metric = ? {flt}
+            GROUP BY length
+            ORDER BY length DESC
+        """, (METRIC_PATH_LENGTH, *params))
+        seen = 0
+        for length, count in cursor.fetchall():
+            seen += count
+            if seen >= limit:
+                return length
+        return None
+    
     def _get_database_info(self):
         """Get comprehensive database information for database page"""
         conn = None
@@ -3344,9 +3670,14 @@ class BotDataViewer:
             'message_stats': 'Message statistics and analytics',
             'command_stats': 'Command execution statistics',
             'path_stats': 'Network path statistics',
+            'stats_rollup_hourly': 'Hourly message, command and path rollups',
+            'stats_rollup_daily': 'Daily message, command and path rollups',
+            'stats_leaderboards': 'Top-N stats leaderboards published by the bot',
             'geocoding_cache': 'Geocoding service cache',
             'generic_cache': 'General purpose cache storage'
         }
+        if table_name.startswith('packet_stream_p'):
+            return 'Real-time packet stream partition (one day or week)'
         return descriptions.get(table_name, 'Database table')
     
     def _optimize_database(self):
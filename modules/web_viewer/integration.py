@@ -10,20 +10,31 @@ import subprocess
 import sys
 import os
 import re
+from collections import OrderedDict
 from pathlib import Path
+from typing import Any, Dict, Tuple
 
+from ..table_partitions import init_packet_stream, packet_stream_table
 from ..utils import resolve_path
+from .packet_records import encode_packet_row
 
 class BotIntegration:
     """Simple bot integration for web viewer compatibility"""
     
+    # Consecutive failed posts before the circuit opens, and how long it stays open
+    CIRCUIT_BREAKER_THRESHOLD = 5
+    CIRCUIT_BREAKER_COOLDOWN = 30.0
+    
     def __init__(self, bot):
         self.bot = bot
         self.circuit_breaker_open = False
         self.circuit_breaker_failures = 0
+        self.circuit_breaker_opened_at = 0.0
         self.is_shutting_down = False
         # Initialize HTTP session with connection pooling for efficient reuse
         self._init_http_session()
+        # Mesh edge/node updates are coalesced per key and posted in batches off the caller's thread
+        self._init_mesh_notifier()
         # Initialize the packet_stream table
         self._init_packet_stream_table()
     
@@ -80,6 +91,30 @@ class BotIntegration:
         """Reset the circuit breaker"""
         self.circuit_breaker_open = False
         self.circuit_breaker_failures = 0
+        self.circuit_breaker_opened_at = 0.0
+    
+    def _circuit_allows_request(self) -> bool:
+        """True if closed, or open long enough to let one trial request through"""
+        if not self.circuit_breaker_open:
+            return True
+        return time.time() - self.circuit_breaker_opened_at >= self.CIRCUIT_BREAKER_COOLDOWN
+    
+    def _record_post_result(self, success: bool):
+        """Update the circuit breaker after a post to the web viewer"""
+        if success:
+            if self.circuit_breaker_open:
+                self.bot.logger.info("Web viewer reachable again, closing circuit breaker")
+            self.reset_circuit_breaker()
+            return
+        self.circuit_breaker_failures += 1
+        if self.circuit_breaker_open or self.circuit_breaker_failures >= self.CIRCUIT_BREAKER_THRESHOLD:
+            if not self.circuit_breaker_open:
+                self.bot.logger.warning(
+                    f"Web viewer unreachable after {self.circuit_breaker_failures} attempts, "
+                    f"pausing mesh updates for {self.CIRCUIT_BREAKER_COOLDOWN:.0f}s"
+                )
+            self.circuit_breaker_open = True
+            self.circuit_breaker_opened_at = time.time()
     
     def _get_web_viewer_db_path(self):
         """Return resolved database path for web viewer. Uses [Bot] db_path when [Web_Viewer] db_path is unset."""
@@ -93,38 +128,10 @@ class BotIntegration:
     def _init_packet_stream_table(self):
         """Initialize the packet_stream table in the web viewer database (same as [Bot] db_path by default)."""
         try:
-            import sqlite3
-            
             db_path = self._get_web_viewer_db_path()
             
-            # Connect to database and create table if it doesn't exist
-            conn = sqlite3.connect(str(db_path), timeout=30.0)
-            cursor = conn.cursor()
-            
-            # Create packet_stream table with schema matching the INSERT statements
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS packet_stream (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp REAL NOT NULL,
-                    data TEXT NOT NULL,
-                    type TEXT NOT NULL
-                )
-            ''')
-            
-            # Create index on timestamp for faster queries
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_packet_stream_timestamp 
-                ON packet_stream(timestamp)
-            ''')
-            
-            # Create index on type for filtering by type
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_packet_stream_type 
-                ON packet_stream(type)
-            ''')
-            
-            conn.commit()
-            conn.close()
+            # Create the table (or its daily/weekly partitions, see [Web_Viewer] packet_stream_partitioning)
+            init_packet_stream(db_path, self.bot.config, self.bot.logger)
             
             self.bot.logger.info(f"Initialized packet_stream table in {db_path}")
             
@@ -141,27 +148,31 @@ class BotIntegration:
             import time
             from datetime import datetime
             
-            # Ensure packet_data is a dict (might be passed as dict already)
-            if not isinstance(packet_data, dict):
-                packet_data = self._make_json_serializable(packet_data)
-                if not isinstance(packet_data, dict):
-                    # If still not a dict, wrap it
-                    packet_data = {'data': packet_data}
-            
-            # Add hops field from path_len if not already present
-            # path_len represents the number of hops (each byte = 1 hop)
-            if 'hops' not in packet_data and 'path_len' in packet_data:
-                packet_data['hops'] = packet_data.get('path_len', 0)
-            elif 'hops' not in packet_data:
-                # If no path_len either, default to 0 hops
-                packet_data['hops'] = 0
-            
-            # Add datetime for frontend display
-            if 'datetime' not in packet_data:
-                packet_data['datetime'] = datetime.now().isoformat()
+            # Packets with their raw bytes are stored compactly; the viewer decodes them on read
+            compact = encode_packet_row(packet_data) if isinstance(packet_data, dict) else None
             
-            # Convert non-serializable objects to strings
-            serializable_data = self._make_json_serializable(packet_data)
+            if compact is None:
+                # Ensure packet_data is a dict (might be passed as dict already)
+                if not isinstance(packet_data, dict):
+                    packet_data = self._make_json_serializable(packet_data)
+                    if not isinstance(packet_data, dict):
+                        # If still not a dict, wrap it
+                        packet_data = {'data': packet_data}
+                
+                # Add hops field from path_len if not already present
+                # path_len represents the number of hops (each byte = 1 hop)
+                if 'hops' not in packet_data and 'path_len' in packet_data:
+                    packet_data['hops'] = packet_data.get('path_len', 0)
+                elif 'hops' not in packet_data:
+                    # If no path_len either, default to 0 hops
+                    packet_data['hops'] = 0
+                
+                # Add datetime for frontend display
+                if 'datetime' not in packet_data:
+                    packet_data['datetime'] = datetime.now().isoformat()
+                
+                # Convert non-serializable objects to strings
+                serializable_data = self._make_json_serializable(packet_data)
             
             # Store in database for web viewer to read
             db_path = self.bot.config.get('Web_Viewer', 'db_path', fallback='meshcore_bot.db')
@@ -172,10 +183,17 @@ class BotIntegration:
             cursor = conn.cursor()
             
             # Insert packet data
-            cursor.execute('''
-                INSERT INTO packet_stream (timestamp, data, type)
-                VALUES (?, ?, ?)
-            ''', (time.time(), json.dumps(serializable_data), 'packet'))
+            if compact is not None:
+                raw, snr, rssi = compact
+                cursor.execute('''
+                    INSERT INTO packet_stream (timestamp, data, type, raw, snr, rssi)
+                    VALUES (?, '', 'packet', ?, ?, ?)
+                ''', (time.time(), raw, snr, rssi))
+            else:
+                cursor.execute('''
+                    INSERT INTO packet_stream (timestamp, data, type)
+                    VALUES (?, ?, ?)
+                ''', (time.time(), json.dumps(serializable_data), 'packet'))
             
             conn.commit()
             conn.close()
@@ -281,6 +299,12 @@ class BotIntegration:
             cutoff_time = time.time() - (days_to_keep * 24 * 60 * 60)
             
             db_path = self._get_web_viewer_db_path()
+            partitioned = packet_stream_table(self.bot.config, self.bot.logger)
+            if partitioned is not None:
+                # Whole days (or weeks) are dropped once their newest row is past the cutoff
+                partitioned.drop_expired(db_path, cutoff_time)
+                return
+            
             conn = sqlite3.connect(str(db_path), timeout=30.0)
             cursor = conn.cursor()
             
@@ -322,65 +346,167 @@ class BotIntegration:
         else:
             return str(obj)
     
-    def send_mesh_edge_update(self, edge_data):
-        """Send mesh edge update to web viewer via HTTP API"""
+    def _init_mesh_notifier(self):
+        """Set up the coalescing queue and settings for mesh edge/node notifications"""
+        self.mesh_notify_interval = self.bot.config.getfloat(
+            'Web_Viewer', 'mesh_notify_interval_seconds', fallback=0.25)
+        self.mesh_notify_max_pending = self.bot.config.getint(
+            'Web_Viewer', 'mesh_notify_max_pending', fallback=1000)
+        self.mesh_notify_batch_size = 200
+        # (type, key) -> payload; re-queued keys keep their position but take the newest data
+        self._mesh_pending: 'OrderedDict[Tuple[str, str], Dict[str, Any]]' = OrderedDict()
+        self._mesh_lock = threading.Lock()
+        self._mesh_flush_lock = threading.Lock()
+        self._mesh_wakeup = threading.Event()
+        self._mesh_thread = None
+        # Highest edge seq handed to the viewer, so coalesced seqs are not seen as gaps
+        self._mesh_last_edge_seq = None
+        self._mesh_last_generation = None
+        self._mesh_dropped_edge_seq = None
+        self.mesh_updates_sent = 0
+        self.mesh_updates_coalesced = 0
+        self.mesh_updates_dropped = 0
+    
+    def _stream_data_url(self) -> str:
+        host = self.bot.config.get('Web_Viewer', 'host', fallback='127.0.0.1')
+        port = self.bot.config.getint('Web_Viewer', 'port', fallback=8080)
+        return f"http://{host}:{port}/api/stream_data"
+    
+    def _queue_mesh_update(self, update_type: str, key: str, data: Dict[str, Any]):
+        """Coalesce an update by key and wake the notifier thread. Never blocks on I/O."""
+        if self.is_shutting_down:
+            return
+        with self._mesh_lock:
+            existing = self._mesh_pending.get((update_type, key))
+            if existing is not None:
+                self.mesh_updates_coalesced += 1
+                if update_type == 'mesh_edge':
+                    # Receivers should still see the edge as new, and know the earliest seq it covers
+                    data = dict(data, _first_seq=existing.get('_first_seq', existing.get('seq')))
+                    if existing.get('is_new'):
+                        data['is_new'] = True
+            elif len(self._mesh_pending) >= self.mesh_notify_max_pending:
+                (dropped_type, _), dropped = self._mesh_pending.popitem(last=False)
+                self.mesh_updates_dropped += 1
+                if dropped_type == 'mesh_edge' and dropped.get('seq') is not None:
+                    # Break the prev_seq chain so the viewer resyncs from the snapshot
+                    self._mesh_dropped_edge_seq = max(self._mesh_dropped_edge_seq or 0, dropped['seq'])
+            self._mesh_pending[(update_type, key)] = data
+            if self._mesh_thread is None or not self._mesh_thread.is_alive():
+                self._mesh_thread = threading.Thread(
+                    target=self._mesh_notifier_loop, name='web-viewer-mesh-notifier', daemon=True)
+                self._mesh_thread.start()
+        self._mesh_wakeup.set()
+    
+    def _mesh_notifier_loop(self):
+        """Background thread: wait for updates, let them coalesce briefly, then post batches"""
+        while not self.is_shutting_down:
+            self._mesh_wakeup.wait()
+            self._mesh_wakeup.clear()
+            if self.is_shutting_down:
+                break
+            time.sleep(self.mesh_notify_interval)
+            try:
+                self.flush_mesh_updates()
+            except Exception as e:
+                self.bot.logger.debug(f"Error flushing mesh updates to web viewer: {e}")
+    
+    def _take_mesh_updates(self):
+        """Pop all pending updates: edges in seq order with prev_seq links, then nodes"""
+        with self._mesh_lock:
+            items = list(self._mesh_pending.items())
+            self._mesh_pending.clear()
+            dropped_seq, self._mesh_dropped_edge_seq = self._mesh_dropped_edge_seq, None
+        edges = sorted((data for (kind, _), data in items if kind == 'mesh_edge'),
+                       key=lambda d: d.get('seq') or 0)
+        nodes = [data for (kind, _), data in items if kind == 'mesh_node']
+        
+        events = []
+        for edge in edges:
+            edge = {k: v for k, v in edge.items() if k != '_first_seq'}
+            generation = edge.get('generation')
+            if generation != self._mesh_last_generation:
+                self._mesh_last_generation = generation
+                self._mesh_last_edge_seq = None
+            if edge.get('seq') is not None:
+                # Seqs folded into a coalesced update are superseded by it, so each update
+                # only requires the receiver to have the previous one sent
+                if self._mesh_last_edge_seq is None:
+                    self._mesh_last_edge_seq = min(
+                        e.get('_first_seq') or e['seq'] for e in edges
+                        if e.get('generation') == generation and e.get('seq') is not None
+                    ) - 1
+                prev_seq = self._mesh_last_edge_seq
+                if dropped_seq is not None:
+                    prev_seq = max(prev_seq, dropped_seq)
+                    dropped_seq = None
+                edge['prev_seq'] = prev_seq
+                self._mesh_last_edge_seq = edge['seq']
+            events.append({'type': 'mesh_edge', 'data': edge})
+        events.extend({'type': 'mesh_node', 'data': node} for node in nodes)
+        return events
+    
+    def flush_mesh_updates(self) -> int:
+        """Post all pending mesh updates to the web viewer in batches.
+        
+        Returns:
+            int: Number of updates delivered.
+        """
+        delivered = 0
+        with self._mesh_flush_lock:
+            events = self._take_mesh_updates()
+            for i in range(0, len(events), self.mesh_notify_batch_size):
+                batch = events[i:i + self.mesh_notify_batch_size]
+                if not self._circuit_allows_request():
+                    # Viewer is down; it resyncs from the mesh graph snapshot when it returns
+                    self.mesh_updates_dropped += len(batch)
+                    continue
+                success = self._post_stream_data({'type': 'batch', 'data': {'events': batch}})
+                self._record_post_result(success)
+                if success:
+                    delivered += len(batch)
+                    self.mesh_updates_sent += len(batch)
+                else:
+                    self.mesh_updates_dropped += len(batch)
+        return delivered
+    
+    def _post_stream_data(self, payload: Dict[str, Any]) -> bool:
+        """POST a payload to the web viewer over the pooled session"""
         try:
-            # Get web viewer URL from config
-            host = self.bot.config.get('Web_Viewer', 'host', fallback='127.0.0.1')
-            port = self.bot.config.getint('Web_Viewer', 'port', fallback=8080)
-            url = f"http://{host}:{port}/api/stream_data"
-            
-            payload = {
-                'type': 'mesh_edge',
-                'data': edge_data
-            }
-            
-            # Use session with connection pooling if available, otherwise fallback to requests.post
             if self.http_session:
-                try:
-                    # Use a slightly longer timeout to allow connection reuse
-                    self.http_session.post(url, json=payload, timeout=1.0)
-                except Exception:
-                    # Silently fail - web viewer might not be running
-                    pass
+                response = self.http_session.post(self._stream_data_url(), json=payload, timeout=2.0)
             else:
-                # Fallback if session not initialized
                 import requests
-                try:
-                    requests.post(url, json=payload, timeout=1.0)
-                except Exception:
-                    pass
+                response = requests.post(self._stream_data_url(), json=payload, timeout=2.0)
+            return response.status_code < 400
+        except Exception:
+            # Web viewer might not be running
+            return False
+    
+    def send_mesh_edge_update(self, edge_data):
+        """Queue a mesh edge update for the web viewer (coalesced per edge, sent in the background)"""
+        try:
+            key = f"{edge_data.get('from_prefix')}-{edge_data.get('to_prefix')}"
+            self._queue_mesh_update('mesh_edge', key, edge_data)
         except Exception as e:
-            self.bot.logger.debug(f"Error sending mesh edge update to web viewer: {e}")
+            self.bot.logger.debug(f"Error queueing mesh edge update for web viewer: {e}")
     
     def send_mesh_node_update(self, node_data):
-        """Send mesh node update to web viewer via HTTP API"""
+        """Queue a mesh node update for the web viewer (coalesced per node, sent in the background)"""
         try:
-            import requests
-            import json
-            
-            # Get web viewer URL from config
-            host = self.bot.config.get('Web_Viewer', 'host', fallback='127.0.0.1')
-            port = self.bot.config.getint('Web_Viewer', 'port', fallback=8080)
-            url = f"http://{host}:{port}/api/stream_data"
-            
-            payload = {
-                'type': 'mesh_node',
-                'data': node_data
-            }
-            
-            # Send asynchronously (don't block)
-            try:
-                requests.post(url, json=payload, timeout=0.5)
-            except Exception:
-                # Silently fail - web viewer might not be running
-                pass
+            key = node_data.get('public_key') or node_data.get('prefix') or ''
+            self._queue_mesh_update('mesh_node', key, node_data)
         except Exception as e:
-            self.bot.logger.debug(f"Error sending mesh node update to web viewer: {e}")
+            self.bot.logger.debug(f"Error queueing mesh node update for web viewer: {e}")
     
     def shutdown(self):
-        """Mark as shutting down and close HTTP session"""
+        """Deliver pending mesh updates, mark as shutting down and close HTTP session"""
+        try:
+            self.flush_mesh_updates()
+        except Exception as e:
+            self.bot.logger.debug(f"Error flushing mesh updates on shutdown: {e}")
         self.is_shutting_down = True
+        self._mesh_wakeup.set()
         # Close HTTP session to clean up connections
         if hasattr(self, 'http_session') and self.http_session:
             try:
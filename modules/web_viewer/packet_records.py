@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Compact packet rows for the web viewer's packet stream
+Received packets are stored as their raw bytes plus SNR and RSSI instead of a
+JSON document repeating every decoded field (path, path_hex, payload_hex, enum
+names...). The viewer rebuilds the decoded document from the bytes only when a
+client is subscribed to the packet stream, and keeps recent documents in an
+LRU so repeated reads of the same row are not decoded twice.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..utils import calculate_packet_hash
+
+# Fields of the decoded packet that hold enum objects (stored by name, as before)
+_ENUM_FIELDS = ('route_type_enum', 'payload_type_enum', 'payload_version_enum')
+
+
+def encode_packet_row(packet_data: Dict[str, Any]) -> Optional[Tuple[bytes, Optional[float], Optional[int]]]:
+    """Compact column values for a captured packet.
+
+    Args:
+        packet_data: Decoded packet with 'raw_packet_hex' and optional 'snr'/'rssi'.
+
+    Returns:
+        Optional[Tuple[bytes, Optional[float], Optional[int]]]: (raw bytes, SNR, RSSI),
+        or None if the packet has no usable raw bytes (store it as JSON instead).
+    """
+    raw_hex = packet_data.get('raw_packet_hex')
+    if not isinstance(raw_hex, str) or not raw_hex:
+        return None
+    if raw_hex.startswith('0x'):
+        raw_hex = raw_hex[2:]
+    try:
+        raw = bytes.fromhex(raw_hex)
+    except ValueError:
+        return None
+    snr = packet_data.get('snr')
+    rssi = packet_data.get('rssi')
+    try:
+        snr = float(snr) if snr is not None else None
+        rssi = int(rssi) if rssi is not None else None
+    except (TypeError, ValueError):
+        snr = rssi = None
+    return raw, snr, rssi
+
+
+class PacketRecordDecoder:
+    """Rebuilds packet documents from compact rows, with an LRU keyed by row id.
+
+    Args:
+        decode: Decoder taking a packet hex string and returning the decoded
+            packet dict or None (MessageHandler.decode_meshcore_packet).
+        max_entries: Documents kept in the LRU.
+    """
+
+    def __init__(self, decode: Callable[[str], Optional[Dict[str, Any]]], max_entries: int = 2048):
+        self.decode = decode
+        self.max_entries = max(1, max_entries)
+        self._cache: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'decoded': 0, 'failed': 0}
+
+    def packet_data(self, row_id: int, timestamp: float, raw: bytes,
+                    snr: Optional[float] = None, rssi: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """The packet document for a compact row (the same shape as the JSON rows).
+
+        Returns:
+            Optional[Dict[str, Any]]: The document, or None if the bytes do not decode.
+        """
+        with self._lock:
+            cached = self._cache.get(row_id)
+            if cached is not None:
+                self._cache.move_to_end(row_id)
+                self.stats['hits'] += 1
+                return cached
+
+        raw_hex = bytes(raw).hex()
+        decoded = self.decode(raw_hex)
+        if not decoded:
+            self.stats['failed'] += 1
+            return None
+
+        document = {k: (v.name if k in _ENUM_FIELDS and isinstance(v, Enum) else v) for k, v in decoded.items()}
+        document['raw_packet_hex'] = raw_hex
+        document['packet_hash'] = calculate_packet_hash(raw_hex, document.get('payload_type'))
+        document['hops'] = document.get('path_len', 0)
+        document['datetime'] = datetime.fromtimestamp(timestamp).isoformat()
+        if snr is not None:
+            document['snr'] = snr
+        if rssi is not None:
+            document['rssi'] = rssi
+
+        with self._lock:
+            self.stats['decoded'] += 1
+            self._cache[row_id] = document
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return document
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'cached': len(self._cache)}
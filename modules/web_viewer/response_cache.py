@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Response cache for heavy web viewer JSON APIs
+Caches rendered JSON bodies keyed by route and query args, invalidates them when the
+database changes, and serves strong ETags (304 Not Modified) and gzip bodies
+"""
+
+import gzip
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import Response, make_response, request
+
+
+@dataclass
+class CachedResponse:
+    """A rendered 200 response body and its validators"""
+    body: bytes
+    etag: str
+    mimetype: str
+    data_version: Tuple
+    created_at: float
+    gzipped: Optional[bytes] = None
+    hits: int = 0
+
+
+@dataclass
+class ResponseCacheStats:
+    """Counters exposed for diagnostics"""
+    hits: int = 0
+    misses: int = 0
+    not_modified: int = 0
+    compressed: int = 0
+    evictions: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+class ResponseCache:
+    """Route-level cache for JSON endpoints.
+
+    The data version is a pair of an in-process counter (bumped by the viewer's own
+    write endpoints via bump()) and SQLite's PRAGMA data_version, which changes
+    whenever another connection - including the bot process - commits to the database.
+    A cached body is reused while the data version is unchanged, or for up to
+    min_age_seconds after an external write so a busy packet stream does not defeat
+    the cache. Local writes always invalidate immediately.
+    """
+
+    def __init__(self, db_path: str, logger: Any = None, max_entries: int = 64,
+                 min_age_seconds: float = 5.0, compress_min_bytes: int = 1024,
+                 enabled: bool = True):
+        self.db_path = db_path
+        self.logger = logger
+        self.max_entries = max_entries
+        self.min_age_seconds = min_age_seconds
+        self.compress_min_bytes = compress_min_bytes
+        self.enabled = enabled
+        self.stats = ResponseCacheStats()
+
+        self._entries: 'OrderedDict[str, CachedResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+        # key -> [lock, holders and waiters]; removed when nobody is using it
+        self._key_locks: Dict[str, List[Any]] = {}
+        self._local_version = 0
+
+        # Dedicated connection: PRAGMA data_version is only meaningful on a long-lived one
+        self._version_conn: Optional[sqlite3.Connection] = None
+        self._version_lock = threading.Lock()
+
+    def bump(self) -> None:
+        """Invalidate all cached responses after a local write."""
+        with self._lock:
+            self._local_version += 1
+
+    def data_version(self) -> Tuple[int, int]:
+        """Current (local, database) data version."""
+        with self._version_lock:
+            try:
+                if self._version_conn is None:
+                    self._version_conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+                db_version = self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+            except sqlite3.Error as e:
+                if self.logger:
+                    self.logger.debug(f"Response cache could not read data_version: {e}")
+                self.close()
+                # Unknown version: force a miss
+                db_version = -int(time.time() * 1000)
+        return self._local_version, db_version
+
+    def close(self) -> None:
+        """Close the data version connection."""
+        if self._version_conn is not None:
+            try:
+                self._version_conn.close()
+            except sqlite3.Error:
+                pass
+            self._version_conn = None
+
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def make_key(path: str, args: Any) -> str:
+        """Cache key from the route path and its (order-independent) query args."""
+        items = sorted(args.items(multi=True)) if hasattr(args, 'getlist') else sorted(dict(args or {}).items())
+        return path + '?' + '&'.join(f"{k}={v}" for k, v in items)
+
+    def _is_fresh(self, entry: CachedResponse, version: Tuple) -> bool:
+        if entry.data_version == version:
+            return True
+        # Local writes and view-specific versions always invalidate; external
+        # database writes only once min_age has passed
+        return (entry.data_version[0] == version[0]
+                and entry.data_version[2:] == version[2:]
+                and time.time() - entry.created_at < self.min_age_seconds)
+
+    def lookup(self, key: str, version: Tuple) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._is_fresh(entry, version):
+                return None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.stats.hits += 1
+            return entry
+
+    def store(self, key: str, body: bytes, mimetype: str, version: Tuple) -> CachedResponse:
+        etag = hashlib.sha1(body).hexdigest()
+        entry = CachedResponse(body=body, etag=etag, mimetype=mimetype,
+                               data_version=version, created_at=time.time())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        return entry
+
+    @contextmanager
+    def _key_lock(self, key: str) -> Iterator[None]:
+        """Hold the build lock for key; the lock is dropped once no request uses it."""
+        with self._lock:
+            slot = self._key_locks.get(key)
+            if slot is None:
+                slot = self._key_locks[key] = [threading.Lock(), 0]
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._key_locks[key]
+
+    def get_or_build(self, key: str, build: Callable[[], Response],
+                     extra_version: Any = None) -> Tuple[Optional[CachedResponse], Optional[Response]]:
+        """Return a fresh cached entry, building it at most once under concurrency.
+
+        Args:
+            key: Cache key from make_key().
+            build: Renders the response on a miss.
+            extra_version: Optional view-specific version (e.g. of in-memory data that
+                is not in the database); any change invalidates the entry.
+
+        Returns:
+            Tuple of (entry, None) for cacheable responses, or (None, response) when the
+            view returned a non-200 response that must be passed through uncached.
+        """
+        version = self.data_version()
+        if extra_version is not None:
+            version = version + (extra_version,)
+        entry = self.lookup(key, version)
+        if entry:
+            return entry, None
+        # Single flight: concurrent requests for the same key wait for one build
+        with self._key_lock(key):
+            entry = self.lookup(key, version)
+            if entry:
+                return entry, None
+            self.stats.misses += 1
+            response = build()
+            if response.status_code != 200 or response.direct_passthrough:
+                return None, response
+            return self.store(key, response.get_data(), response.mimetype, version), None
+
+    def _gzipped(self, entry: CachedResponse) -> bytes:
+        if entry.gzipped is None:
+            entry.gzipped = gzip.compress(entry.body, compresslevel=6)
+        return entry.gzipped
+
+    def respond(self, entry: CachedResponse) -> Response:
+        """Build the HTTP response for a cached entry, honouring If-None-Match and Accept-Encoding."""
+        use_gzip = (len(entry.body) >= self.compress_min_bytes
+                    and 'gzip' in request.headers.get('Accept-Encoding', '').lower())
+        # Strong ETags must differ per content-coding
+        etag = f"{entry.etag}-gz" if use_gzip else entry.etag
+
+        if request.if_none_match and (request.if_none_match.contains(entry.etag)
+                                      or request.if_none_match.contains(f"{entry.etag}-gz")):
+            self.stats.not_modified += 1
+            response = make_response('', 304)
+        elif use_gzip:
+            self.stats.compressed += 1
+            response = make_response(self._gzipped(entry))
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = make_response(entry.body)
+
+        response.mimetype = entry.mimetype
+        response.set_etag(etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def cached(self, view: Optional[Callable] = None, *,
+               version: Optional[Callable[[], Any]] = None) -> Callable:
+        """Decorator for Flask GET views that return JSON.
+
+        Use as @cache.cached, or @cache.cached(version=fn) when the view also reads
+        data outside the database; fn() is added to the data version.
+        """
+        if view is None:
+            return lambda v: self.cached(v, version=version)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            build = lambda: make_response(view(*args, **kwargs))
+            if not self.enabled or request.method != 'GET':
+                return build()
+            key = self.make_key(request.path, request.args)
+            entry, passthrough = self.get_or_build(key, build, version() if version else None)
+            if passthrough is not None:
+                return passthrough
+            return self.respond(entry)
+        return wrapper
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = self.stats.to_dict()
+            data['entries'] = len(self._entries)
+        data['enabled'] = self.enabled
+        return data
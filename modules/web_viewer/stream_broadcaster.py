@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Coalesced Socket.IO broadcasting for the web viewer's live streams
+Events are queued per client (bounded, dropping the oldest) and sent as one
+'stream_batch' frame per client at a fixed rate. A client gets its next frame
+only after acknowledging the previous one, so a slow browser backs up its own
+queue instead of the server's send buffers.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+STREAM_COMMANDS = 'commands'
+STREAM_PACKETS = 'packets'
+STREAM_MESH = 'mesh'
+
+FRAME_EVENT = 'stream_batch'
+
+
+@dataclass
+class ClientStream:
+    """Per-client subscription and send state"""
+    sid: str
+    queue: Deque[Tuple[str, Any]]
+    streams: Set[str] = field(default_factory=set)
+    dropped: int = 0
+    dropped_total: int = 0
+    frames_sent: int = 0
+    in_flight_since: Optional[float] = None
+
+
+class StreamBroadcaster:
+    """Batches live stream events into per-client frames.
+
+    Args:
+        socketio: Flask-SocketIO instance used to emit frames.
+        logger: Logger for errors.
+        rate_hz: Maximum frames per second per client.
+        max_queue: Events buffered per client before the oldest are dropped.
+        max_frame_events: Events sent in a single frame.
+        ack_timeout: Seconds to wait for a frame acknowledgement before sending anyway.
+    """
+
+    def __init__(self, socketio, logger, rate_hz: float = 10.0, max_queue: int = 500,
+                 max_frame_events: int = 200, ack_timeout: float = 5.0):
+        self.socketio = socketio
+        self.logger = logger
+        self.interval = 1.0 / max(0.1, rate_hz)
+        self.max_queue = max(1, max_queue)
+        self.max_frame_events = max(1, max_frame_events)
+        self.ack_timeout = ack_timeout
+
+        self._clients: Dict[str, ClientStream] = {}
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.events_published = 0
+        self.events_dropped = 0
+        self.frames_sent = 0
+
+    def add_client(self, sid: str) -> None:
+        with self._lock:
+            self._clients[sid] = ClientStream(sid=sid, queue=deque(maxlen=self.max_queue))
+
+    def remove_client(self, sid: str) -> None:
+        with self._lock:
+            self._clients.pop(sid, None)
+
+    def subscribe(self, sid: str, stream: str) -> None:
+        with self._lock:
+            client = self._clients.get(sid)
+            if client:
+                client.streams.add(stream)
+
+    def has_subscribers(self, stream: str) -> bool:
+        with self._lock:
+            return any(stream in client.streams for client in self._clients.values())
+
+    def publish(self, stream: str, event: str, data: Any) -> int:
+        """Queue an event for every client subscribed to stream.
+
+        Returns:
+            int: Number of clients the event was queued for.
+        """
+        queued = 0
+        with self._lock:
+            for client in self._clients.values():
+                if stream not in client.streams:
+                    continue
+                if len(client.queue) == client.queue.maxlen:
+                    # deque(maxlen) drops the oldest entry on append
+                    client.dropped += 1
+                    client.dropped_total += 1
+                    self.events_dropped += 1
+                client.queue.append((event, data))
+                queued += 1
+            self.events_published += 1
+        if queued:
+            self._pending.set()
+        return queued
+
+    def _ack(self, sid: str, *args) -> None:
+        with self._lock:
+            client = self._clients.get(sid)
+            if client:
+                client.in_flight_since = None
+        self._pending.set()
+
+    def flush(self) -> bool:
+        """Send at most one frame to each client with queued events.
+
+        Returns:
+            bool: True if events remain queued (backlog or unacknowledged clients).
+        """
+        now = time.time()
+        frames = []
+        backlog = False
+        with self._lock:
+            for client in self._clients.values():
+                if not client.queue:
+                    continue
+                if client.in_flight_since is not None and now - client.in_flight_since < self.ack_timeout:
+                    backlog = True
+                    continue
+                count = min(len(client.queue), self.max_frame_events)
+                events = [client.queue.popleft() for _ in range(count)]
+                frames.append((client.sid, {
+                    'events': [{'event': event, 'data': data} for event, data in events],
+                    'dropped': client.dropped,
+                }))
+                client.dropped = 0
+                client.frames_sent += 1
+                client.in_flight_since = now
+                backlog = backlog or bool(client.queue)
+
+        for sid, frame in frames:
+            try:
+                self.socketio.emit(FRAME_EVENT, frame, to=sid, callback=partial(self._ack, sid))
+                self.frames_sent += 1
+            except Exception as e:
+                self.logger.debug(f"Error sending stream frame to {sid}: {e}")
+                self._ack(sid)
+        return backlog
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._pending.wait()
+            self._pending.clear()
+            if self._stop.is_set():
+                break
+            try:
+                if self.flush():
+                    self._pending.set()
+            except Exception as e:
+                self.logger.error(f"Error in stream broadcaster: {e}", exc_info=True)
+            # Bound the frame rate
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Start the flusher thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stream-broadcaster', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._pending.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'clients': len(self._clients),
+                'queued': sum(len(c.queue) for c in self._clients.values()),
+                'events_published': self.events_published,
+                'events_dropped': self.events_dropped,
+                'frames_sent': self.frames_sent,
+                'rate_hz': round(1.0 / self.interval, 2),
+            }
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Replay a packet capture through the bot's RX pipeline and report timings.
+
+Run standalone: python replay_capture.py CAPTURE.jsonl [--config config.ini] [--speed N | --realtime]
+Replays the capture against a fake radio and a temporary database, then prints
+throughput and p50/p99 latency per stage (handlers, packet decode, advert
+tracking, mesh graph updates).
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+
+from modules.replay_benchmark import format_report, load_capture, run_replay
+
+
+async def run(args, work_dir: str) -> dict:
+    events = load_capture(args.capture, include_raw_data=args.raw_data)
+    return await run_replay(
+        args.config,
+        events,
+        work_dir,
+        speed=1.0 if args.realtime else args.speed,
+        seed_db=args.seed_db,
+        log_level=args.log_level,
+        limit=args.limit,
+        geocode=args.geocode,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Replay a PacketCapture JSONL file through the bot's RX pipeline"
+    )
+    parser.add_argument("capture", help="Capture file (JSONL, optionally .gz or .zst)")
+    parser.add_argument("--config", default="config.ini", help="Bot config to base the replay on (default: config.ini)")
+    parser.add_argument("--seed-db", help="Copy this database as the starting state instead of an empty one")
+    parser.add_argument("--work-dir", help="Keep the replay database and log here (default: a temporary directory)")
+    speed = parser.add_mutually_exclusive_group()
+    speed.add_argument("--speed", type=float, help="Replay N times faster than captured (default: as fast as possible)")
+    speed.add_argument("--realtime", action="store_true", help="Replay with the captured timing")
+    parser.add_argument("--raw-data", action="store_true", help="Also replay each packet as a RAW_DATA event")
+    parser.add_argument("--limit", type=int, help="Stop after N events")
+    parser.add_argument("--geocode", action="store_true", help="Reverse geocode advert locations (network calls)")
+    parser.add_argument("--log-level", default="WARNING", help="Bot log level during the replay (default: WARNING)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if args.work_dir:
+        report = asyncio.run(run(args, args.work_dir))
+    else:
+        with tempfile.TemporaryDirectory(prefix="meshcore-replay-") as work_dir:
+            report = asyncio.run(run(args, work_dir))
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
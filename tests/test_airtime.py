@@ -0,0 +1,276 @@
+"""Tests for modules.airtime and airtime-aware bot TX pacing."""
+
+import asyncio
+from configparser import ConfigParser
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from meshcore import EventType, MeshCore
+from meshcore.events import Event
+
+from modules.airtime import (
+    AirtimeBudget, airtime_budget_from_config, lora_settings, text_packet_bytes, time_on_air,
+)
+from modules.command_manager import CommandManager
+from modules.rate_limiter import BotTxRateLimiter
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_manager(logger, budget):
+    bot = Mock()
+    bot.logger = logger
+    bot.config = ConfigParser()
+    bot.config.read_dict({'Bot': {'bot_name': 'TestBot'}, 'Channels': {'monitor_channels': 'general'}})
+    bot.meshcore.self_info = {'name': 'TestBot', 'radio_sf': 11, 'radio_bw': 250.0, 'radio_cr': 5}
+    bot.get_lora_settings = lambda: lora_settings(bot.config, bot.meshcore.self_info)
+    bot.tx_delay_ms = 0
+    bot.bot_tx_rate_limiter = BotTxRateLimiter(0, airtime_budget=budget)
+    with patch('modules.command_manager.PluginLoader'):
+        return CommandManager(bot)
+
+
+class TestTimeOnAir:
+    """Semtech time-on-air formula and MeshCore text packet sizes."""
+
+    def test_reference_values(self):
+        # Semtech LoRa calculator: 20 bytes at SF7/125 kHz/4-5, 8 preamble symbols
+        assert time_on_air(20, 7, 125, 5, 8) == pytest.approx(0.056576)
+        # SF12/125 kHz uses low data rate optimisation
+        assert time_on_air(51, 12, 125, 5, 8) == pytest.approx(2.465792)
+        assert time_on_air(20, 7, 125, 1, 8) == time_on_air(20, 7, 125, 5, 8)
+        assert time_on_air(20, 7, 125, 8, 8) > time_on_air(20, 7, 125, 5, 8)
+
+    def test_long_replies_cost_more_airtime(self):
+        ping = text_packet_bytes('pong', channel=True, sender_name='Bot')
+        reply = text_packet_bytes('x' * 140, channel=True, sender_name='Bot')
+        # header + path length, channel hash + MAC, one 16-byte block for "Bot: pong" + 5
+        assert ping == 2 + 3 + 16
+        assert reply == 2 + 3 + 160
+        assert text_packet_bytes('hi', channel=False, path_len=3) == 2 + 3 + 4 + 16
+        assert time_on_air(reply, 11, 250, 5, 16) > 3 * time_on_air(ping, 11, 250, 5, 16)
+
+    def test_settings_precedence(self):
+        config = ConfigParser()
+        assert lora_settings(config)['spreading_factor'] == 11
+        self_info = {'radio_sf': 10, 'radio_bw': 62.5, 'radio_cr': 7}
+        assert lora_settings(config, self_info) == {
+            'spreading_factor': 10, 'bandwidth_khz': 62.5, 'coding_rate': 7, 'preamble_length': 16}
+        config.read_dict({'Airtime': {'spreading_factor': '8', 'bandwidth_khz': ''}})
+        settings = lora_settings(config, self_info)
+        assert settings['spreading_factor'] == 8 and settings['bandwidth_khz'] == 62.5
+
+
+class TestAirtimeBudget:
+    """Sliding-window duty cycle."""
+
+    def test_window_slides(self):
+        clock = Clock()
+        budget = AirtimeBudget(duty_cycle_percent=1, window_seconds=100, clock=clock)
+        assert budget.budget_seconds == 1.0
+        budget.reserve(0.4)
+        clock.now += 10
+        budget.reserve(0.5)
+        assert budget.time_until(0.1) == 0.0
+        # 0.3 more needs the first send to leave the window (at t=1100)
+        assert budget.time_until(0.3) == pytest.approx(90)
+        # A packet longer than the whole budget waits for an empty window
+        assert budget.time_until(5.0) == pytest.approx(100)
+        clock.now = 1100.5
+        assert budget.used() == pytest.approx(0.5)
+        assert budget.time_until(0.3) == 0.0
+
+    def test_release_refunds_reservation(self):
+        clock = Clock()
+        budget = AirtimeBudget(duty_cycle_percent=1, window_seconds=100, clock=clock)
+        budget.reserve(0.4)
+        budget.reserve(0.5)
+        budget.release(0.4)
+        assert budget.used() == pytest.approx(0.5)
+        # Nothing left to refund
+        budget.release(0.4)
+        stats = budget.get_stats()
+        assert stats['airtime_total_seconds'] == pytest.approx(0.5) and stats['airtime_released'] == 1
+        assert budget.time_until(0.5) == 0.0
+
+    def test_zero_duty_cycle_never_transmits(self):
+        budget = AirtimeBudget(duty_cycle_percent=0, window_seconds=100, clock=Clock())
+        assert budget.time_until(0.01) == float('inf')
+        assert BotTxRateLimiter(0, airtime_budget=budget).can_tx(0.01) is False
+
+    def test_disabled_by_default(self):
+        config = ConfigParser()
+        assert airtime_budget_from_config(config) is None
+        config.read_dict({'Airtime': {'enabled': 'true', 'duty_cycle_percent': '5', 'window_seconds': '600'}})
+        assert airtime_budget_from_config(config).budget_seconds == 30.0
+
+
+class TestAirtimePacing:
+    """BotTxRateLimiter and CommandManager charge sends to the budget."""
+
+    @pytest.mark.asyncio
+    async def test_wait_reserves_airtime(self):
+        clock = Clock()
+        budget = AirtimeBudget(duty_cycle_percent=1, window_seconds=100, clock=clock)
+        limiter = BotTxRateLimiter(0, airtime_budget=budget)
+        await limiter.wait_for_tx(0.6)
+        assert budget.used() == pytest.approx(0.6)
+        assert not limiter.can_tx(0.6)
+        assert limiter.can_tx(0.3) and limiter.can_tx()
+
+        async def advance(seconds):
+            clock.now += seconds
+
+        with patch('modules.rate_limiter.asyncio.sleep', side_effect=advance):
+            await limiter.wait_for_tx(0.6)
+        assert clock.now >= 1100
+        stats = limiter.get_stats()
+        assert stats['airtime_deferred'] == 1 and stats['airtime_total_seconds'] == pytest.approx(1.2)
+
+    @pytest.mark.asyncio
+    async def test_command_manager_drops_when_budget_is_exhausted(self, mock_logger):
+        budget = AirtimeBudget(duty_cycle_percent=2, window_seconds=100, max_wait_seconds=5)
+        manager = make_manager(mock_logger, budget)
+
+        reply = 'x' * 140
+        airtime = manager._estimate_airtime(reply, channel=True)
+        assert airtime == pytest.approx(time_on_air(text_packet_bytes(reply, True, 0, 'TestBot'), 11, 250, 5, 16))
+        assert (await manager._check_rate_limits(skip_user_rate_limit=True, airtime=airtime)) == (True, '')
+
+        can_send, reason = await manager._check_rate_limits(skip_user_rate_limit=True, airtime=airtime)
+        assert not can_send and reason.startswith('Airtime budget exhausted')
+        assert budget.get_stats()['airtime_dropped'] == 1
+        # A short reply still fits
+        short = manager._estimate_airtime('pong', channel=True)
+        assert (await manager._check_rate_limits(skip_user_rate_limit=True, airtime=short)) == (True, '')
+
+    @pytest.mark.asyncio
+    async def test_failed_sends_are_refunded(self, mock_logger):
+        budget = AirtimeBudget(duty_cycle_percent=2, window_seconds=100, max_wait_seconds=5)
+        manager = make_manager(mock_logger, budget)
+        manager.bot.channel_manager.get_channel_number.return_value = None
+        for _ in range(5):
+            assert await manager.send_channel_message('missing', 'x' * 140, skip_user_rate_limit=True) is False
+        assert budget.used() == 0.0
+
+        manager.bot.channel_manager.get_channel_number.return_value = 0
+        rejected = Event(EventType.ERROR, {'reason': 'radio busy'})
+        with patch('meshcore_cli.meshcore_cli.send_chan_msg', AsyncMock(return_value=rejected)):
+            assert await manager.send_channel_message('general', 'x' * 140, skip_user_rate_limit=True) is False
+        assert budget.used() == 0.0
+        assert budget.get_stats()['airtime_released'] == 6
+
+    @pytest.mark.asyncio
+    async def test_dm_retries_are_charged_per_attempt(self, mock_logger):
+        budget = AirtimeBudget(duty_cycle_percent=10, window_seconds=100, max_wait_seconds=5)
+        manager = make_manager(mock_logger, budget)
+        contact = {'name': 'Alice', 'out_path_len': 2, 'out_path': 'aabb'}
+        manager.bot.meshcore.get_contact_by_name.return_value = contact
+        manager.bot.meshcore.commands.send_msg = AsyncMock(return_value=Event(
+            EventType.MSG_SENT, {'expected_ack': b'\x01\x02\x03\x04', 'suggested_timeout': 1000}))
+        manager.bot.meshcore.commands.reset_path = AsyncMock(return_value=Event(EventType.OK, {}))
+        # No ACK for the first two attempts
+        manager.bot.meshcore.dispatcher.wait_for_event = AsyncMock(
+            side_effect=[None, None, Event(EventType.ACK, {'code': '01020304'})])
+
+        direct = manager._estimate_airtime('hello', channel=False, recipient_id='Alice')
+        assert await manager.send_dm('Alice', 'hello', skip_user_rate_limit=True) is True
+        attempts = [c.kwargs['attempt'] for c in manager.bot.meshcore.commands.send_msg.await_args_list]
+        assert attempts == [0, 1, 2]
+        # The third attempt floods, which carries no stored path
+        flooded = manager._estimate_airtime('hello', channel=False, recipient_id='Alice')
+        assert flooded < direct
+        assert budget.used() == pytest.approx(2 * direct + flooded)
+
+    @pytest.mark.asyncio
+    async def test_dm_retry_loop_runs_against_meshcore(self, mock_logger):
+        """_send_msg_with_retry copies meshcore's loop; drive it through a real MeshCore."""
+
+        class FakeRadio:
+            """Answers send_msg with MSG_SENT and ACKs only the third attempt."""
+
+            def __init__(self):
+                self.reader = None
+                self.frames = []
+
+            def set_reader(self, reader):
+                self.reader = reader
+
+            def set_disconnect_callback(self, callback):
+                pass
+
+            async def send(self, data):
+                self.frames.append(bytes(data))
+                if data[:2] == b'\x02\x00':
+                    attempt = data[2]
+                    ack = bytes([attempt, 0, 0, 0])
+                    # route type, expected ACK code, suggested timeout in ms
+                    sent = bytes([6, 0]) + ack + (50).to_bytes(4, 'little')
+                    asyncio.get_running_loop().call_soon(asyncio.ensure_future, self.reader.handle_rx(sent))
+                    if attempt == 2:
+                        asyncio.get_running_loop().call_later(
+                            0.01, asyncio.ensure_future, self.reader.handle_rx(bytes([0x82]) + ack))
+                elif data[:1] == b'\x0d':
+                    asyncio.get_running_loop().call_soon(asyncio.ensure_future, self.reader.handle_rx(b'\x00'))
+
+        async def run(send):
+            radio = FakeRadio()
+            meshcore = MeshCore(radio, default_timeout=1)
+            await meshcore.dispatcher.start()
+            try:
+                contact = {'public_key': 'cd' * 32, 'adv_name': 'Alice', 'out_path_len': 2, 'out_path': 'aabb'}
+                return await send(meshcore, contact), contact, radio.frames
+            finally:
+                await meshcore.dispatcher.stop()
+
+        budget = AirtimeBudget(duty_cycle_percent=10, window_seconds=100, max_wait_seconds=5)
+        manager = make_manager(mock_logger, budget)
+        transmitted = []
+
+        async def paced(meshcore, contact):
+            manager.bot.meshcore = meshcore
+            return await manager._send_msg_with_retry(contact, 'hello', 'Alice', transmitted)
+
+        result, contact, frames = await run(paced)
+        assert result.type == EventType.MSG_SENT and result.payload['expected_ack'] == b'\x02\x00\x00\x00'
+        assert transmitted == [0, 1, 2]
+        assert contact['out_path_len'] == -1
+        # Two direct attempts, a path reset, then the flooded attempt that was ACKed
+        assert [frame[0] for frame in frames] == [0x02, 0x02, 0x0d, 0x02]
+
+        # Same radio traffic as the library loop it copies (command, type, attempt; not the timestamp)
+        expected, _, library_frames = await run(
+            lambda meshcore, contact: meshcore.commands.send_msg_with_retry(contact, 'hello'))
+        assert expected.payload == result.payload
+        assert [frame[:3] for frame in library_frames] == [frame[:3] for frame in frames]
+
+    @pytest.mark.asyncio
+    async def test_errors_after_transmitting_keep_the_charge(self, mock_logger):
+        budget = AirtimeBudget(duty_cycle_percent=10, window_seconds=100, max_wait_seconds=5)
+        manager = make_manager(mock_logger, budget)
+        manager.bot.meshcore.get_contact_by_name.return_value = {'name': 'Alice', 'out_path_len': 0}
+        send_msg = AsyncMock(return_value=Event(
+            EventType.MSG_SENT, {'expected_ack': b'\x01\x02\x03\x04', 'suggested_timeout': 1000}))
+        manager.bot.meshcore.commands.send_msg = send_msg
+        manager.bot.meshcore.dispatcher.wait_for_event = AsyncMock(side_effect=AttributeError('dispatcher'))
+
+        dm = manager._estimate_airtime('hello', channel=False, recipient_id='Alice')
+        assert await manager.send_dm('Alice', 'hello', skip_user_rate_limit=True) is False
+        # No untracked second send, and the attempt that went on air stays charged
+        assert send_msg.await_count == 1
+        assert budget.used() == pytest.approx(dm)
+
+        manager.bot.channel_manager.get_channel_number.return_value = 0
+        sent = Event(EventType.MSG_SENT, {'expected_ack': b'\x00\x00\x00\x00', 'suggested_timeout': 0})
+        with patch('meshcore_cli.meshcore_cli.send_chan_msg', AsyncMock(return_value=sent)), \
+                patch.object(manager, '_handle_send_result', side_effect=RuntimeError('boom')):
+            assert await manager.send_channel_message('general', 'hello', skip_user_rate_limit=True) is False
+        channel = manager._estimate_airtime('hello', channel=True)
+        assert budget.used() == pytest.approx(dm + channel)
+        assert budget.get_stats()['airtime_released'] == 0
@@ -0,0 +1,112 @@
+"""Tests for modules.service_plugins.capture_writer_utils."""
+
+import json
+import logging
+import os
+from configparser import ConfigParser
+from unittest.mock import Mock
+
+import pytest
+
+from modules.service_plugins.capture_writer_utils import (
+    CaptureWriter, index_path_for, iter_segment_lines, read_segment_index,
+)
+from modules.service_plugins.packet_capture_service import PacketCaptureService
+
+
+class TestCaptureWriter:
+    """Buffering, rotation, compression and the segment index."""
+
+    def test_lines_are_buffered_until_flush(self, mock_logger, tmp_path):
+        output = str(tmp_path / 'packets.json')
+        writer = CaptureWriter(output, mock_logger, flush_interval=3600, flush_bytes=1 << 20)
+        writer.write('{"n": 1}')
+        writer.write('{"n": 2}')
+        assert open(output).read() == ''
+
+        writer.flush()
+        assert open(output).read().splitlines() == ['{"n": 1}', '{"n": 2}']
+        writer.close()
+
+    def test_flush_bytes_threshold(self, mock_logger, tmp_path):
+        output = str(tmp_path / 'packets.json')
+        writer = CaptureWriter(output, mock_logger, flush_interval=3600, flush_bytes=10)
+        writer.write('{"n": 12345}')
+        assert open(output).read() == '{"n": 12345}\n'
+        writer.close()
+
+    def test_size_rotation_indexes_gzip_segments(self, mock_logger, tmp_path):
+        output = str(tmp_path / 'captures' / 'packets.json')
+        writer = CaptureWriter(output, mock_logger, flush_interval=0, rotation='size',
+                               max_segment_bytes=20, compression='gzip')
+        for i in range(5):
+            writer.write(json.dumps({'n': i}), timestamp=1000 + i)
+        writer.close()
+
+        segments = read_segment_index(output)
+        assert [s['packets'] for s in segments] == [3, 2]  # Rotates once a segment reaches 20 bytes
+        assert all(s['path'].endswith('.json.gz') for s in segments)
+        assert (segments[0]['start'], segments[0]['end']) == (1000, 1002)
+        lines = [line for s in segments for line in iter_segment_lines(s['path'])]
+        assert [json.loads(line)['n'] for line in lines] == [0, 1, 2, 3, 4]
+
+        assert [s['start'] for s in read_segment_index(output, start=1003, end=1010)] == [1003]
+
+    def test_hourly_rotation(self, mock_logger, tmp_path, monkeypatch):
+        output = str(tmp_path / 'packets.json')
+        clock = [7200.0]
+        monkeypatch.setattr('modules.service_plugins.capture_writer_utils.time.time', lambda: clock[0])
+        writer = CaptureWriter(output, mock_logger, flush_interval=3600, rotation='hourly')
+        writer.write('a')
+        clock[0] += 3600
+        writer.flush_if_due()
+        assert writer.segments_closed == 1
+        writer.write('b')
+        writer.close()
+        assert [s['packets'] for s in read_segment_index(output)] == [1, 1]
+
+    def test_no_rotation_appends_without_index(self, mock_logger, tmp_path):
+        output = tmp_path / 'packets.json'
+        output.write_text('old\n')
+        writer = CaptureWriter(str(output), mock_logger, flush_interval=0)
+        writer.write('new')
+        writer.close()
+        assert output.read_text() == 'old\nnew\n'
+        assert not (tmp_path / index_path_for('packets.json')).exists()
+
+    def test_open_creates_first_segment(self, mock_logger, tmp_path):
+        output = str(tmp_path / 'captures' / 'packets.json')
+        writer = CaptureWriter(output, mock_logger, rotation='hourly')
+        segment = writer.open()
+        assert segment == writer.current_segment
+        assert os.path.exists(segment)
+        writer.close()
+
+        (tmp_path / 'blocked').write_text('')
+        with pytest.raises(OSError):
+            CaptureWriter(str(tmp_path / 'blocked' / 'packets.json'), mock_logger).open()
+
+
+class TestPacketCaptureServiceOutput:
+    """The service opens its capture output when it starts."""
+
+    @pytest.mark.asyncio
+    async def test_segment_is_open_after_start(self, mock_logger, tmp_path):
+        output = tmp_path / 'packets.json'
+        bot = Mock()
+        bot.logger = mock_logger
+        bot.logger.level = logging.INFO
+        bot.logger.handlers = []
+        bot.connected = True
+        bot.config = ConfigParser()
+        bot.config.read_dict({'PacketCapture': {
+            'enabled': 'true', 'output_file': str(output), 'mqtt_enabled': 'false',
+            'stats_status_enabled': 'false', 'jwt_renewal_interval': '0',
+        }})
+        service = PacketCaptureService(bot)
+        await service.start()
+        try:
+            assert service.capture_writer.current_segment == str(output)
+            assert output.exists()
+        finally:
+            await service.stop()
@@ -103,6 +103,30 @@ test = ack
         assert any("Banned_Users" in r[1] for r in infos)
         assert any("Localization" in r[1] for r in infos)
 
+    def test_zero_airtime_duty_cycle_is_an_error(self, tmp_path):
+        config = tmp_path / "config.ini"
+        template = """[Connection]
+connection_type = serial
+serial_port = /dev/ttyUSB0
+
+[Bot]
+bot_name = TestBot
+
+[Channels]
+monitor_channels = general
+
+[Airtime]
+enabled = {enabled}
+duty_cycle_percent = 0
+"""
+        config.write_text(template.format(enabled="true"))
+        errors = [r for r in validate_config(str(config)) if r[0] == SEVERITY_ERROR]
+        assert any("duty_cycle_percent" in r[1] for r in errors)
+
+        config.write_text(template.format(enabled="false"))
+        errors = [r for r in validate_config(str(config)) if r[0] == SEVERITY_ERROR]
+        assert not errors
+
     def test_non_standard_section_typo(self, tmp_path):
         config = tmp_path / "config.ini"
         config.write_text("""[Connection]
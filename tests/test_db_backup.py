@@ -0,0 +1,114 @@
+"""Tests for modules.db_backup and the scheduled backup job."""
+
+import gzip
+import sqlite3
+import threading
+import time
+from configparser import ConfigParser
+from unittest.mock import Mock
+
+import pytest
+import schedule
+
+from modules.db_backup import BackupError, backup_files, online_backup, rotate_backups, verify_backup
+from modules.scheduler import MessageScheduler
+
+
+def _database(path, rows=2000):
+    conn = sqlite3.connect(str(path))
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, data TEXT)')
+    conn.executemany('INSERT INTO t (data) VALUES (?)', [('x' * 200,)] * rows)
+    conn.commit()
+    return conn
+
+
+def test_stepped_backup_is_compressed_and_verified(tmp_path, mock_logger):
+    writer = _database(tmp_path / 'bot.db')
+    # Uncheckpointed rows in the WAL must end up in the copy
+    writer.execute("INSERT INTO t (data) VALUES ('latest')")
+    writer.commit()
+
+    result = online_backup(str(tmp_path / 'bot.db'), str(tmp_path / 'backups'),
+                           pages_per_step=10, step_sleep=0, logger=mock_logger)
+    writer.close()
+    assert result.path.endswith('.db.gz') and result.integrity == 'ok'
+    assert result.steps > 1 and result.checkpoint is not None
+
+    restored = tmp_path / 'restored.db'
+    with gzip.open(result.path, 'rb') as src:
+        restored.write_bytes(src.read())
+    with sqlite3.connect(str(restored)) as conn:
+        assert conn.execute('SELECT COUNT(*), MAX(data) FROM t').fetchone() == (2001, 'x' * 200)
+        assert conn.execute("SELECT COUNT(*) FROM t WHERE data = 'latest'").fetchone()[0] == 1
+    assert not list((tmp_path / 'backups').glob('*.partial'))
+
+
+def test_writes_during_backup_fall_back_to_one_step(tmp_path, mock_logger):
+    _database(tmp_path / 'bot.db').close()
+    done = threading.Event()
+
+    def write():
+        conn = sqlite3.connect(str(tmp_path / 'bot.db'), timeout=5)
+        while not done.is_set():
+            conn.execute("INSERT INTO t (data) VALUES ('during')")
+            conn.commit()
+            time.sleep(0.001)
+        conn.close()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        result = online_backup(str(tmp_path / 'bot.db'), str(tmp_path / 'backups'), pages_per_step=5,
+                               step_sleep=0.02, compress=False, max_restarts=2, logger=mock_logger)
+    finally:
+        done.set()
+        writer.join()
+    # Writes restart the stepped copy; after max_restarts it finishes in one step
+    assert result.restarts == 3 and result.integrity == 'ok'
+    with sqlite3.connect(result.path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] >= 2000
+
+
+def test_rotation_and_failures(tmp_path):
+    backup_dir = tmp_path / 'backups'
+    backup_dir.mkdir()
+    for stamp in ('20261001_030000', '20261002_030000', '20261003_030000'):
+        (backup_dir / f'bot_{stamp}.db.gz').write_bytes(b'')
+    (backup_dir / 'other_20261001_030000.db').write_bytes(b'')
+
+    removed = rotate_backups(str(backup_dir), 'bot', keep=2)
+    assert [p.split('/')[-1] for p in removed] == ['bot_20261001_030000.db.gz']
+    assert [p.name for p in backup_files(str(backup_dir), 'bot')] == ['bot_20261002_030000.db.gz',
+                                                                     'bot_20261003_030000.db.gz']
+    assert (backup_dir / 'other_20261001_030000.db').exists()
+
+    (tmp_path / 'broken.db').write_bytes(b'SQLite format 3\x00' + b'\xff' * 200)
+    with pytest.raises((BackupError, sqlite3.DatabaseError)):
+        verify_backup(str(tmp_path / 'broken.db'))
+    with pytest.raises(BackupError):
+        online_backup(str(tmp_path / 'missing.db'), str(backup_dir))
+    with pytest.raises(ValueError):
+        online_backup(str(tmp_path / 'broken.db'), str(backup_dir), integrity='sometimes')
+
+
+def test_scheduler_runs_backup_in_its_own_thread(tmp_path, mock_logger):
+    _database(tmp_path / 'bot.db', rows=10).close()
+    bot = Mock()
+    bot.logger = mock_logger
+    bot.bot_root = tmp_path
+    bot.db_manager.db_path = str(tmp_path / 'bot.db')
+    bot.config = ConfigParser()
+    bot.config.read_dict({'Bot': {}, 'Backup': {'enabled': 'true', 'schedule': '0315', 'keep': '1'}})
+    scheduler = MessageScheduler(bot)
+    try:
+        scheduler.setup_scheduled_messages()
+        jobs = [job for job in schedule.get_jobs() if job.job_func.func == scheduler.run_database_backup]
+        assert len(jobs) == 1 and str(jobs[0].at_time) == '03:15:00'
+    finally:
+        schedule.clear()
+
+    assert scheduler.run_database_backup() is True
+    scheduler.backup_thread.join(timeout=10)
+    (result,) = scheduler.last_backup['results']
+    assert result['integrity'] == 'ok' and result['path'].startswith(str(tmp_path / 'backups'))
@@ -0,0 +1,79 @@
+"""Tests for Discord bridge webhook pacing and message coalescing."""
+
+import configparser
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from modules.service_plugins.discord_batch_utils import TokenBucket, build_batch
+from modules.service_plugins.discord_bridge_service import DiscordBridgeService
+
+WEBHOOK = 'https://discord.com/api/webhooks/123/abcdefghijkl'
+
+
+def _payload(username, content):
+    return {'username': username, 'content': content}
+
+
+class TestTokenBucket:
+    """Refill, Retry-After blocking and header corrections."""
+
+    def test_refill_and_block(self):
+        bucket = TokenBucket(capacity=2, window=10.0)
+        bucket._updated = 0.0
+        assert bucket.try_acquire(now=0.0) and bucket.try_acquire(now=0.0)
+        assert not bucket.try_acquire(now=0.0)
+        assert bucket.time_until_available(now=0.0) == 5.0
+        assert bucket.try_acquire(now=5.0)
+
+        bucket.block_for(30.0, now=5.0)
+        assert not bucket.try_acquire(now=20.0)
+        assert bucket.try_acquire(now=35.0)
+
+    def test_headers_lower_tokens_and_block_until_reset(self):
+        bucket = TokenBucket(capacity=25, window=60.0)
+        bucket._updated = 0.0
+        bucket.update_from_headers(remaining=0, reset_after=12.0, now=0.0)
+        assert bucket.tokens == 0
+        assert bucket.time_until_available(now=0.0) == 12.0
+
+
+class TestBuildBatch:
+    """Merging queued payloads within Discord's content limit."""
+
+    def test_single_sender_keeps_username(self):
+        payloads = [dict(_payload('Alice', 'one'), avatar_url='a.png'), _payload('Alice', 'two')]
+        merged, count = build_batch(payloads, 'general')
+        assert count == 2
+        assert merged == {'username': 'Alice', 'content': 'one\ntwo', 'avatar_url': 'a.png'}
+
+    def test_mixed_senders_are_prefixed(self):
+        merged, count = build_batch([_payload('Alice', 'hi'), _payload('Bob', 'yo')], 'general')
+        assert count == 2
+        assert merged == {'username': 'MeshCore [general]', 'content': '**Alice:** hi\n**Bob:** yo'}
+
+    def test_content_limit(self):
+        payloads = [_payload('Alice', 'x' * 8), _payload('Alice', 'y' * 8), _payload('Bob', 'z')]
+        merged, count = build_batch(payloads, 'general', max_chars=20)
+        assert (merged['content'], count) == ('x' * 8 + '\n' + 'y' * 8, 2)
+
+        merged, count = build_batch([_payload('Alice', 'x' * 50)], 'general', max_chars=20)
+        assert count == 1 and len(merged['content']) == 20 and merged['content'].endswith('…')
+
+
+async def test_backlog_is_merged_into_one_post(mock_logger):
+    config = configparser.ConfigParser()
+    config.add_section('DiscordBridge')
+    config.set('DiscordBridge', 'bridge.general', WEBHOOK)
+    service = DiscordBridgeService(SimpleNamespace(logger=mock_logger, config=config))
+    service._post_to_webhook = AsyncMock(return_value=True)
+
+    for i in range(5):
+        await service._queue_message(WEBHOOK, f'message {i}', 'general', f'user{i % 2}')
+    await service._process_webhook_queue(WEBHOOK, service.message_queues[WEBHOOK])
+
+    service._post_to_webhook.assert_awaited_once()
+    payload = service._post_to_webhook.await_args.args[1]
+    assert payload['content'].count('\n') == 4
+    stats = service.get_queue_stats()['general']
+    assert stats['queued'] == 0
+    assert (stats['posts'], stats['messages']) == (1, 5)
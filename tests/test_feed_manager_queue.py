@@ -0,0 +1,171 @@
+"""Tests for FeedManager's event-driven message queue drain."""
+
+import asyncio
+import sqlite3
+
+import pytest
+from configparser import ConfigParser
+from unittest.mock import AsyncMock, Mock
+
+from modules.db_manager import DBManager
+from modules.feed_manager import FeedManager
+from modules.rate_limiter import BotTxRateLimiter
+
+
+@pytest.fixture
+def fm(mock_logger, tmp_path):
+    """Enabled FeedManager backed by a real database with one feed."""
+    bot = Mock()
+    bot.logger = mock_logger
+    bot.connected = True
+    bot.db_manager = DBManager(bot, str(tmp_path / "test.db"))
+    bot.config = ConfigParser()
+    bot.config.add_section("Feed_Manager")
+    bot.config.set("Feed_Manager", "feed_manager_enabled", "true")
+    bot.config.set("Feed_Manager", "queue_batch_size", "2")
+    bot.bot_tx_rate_limiter = BotTxRateLimiter(0)
+    bot.command_manager = Mock()
+    bot.command_manager.send_channel_message = AsyncMock(return_value=True)
+    with sqlite3.connect(bot.db_manager.db_path) as conn:
+        conn.execute(
+            "INSERT INTO feed_subscriptions (id, feed_type, feed_url, channel_name, message_send_interval_seconds) "
+            "VALUES (1, 'rss', 'http://example.com/rss', 'general', 0.001)"
+        )
+    return FeedManager(bot)
+
+
+FEED = {'id': 1, 'channel_name': 'general'}
+
+
+def _unsent_count(fm):
+    with sqlite3.connect(fm.db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM feed_message_queue WHERE sent_at IS NULL").fetchone()[0]
+
+
+class TestProcessMessageQueue:
+    """Tests for batched dequeue in process_message_queue()."""
+
+    async def test_sends_all_batches_in_priority_order(self, fm):
+        for i in range(5):
+            fm._queue_feed_message(FEED, {'id': str(i), 'title': f"item {i}"}, f"msg {i}")
+        with sqlite3.connect(fm.db_path) as conn:
+            conn.execute("UPDATE feed_message_queue SET priority = 5 WHERE message = 'msg 3'")
+
+        failed = await fm.process_message_queue()
+
+        assert failed == 0
+        assert _unsent_count(fm) == 0
+        sent = [c.args[1] for c in fm.bot.command_manager.send_channel_message.call_args_list]
+        assert sent[0] == "msg 3"
+        assert sorted(sent) == [f"msg {i}" for i in range(5)]
+        with sqlite3.connect(fm.db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM feed_activity").fetchone()[0] == 5
+
+    async def test_failed_messages_stay_queued_without_blocking_others(self, fm):
+        for i in range(3):
+            fm._queue_feed_message(FEED, {'id': str(i), 'title': ''}, f"msg {i}")
+        fm.bot.command_manager.send_channel_message = AsyncMock(
+            side_effect=lambda channel, text, **kwargs: text != "msg 0"
+        )
+
+        failed = await fm.process_message_queue()
+
+        assert failed == 1
+        assert _unsent_count(fm) == 1
+        assert fm.bot.command_manager.send_channel_message.await_count == 3
+
+
+    async def test_each_batch_is_marked_sent_when_it_ends(self, fm):
+        for i in range(3):
+            fm._queue_feed_message(FEED, {'id': str(i), 'title': ''}, f"msg {i}")
+        unsent_at_send = []
+
+        async def send(channel, text, **kwargs):
+            unsent_at_send.append(_unsent_count(fm))
+            if text == "msg 1":
+                raise RuntimeError("radio went away")
+            return True
+
+        fm.bot.command_manager.send_channel_message = AsyncMock(side_effect=send)
+        assert await fm.process_message_queue() == 1
+        # Batches of two: msg 0 is marked when the first batch ends, before msg 2 is sent
+        assert unsent_at_send == [3, 3, 2]
+        assert _unsent_count(fm) == 1
+        with sqlite3.connect(fm.db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM feed_activity").fetchone()[0] == 2
+        # The TX limiter is waited on once, inside send_channel_message
+        assert all(c.kwargs == {} for c in fm.bot.command_manager.send_channel_message.call_args_list)
+
+    async def test_cancelled_batch_marks_what_was_sent(self, fm):
+        for i in range(2):
+            fm._queue_feed_message(FEED, {'id': str(i), 'title': ''}, f"msg {i}")
+
+        async def send(channel, text, **kwargs):
+            if text == "msg 1":
+                raise asyncio.CancelledError()
+            return True
+
+        fm.bot.command_manager.send_channel_message = AsyncMock(side_effect=send)
+        with pytest.raises(asyncio.CancelledError):
+            await fm.process_message_queue()
+        assert _unsent_count(fm) == 1
+
+    async def test_stops_when_the_bot_disconnects(self, fm):
+        for i in range(3):
+            fm._queue_feed_message(FEED, {'id': str(i), 'title': ''}, f"msg {i}")
+
+        async def send(channel, text, **kwargs):
+            fm.bot.connected = False
+            return True
+
+        fm.bot.command_manager.send_channel_message = AsyncMock(side_effect=send)
+        assert await fm.process_message_queue() == 0
+        assert fm.bot.command_manager.send_channel_message.await_count == 1
+        assert _unsent_count(fm) == 2
+
+
+class TestDrainTask:
+    """Tests for the drain task woken by _queue_feed_message()."""
+
+    async def test_enqueue_wakes_drain_task(self, fm):
+        await fm.initialize()
+        try:
+            await asyncio.sleep(0.05)
+            fm.bot.command_manager.send_channel_message.assert_not_awaited()
+
+            fm._queue_feed_message(FEED, {'id': 'a', 'title': 'A'}, "hello")
+            for _ in range(50):
+                if _unsent_count(fm) == 0:
+                    break
+                await asyncio.sleep(0.01)
+
+            assert _unsent_count(fm) == 0
+            fm.bot.command_manager.send_channel_message.assert_awaited_once()
+        finally:
+            await fm.stop()
+        assert fm._drain_task is None
+
+    async def test_signal_without_drain_task_is_noop(self, fm):
+        fm._queue_feed_message(FEED, {'id': 'a', 'title': 'A'}, "hello")
+        assert _unsent_count(fm) == 1
+
+    async def test_drain_waits_for_connection(self, fm):
+        fm.bot.connected = False
+        fm._queue_feed_message(FEED, {'id': 'a', 'title': 'A'}, "hello")
+        await fm.initialize()
+        try:
+            await asyncio.sleep(0.05)
+            fm.bot.command_manager.send_channel_message.assert_not_awaited()
+
+            # Connecting alone does not wake the drain task; connect() signals it
+            fm.bot.connected = True
+            await asyncio.sleep(0.05)
+            fm.bot.command_manager.send_channel_message.assert_not_awaited()
+            fm.notify_connected()
+            for _ in range(50):
+                if _unsent_count(fm) == 0:
+                    break
+                await asyncio.sleep(0.01)
+            assert _unsent_count(fm) == 0
+        finally:
+            await fm.stop()
@@ -0,0 +1,140 @@
+"""Tests for modules.greeter_index and the greeter's in-memory greeted users."""
+
+import random
+import sqlite3
+
+import pytest
+
+from modules.commands.greeter_command import GreeterCommand
+from modules.db_manager import DBManager
+from modules.greeter_index import GreetedNameIndex, bounded_levenshtein, queue_change
+from tests.conftest import mock_message
+
+
+def _full_levenshtein(s1, s2):
+    previous = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1, 1):
+        current = [i]
+        for j, c2 in enumerate(s2, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (c1 != c2)))
+        previous = current
+    return previous[-1]
+
+
+class TestBoundedLevenshtein:
+    """Banded distance agrees with the full matrix up to the threshold."""
+
+    def test_matches_full_distance_within_threshold(self):
+        rng = random.Random(48)
+        for _ in range(2000):
+            s1 = ''.join(rng.choice('abc') for _ in range(rng.randint(0, 8)))
+            s2 = ''.join(rng.choice('abc') for _ in range(rng.randint(0, 8)))
+            k = rng.randint(0, 3)
+            expected = _full_levenshtein(s1, s2)
+            assert bounded_levenshtein(s1, s2, k) == (expected if expected <= k else None), (s1, s2, k)
+
+    def test_examples(self):
+        assert bounded_levenshtein('kitten', 'sitting', 3) == 3
+        assert bounded_levenshtein('kitten', 'sitting', 2) is None
+        assert bounded_levenshtein('Bob', 'Bob', 0) == 0
+        assert bounded_levenshtein('', 'ab', 2) == 2
+        assert bounded_levenshtein('a' * 40, 'b' * 3, 2) is None
+
+
+class TestGreetedNameIndex:
+    """Per-scope, case-insensitive candidates, closest first."""
+
+    def test_scopes_lengths_and_discard(self):
+        index = GreetedNameIndex()
+        index.load([('Alice', None), ('alicia', None), ('Bob', None), ('Alice', 'general'), ('Zed', 'general')])
+        assert len(index) == 5
+        assert index.matches('ALICE', None, 2) == [('Alice', 0), ('alicia', 2)]
+        assert index.matches('Alise', 'general', 1) == [('Alice', 1)]
+        assert index.matches('Alice', 'test', 2) == []
+        assert index.matches('Alice', None, 0) == []
+
+        index.add('Alicee', None)
+        index.discard('Alice', None)
+        assert index.matches('Alice', None, 1) == [('Alicee', 1)]
+        index.invalidate()
+        assert not index.loaded and index.matches('Alicee', None, 1) == []
+
+
+@pytest.fixture
+def greeter_bot(command_mock_bot_with_db):
+    bot = command_mock_bot_with_db
+    bot.db_manager = DBManager(bot, bot.db_manager.db_path)
+    bot.config.add_section('Greeter_Command')
+    bot.config.set('Greeter_Command', 'enabled', 'true')
+    bot.config.set('Greeter_Command', 'rollout_days', '0')
+    bot.config.set('Greeter_Command', 'levenshtein_distance', '1')
+    return bot
+
+
+class TestGreeterDedupe:
+    """GreeterCommand answers message checks from memory and keeps it current."""
+
+    def test_similar_names_are_treated_as_greeted(self, greeter_bot):
+        greeter = GreeterCommand(greeter_bot)
+        assert not greeter.has_been_greeted('Mallory', 'general')
+        assert greeter.mark_as_greeted('Mallory', 'general')
+        assert greeter.greeted_name_index.loaded
+        assert greeter.has_been_greeted('mallory2', 'test')
+        assert greeter._find_similar_greeted_user('Malory', 'general') == 'Mallory'
+        assert not greeter.has_been_greeted('Mal', 'general')
+
+        # Ungreets from the web viewer reach the in-memory copy through the queue
+        with sqlite3.connect(greeter_bot.db_manager.db_path) as conn:
+            conn.execute("DELETE FROM greeted_users WHERE sender_id = 'Mallory'")
+            queue_change(conn.cursor(), 'ungreet', 'Mallory', None)
+        assert greeter.apply_greeter_changes() == 1
+        assert greeter.apply_greeter_changes() == 0
+        assert greeter._find_similar_greeted_user('Malory', 'general') is None
+        assert not greeter.has_been_greeted('Mallory', 'general')
+        assert len(greeter.greeted_name_index) == 0
+
+    def test_message_checks_do_not_touch_the_database(self, greeter_bot):
+        greeter = GreeterCommand(greeter_bot)
+        greeter.mark_as_greeted('Peggy', 'general')
+        db_manager, greeter_bot.db_manager = greeter_bot.db_manager, None
+        assert greeter.has_been_greeted('Peggy', 'test')
+        assert greeter.mark_as_greeted('Peggy', 'general')
+        assert not greeter._is_rollout_active()
+        assert greeter.should_execute(mock_message(content='hello', channel='general', sender_id='Peggy')) is False
+        greeter_bot.logger.error.assert_not_called()
+
+        # A restarted greeter loads the same users
+        greeter_bot.db_manager = db_manager
+        assert GreeterCommand(greeter_bot).greeted_keys == {('Peggy', None)}
+
+    def test_rollout_is_cached_and_ended_from_the_viewer(self, greeter_bot):
+        greeter = GreeterCommand(greeter_bot)
+        assert greeter.start_rollout(days=2, backfill_first=False)
+        assert greeter._is_rollout_active()
+        assert greeter.should_execute(mock_message(content='hi', channel='general', sender_id='Walter')) is False
+        assert greeter.has_been_greeted('Walter', 'general')
+
+        with sqlite3.connect(greeter_bot.db_manager.db_path) as conn:
+            conn.execute('UPDATE greeter_rollout SET rollout_completed = 1')
+            queue_change(conn.cursor(), 'end_rollout')
+        greeter.apply_greeter_changes()
+        assert not greeter._is_rollout_active()
+        assert greeter.should_execute(mock_message(content='hi', channel='general', sender_id='Olivia'))
+
+    def test_per_channel_scope_and_rollout_marks(self, greeter_bot):
+        greeter_bot.config.set('Greeter_Command', 'per_channel_greetings', 'true')
+        greeter = GreeterCommand(greeter_bot)
+        greeter.mark_as_greeted('Trent', 'general')
+        assert greeter.has_been_greeted('Trentt', 'general')
+        assert not greeter.has_been_greeted('Trentt', 'test')
+
+        with greeter_bot.db_manager.get_connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS message_stats (
+                    timestamp INTEGER, sender_id TEXT, channel TEXT, content TEXT, is_dm BOOLEAN
+                )
+            ''')
+            conn.execute("INSERT INTO message_stats VALUES (strftime('%s', 'now'), 'Victor', 'test', 'hi', 0)")
+            conn.commit()
+        assert greeter.backfill_greeted_users()['marked_count'] == 1
+        assert greeter._find_similar_greeted_user('Viktor', 'test') == 'Victor'
@@ -0,0 +1,131 @@
+"""Tests for modules.leaderboards and the stats command leaderboards."""
+
+import sqlite3
+
+import pytest
+
+from modules.commands.stats_command import StatsCommand
+from modules.leaderboards import CountBoard, Leaderboards, MaxBoard, read_snapshot
+from modules.web_viewer.app import BotDataViewer
+from tests.conftest import mock_message
+
+HOUR = 3600
+# An hour boundary, so bucket arithmetic in the tests is exact
+NOW = 1_792_324_800
+
+
+class Clock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestBoards:
+    """Windowed counters, incremental top lists and decay."""
+
+    def test_counts_per_window_and_decay(self):
+        clock = Clock()
+        board = CountBoard('channels', top_n=2, distinct=True, clock=clock)
+        board.record('old', 'a', timestamp=NOW - 30 * HOUR)
+        for sender in ('a', 'b', 'a'):
+            board.record('general', sender, timestamp=NOW - 2 * HOUR)
+        board.record('test', 'c', timestamp=NOW)
+        board.record('test', 'c', timestamp=NOW)
+
+        assert board.top('24h') == [{'key': 'general', 'count': 3, 'distinct': 2},
+                                    {'key': 'test', 'count': 2, 'distinct': 1}]
+        assert [e['key'] for e in board.top('7d')] == ['general', 'test']
+        assert board.total('7d') == 6
+
+        # A key only enters a full top list by overtaking its last entry
+        board.record('old', 'a', amount=5, timestamp=NOW)
+        assert [e['key'] for e in board.top('24h')] == ['old', 'general']
+
+        # Two hours later the general bucket has left the 24h window but not the 7d one
+        clock.now = NOW + 23 * HOUR
+        assert board.decay()
+        assert board.top('24h') == [{'key': 'old', 'count': 5, 'distinct': 1},
+                                    {'key': 'test', 'count': 2, 'distinct': 1}]
+        assert board.top('7d')[0] == {'key': 'old', 'count': 6, 'distinct': 1}
+        # Windows never slide backwards, so an early read does not re-subtract buckets
+        clock.now = NOW
+        assert board.total('24h') == 7
+        assert board.top('all', 1) == [{'key': 'old', 'count': 6, 'distinct': 1}]
+
+    def test_max_board_recomputes_expired_maxima(self):
+        clock = Clock()
+        board = MaxBoard('paths', clock=clock)
+        board.record('alice', 7, '01,02,03,04,05,06,07', timestamp=NOW - 20 * HOUR)
+        board.record('alice', 3, '01,02,03', timestamp=NOW - HOUR)
+        board.record('bob', 5, '0a,0b,0c,0d,0e', timestamp=NOW)
+        assert [(e['key'], e['value']) for e in board.top('24h')] == [('alice', 7), ('bob', 5)]
+
+        clock.now = NOW + 5 * HOUR
+        assert [(e['key'], e['value'], e['label']) for e in board.top('24h')] == [
+            ('bob', 5, '0a,0b,0c,0d,0e'), ('alice', 3, '01,02,03')]
+        assert board.top('all')[0]['value'] == 7
+        with pytest.raises(ValueError):
+            board.top('30d')
+
+
+class TestStatsLeaderboards:
+    """StatsCommand answers from the boards, seeds them at startup and publishes snapshots."""
+
+    def test_records_feed_the_leaderboards(self, command_mock_bot_with_db):
+        stats = StatsCommand(command_mock_bot_with_db)
+        stats.record_command(mock_message(content="ping", sender_id="alice"), "ping", True)
+        stats.record_command(mock_message(content="wx", sender_id="alice"), "wx", False)
+        stats.record_message(mock_message(content="hi", channel="general", sender_id="bob"))
+        stats.record_path_stats(mock_message(content="hi", sender_id="bob", hops=3, path="01,02,03"))
+        stats.record_advert('ab' * 32, 'Hilltop')
+        stats.record_advert('ab' * 32, 'Hilltop')
+
+        boards = stats.leaderboards
+        assert boards['command_users'].top('24h') == [{'key': 'alice', 'count': 2}]
+        assert boards['commands'].total('24h') == 2 and boards['command_replies'].total('24h') == 1
+        assert boards['channels'].top('24h') == [{'key': 'general', 'count': 1, 'distinct': 1}]
+        assert boards['paths'].top('24h')[0]['label'] == '01,02,03'
+        assert boards['adverts'].top('24h') == [{'key': 'ab' * 32, 'count': 2}]
+
+        # A restarted bot seeds the same boards from the rollups and raw tables
+        reloaded = StatsCommand(command_mock_bot_with_db)
+        for name in ('command_users', 'commands', 'command_replies', 'channels', 'message_senders', 'paths'):
+            for window in ('24h', '7d', 'all'):
+                assert reloaded.leaderboards[name].top(window) == boards[name].top(window), (name, window)
+
+    @pytest.mark.asyncio
+    async def test_subcommands_and_viewer_read_the_boards(self, command_mock_bot_with_db):
+        stats = StatsCommand(command_mock_bot_with_db)
+        for sender in ('alice', 'alice', 'bob'):
+            stats.record_command(mock_message(content="ping", sender_id=sender), "ping", True)
+            stats.record_message(mock_message(content="hi", channel="general", sender_id=sender))
+
+        assert "1. alice: 2" in await stats._get_bot_user_leaderboard()
+        assert "channel=general" in await stats._get_channel_leaderboard()
+        assert "command=ping (3)" in await stats._get_basic_stats()
+
+        stats.flush_leaderboards()
+        with sqlite3.connect(command_mock_bot_with_db.db_manager.db_path) as conn:
+            cursor = conn.cursor()
+            rows = read_snapshot(cursor, 'message_senders', '7d', 15, max_age=300)
+            assert [(r['key'], r['value']) for r in rows] == [('alice', 2), ('bob', 1)]
+            assert read_snapshot(cursor, 'message_senders', '7d', 15, max_age=300, now=NOW * 2) is None
+
+            viewer = BotDataViewer.__new__(BotDataViewer)
+            viewer.leaderboard_max_age = 300
+            viewer.logger = command_mock_bot_with_db.logger
+            tops = viewer._get_leaderboard_tops(cursor, '24h', 'all', '30d')
+        assert tops == {'top_users': [{'user': 'alice', 'count': 2}, {'user': 'bob', 'count': 1}],
+                        'top_commands': [{'command': 'ping', 'count': 3}]}
+
+
+def test_snapshot_rows_use_advert_names():
+    clock = Clock()
+    boards = Leaderboards(top_n=5, clock=clock)
+    boards.names['cd' * 32] = 'Ridge'
+    boards['adverts'].record('cd' * 32)
+    rows = [row for row in boards.snapshot_rows() if row[0] == 'adverts']
+    assert rows[0] == ('adverts', '24h', 1, 'cd' * 32, 1, None, 'Ridge', NOW)
+    assert boards.dirty()
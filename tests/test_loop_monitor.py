@@ -0,0 +1,58 @@
+"""Tests for modules.loop_monitor."""
+
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+
+from modules.loop_monitor import LoopMonitor, describe_stack
+from modules.metrics import MetricsRegistry
+
+
+def _blocking_call():
+    time.sleep(0.3)
+
+
+class TestLoopMonitor:
+    """Lag sampling and stall attribution."""
+
+    async def test_blocking_call_is_attributed_to_its_call_site(self, mock_logger):
+        monitor = LoopMonitor(SimpleNamespace(logger=mock_logger), interval=0.02, threshold=0.1)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        _blocking_call()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+        stats = monitor.get_stats()
+        assert stats['stalls'] >= 1
+        assert stats['lag_ms']['max'] >= 200
+        top = stats['offenders'][0]
+        assert top['site'].startswith('tests/test_loop_monitor.py:')
+        assert top['site'].endswith('in _blocking_call')
+        assert 'time.sleep(0.3)' in top['stack']
+
+    def test_record_lag_without_capture_and_metrics(self, mock_logger):
+        bot = SimpleNamespace(logger=mock_logger, metrics=MetricsRegistry())
+        monitor = LoopMonitor(bot, interval=0.5, threshold=0.1)
+        monitor.record_lag(0.01)
+        monitor.record_lag(0.5)
+
+        stats = monitor.get_stats()
+        assert stats['samples'] == 2
+        assert stats['stalls'] == 1
+        assert stats['offenders'][0]['site'].startswith('unknown')
+        assert bot.metrics.get_histogram('event_loop_lag').count == 2
+
+    def test_offender_sites_are_bounded(self, mock_logger):
+        monitor = LoopMonitor(SimpleNamespace(logger=mock_logger), threshold=0.1, max_sites=2)
+        for site, lag in (('a', 0.5), ('b', 0.2), ('c', 0.3)):
+            monitor._captured = {'site': site, 'blocked_in': site, 'stack': ''}
+            monitor.record_lag(lag)
+        assert [e['site'] for e in monitor.get_stats()['offenders']] == ['a', 'c']
+
+
+def test_describe_stack_finds_project_frame():
+    description = describe_stack(sys._getframe())
+    assert description['site'].startswith('tests/test_loop_monitor.py:')
+    assert 'test_describe_stack_finds_project_frame' in description['site']
@@ -0,0 +1,107 @@
+"""Tests for modules.service_plugins.map_upload_utils."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock
+
+from modules.service_plugins.map_upload_utils import PendingUpload, SeenAdvertBuckets, UploadQueue
+
+
+def _upload(pubkey='ab' * 32):
+    return PendingUpload(raw_hex='1100', public_key=pubkey, name='Node', advert_time=1,
+                         type='REPEATER', queued_at=time.time())
+
+
+class TestSeenAdvertBuckets:
+    """Bucketed seen-advert expiry."""
+
+    def test_expire_drops_whole_buckets(self):
+        seen = SeenAdvertBuckets(bucket_seconds=60, retention_seconds=120)
+        seen.record('old', 10, now=0)
+        seen.record('refreshed', 20, now=0)
+        seen.record('refreshed', 30, now=200)
+        seen.record('new', 40, now=230)
+
+        assert seen.expire(now=250) == 1
+        assert 'old' not in seen
+        assert seen['refreshed'] == 30
+        assert seen.get('new') == 40
+        assert len(seen) == 2
+
+    def test_max_entries_drops_oldest_buckets(self):
+        seen = SeenAdvertBuckets(bucket_seconds=10, retention_seconds=1000, max_entries=2)
+        for i, key in enumerate(('a', 'b', 'c')):
+            seen.record(key, i, now=i * 10)
+        assert seen.expire(now=30) == 1
+        assert 'a' not in seen and 'c' in seen
+
+
+class TestUploadQueue:
+    """Retries, backoff and persistence."""
+
+    async def test_failed_upload_backs_off_then_gives_up(self, mock_logger):
+        upload = AsyncMock(return_value=False)
+        queue = UploadQueue(mock_logger, upload, max_attempts=2, retry_base=5, retry_max=8)
+        queue.enqueue(_upload())
+
+        assert await queue.process_once() is True
+        assert len(queue) == 1 and queue.items[0].next_attempt > time.time() + 4
+        assert await queue.process_once() is False  # Not ready yet
+
+        queue.items[0].next_attempt = 0
+        await queue.process_once()
+        assert len(queue) == 0
+        assert queue.stats == {'enqueued': 1, 'uploaded': 0, 'retried': 1, 'dropped': 1}
+        assert [queue.retry_delay(n) for n in (1, 2, 3)] == [5, 8, 8]
+
+    async def test_workers_batch_and_bound_concurrency(self, mock_logger):
+        active = []
+        peak = []
+
+        async def upload(batch):
+            active.append(batch)
+            peak.append(len(active))
+            await asyncio.sleep(0.01)
+            active.remove(batch)
+            return True
+
+        queue = UploadQueue(mock_logger, upload, concurrency=2, batch_size=2)
+        queue.start()
+        for i in range(6):
+            queue.enqueue(_upload(f'{i:02x}' * 32))
+        for _ in range(50):
+            if queue.stats['uploaded'] == 6:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+        assert queue.stats['uploaded'] == 6
+        assert max(peak) <= 2
+
+    def test_round_trip_for_persistence(self, mock_logger):
+        queue = UploadQueue(mock_logger, AsyncMock(), max_queue=2)
+        for i in range(3):
+            queue.enqueue(_upload(f'{i:02x}' * 32))
+        assert queue.stats['dropped'] == 1
+
+        restored = UploadQueue(mock_logger, AsyncMock())
+        assert restored.load(queue.to_list() + [{'bogus': 1}]) == 2
+        assert [item.public_key[:2] for item in restored.items] == ['01', '02']
+
+    def test_queue_built_outside_the_loop_drains_once_started(self, mock_logger):
+        # The service builds its queue in the bot constructor, before asyncio.run()
+        upload = AsyncMock(return_value=True)
+        queue = UploadQueue(mock_logger, upload)
+        queue.enqueue(_upload('01' * 32))
+
+        async def run():
+            queue.start()
+            queue.enqueue(_upload('02' * 32))
+            for _ in range(50):
+                if queue.stats['uploaded'] == 2:
+                    break
+                await asyncio.sleep(0.01)
+            await queue.stop()
+
+        asyncio.run(run())
+        assert queue.stats['uploaded'] == 2 and len(queue) == 0
@@ -0,0 +1,127 @@
+"""Tests for MapUploaderService advert verification caching and signing."""
+
+import asyncio
+import configparser
+import hashlib
+import logging
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from modules.enums import PayloadType
+from modules.service_plugins.map_uploader_service import MapUploaderService, advert_cache_key
+from modules.traffic_generator import SyntheticNode, build_advert_payload, build_packet
+
+
+def _service():
+    config = configparser.ConfigParser()
+    config.add_section('MapUploader')
+    config.set('MapUploader', 'enabled', 'true')
+    config.add_section('Logging')
+    config.set('Logging', 'log_file', '')
+    bot = SimpleNamespace(logger=logging.getLogger('test_map_uploader'), config=config)
+    service = MapUploaderService(bot)
+    service.upload_queue.upload = AsyncMock(return_value=True)
+    return service
+
+
+def _node():
+    private_key = Ed25519PrivateKey.generate()
+    public_key = private_key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    return SyntheticNode('Repeater 1', 'repeater', private_key, public_key, 47.6, -122.3)
+
+
+async def _start_worker(service):
+    service._verify_queue = asyncio.Queue()
+    service._verify_task = asyncio.create_task(service._verification_worker())
+
+
+class TestAdvertVerification:
+    """Verification cache, batching and ordering of cheap checks."""
+
+    async def test_concurrent_copies_are_verified_once(self):
+        service = _service()
+        await _start_worker(service)
+        payload = build_advert_payload(_node(), 1700000000)
+        advert = service._parse_advert(payload)
+
+        results = await asyncio.gather(*(service._verify_advert_signature(advert, payload) for _ in range(5)))
+        assert await service._verify_advert_signature(advert, payload) is True
+        await service.stop()
+
+        assert results == [True] * 5
+        assert service.verify_stats['verified'] == 1
+        assert service.verify_stats['batches'] == 1
+        assert service.verify_stats['cache_hits'] == 5
+
+    async def test_tampered_copy_does_not_reuse_cached_result(self):
+        service = _service()
+        payload = build_advert_payload(_node(), 1700000000)
+        tampered = payload[:-1] + b'X'
+
+        assert await service._verify_advert_signature(service._parse_advert(payload), payload) is True
+        assert advert_cache_key(tampered) != advert_cache_key(payload)
+        assert await service._verify_advert_signature(service._parse_advert(tampered), tampered) is False
+        assert service.verify_stats['verified'] == 2
+
+    async def test_stale_copies_skip_verification(self):
+        service = _service()
+        payload = build_advert_payload(_node(), 1700000000)
+
+        await service._process_packet(build_packet(PayloadType.ADVERT, payload, path=b'\x01').hex())
+        await service._process_packet(build_packet(PayloadType.ADVERT, payload, path=b'\x02\x03').hex())
+
+        assert len(service.upload_queue) == 1
+        assert service.verify_stats['verified'] == 1
+        assert service.verify_stats['cache_hits'] == 0
+
+    def test_cache_is_bounded(self):
+        service = _service()
+        service.verify_cache_size = 2
+        for i in range(3):
+            service._record_verification(('key', i, b''), True)
+        assert list(service._verify_cache) == [('key', 1, b''), ('key', 2, b'')]
+
+
+def test_sign_hash_caches_expanded_key():
+    seed = bytes(range(32))
+    expanded = bytearray(hashlib.sha512(seed).digest())
+    expanded[0] &= 248
+    expanded[31] &= 127
+    expanded[31] |= 64
+    public_key = Ed25519PrivateKey.from_private_bytes(seed).public_key()
+
+    service = _service()
+    service.private_key_hex = bytes(expanded).hex()
+    service.public_key_hex = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw).hex()
+
+    data_hash = hashlib.sha256(b'upload').digest()
+    signature = bytes.fromhex(service._sign_hash(data_hash))
+    public_key.verify(signature, data_hash)
+    cached = service._signing_key
+    service._sign_hash(data_hash)
+    assert service._signing_key is cached
+
+    # A different key (seed format) replaces the cached one
+    service.private_key_hex = seed.hex()
+    assert bytes.fromhex(service._sign_hash(data_hash)) == signature
+    assert service._signing_key is not cached
+
+
+async def test_pending_uploads_survive_restart():
+    store = {}
+    db_manager = SimpleNamespace(get_metadata=store.get, set_metadata=store.__setitem__)
+    service = _service()
+    service.bot.db_manager = db_manager
+    payload = build_advert_payload(_node(), 1700000000)
+    await service._process_packet(build_packet(PayloadType.ADVERT, payload).hex())
+    await service.stop()
+
+    restarted = _service()
+    restarted.bot.db_manager = db_manager
+    await restarted._load_pending_uploads()
+
+    assert [item.advert_time for item in restarted.upload_queue.items] == [1700000000]
+    assert store['map_uploader_pending_uploads'] == '[]'
@@ -0,0 +1,102 @@
+"""Tests for modules.metrics."""
+
+import asyncio
+from types import SimpleNamespace
+
+from modules.metrics import (
+    Histogram, MetricsRegistry, format_prometheus, record_command_response,
+    reset_response_clock, start_response_clock, timed,
+)
+
+
+class Component:
+    """Minimal bot component for the timed decorator."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @timed('db_write')
+    def write(self, value):
+        return value * 2
+
+    @timed('send', {'kind': 'channel'})
+    async def send(self):
+        await asyncio.sleep(0)
+        return True
+
+
+class TestHistogram:
+    """Buckets and percentile estimates."""
+
+    def test_percentiles_interpolate_within_buckets(self):
+        histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+        for _ in range(90):
+            histogram.observe(0.005)
+        for _ in range(10):
+            histogram.observe(0.5)
+        assert histogram.count == 100
+        assert histogram.percentile(50) <= 0.01
+        assert 0.1 < histogram.percentile(99) <= 0.5
+        assert histogram.to_dict()['buckets'] == [[0.01, 90], [0.1, 90], [1.0, 100]]
+
+    def test_overflow_bucket_uses_max(self):
+        histogram = Histogram(buckets=(0.01,))
+        histogram.observe(3.0)
+        assert histogram.percentile(99) == 3.0
+        assert Histogram().percentile(99) == 0.0
+
+
+class TestMetricsRegistry:
+    """Labelled series, gauges and snapshots."""
+
+    def test_timed_decorator_sync_and_async(self):
+        bot = SimpleNamespace(metrics=MetricsRegistry())
+        component = Component(bot)
+        assert component.write(2) == 4
+        assert asyncio.run(component.send()) is True
+        assert bot.metrics.get_histogram('db_write').count == 1
+        assert bot.metrics.get_histogram('send', {'kind': 'channel'}).count == 1
+        assert bot.metrics.get_histogram('send') is None
+
+    def test_timed_without_registry_is_passthrough(self):
+        assert Component(SimpleNamespace()).write(3) == 6
+        assert Component(SimpleNamespace(metrics=None)).write(3) == 6
+
+    def test_snapshot_reads_gauges_and_skips_failures(self, mock_logger):
+        registry = MetricsRegistry(mock_logger)
+        registry.observe('command_execute', 0.02, {'command': 'ping'})
+        registry.register_gauge('queue_depth', lambda: 3, {'queue': 'command_queue'})
+        registry.register_gauge('queue_depth', lambda: 1 / 0, {'queue': 'broken'})
+
+        snapshot = registry.snapshot()
+
+        series = snapshot['histograms']['command_execute'][0]
+        assert series['labels'] == {'command': 'ping'}
+        assert series['count'] == 1
+        assert snapshot['gauges']['queue_depth'] == [{'labels': {'queue': 'command_queue'}, 'value': 3}]
+
+    def test_command_response_recorded_once_per_clock(self):
+        bot = SimpleNamespace(metrics=MetricsRegistry())
+        record_command_response(bot)  # No message being processed
+        assert bot.metrics.get_histogram('command_response') is None
+
+        token = start_response_clock()
+        record_command_response(bot)
+        record_command_response(bot)
+        reset_response_clock(token)
+        assert bot.metrics.get_histogram('command_response').count == 1
+
+
+def test_format_prometheus():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.observe('send', 0.05, {'kind': 'dm'})
+    registry.register_gauge('queue_depth', lambda: 2, {'queue': 'mqtt_publish'})
+
+    text = format_prometheus(registry.snapshot())
+
+    assert '# TYPE meshcore_bot_send_seconds histogram' in text
+    assert 'meshcore_bot_send_seconds_bucket{kind="dm",le="0.1"} 1' in text
+    assert 'meshcore_bot_send_seconds_bucket{kind="dm",le="+Inf"} 1' in text
+    assert 'meshcore_bot_send_seconds_count{kind="dm"} 1' in text
+    assert 'meshcore_bot_queue_depth{queue="mqtt_publish"} 2' in text
+    assert format_prometheus({}) == '\n'
@@ -0,0 +1,88 @@
+"""Tests for modules.service_plugins.mqtt_publish_utils."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from modules.service_plugins.mqtt_publish_utils import DROP_NEWEST, MqttPublishPipeline
+
+
+class FakeClient:
+    """Records publishes instead of sending them."""
+
+    def __init__(self, rc=0):
+        self.rc = rc
+        self.published = []
+
+    def publish(self, topic, payload, qos=0):
+        self.published.append((topic, payload))
+        return SimpleNamespace(rc=self.rc)
+
+
+def _broker(host, rc=0):
+    return {'client': FakeClient(rc), 'config': {'host': host}, 'connected': True}
+
+
+async def _drain(pipeline):
+    for _ in range(20):
+        await asyncio.sleep(0)
+        if all(s['queued'] == 0 for s in pipeline.get_stats()):
+            return
+
+
+class TestMqttPublishPipeline:
+    """Per-broker queues, drop policies and counters."""
+
+    async def test_workers_publish_same_payload_to_each_broker(self, mock_logger):
+        pipeline = MqttPublishPipeline(mock_logger)
+        brokers = [_broker('a'), _broker('b')]
+        pipeline.start()
+        try:
+            for broker in brokers:
+                assert pipeline.enqueue(broker, 'meshcore/packets/packet', '{"n": 1}')
+            await _drain(pipeline)
+        finally:
+            await pipeline.stop()
+
+        for broker in brokers:
+            assert broker['client'].published == [('meshcore/packets/packet', '{"n": 1}')]
+        stats = {s['broker']: s for s in pipeline.get_stats()}
+        assert stats['a']['published'] == 1
+        assert stats['b']['enqueued'] == 1
+
+    async def test_drop_oldest_when_full(self, mock_logger):
+        pipeline = MqttPublishPipeline(mock_logger, max_queue=2)
+        broker = _broker('a')
+        for i in range(4):
+            assert pipeline.enqueue(broker, 't', str(i))
+        await pipeline.stop()
+        assert broker['client'].published == [('t', '2'), ('t', '3')]
+        assert pipeline.get_stats()[0]['dropped'] == 2
+
+    async def test_drop_newest_when_full(self, mock_logger):
+        pipeline = MqttPublishPipeline(mock_logger, max_queue=2, drop_policy=DROP_NEWEST)
+        broker = _broker('a')
+        results = [pipeline.enqueue(broker, 't', str(i)) for i in range(3)]
+        await pipeline.stop()
+        assert results == [True, True, False]
+        assert broker['client'].published == [('t', '0'), ('t', '1')]
+
+    async def test_failed_and_disconnected_are_counted(self, mock_logger):
+        pipeline = MqttPublishPipeline(mock_logger)
+        failing = _broker('a', rc=4)
+        gone = _broker('b')
+        pipeline.enqueue(failing, 't', 'x')
+        pipeline.enqueue(gone, 't', 'x')
+        gone['connected'] = False
+        await pipeline.stop()
+
+        stats = {s['broker']: s for s in pipeline.get_stats()}
+        assert stats['a']['failed'] == 1
+        assert stats['b']['dropped'] == 1
+        assert gone['client'].published == []
+
+    def test_unknown_drop_policy_falls_back(self, mock_logger):
+        pipeline = MqttPublishPipeline(mock_logger, drop_policy='random')
+        assert pipeline.drop_policy == 'oldest'
+        mock_logger.warning.assert_called_once()
@@ -1,10 +1,13 @@
 """Tests for modules.plugin_loader."""
 
+import json
+
 import pytest
 from unittest.mock import Mock, MagicMock, AsyncMock
 
-from modules.plugin_loader import PluginLoader
+from modules.plugin_loader import LazyCommand, PluginLoader
 from modules.commands.base_command import BaseCommand
+from tests.conftest import mock_message
 
 
 @pytest.fixture
@@ -159,3 +162,92 @@ class TestCategoryAndFailed:
         # Mutating the return should not affect internal state
         failed.clear()
         assert len(loader.get_failed_plugins()) > 0
+
+
+class TestLazyLoading:
+    """Tests for manifest-driven lazy plugin loading."""
+
+    @pytest.fixture
+    def lazy_bot(self, loader_bot, tmp_path, monkeypatch):
+        loader_bot.bot_root = tmp_path
+        # Some plugins create caches relative to the working directory when loaded
+        monkeypatch.chdir(tmp_path)
+        return loader_bot
+
+    def test_first_start_loads_everything_and_writes_manifest(self, lazy_bot, tmp_path):
+        loader = PluginLoader(lazy_bot)
+        plugins = loader.load_all_plugins()
+
+        assert loader.get_deferred_plugins() == []
+        assert isinstance(plugins["ping"], BaseCommand)
+        manifest = json.loads((tmp_path / "meshcore_bot.db.plugins.json").read_text())
+        entry = manifest["plugins"]["ping_command"]
+        assert entry["name"] == "ping"
+        assert "ping" in entry["keywords"]
+        assert entry["config_section"] == "Ping_Command"
+        assert entry["lazy"] is True
+        assert manifest["plugins"]["greeter_command"]["lazy"] is False
+        assert manifest["plugins"]["path_command"]["lazy"] is False
+
+    def test_second_start_defers_until_matching_message(self, lazy_bot):
+        PluginLoader(lazy_bot).load_all_plugins()
+        loader = PluginLoader(lazy_bot)
+        plugins = loader.load_all_plugins()
+
+        ping = plugins["ping"]
+        assert isinstance(ping, LazyCommand)
+        assert isinstance(plugins["greeter"], BaseCommand)
+        assert "ping" in loader.keyword_mappings
+        assert loader.get_plugin_metadata("ping")["name"] == "ping"
+        assert ping.is_channel_allowed(mock_message(content="hello")) is True
+
+        assert ping.should_execute(mock_message(content="nothing to see")) is False
+        assert not ping.is_loaded
+        assert ping.should_execute(mock_message(content="ping")) is True
+        assert ping.is_loaded
+        assert isinstance(plugins["ping"], BaseCommand)
+        assert loader.lazy_stats["loaded_on_demand"] == 1
+
+    def test_stale_entry_is_loaded_eagerly_and_refreshed(self, lazy_bot, tmp_path):
+        PluginLoader(lazy_bot).load_all_plugins()
+        manifest_path = tmp_path / "meshcore_bot.db.plugins.json"
+        manifest = json.loads(manifest_path.read_text())
+        manifest["plugins"]["ping_command"]["file"] = [0, 0]
+        manifest_path.write_text(json.dumps(manifest))
+
+        loader = PluginLoader(lazy_bot)
+        plugins = loader.load_all_plugins()
+
+        assert isinstance(plugins["ping"], BaseCommand)
+        assert isinstance(plugins["help"], LazyCommand)
+        refreshed = json.loads(manifest_path.read_text())
+        assert refreshed["plugins"]["ping_command"]["file"] != [0, 0]
+
+    def test_overrides_are_applied_when_loaded(self, lazy_bot):
+        PluginLoader(lazy_bot).load_all_plugins()
+        loader = PluginLoader(lazy_bot)
+        plugins = loader.load_all_plugins()
+
+        ping = plugins["ping"]
+        ping.keywords = ["pong"]
+        assert ping.should_execute(mock_message(content="ping")) is False
+        assert ping.should_execute(mock_message(content="pong")) is True
+        assert plugins["ping"].keywords == ["pong"]
+
+    async def test_warmup_loads_deferred_plugins(self, lazy_bot):
+        PluginLoader(lazy_bot).load_all_plugins()
+        loader = PluginLoader(lazy_bot)
+        plugins = loader.load_all_plugins()
+        deferred = len(loader.get_deferred_plugins())
+        assert deferred > 0
+
+        loader.start_warmup(0)
+        await loader._warmup_task
+        assert loader.get_deferred_plugins() == []
+        assert loader.lazy_stats["loaded_by_warmup"] + loader.lazy_stats["failed"] == deferred
+        assert not any(isinstance(p, LazyCommand) and p.is_loaded for p in plugins.values())
+
+    def test_disabled_loads_everything(self, lazy_bot, tmp_path):
+        lazy_bot.config.set("Bot", "lazy_plugin_loading", "false")
+        PluginLoader(lazy_bot).load_all_plugins()
+        assert not (tmp_path / "meshcore_bot.db.plugins.json").exists()
@@ -0,0 +1,128 @@
+"""Tests for modules.replay_benchmark."""
+
+import configparser
+import json
+from types import SimpleNamespace
+
+from modules.replay_benchmark import (
+    ReplayHarness, StageTimer, _percentile, capture_line_to_events, load_capture, prepare_replay_config,
+)
+
+
+class RecordingHandler:
+    """MessageHandler stand-in that records dispatched events."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def handle_rf_log_data(self, event, metadata=None):
+        self.calls.append(('rf_log_data', event.payload))
+        self.decode_meshcore_packet(event.payload['payload'])
+
+    async def handle_raw_data(self, event, metadata=None):
+        self.calls.append(('raw_data', event.payload))
+
+    async def handle_channel_message(self, event, metadata=None):
+        self.calls.append(('channel_message', event.payload))
+
+    async def handle_contact_message(self, event, metadata=None):
+        raise ValueError("boom")
+
+    def decode_meshcore_packet(self, raw_hex, payload_hex=None):
+        return {'raw': raw_hex}
+
+
+def _bot(mock_logger):
+    bot = SimpleNamespace(logger=mock_logger, meshcore=None, message_handler=RecordingHandler(),
+                          command_manager=SimpleNamespace(monitor_channels=['general']),
+                          channel_manager=SimpleNamespace(_channels_cache={}, _cache_valid=False))
+    return bot
+
+
+class TestCaptureConversion:
+    """PacketCapture lines and event lines become handler events."""
+
+    def test_packet_line_rebuilds_rx_log_framing(self):
+        record = {'type': 'PACKET', 'raw': '15027e86', 'SNR': '8.5', 'RSSI': '-60',
+                  'timestamp': '2026-01-01T00:00:00'}
+        events = capture_line_to_events(record, include_raw_data=True)
+        assert [e['stage'] for e in events] == ['rf_log_data', 'raw_data']
+        payload = events[0]['payload']
+        assert payload['raw_hex'] == '22c4' + '15027e86'  # 8.5 * 4 = 0x22, -60 = 0xc4
+        assert (payload['snr'], payload['rssi'], payload['payload_length']) == (8.5, -60, 4)
+        assert events[1]['payload'] == {'data': '15027e86'}
+
+    def test_event_line_and_unknown_records(self):
+        events = capture_line_to_events({'event': 'channel_message', 'payload': {'text': 'A: hi'}, 'timestamp': 5})
+        assert events == [{'stage': 'channel_message', 'payload': {'text': 'A: hi'}, 'metadata': None, 'timestamp': 5.0}]
+        assert capture_line_to_events({'event': 'unknown'}) == []
+        assert capture_line_to_events({'type': 'STATUS'}) == []
+
+    def test_load_capture_skips_bad_lines(self, tmp_path):
+        path = tmp_path / 'capture.jsonl'
+        path.write_text(json.dumps({'type': 'PACKET', 'raw': '1500'}) + '\nnot json\n')
+        assert len(list(load_capture(str(path)))) == 1
+
+
+class TestStageTimer:
+    """Percentiles and method wrapping."""
+
+    def test_percentiles(self):
+        ordered = [i / 1000 for i in range(1, 101)]
+        assert _percentile(ordered, 50) == 0.05
+        assert _percentile(ordered, 99) == 0.099
+        assert _percentile([], 50) == 0.0
+
+    def test_wrap_sync_method(self):
+        timer = StageTimer()
+        obj = SimpleNamespace(work=lambda x: x * 2)
+        assert timer.wrap(obj, 'work', 'work')
+        assert obj.work(3) == 6
+        assert timer.report()['work']['count'] == 1
+        assert not timer.wrap(obj, 'missing', 'missing')
+
+
+class TestReplayHarness:
+    """Dispatch, timing and error counting."""
+
+    async def test_replay_times_each_stage(self, mock_logger):
+        bot = _bot(mock_logger)
+        harness = ReplayHarness(bot)
+        events = capture_line_to_events({'type': 'PACKET', 'raw': '1500', 'SNR': 1, 'RSSI': -1})
+        events += capture_line_to_events({'event': 'channel_message', 'payload': {'channel_idx': 0}})
+        events += capture_line_to_events({'event': 'contact_message', 'payload': {}})
+
+        report = await harness.run(events)
+
+        assert report['events'] == 3
+        assert report['errors'] == 1
+        assert report['mode'] == 'max-speed'
+        assert set(report['stages']) == {'rf_log_data', 'channel_message', 'contact_message', 'decode_meshcore_packet'}
+        assert bot.meshcore.channels[0]['channel_name'] == 'general'
+        assert bot.connected
+
+    async def test_speed_and_limit(self, mock_logger):
+        harness = ReplayHarness(_bot(mock_logger), speed=1000)
+        events = [{'stage': 'raw_data', 'payload': {}, 'metadata': None, 'timestamp': t} for t in (0, 10, 20)]
+        report = await harness.run(events, limit=2)
+        assert report['events'] == 2
+        assert report['mode'] == '1000x'
+        assert report['elapsed_s'] >= 0.01
+
+
+def test_prepare_replay_config(tmp_path):
+    source = tmp_path / 'config.ini'
+    config = configparser.ConfigParser()
+    config['Bot'] = {'db_path': 'bot.db', 'tx_delay_ms': '250'}
+    config['PacketCapture'] = {'enabled': 'true'}
+    with open(source, 'w') as f:
+        config.write(f)
+
+    replay = configparser.ConfigParser()
+    replay.read(prepare_replay_config(str(source), str(tmp_path / 'work')))
+
+    assert replay.get('Bot', 'db_path') == str(tmp_path / 'work' / 'replay.db')
+    assert replay.get('Bot', 'tx_delay_ms') == '0'
+    assert replay.get('PacketCapture', 'enabled') == 'false'
+    assert replay.get('Web_Viewer', 'enabled') == 'false'
+    assert replay.get('Localization', 'translation_path') == str(tmp_path / 'translations')
@@ -0,0 +1,121 @@
+"""Tests for modules.startup."""
+
+import asyncio
+from configparser import ConfigParser
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from modules.core import MeshCoreBot
+from modules.metrics import MetricsRegistry
+from modules.startup import StartupOrchestrator
+
+
+def _orchestrator(mock_logger, **kwargs):
+    return StartupOrchestrator(SimpleNamespace(logger=mock_logger, metrics=MetricsRegistry()), **kwargs)
+
+
+class TestStartupOrchestrator:
+    """Dependency ordering, concurrency, timeouts and the boot timeline."""
+
+    async def test_independent_stages_run_concurrently(self, mock_logger):
+        startup = _orchestrator(mock_logger)
+        order = []
+
+        async def stage(name, delay):
+            order.append(f'{name}:start')
+            await asyncio.sleep(delay)
+            order.append(f'{name}:end')
+
+        startup.add('connect', lambda: stage('connect', 0.01))
+        startup.add('slow_a', lambda: stage('slow_a', 0.2), ('connect',))
+        startup.add('slow_b', lambda: stage('slow_b', 0.2), ('connect',))
+        startup.add('after_a', lambda: order.append('after_a'), ('slow_a',))
+
+        assert await startup.run() is True
+        assert order.index('connect:end') < order.index('slow_a:start')
+        assert order.index('slow_b:start') < order.index('slow_a:end')
+        assert order[-1] == 'after_a'
+        # Both slow stages overlapped, so startup took well under their sum
+        assert startup.total_ms < 350
+        timeline = startup.get_timeline()
+        assert [s['stage'] for s in timeline['stages']][0] == 'connect'
+        assert all(s['status'] == 'ok' for s in timeline['stages'])
+        assert startup.bot.metrics.get_histogram('startup_stage', {'stage': 'slow_a'}).count == 1
+
+    async def test_timeout_and_failure_skip_dependents(self, mock_logger):
+        startup = _orchestrator(mock_logger, default_timeout=0.05)
+
+        def fail():
+            raise RuntimeError('boom')
+
+        startup.add('hang', lambda: asyncio.sleep(5))
+        startup.add('after_hang', lambda: None, ('hang',))
+        startup.add('fail', fail)
+        startup.add('refused', lambda: False)
+        startup.add('after_refused', lambda: None, ('refused',))
+        startup.add('fine', lambda: None)
+
+        assert await startup.run() is True
+        status = {s['stage']: s['status'] for s in startup.get_timeline()['stages']}
+        assert status == {'hang': 'timeout', 'after_hang': 'skipped', 'fail': 'failed',
+                          'refused': 'failed', 'after_refused': 'skipped', 'fine': 'ok'}
+        assert startup.results['fail']['error'] == 'boom'
+        assert any('skipped' in line for line in startup.format_timeline())
+
+    async def test_critical_failure_cancels_pending_stages(self, mock_logger):
+        startup = _orchestrator(mock_logger)
+        started = []
+
+        async def connect():
+            await asyncio.sleep(0.01)
+            return False
+
+        startup.add('connect', connect, critical=True)
+        startup.add('advert', lambda: started.append('advert'), ('connect',))
+        startup.add('feeds', lambda: asyncio.sleep(5))
+
+        assert await startup.run() is False
+        assert started == []
+        status = {name: result['status'] for name, result in startup.results.items()}
+        assert status == {'connect': 'failed', 'advert': 'skipped', 'feeds': 'cancelled'}
+
+    async def test_stage_timeout_override(self, mock_logger):
+        startup = _orchestrator(mock_logger, default_timeout=0.01)
+        startup.add('connect', lambda: asyncio.sleep(0.05), timeout=0)
+        assert await startup.run() is True
+        assert startup.results['connect']['status'] == 'ok'
+
+    async def test_invalid_graphs_are_rejected(self, mock_logger):
+        startup = _orchestrator(mock_logger)
+        startup.add('a', lambda: None, ('b',))
+        startup.add('b', lambda: None, ('a',))
+        with pytest.raises(ValueError, match='cycle'):
+            await startup.run()
+
+        startup = _orchestrator(mock_logger)
+        startup.add('a', lambda: None, ('missing',))
+        with pytest.raises(ValueError, match='unknown'):
+            await startup.run()
+        with pytest.raises(ValueError, match='Duplicate'):
+            startup.add('a', lambda: None)
+
+
+class TestBotStartupGraph:
+    """MeshCoreBot's stage graph."""
+
+    async def test_scheduler_starts_when_feeds_fail(self, mock_logger):
+        bot = SimpleNamespace(
+            logger=mock_logger, metrics=MetricsRegistry(), config=ConfigParser(), services={},
+            connect=AsyncMock(return_value=True), set_radio_clock=AsyncMock(), set_device_name=AsyncMock(),
+            send_startup_advert=AsyncMock(), command_manager=Mock(), transmission_tracker=None,
+            feed_manager=Mock(initialize=AsyncMock(side_effect=RuntimeError('feeds down'))),
+            scheduler=Mock(), web_viewer_integration=None,
+        )
+        startup = MeshCoreBot._build_startup(bot)
+
+        assert await startup.run() is True
+        status = {s['stage']: s['status'] for s in startup.get_timeline()['stages']}
+        assert status['feeds'] == 'failed' and status['scheduler'] == 'ok'
+        bot.scheduler.start.assert_called_once()
@@ -0,0 +1,144 @@
+"""Tests for modules.stats_rollup and its use by StatsCommand and the web viewer."""
+
+import sqlite3
+import time
+
+import pytest
+
+from modules.commands.stats_command import StatsCommand
+from modules.stats_rollup import (
+    DAILY_TABLE, HOURLY_TABLE, METRIC_COMMAND, METRIC_MESSAGE, METRIC_PATH_LENGTH,
+    backfill_rollups, init_rollup_tables, prune_hourly_rollups, record_rollup,
+    rollup_source, rollups_available,
+)
+from modules.web_viewer.app import BotDataViewer
+from tests.conftest import mock_message
+
+
+@pytest.fixture
+def stats_cmd(command_mock_bot_with_db):
+    return StatsCommand(command_mock_bot_with_db)
+
+
+def _connect(cmd):
+    return sqlite3.connect(cmd.bot.db_manager.db_path)
+
+
+def _rollup_sum(conn, table, metric, key=None):
+    query = f"SELECT COALESCE(SUM(count), 0) FROM {table} WHERE metric = ?"
+    params = [metric]
+    if key is not None:
+        query += " AND key = ?"
+        params.append(key)
+    return conn.execute(query, params).fetchone()[0]
+
+
+class TestRecordRollup:
+    """Tests for insert-time rollup maintenance."""
+
+    def test_record_updates_hourly_and_daily_buckets(self):
+        conn = sqlite3.connect(":memory:")
+        cursor = conn.cursor()
+        init_rollup_tables(cursor)
+        ts = 1_700_000_123
+        record_rollup(cursor, METRIC_COMMAND, ts, "ping", "alice", replied=True)
+        record_rollup(cursor, METRIC_COMMAND, ts + 10, "ping", "alice", replied=False)
+
+        hourly = conn.execute(f"SELECT bucket, count, replied FROM {HOURLY_TABLE}").fetchall()
+        daily = conn.execute(f"SELECT bucket, count, replied FROM {DAILY_TABLE}").fetchall()
+        assert hourly == [(ts - ts % 3600, 2, 1)]
+        assert daily == [(ts - ts % 86400, 2, 1)]
+
+    def test_stats_command_records_rollups(self, stats_cmd):
+        stats_cmd.record_message(mock_message(content="hi", channel="general", sender_id="alice"))
+        stats_cmd.record_message(mock_message(content="dm", is_dm=True, sender_id="bob"))
+        stats_cmd.record_command(mock_message(content="ping", sender_id="alice"), "ping", True)
+        stats_cmd.record_path_stats(mock_message(content="hi", sender_id="alice", hops=3, path="01,02,03"))
+
+        with _connect(stats_cmd) as conn:
+            assert _rollup_sum(conn, DAILY_TABLE, METRIC_MESSAGE) == 2
+            assert _rollup_sum(conn, HOURLY_TABLE, METRIC_MESSAGE, "general") == 1
+            assert _rollup_sum(conn, HOURLY_TABLE, METRIC_MESSAGE, "") == 1
+            assert _rollup_sum(conn, DAILY_TABLE, METRIC_COMMAND, "ping") == 1
+            assert _rollup_sum(conn, DAILY_TABLE, METRIC_PATH_LENGTH, "3") == 1
+
+
+class TestBackfill:
+    """Tests for the one-time rollup backfill."""
+
+    def test_backfill_matches_raw_tables_and_runs_once(self, stats_cmd):
+        now = int(time.time())
+        with _connect(stats_cmd) as conn:
+            conn.execute(f"DELETE FROM {HOURLY_TABLE}")
+            conn.execute(f"DELETE FROM {DAILY_TABLE}")
+            for i in range(4):
+                conn.execute(
+                    "INSERT INTO message_stats (timestamp, sender_id, channel, content, is_dm) VALUES (?, ?, ?, 'x', 0)",
+                    (now - i * 3600, f"user{i % 2}", "general"),
+                )
+            conn.execute(
+                "INSERT INTO command_stats (timestamp, sender_id, command_name, channel, is_dm, response_sent) "
+                "VALUES (?, 'user0', 'wx', 'general', 0, 1)",
+                (now,),
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS bot_metadata (key TEXT PRIMARY KEY, value TEXT, updated_at TIMESTAMP)")
+
+            assert backfill_rollups(conn) is True
+            assert backfill_rollups(conn) is False
+            assert rollups_available(conn.cursor())
+            assert _rollup_sum(conn, DAILY_TABLE, METRIC_MESSAGE) == 4
+            assert _rollup_sum(conn, HOURLY_TABLE, METRIC_MESSAGE) == 4
+            assert conn.execute(
+                f"SELECT SUM(replied) FROM {DAILY_TABLE} WHERE metric = ?", (METRIC_COMMAND,)
+            ).fetchone()[0] == 1
+
+    def test_prune_keeps_recent_hourly_buckets(self):
+        conn = sqlite3.connect(":memory:")
+        cursor = conn.cursor()
+        init_rollup_tables(cursor)
+        now = 1_700_000_000
+        record_rollup(cursor, METRIC_MESSAGE, now - 40 * 86400, "general", "a")
+        record_rollup(cursor, METRIC_MESSAGE, now, "general", "a")
+        assert prune_hourly_rollups(cursor, now) == 1
+        assert conn.execute(f"SELECT COUNT(*) FROM {DAILY_TABLE}").fetchone()[0] == 2
+
+
+class TestRollupSource:
+    """Tests for window to table selection."""
+
+    def test_windows(self):
+        now = 1_700_000_000
+        table, bucket = rollup_source('24h', now)
+        assert table == HOURLY_TABLE
+        assert bucket == (now - 86400) - (now - 86400) % 3600
+        assert rollup_source('all', now) == (DAILY_TABLE, None)
+        assert rollup_source('bogus', now) == (DAILY_TABLE, None)
+
+
+class TestViewerRollupStats:
+    """Dashboard stats computed from rollups agree with the raw tables."""
+
+    def test_activity_stats(self, stats_cmd):
+        for sender, channel in [("alice", "general"), ("alice", "general"), ("bob", "test"), ("carol", None)]:
+            stats_cmd.record_message(mock_message(content="hi", channel=channel, is_dm=channel is None, sender_id=sender))
+        stats_cmd.record_command(mock_message(content="ping", sender_id="alice"), "ping", True)
+        stats_cmd.record_command(mock_message(content="wx", sender_id="bob"), "wx", False)
+
+        with _connect(stats_cmd) as conn:
+            stats = BotDataViewer._get_rollup_activity_stats(None, conn.cursor(), '24h', 'all', '7d')
+
+        assert stats['total_messages'] == 4
+        assert stats['messages_24h'] == 4
+        assert stats['unique_senders_24h'] == 3
+        assert stats['unique_channels_total'] == 2
+        assert stats['top_users'][0] == {'user': 'alice', 'count': 2}
+        assert stats['total_commands'] == 2
+        assert stats['bot_reply_rate_24h'] == 50.0
+        assert stats['top_channels'][0] == {'channel': 'general', 'messages': 2, 'users': 1}
+
+    def test_path_length_floor(self, stats_cmd):
+        for hops in (1, 2, 2, 5, 6, 7, 8):
+            stats_cmd.record_path_stats(mock_message(content="x", sender_id="a", hops=hops, path="01"))
+        with _connect(stats_cmd) as conn:
+            floor = BotDataViewer._get_rollup_path_length_floor(None, conn.cursor(), '24h', 5)
+        assert floor == 2
@@ -0,0 +1,129 @@
+"""Tests for modules.table_partitions."""
+
+import configparser
+import sqlite3
+
+import pytest
+
+from modules.table_partitions import (
+    PACKET_STREAM_COLUMNS,
+    PACKET_STREAM_INDEXES,
+    PartitionedTable,
+    init_packet_stream,
+    packet_stream_table,
+)
+
+DAY = 86400.0
+# 2026-10-18 12:00 UTC (a Sunday)
+NOW = 1792324800.0
+
+
+def _table(period='daily'):
+    return PartitionedTable('packet_stream', PACKET_STREAM_COLUMNS, PACKET_STREAM_INDEXES, period=period)
+
+
+def _insert(db_path, timestamp, data='{}', kind='packet'):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('INSERT INTO packet_stream (timestamp, data, type) VALUES (?, ?, ?)', (timestamp, data, kind))
+
+
+def _rows(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute('SELECT id, timestamp, data FROM packet_stream ORDER BY id').fetchall()
+
+
+class TestPartitionedTable:
+    """Routing through the view, rotation, retention and migration."""
+
+    def test_partition_names(self):
+        assert _table().partition_for(NOW) == 'packet_stream_p20261018'
+        assert _table('weekly').partition_for(NOW) == 'packet_stream_p20261012'
+        with pytest.raises(ValueError):
+            _table('hourly')
+
+    def test_rotation_keeps_ids_and_routes_updates(self, tmp_path):
+        db_path = str(tmp_path / 'stream.db')
+        table = _table()
+        table.ensure(db_path, now=NOW - DAY)
+        _insert(db_path, NOW - DAY)
+        _insert(db_path, NOW - DAY + 1)
+        table.ensure(db_path, now=NOW)
+        _insert(db_path, NOW)
+
+        with sqlite3.connect(db_path) as conn:
+            assert table.partitions(conn) == ['packet_stream_p20261017', 'packet_stream_p20261018',
+                                              'packet_stream_p20261019']
+            assert conn.execute('SELECT COUNT(*) FROM packet_stream_p20261018').fetchone()[0] == 1
+            # Updates and deletes reach rows in older partitions
+            conn.execute("UPDATE packet_stream SET data = ? WHERE id = ?", ('{"updated": 1}', 1))
+            conn.execute('DELETE FROM packet_stream WHERE id = ?', (2,))
+
+        assert _rows(db_path) == [(1, NOW - DAY, '{"updated": 1}'), (3, NOW, '{}')]
+
+    def test_inserts_roll_over_at_the_boundary(self, tmp_path):
+        db_path = str(tmp_path / 'stream.db')
+        table = _table()
+        table.ensure(db_path, now=NOW - DAY)
+        _insert(db_path, NOW - DAY)
+        # After midnight, before any maintenance runs
+        _insert(db_path, NOW)
+        _insert(db_path, NOW + 1)
+        # A late row for the previous day still gets a new id
+        _insert(db_path, NOW - DAY + 5)
+
+        with sqlite3.connect(db_path) as conn:
+            counts = [conn.execute(f'SELECT COUNT(*) FROM {p}').fetchone()[0] for p in table.partitions(conn)]
+        assert counts == [2, 2]
+        assert [row[0] for row in _rows(db_path)] == [1, 2, 3, 4]
+
+        table.ensure(db_path, now=NOW)
+        _insert(db_path, NOW + 2)
+        assert [row[0] for row in _rows(db_path)] == [1, 2, 3, 4, 5]
+
+    def test_partitioning_is_opt_in(self):
+        config = configparser.ConfigParser()
+        assert packet_stream_table(config) is None
+        config.read_dict({'Web_Viewer': {'packet_stream_partitioning': 'weekly'}})
+        assert packet_stream_table(config).period == 'weekly'
+
+    def test_drop_expired_keeps_current_partition(self, tmp_path):
+        db_path = str(tmp_path / 'stream.db')
+        table = _table()
+        for days_ago in (10, 3, 0):
+            table.ensure(db_path, now=NOW - days_ago * DAY)
+            _insert(db_path, NOW - days_ago * DAY)
+
+        dropped = table.drop_expired(db_path, NOW - 7 * DAY, now=NOW)
+        # Empty partitions created ahead of time for past days go too
+        assert dropped == ['packet_stream_p20261008', 'packet_stream_p20261009', 'packet_stream_p20261016']
+        assert [row[1] for row in _rows(db_path)] == [NOW - 3 * DAY, NOW]
+        # The insert target survives even when everything is expired
+        assert table.drop_expired(db_path, NOW + DAY, now=NOW) == ['packet_stream_p20261015']
+        _insert(db_path, NOW + 1)
+        assert len(_rows(db_path)) == 2
+
+    def test_plain_table_is_migrated_and_merged_back(self, tmp_path):
+        db_path = str(tmp_path / 'stream.db')
+        config = configparser.ConfigParser()
+        config.read_dict({'Web_Viewer': {'packet_stream_partitioning': 'none'}})
+        init_packet_stream(db_path, config)
+        _insert(db_path, NOW - 2 * DAY)
+        assert packet_stream_table(config) is None
+
+        table = _table()
+        table.ensure(db_path, now=NOW)
+        _insert(db_path, NOW)
+        with sqlite3.connect(db_path) as conn:
+            assert table.is_partitioned(conn)
+            assert table.partitions(conn) == ['packet_stream_p20261016', 'packet_stream_p20261018',
+                                              'packet_stream_p20261019']
+        assert [row[0] for row in _rows(db_path)] == [1, 2]
+
+        init_packet_stream(db_path, config)
+        _insert(db_path, NOW + 1)
+        with sqlite3.connect(db_path) as conn:
+            assert not table.is_partitioned(conn)
+            assert table.partitions(conn) == []
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {'idx_packet_stream_timestamp', 'idx_packet_stream_type'} <= indexes
+        assert [row[0] for row in _rows(db_path)] == [1, 2, 3]
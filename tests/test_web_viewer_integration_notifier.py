@@ -0,0 +1,118 @@
+"""Tests for BotIntegration's background mesh update notifier."""
+
+import time
+from configparser import ConfigParser
+from unittest.mock import Mock
+
+import pytest
+
+from modules.mesh_graph_snapshot import MeshGraphSnapshotReader
+from modules.web_viewer.integration import BotIntegration
+
+
+@pytest.fixture
+def integration(mock_logger, tmp_path):
+    bot = Mock()
+    bot.logger = mock_logger
+    bot.config = ConfigParser()
+    bot.config.add_section("Web_Viewer")
+    bot.config.set("Web_Viewer", "mesh_notify_interval_seconds", "0")
+    bot.db_manager.db_path = str(tmp_path / "test.db")
+    bot.bot_root = tmp_path
+    integ = BotIntegration(bot)
+    integ.posted = []
+    integ.post_ok = True
+
+    def fake_post(payload):
+        integ.posted.append(payload)
+        return integ.post_ok
+
+    integ._post_stream_data = fake_post
+    yield integ
+    integ.is_shutting_down = True
+    integ._mesh_wakeup.set()
+
+
+def _edge(from_prefix, to_prefix, seq, is_new=False, count=1):
+    return {'from_prefix': from_prefix, 'to_prefix': to_prefix, 'observation_count': count,
+            'is_new': is_new, 'generation': 1, 'seq': seq,
+            'first_seen': '2025-01-01T00:00:00', 'last_seen': '2025-01-01T00:00:00'}
+
+
+def _events(integ):
+    return [event for payload in integ.posted for event in payload['data']['events']]
+
+
+class TestMeshNotifier:
+    """Coalescing, ordering and circuit breaking."""
+
+    def test_updates_coalesce_per_key_with_prev_seq_links(self, integration):
+        integration.mesh_notify_interval = 60  # Keep the background thread from flushing first
+        integration.send_mesh_edge_update(_edge('01', '7e', 1, is_new=True))
+        integration.send_mesh_edge_update(_edge('7e', '86', 2, is_new=True))
+        integration.send_mesh_edge_update(_edge('01', '7e', 3, count=2))
+        integration.send_mesh_node_update({'public_key': 'ab' * 32, 'name': 'Node'})
+        integration.send_mesh_node_update({'public_key': 'ab' * 32, 'name': 'Node renamed'})
+
+        assert integration.flush_mesh_updates() == 3
+        assert len(integration.posted) == 1
+        events = _events(integration)
+        edges = [e['data'] for e in events if e['type'] == 'mesh_edge']
+        assert [(e['seq'], e['prev_seq']) for e in edges] == [(2, 0), (3, 2)]
+        assert edges[1]['is_new'] is True
+        assert edges[1]['observation_count'] == 2
+        assert [e['data']['name'] for e in events if e['type'] == 'mesh_node'] == ['Node renamed']
+        assert integration.mesh_updates_coalesced == 2
+
+    def test_coalesced_deltas_apply_without_gap(self, integration, tmp_path):
+        integration.mesh_notify_interval = 60
+        reader = MeshGraphSnapshotReader(str(tmp_path / 'graph.bin'))
+        reader.generation = 1
+        for seq, key in enumerate([('01', '7e'), ('7e', '86'), ('01', '7e'), ('01', '7e')], start=1):
+            integration.send_mesh_edge_update(_edge(*key, seq))
+        integration.flush_mesh_updates()
+        for event in _events(integration):
+            reader.apply_delta(event['data'])
+        assert reader.seq == 4
+        assert not reader.stale
+
+    def test_dropped_edge_breaks_chain(self, integration, tmp_path):
+        integration.mesh_notify_interval = 60
+        integration.mesh_notify_max_pending = 1
+        reader = MeshGraphSnapshotReader(str(tmp_path / 'graph.bin'))
+        reader.generation = 1
+        integration.send_mesh_edge_update(_edge('01', '7e', 1))
+        integration.send_mesh_edge_update(_edge('7e', '86', 2))  # Evicts seq 1
+        integration.flush_mesh_updates()
+        for event in _events(integration):
+            reader.apply_delta(event['data'])
+        assert reader.stale
+
+    def test_send_returns_immediately_and_thread_delivers(self, integration):
+        integration.send_mesh_edge_update(_edge('01', '7e', 1))
+        for _ in range(100):
+            if integration.posted:
+                break
+            time.sleep(0.01)
+        assert len(_events(integration)) == 1
+
+    def test_circuit_breaker_opens_and_recovers(self, integration):
+        integration.mesh_notify_interval = 60
+        integration.post_ok = False
+        for seq in range(1, BotIntegration.CIRCUIT_BREAKER_THRESHOLD + 1):
+            integration.send_mesh_edge_update(_edge('01', '7e', seq))
+            integration.flush_mesh_updates()
+        assert integration.circuit_breaker_open
+
+        # While open, updates are dropped without posting
+        posts = len(integration.posted)
+        integration.send_mesh_edge_update(_edge('01', '7e', 10))
+        integration.flush_mesh_updates()
+        assert len(integration.posted) == posts
+
+        # After the cooldown one trial post is allowed; success closes the breaker
+        integration.circuit_breaker_opened_at -= BotIntegration.CIRCUIT_BREAKER_COOLDOWN
+        integration.post_ok = True
+        integration.send_mesh_edge_update(_edge('01', '7e', 11))
+        assert integration.flush_mesh_updates() == 1
+        assert not integration.circuit_breaker_open
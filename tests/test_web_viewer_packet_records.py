@@ -0,0 +1,89 @@
+"""Tests for compact packet_stream rows (modules.web_viewer.packet_records)."""
+
+import json
+import sqlite3
+from configparser import ConfigParser
+from unittest.mock import Mock
+
+from modules.enums import PayloadType
+from modules.message_handler import MessageHandler
+from modules.table_partitions import init_packet_stream
+from modules.traffic_generator import build_packet
+from modules.utils import calculate_packet_hash
+from modules.web_viewer.integration import BotIntegration
+from modules.web_viewer.packet_records import PacketRecordDecoder, encode_packet_row
+
+
+def _handler(mock_logger):
+    handler = MessageHandler.__new__(MessageHandler)
+    handler.logger = mock_logger
+    return handler
+
+
+def _packet(mock_logger, path=b'\x01\x02\x03'):
+    raw_hex = build_packet(PayloadType.GRP_TXT, bytes(range(40)), path=path).hex()
+    decoded = _handler(mock_logger).decode_meshcore_packet(raw_hex)
+    decoded.update({'raw_packet_hex': raw_hex, 'packet_hash': calculate_packet_hash(raw_hex), 'snr': 7.25, 'rssi': -98})
+    return raw_hex, decoded
+
+
+def test_decoded_document_matches_the_captured_packet(mock_logger):
+    raw_hex, decoded = _packet(mock_logger)
+    raw, snr, rssi = encode_packet_row(decoded)
+    assert raw.hex() == raw_hex and (snr, rssi) == (7.25, -98)
+
+    decoder = PacketRecordDecoder(_handler(mock_logger).decode_meshcore_packet, max_entries=1)
+    document = decoder.packet_data(1, 1700000000.0, raw, snr, rssi)
+    assert document['path'] == ['01', '02', '03']
+    assert document['hops'] == 3
+    assert document['payload_type_enum'] == 'GRP_TXT'
+    assert document['packet_hash'] == decoded['packet_hash']
+    assert (document['snr'], document['rssi']) == (7.25, -98)
+    json.dumps(document)
+
+    # LRU keyed by row id
+    assert decoder.packet_data(1, 1700000000.0, raw) is document
+    decoder.packet_data(2, 1700000000.0, raw)
+    assert decoder.packet_data(1, 1700000000.0, raw) is not document
+    assert decoder.get_stats() == {'hits': 1, 'decoded': 3, 'failed': 0, 'cached': 1}
+
+
+def test_packets_without_raw_bytes_stay_json(mock_logger):
+    assert encode_packet_row({'path_len': 0}) is None
+    assert encode_packet_row({'raw_packet_hex': 'zz'}) is None
+    decoder = PacketRecordDecoder(_handler(mock_logger).decode_meshcore_packet)
+    assert decoder.packet_data(1, 0.0, b'\x00') is None
+
+
+def test_capture_stores_compact_rows(mock_logger, tmp_path):
+    db_path = str(tmp_path / 'viewer.db')
+    bot = Mock()
+    bot.logger = mock_logger
+    bot.config = ConfigParser()
+    bot.config.read_dict({'Web_Viewer': {'db_path': db_path}})
+    bot.db_manager.db_path = db_path
+    bot.bot_root = tmp_path
+    integration = BotIntegration(bot)
+
+    raw_hex, decoded = _packet(mock_logger)
+    integration.capture_full_packet_data(dict(decoded))
+    integration.capture_full_packet_data({'note': 'no raw bytes'})
+    integration.shutdown()
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute('SELECT data, type, raw, snr, rssi FROM packet_stream ORDER BY id').fetchall()
+    assert rows[0] == ('', 'packet', bytes.fromhex(raw_hex), 7.25, -98)
+    assert json.loads(rows[1][0])['note'] == 'no raw bytes'
+    # The JSON document it replaces is several times larger than the raw bytes
+    assert len(json.dumps(integration._make_json_serializable(decoded))) > 8 * len(raw_hex) // 2
+
+
+def test_existing_tables_gain_compact_columns(tmp_path):
+    db_path = str(tmp_path / 'old.db')
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('CREATE TABLE packet_stream (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                     'timestamp REAL NOT NULL, data TEXT NOT NULL, type TEXT NOT NULL)')
+    init_packet_stream(db_path, ConfigParser())
+    with sqlite3.connect(db_path) as conn:
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(packet_stream)')]
+    assert columns == ['id', 'timestamp', 'data', 'type', 'raw', 'snr', 'rssi']
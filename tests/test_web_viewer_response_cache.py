@@ -0,0 +1,133 @@
+"""Tests for modules.web_viewer.response_cache."""
+
+import gzip
+import json
+import sqlite3
+
+import pytest
+from flask import Flask, jsonify, request
+
+from modules.web_viewer.response_cache import ResponseCache
+
+
+@pytest.fixture
+def app_and_cache(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    cache = ResponseCache(db_path, min_age_seconds=0, compress_min_bytes=100)
+    app = Flask(__name__)
+    calls = {'count': 0}
+
+    @app.route('/api/items')
+    @cache.cached
+    def items():
+        calls['count'] += 1
+        if request.args.get('fail'):
+            return jsonify({'error': 'boom'}), 500
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute("SELECT name FROM items").fetchall()
+        return jsonify({'items': [r[0] for r in rows], 'pad': 'x' * 200})
+
+    return app, cache, calls, db_path
+
+
+class TestResponseCache:
+    """Caching, invalidation, ETags and compression."""
+
+    def test_repeat_requests_hit_cache(self, app_and_cache):
+        app, cache, calls, _ = app_and_cache
+        client = app.test_client()
+        first = client.get('/api/items?b=2&a=1')
+        second = client.get('/api/items?a=1&b=2')
+        assert first.status_code == 200
+        assert first.get_data() == second.get_data()
+        assert calls['count'] == 1
+        assert cache.get_stats()['hits'] == 1
+
+    def test_external_write_invalidates(self, app_and_cache):
+        app, cache, calls, db_path = app_and_cache
+        client = app.test_client()
+        client.get('/api/items')
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("INSERT INTO items (name) VALUES ('node')")
+        response = client.get('/api/items')
+        assert json.loads(response.get_data())['items'] == ['node']
+        assert calls['count'] == 2
+
+    def test_min_age_serves_cached_body_after_external_write(self, app_and_cache):
+        app, cache, calls, db_path = app_and_cache
+        cache.min_age_seconds = 60
+        client = app.test_client()
+        client.get('/api/items')
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("INSERT INTO items (name) VALUES ('node')")
+        client.get('/api/items')
+        assert calls['count'] == 1
+        cache.bump()
+        client.get('/api/items')
+        assert calls['count'] == 2
+
+    def test_etag_returns_304(self, app_and_cache):
+        app, _, _, _ = app_and_cache
+        client = app.test_client()
+        first = client.get('/api/items')
+        etag = first.headers['ETag']
+        second = client.get('/api/items', headers={'If-None-Match': etag})
+        assert second.status_code == 304
+        assert second.get_data() == b''
+
+    def test_gzip_for_large_bodies(self, app_and_cache):
+        app, _, _, _ = app_and_cache
+        client = app.test_client()
+        plain = client.get('/api/items')
+        zipped = client.get('/api/items', headers={'Accept-Encoding': 'gzip, deflate'})
+        assert zipped.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(zipped.get_data()) == plain.get_data()
+        assert zipped.headers['ETag'] != plain.headers['ETag']
+        revalidated = client.get('/api/items', headers={'If-None-Match': zipped.headers['ETag']})
+        assert revalidated.status_code == 304
+
+    def test_errors_are_not_cached(self, app_and_cache):
+        app, _, calls, _ = app_and_cache
+        client = app.test_client()
+        assert client.get('/api/items?fail=1').status_code == 500
+        assert client.get('/api/items?fail=1').status_code == 500
+        assert calls['count'] == 2
+
+    def test_disabled_cache_passes_through(self, app_and_cache):
+        app, cache, calls, _ = app_and_cache
+        cache.enabled = False
+        client = app.test_client()
+        client.get('/api/items')
+        response = client.get('/api/items')
+        assert calls['count'] == 2
+        assert 'ETag' not in response.headers
+
+    def test_view_version_invalidates(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "v.db"), min_age_seconds=60)
+        app = Flask(__name__)
+        state = {'version': 1, 'calls': 0}
+
+        @app.route('/api/graph')
+        @cache.cached(version=lambda: state['version'])
+        def graph():
+            state['calls'] += 1
+            return jsonify({'version': state['version']})
+
+        client = app.test_client()
+        client.get('/api/graph')
+        client.get('/api/graph')
+        assert state['calls'] == 1
+        state['version'] = 2
+        assert json.loads(client.get('/api/graph').get_data()) == {'version': 2}
+        assert state['calls'] == 2
+
+    def test_build_locks_are_released(self, app_and_cache):
+        app, cache, calls, _ = app_and_cache
+        client = app.test_client()
+        for i in range(20):
+            client.get(f'/api/items?page={i}')
+        client.get('/api/items?fail=1')
+        assert calls['count'] == 21
+        assert cache._key_locks == {}
@@ -0,0 +1,109 @@
+"""Tests for modules.web_viewer.stream_broadcaster."""
+
+import time
+
+import pytest
+
+from modules.web_viewer.stream_broadcaster import (
+    FRAME_EVENT, STREAM_COMMANDS, STREAM_MESH, STREAM_PACKETS, StreamBroadcaster,
+)
+
+
+class FakeSocketIO:
+    """Records emits instead of sending them."""
+
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, event, data, to=None, callback=None):
+        self.emitted.append({'event': event, 'data': data, 'to': to, 'callback': callback})
+
+
+@pytest.fixture
+def broadcaster(mock_logger):
+    socketio = FakeSocketIO()
+    b = StreamBroadcaster(socketio, mock_logger, rate_hz=50, max_queue=3, max_frame_events=10)
+    b.add_client('a')
+    b.add_client('b')
+    return b, socketio
+
+
+class TestStreamBroadcaster:
+    """Batching, subscriptions, drop-oldest and ack gating."""
+
+    def test_only_subscribed_clients_receive_events(self, broadcaster):
+        b, socketio = broadcaster
+        b.subscribe('a', STREAM_PACKETS)
+        b.subscribe('b', STREAM_COMMANDS)
+
+        assert b.publish(STREAM_PACKETS, 'packet_data', {'n': 1}) == 1
+        assert b.publish(STREAM_MESH, 'mesh_node_added', {}) == 0
+        b.flush()
+
+        assert [(e['event'], e['to']) for e in socketio.emitted] == [(FRAME_EVENT, 'a')]
+        assert socketio.emitted[0]['data']['events'] == [{'event': 'packet_data', 'data': {'n': 1}}]
+
+    def test_events_are_coalesced_into_one_frame(self, broadcaster):
+        b, socketio = broadcaster
+        b.subscribe('a', STREAM_PACKETS)
+        b.publish(STREAM_PACKETS, 'packet_data', 1)
+        b.publish(STREAM_PACKETS, 'packet_data', 2)
+        b.flush()
+        assert len(socketio.emitted) == 1
+        assert [e['data'] for e in socketio.emitted[0]['data']['events']] == [1, 2]
+
+    def test_full_queue_drops_oldest_and_counts(self, broadcaster):
+        b, socketio = broadcaster
+        b.subscribe('a', STREAM_PACKETS)
+        for i in range(5):
+            b.publish(STREAM_PACKETS, 'packet_data', i)
+        b.flush()
+        frame = socketio.emitted[0]['data']
+        assert [e['data'] for e in frame['events']] == [2, 3, 4]
+        assert frame['dropped'] == 2
+        assert b.get_stats()['events_dropped'] == 2
+
+    def test_next_frame_waits_for_ack(self, broadcaster):
+        b, socketio = broadcaster
+        b.subscribe('a', STREAM_PACKETS)
+        b.publish(STREAM_PACKETS, 'packet_data', 1)
+        b.flush()
+        b.publish(STREAM_PACKETS, 'packet_data', 2)
+        assert b.flush() is True  # Backlog held until the client acknowledges
+        assert len(socketio.emitted) == 1
+
+        socketio.emitted[0]['callback']()
+        assert b.flush() is False
+        assert len(socketio.emitted) == 2
+
+    def test_unacknowledged_frame_times_out(self, broadcaster):
+        b, socketio = broadcaster
+        b.ack_timeout = 0
+        b.subscribe('a', STREAM_PACKETS)
+        b.publish(STREAM_PACKETS, 'packet_data', 1)
+        b.flush()
+        b.publish(STREAM_PACKETS, 'packet_data', 2)
+        b.flush()
+        assert len(socketio.emitted) == 2
+
+    def test_flusher_thread_delivers(self, broadcaster):
+        b, socketio = broadcaster
+        b.subscribe('b', STREAM_MESH)
+        b.start()
+        try:
+            b.publish(STREAM_MESH, 'mesh_edge_updated', {'seq': 1})
+            for _ in range(50):
+                if socketio.emitted:
+                    break
+                time.sleep(0.01)
+        finally:
+            b.stop()
+        assert socketio.emitted[0]['to'] == 'b'
+
+    def test_removed_client_gets_nothing(self, broadcaster):
+        b, socketio = broadcaster
+        b.subscribe('a', STREAM_PACKETS)
+        b.remove_client('a')
+        assert b.publish(STREAM_PACKETS, 'packet_data', 1) == 0
+        b.flush()
+        assert socketio.emitted == []
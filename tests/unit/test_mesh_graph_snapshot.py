@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Unit tests for mesh graph snapshots and deltas shared with the web viewer
+"""
+
+import os
+import sqlite3
+
+import pytest
+from datetime import datetime, timedelta
+
+from modules.mesh_graph import MeshGraph
+from modules.mesh_graph_snapshot import (
+    MeshGraphSnapshotPublisher, MeshGraphSnapshotReader, SnapshotError,
+    decode_snapshot, encode_snapshot, read_snapshot, snapshot_path_from_config,
+)
+from modules.web_viewer.app import BotDataViewer
+
+
+def _delta(mesh_graph, from_prefix, to_prefix):
+    """Add an edge and return the delta MeshGraph would push to the web viewer."""
+    mesh_graph.add_edge(from_prefix, to_prefix)
+    edge = mesh_graph.get_edge(from_prefix, to_prefix)
+    return {
+        'from_prefix': edge['from_prefix'],
+        'to_prefix': edge['to_prefix'],
+        'observation_count': edge['observation_count'],
+        'first_seen': edge['first_seen'].isoformat(),
+        'last_seen': edge['last_seen'].isoformat(),
+        'generation': mesh_graph.graph_generation,
+        'seq': mesh_graph.graph_seq,
+    }
+
+
+def _copy_database(source, target):
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+
+
+@pytest.mark.unit
+class TestSnapshotFormat:
+    """Binary encode/decode."""
+
+    def test_round_trip(self):
+        first_seen = datetime(2025, 1, 2, 3, 4, 5, 678901)
+        edges = [
+            {'from_prefix': '01', 'to_prefix': '7e', 'from_public_key': '01' * 32, 'to_public_key': None,
+             'observation_count': 12, 'first_seen': first_seen, 'last_seen': '2025-01-03T00:00:00',
+             'avg_hop_position': 1.5, 'geographic_distance': None},
+        ]
+        snapshot = decode_snapshot(encode_snapshot(edges, generation=42, seq=7))
+
+        assert (snapshot.generation, snapshot.seq) == (42, 7)
+        edge = snapshot.edges[('01', '7e')]
+        assert edge['from_public_key'] == '01' * 32
+        assert edge['to_public_key'] is None
+        # Keys are stored as 32 raw bytes; partial or non-hex keys are dropped
+        odd = decode_snapshot(encode_snapshot([dict(edges[0], from_public_key='AB' * 32, to_public_key='xyz')],
+                                              generation=42, seq=8)).edges[('01', '7e')]
+        assert (odd['from_public_key'], odd['to_public_key']) == ('ab' * 32, None)
+        assert edge['observation_count'] == 12
+        assert edge['first_seen'] == first_seen
+        assert edge['last_seen'] == datetime(2025, 1, 3)
+        assert edge['avg_hop_position'] == 1.5
+        assert edge['geographic_distance'] is None
+        assert snapshot.watermark == datetime(2025, 1, 3)
+
+    def test_corrupt_data_rejected(self):
+        data = bytearray(encode_snapshot([], generation=1, seq=0))
+        data[5] ^= 0xFF
+        with pytest.raises(SnapshotError):
+            decode_snapshot(bytes(data))
+        with pytest.raises(SnapshotError):
+            decode_snapshot(b'MGSN')
+
+    def test_default_path_follows_db_path(self, test_config, tmp_path):
+        test_config.set('Bot', 'db_path', 'data/bot.db')
+        assert snapshot_path_from_config(test_config, tmp_path) == str(tmp_path / 'data' / 'bot.db.meshgraph')
+
+    def test_records_are_fixed_width(self, tmp_path):
+        edge = {'from_prefix': '01', 'to_prefix': '7e', 'observation_count': 1}
+        one = encode_snapshot([edge], generation=1, seq=1)
+        two = encode_snapshot([edge, dict(edge, to_prefix='86', from_public_key='ab' * 32)], generation=1, seq=2)
+        assert len(two) - len(one) == len(one) - len(encode_snapshot([], generation=1, seq=0)) == 105
+
+        path = tmp_path / 'graph.bin'
+        path.write_bytes(two)
+        assert set(read_snapshot(str(path)).edges) == {('01', '7e'), ('01', '86')}
+        path.write_bytes(two[:-1])
+        with pytest.raises(SnapshotError):
+            read_snapshot(str(path))
+        path.write_bytes(b'')
+        with pytest.raises(SnapshotError):
+            read_snapshot(str(path))
+
+
+@pytest.mark.unit
+class TestPublisherAndReader:
+    """Bot publishes snapshots; the viewer applies deltas on top."""
+
+    def test_publish_only_when_changed(self, mesh_graph, tmp_path):
+        publisher = MeshGraphSnapshotPublisher(mesh_graph, str(tmp_path / 'graph.bin'))
+        mesh_graph.add_edge('01', '7e')
+        assert publisher.publish() is True
+        assert publisher.publish() is False
+        mesh_graph.add_edge('7e', '86')
+        assert publisher.publish() is True
+
+        with open(publisher.path, 'rb') as f:
+            snapshot = decode_snapshot(f.read())
+        assert snapshot.generation == mesh_graph.graph_generation
+        assert snapshot.seq == mesh_graph.graph_seq
+        assert set(snapshot.edges) == {('01', '7e'), ('7e', '86')}
+
+    def test_only_periodic_writes_are_synced(self, mesh_graph, tmp_path, monkeypatch):
+        synced = []
+        real_fsync = os.fsync
+        monkeypatch.setattr(os, 'fsync', lambda fd: synced.append(fd) or real_fsync(fd))
+        publisher = MeshGraphSnapshotPublisher(mesh_graph, str(tmp_path / 'graph.bin'))
+        mesh_graph.add_edge('01', '7e')
+        assert publisher.publish() is True  # After a batch flush
+        assert synced == []
+        inode = os.stat(publisher.path).st_ino
+
+        # Unchanged graph: the periodic write syncs the existing file once, then does nothing
+        assert publisher.publish(fsync=True) is False
+        assert publisher.publish(fsync=True) is False
+        assert len(synced) == 1
+        assert os.stat(publisher.path).st_ino == inode
+
+        mesh_graph.add_edge('7e', '86')
+        assert publisher.publish(fsync=True) is True
+        assert len(synced) == 2
+
+    def test_reader_applies_deltas_after_snapshot(self, mesh_graph, tmp_path):
+        publisher = MeshGraphSnapshotPublisher(mesh_graph, str(tmp_path / 'graph.bin'))
+        mesh_graph.add_edge('01', '7e')
+        publisher.publish()
+        reader = MeshGraphSnapshotReader(publisher.path)
+        assert reader.refresh() is True
+
+        delta = _delta(mesh_graph, '01', '7e')
+        assert reader.apply_delta(delta) is True
+        assert reader.apply_delta(delta) is False  # Duplicate
+        assert reader.edges[('01', '7e')]['observation_count'] == 2
+        assert reader.version() == {'generation': mesh_graph.graph_generation, 'seq': 2, 'stale': False}
+
+    def test_gap_is_repaired_by_next_snapshot(self, mesh_graph, tmp_path):
+        publisher = MeshGraphSnapshotPublisher(mesh_graph, str(tmp_path / 'graph.bin'))
+        mesh_graph.add_edge('01', '7e')
+        publisher.publish()
+        reader = MeshGraphSnapshotReader(publisher.path)
+        reader.refresh()
+
+        mesh_graph.add_edge('7e', '86')  # Delta lost
+        late = _delta(mesh_graph, '86', 'a1')
+        reader.apply_delta(late)
+        assert reader.stale
+        assert ('7e', '86') not in reader.edges
+
+        publisher.publish()
+        assert reader.refresh() is True
+        assert not reader.stale
+        assert set(reader.edges) == {('01', '7e'), ('7e', '86'), ('86', 'a1')}
+
+    def test_missing_snapshot_is_not_loaded(self, tmp_path):
+        reader = MeshGraphSnapshotReader(str(tmp_path / 'missing.bin'))
+        assert reader.get_edges() == []
+        assert not reader.loaded
+
+
+@pytest.mark.unit
+class TestWarmStart:
+    """MeshGraph startup from the snapshot plus newer database rows."""
+
+    def test_snapshot_path_follows_database(self, mesh_graph, test_db):
+        assert mesh_graph.snapshot_path == f"{test_db.db_path}.meshgraph"
+
+    def test_loads_snapshot_and_replays_newer_rows(self, mock_bot, mesh_graph, test_db):
+        mesh_graph.add_edge('01', '7e')
+        mesh_graph.add_edge('7e', '86')
+        MeshGraphSnapshotPublisher(mesh_graph, mesh_graph.snapshot_path).publish()
+
+        # Changed after the snapshot was written
+        later = (datetime.now() + timedelta(minutes=5)).isoformat()
+        test_db.execute_update(
+            'UPDATE mesh_connections SET observation_count = 9, last_seen = ? WHERE from_prefix = ?', (later, '7e'))
+        # Older than the snapshot's high-water mark, so taken from the snapshot
+        test_db.execute_update(
+            'UPDATE mesh_connections SET observation_count = 4 WHERE from_prefix = ?', ('01',))
+
+        graph = MeshGraph(mock_bot)
+        assert graph.get_edge('01', '7e')['observation_count'] == 1
+        assert graph.get_edge('7e', '86')['observation_count'] == 9
+
+    def test_snapshot_records_database_and_load_window(self, mesh_graph, test_db):
+        mesh_graph.add_edge('01', '7e')
+        MeshGraphSnapshotPublisher(mesh_graph, mesh_graph.snapshot_path).publish()
+        snapshot = read_snapshot(mesh_graph.snapshot_path)
+        assert (snapshot.db_id, snapshot.db_max_rowid) == mesh_graph.database_identity()
+        assert snapshot.db_max_rowid >= 1
+        assert snapshot.load_days == mesh_graph.startup_load_days == 0
+
+    def test_rows_missing_from_snapshot_are_not_lost(self, mock_bot, mesh_graph, test_db, tmp_path):
+        old = (datetime.now() - timedelta(days=30)).isoformat()
+        test_db.execute_update(
+            'INSERT INTO mesh_connections (from_prefix, to_prefix, observation_count, first_seen, last_seen) '
+            'VALUES (?, ?, 3, ?, ?)', ('a1', 'b2', old, old))
+        backup = str(tmp_path / 'backup.db')
+        _copy_database(test_db.db_path, backup)
+        test_db.execute_update('DELETE FROM mesh_connections')
+
+        mesh_graph.add_edge('01', '7e')
+        mesh_graph.add_edge('7e', '86')
+        MeshGraphSnapshotPublisher(mesh_graph, mesh_graph.snapshot_path).publish()
+        snapshot_bytes = open(mesh_graph.snapshot_path, 'rb').read()
+
+        # Restored from the older backup: its row is older than the snapshot's high-water mark
+        _copy_database(backup, test_db.db_path)
+        assert MeshGraph(mock_bot).has_edge('a1', 'b2')
+
+        # Snapshot taken from a different database file that has since grown
+        with open(mesh_graph.snapshot_path, 'wb') as f:
+            f.write(snapshot_bytes)
+        mock_bot.config.read_dict({'Web_Viewer': {'mesh_snapshot_path': mesh_graph.snapshot_path}})
+        with sqlite3.connect(backup) as conn:
+            conn.executemany(
+                'INSERT INTO mesh_connections (from_prefix, to_prefix, observation_count, first_seen, last_seen) '
+                'VALUES (?, ?, 1, ?, ?)', [(f'c{i}', 'd4', old, old) for i in range(5)])
+        mock_bot.db_manager.db_path = backup
+        graph = MeshGraph(mock_bot)
+        assert graph.snapshot_path == mesh_graph.snapshot_path
+        assert graph.has_edge('a1', 'b2') and not graph.has_edge('01', '7e')
+
+    def test_wider_load_window_loads_from_database(self, mock_bot, test_db):
+        old = (datetime.now() - timedelta(days=30)).isoformat()
+        test_db.execute_update(
+            'INSERT INTO mesh_connections (from_prefix, to_prefix, observation_count, first_seen, last_seen) '
+            'VALUES (?, ?, 1, ?, ?)', ('a1', 'b2', old, old))
+        mock_bot.config.set('Path_Command', 'graph_startup_load_days', '7')
+        graph = MeshGraph(mock_bot)
+        graph.add_edge('01', '7e')
+        MeshGraphSnapshotPublisher(graph, graph.snapshot_path).publish()
+        assert not graph.has_edge('a1', 'b2')
+
+        assert MeshGraph(mock_bot).get_edge('01', '7e') is not None
+        mock_bot.config.set('Path_Command', 'graph_startup_load_days', '0')
+        assert MeshGraph(mock_bot).has_edge('a1', 'b2')
+
+    def test_corrupt_snapshot_falls_back_to_database(self, mock_bot, mesh_graph, test_db):
+        mesh_graph.add_edge('01', '7e')
+        with open(mesh_graph.snapshot_path, 'wb') as f:
+            f.write(b'MGSN garbage')
+
+        graph = MeshGraph(mock_bot)
+        assert graph.has_edge('01', '7e')
+
+    def test_batch_flush_refreshes_snapshot(self, mock_bot, test_db):
+        mock_bot.config.set('Path_Command', 'graph_write_strategy', 'batched')
+        mock_bot.config.read_dict({'Web_Viewer': {'mesh_snapshot_enabled': 'false'}})
+        graph = MeshGraph(mock_bot)
+        graph._shutdown_event.set()
+        graph.start_snapshot_publisher()
+        assert graph.snapshot_publisher._thread is None
+
+        graph.add_edge('01', '7e')
+        graph._flush_pending_updates_sync()
+        assert set(read_snapshot(graph.snapshot_path).edges) == {('01', '7e')}
+
+
+@pytest.mark.unit
+class TestViewerSnapshotQueries:
+    """/api/mesh/edges filtering and /api/mesh/stats from snapshot edges."""
+
+    def _edges(self):
+        now = datetime.now()
+        return [
+            {'from_prefix': '01', 'to_prefix': '7e', 'from_public_key': 'aa', 'to_public_key': 'bb',
+             'observation_count': 10, 'first_seen': now - timedelta(days=9), 'last_seen': now - timedelta(hours=1),
+             'avg_hop_position': 0.0, 'geographic_distance': 4.0},
+            {'from_prefix': '7e', 'to_prefix': '86', 'from_public_key': 'bb', 'to_public_key': None,
+             'observation_count': 2, 'first_seen': now - timedelta(days=9), 'last_seen': now - timedelta(days=5),
+             'avg_hop_position': 1.0, 'geographic_distance': None},
+        ]
+
+    def test_filter_edges(self):
+        edges = self._edges()
+        result = BotDataViewer._filter_mesh_edges(BotDataViewer, edges)
+        assert [e['to_prefix'] for e in result] == ['7e', '86']
+        assert isinstance(result[0]['last_seen'], str)
+        assert len(BotDataViewer._filter_mesh_edges(BotDataViewer, edges, min_observations=5)) == 1
+        assert len(BotDataViewer._filter_mesh_edges(BotDataViewer, edges, days=2)) == 1
+        assert len(BotDataViewer._filter_mesh_edges(BotDataViewer, edges, max_distance=10)) == 1
+
+    def test_edge_stats(self):
+        stats = BotDataViewer._compute_mesh_edge_stats(self._edges())
+        assert stats['total_edges'] == 2
+        assert stats['total_observations'] == 12
+        assert stats['avg_observations'] == 6.0
+        assert stats['avg_distance'] == 4.0
+        assert stats['edges_with_both_keys'] == 1
+        assert stats['top_connected'][0] == {'prefix': '7e', 'count': 2}
+        assert stats['recent_edges_24h'] == 1